@@ -1,106 +1,109 @@
-import os, sys, time
-
-#########################################################################################
-#########################################################################################
-
-#if len(sys.argv) != 3:
-#	print '''Usage: {0}
-#	<input>
-#	<output>\n\n\n'''.format(sys.argv[0])
-#	sys.exit()
-
-finput, foutput = sys.argv[1:]
-
-# Section 1: Reading into memory, and possibly time-inefficient
-#OUT = open(foutput,'w')
-#with open(finput) as IN:
-#	lines = []
-#	t1 = time.time()
-#	for line in IN:
-#		if "<variable name=" in line:
-#			lst = line.strip().split()
-#			lines.append(lst)
-#sortedList = sorted(lines)
-#old = ''
-#for each in sortedList:
-	# Assign the values after '=' in variable name= to the variable variableContents
-	# This involves replacing '"', and ')', and adding a ',' instead of '(', and then splitting at ','
-#	variableContents = each[1].replace('(',',').replace(")",'').replace('name=','').replace('"','').split(',')
-	# The contents of variableContents are then joined and saved as the variable 'variable'. This involves starting of with the 0th element and joining elements 1 to -1 (2nd last) between parentheses.
-#	variable = variableContents[0]+'('+','.join(variableContents[1:-1])+')'
-	# 'old' carries the name of the variable from the previous line. This enables printing each row in the input file into a column in the output file.
-#	if variable == old:
-#		OUT.write('\t{0}'.format(float(each[-2].replace('"','').split('=')[1])))
-#	else:
-#		OUT.write('\n{0}\t{1}'.format(variable, float(each[-2].replace('"','').split('=')[1])))
-#		print each
-#		old = variable
-#t2 = time.time()
-#print 'This process took ', (t2-t1)/60.0 , 'mins'
-
-# Section 2: Attempt to make it time-efficient
-def delete_key(d, k):
-	r = dict(d)
-	del r[k]
-	return r
-
-OUT = open(foutput,'w')
-with open(finput) as IN:
-	recordedVariables = []
-	lines = []
-	old = ''
-	remember = {}
-	for line in IN:
-		if "<variable name=" in line:
-			# Split at spaces
-			lst = line.strip().split()
-			# Assign the values after '=' in variable name= to the variable variableContents
-			# This involves replacing '"', and ')', and adding a ',' instead of '(', and then splitting at ','
-			variableContents = lst[1].replace('(',',').replace(")",'').replace('name=','').replace('"','').split(',')
-			# The contents of variableContents are then joined and saved as the variable 'variable'. This involves starting of with the 0th element and joining elements 1 to -1 (2nd last) between parentheses.
-			variable = variableContents[0]+'\t'+'\t'.join(variableContents[1:-1])
-			if variable not in recordedVariables:
-				if variable == old:
-					lines.append(lst)
-				else:
-					if len(lines) == 21:
-						sortedList = sorted(lines)
-						OUT.write('{0}'.format(old))
-						for each in sortedList:
-							OUT.write('\t{0}'.format(float(each[-2].replace('"','').split('=')[1])))
-						OUT.write('\n')
-						#t2 = time.time()
-						#print old, ' took ', (t2-t1)/60.0 , 'mins'
-						lines = []
-						lines.append(lst)
-						recordedVariables.append(old)
-						old = variable
-					elif len(lines) == 0:
-						t1 = time.time()
-						t0 = t1
-						lines.append(lst)
-						old = variable
-						if variable in remember.keys():
-							for each in remember[variable]:
-								lines.append(each)
-							remember = delete_key(remember, variable)
-					else:
-						if variable not in remember.keys():
-							remember[variable] = []
-							remember[variable].append(lst)
-						else:
-							remember[variable].append(lst)
-
-#print (len(remember.keys()))
-
-for variable in remember.keys():
-	values = remember[variable]
-	sortedList = sorted(values)
-	OUT.write('{0}'.format(variable))
-	for each in sortedList:
-		OUT.write('\t{0}'.format(float(each[-2].replace('"','').split('=')[1])))
-	OUT.write('\n')
-	#t2 = time.time()
-	#print old, ' took ', (t2-t1)/60.0 , 'mins'
-t3 = time.time()
-print ("Process took ", (t3-t0)/60.0, ' mins')
+"""Transform a CPLEX solution file into the sorted tab separated layout otoole
+reads, with one line per variable and one value per model year::
+
+    RateOfActivity	GLOBAL	S1D1	PWRCOAIND01	1	0.0	0.5	...
+
+The years of the model are read from the ``YEAR`` set of the data file, so
+any model horizon is supported. The solution is read in a single pass. A
+variable is written as soon as values for all years have been read, and the
+written lines are sorted with an external merge sort, so solutions larger
+than the available memory can be transformed and no separate ``sort`` step
+is needed.
+"""
+
+import heapq
+import re
+import sys
+import tempfile
+
+VARIABLE = re.compile(r'<variable\s[^>]*?name="([^"]*)"[^>]*?value="([^"]*)"')
+
+# Number of lines sorted in memory before they are written to a temporary file
+MAX_LINES_IN_MEMORY = 1_000_000
+
+
+def read_years(data_file):
+    """Returns the members of the YEAR set of a GMPL data file"""
+    years = []
+    parsing = False
+    with open(data_file, 'r') as f:
+        for line in f:
+            if parsing:
+                if line.startswith(';'):
+                    break
+                if line.strip():
+                    years.append(line.strip())
+            elif line.startswith('set YEAR'):
+                members = line.split(':=')[1].split()
+                if members:
+                    return [x for x in members if x != ';']
+                parsing = True
+    return years
+
+
+def format_line(variable, values):
+    return variable + ''.join(f'\t{value}' for value in values) + '\n'
+
+
+def write_run(lines):
+    """Sorts lines and writes them to a temporary file"""
+    lines.sort()
+    run = tempfile.TemporaryFile('w+')
+    run.writelines(lines)
+    run.seek(0)
+    return run
+
+
+def main(finput, foutput, data_file):
+
+    years = read_years(data_file)
+    year_set = set(years)
+    n_years = len(years)
+
+    # Values of variables that are not complete yet, as
+    # {variable: {year: value}}. Solution files list the values of a variable
+    # next to each other, so this stays small.
+    pending = {}
+    lines = []
+    runs = []
+
+    with open(finput, 'r') as f:
+        for line in f:
+            match = VARIABLE.search(line)
+            if not match:
+                continue
+            name, value = match.groups()
+            indices = name.replace(')', '').split('(')
+            contents = [indices[0]] + (indices[1].split(',') if len(indices) > 1 else [''])
+            variable = contents[0] + '\t' + '\t'.join(contents[1:-1])
+            values = pending.setdefault(variable, {})
+            values[contents[-1]] = float(value)
+
+            if contents[-1] in year_set and len(values) == n_years:
+                del pending[variable]
+                lines.append(format_line(
+                    variable, [values.get(year, 0.0) for year in years]))
+                if len(lines) >= MAX_LINES_IN_MEMORY:
+                    runs.append(write_run(lines))
+                    lines = []
+
+    # Variables not indexed over years, or with values for only some years
+    for variable, values in pending.items():
+        lines.append(format_line(
+            variable, [values[key] for key in sorted(values)]))
+    runs.append(write_run(lines))
+
+    with open(foutput, 'w') as out:
+        out.writelines(heapq.merge(*runs))
+    for run in runs:
+        run.close()
+
+
+if __name__ == '__main__':
+
+    if len(sys.argv) != 4:
+        msg = "Usage: python {} <solution> <output> <data_file>"
+        print(msg.format(sys.argv[0]))
+        sys.exit(1)
+    else:
+        main(sys.argv[1], sys.argv[2], sys.argv[3])
@@ -28,285 +28,196 @@ need to be introduced to its associated OSeMOSYS model file::
     set MODExTECHNOLOGYperSTORAGEto{STORAGE} within MODE_OF_OPERATION cross TECHNOLOGY;
     set MODExTECHNOLOGYperSTORAGEfrom{STORAGE} within MODE_OF_OPERATION cross TECHNOLOGY;
 
+The data file is read in a single pass. Lines are copied to the output file as
+they are read, so memory use depends on the number of set entries rather than
+on the size of the data file. The sets rely on the ``set`` statements coming
+before the ``param`` statements, as they do in files written by otoole.
+
 """
 
-import pandas as pd
-import os, sys
+import sys
 from collections import defaultdict
 
+# Lines of the data file that are replaced by the pre-processed sets
+REPLACED_LINES = ('set MODEper', 'set MODEx', 'end;')
+
+PARAMS_TO_CHECK = ['OutputActivityRatio', 'InputActivityRatio',
+                   'TechnologyToStorage', 'TechnologyFromStorage',
+                   'EmissionActivityRatio']
+
+# Set statements read from the data file. COMMODITY is used in place of FUEL
+# in some models.
+SET_NAMES = {'YEAR': 'YEAR',
+             'COMMODITY': 'FUEL',
+             'FUEL': 'FUEL',
+             'TECHNOLOGY': 'TECHNOLOGY',
+             'STORAGE': 'STORAGE',
+             'MODE_OF_OPERATION': 'MODE_OF_OPERATION',
+             'EMISSION': 'EMISSION'}
+
+STORAGE_LIST_LEN = {'otoole': 0,
+                    'momani': 1}
+
+
+class ModeSets:
+    """Set entries of the pre-processed sets, built up line by line"""
+
+    def __init__(self):
+        self.sets = {name: [] for name in set(SET_NAMES.values())}
+        self.fuel_out = defaultdict(set)
+        self.fuel_in = defaultdict(set)
+        self.storage_to = defaultdict(set)
+        self.storage_from = defaultdict(set)
+        self.emission = defaultdict(set)
+        self.modes = defaultdict(set)
+
+    def add_otoole_line(self, param, details):
+        """Adds a data row of an otoole formatted parameter"""
+        tech = details[1]
+        mode = details[3]
+        if param == 'OutputActivityRatio':
+            if float(details[5]) != 0.0:
+                self.fuel_out[details[2]].add((mode, tech))
+                self.modes[tech].add(mode)
+        elif param == 'InputActivityRatio':
+            if float(details[5]) != 0.0:
+                self.fuel_in[details[2]].add((mode, tech))
+                self.modes[tech].add(mode)
+        elif param == 'TechnologyToStorage':
+            if float(details[4]) > 0.0:
+                self.storage_to[details[2]].add((mode, tech))
+        elif param == 'TechnologyFromStorage':
+            if float(details[4]) > 0.0:
+                self.storage_from[details[2]].add((mode, tech))
+        elif param == 'EmissionActivityRatio':
+            if float(details[5]) != 0.0:
+                self.emission[details[2]].add((mode, tech))
+                self.modes[tech].add(mode)
+
+    def add_momani_line(self, param, index, line):
+        """Adds a data row of a momani formatted parameter, where index holds
+        the technology and commodity of the current [*,TECH,FUEL,*] slice"""
+        tech, fuel = index
+        details = line.rstrip().split(' ')
+        mode = details[0]
+        if param == 'OutputActivityRatio':
+            self.fuel_out[fuel].add((mode, tech))
+        elif param == 'InputActivityRatio':
+            self.fuel_in[fuel].add((mode, tech))
+        elif param == 'EmissionActivityRatio':
+            self.emission[fuel].add((mode, tech))
+        elif param in ('TechnologyToStorage', 'TechnologyFromStorage'):
+            mode_list = self.sets['MODE_OF_OPERATION']
+            if not line.startswith(mode_list[0]):
+                storage_sets = (self.storage_to if param == 'TechnologyToStorage'
+                                else self.storage_from)
+                for storage_mode, value in zip(mode_list, details[1:]):
+                    if value != '0':
+                        storage_sets[mode].add((storage_mode, tech))
+            return
+        self.modes[tech].add(mode)
+
+
+def format_member(member):
+    if isinstance(member, tuple):
+        return '({}, {})'.format(*member)
+    return member
+
+
+def format_set_line(set_name, key, members):
+    """Formats one entry of an indexed set, with members in sorted order, e.g.
+    ``set MODExTECHNOLOGYperFUELout[ELC]:= (1, PWRCOA) (1, PWRNGS);``"""
+    line = f'set {set_name}[{key}]:='
+    if members:
+        line += ' ' + ' '.join(format_member(m) for m in sorted(members))
+    return line + ';\n'
+
+
+def write_sets(file_out, set_name, members_by_key, keys):
+    for key in keys:
+        file_out.write(format_set_line(set_name, key, members_by_key.get(key, ())))
+
+
+def read_set_line(line):
+    """Returns the name and inline members of a set statement, or None if the
+    line does not start a set that is read"""
+    details = line.split()
+    if len(details) < 2 or details[0] != 'set' or details[1] not in SET_NAMES:
+        return None
+    name = SET_NAMES[details[1]]
+    return name, [x for x in details[3:] if x != ';']
+
 
 def main(data_format, data_infile, data_outfile):
 
-    lines = []
-
-    with open(data_infile, 'r') as f1:
-        for line in f1:
-            if not line.startswith(('set MODEper','set MODEx', 'end;')):
-                lines.append(line)
-
-    with open(data_outfile, 'w') as f2:
-        f2.writelines(lines)
-
-    parsing = False
-    parsing_year = False
-    parsing_tech = False
-    parsing_fuel = False
-    parsing_mode = False
-    parsing_storage = False
-    parsing_emission = False
-
-    year_list = []
-    fuel_list = []
-    tech_list = []
-    storage_list = []
-    mode_list = []
-    emission_list = []
-
-    data_all = []
-    data_out = []
-    data_inp = []
-    output_table = []
-    storage_to = []
-    storage_from = []
-    emission_table = []
-
-    params_to_check = ['OutputActivityRatio', 'InputActivityRatio', 'TechnologyToStorage', 'TechnologyFromStorage', 'EmissionActivityRatio']
-
-    with open(data_infile, 'r') as f:
+    mode_sets = ModeSets()
+    set_current = None
+    param_current = None
+    momani_index = None
+    start_year = None
+
+    with open(data_infile, 'r') as f, open(data_outfile, 'w') as file_out:
         for line in f:
-            if parsing_year:
-                year_list += [line.strip()] if line.strip() not in ['', ';'] else []
-            if parsing_fuel:
-                fuel_list += [line.strip()] if line.strip() not in ['', ';'] else []
-            if parsing_tech:
-                tech_list += [line.strip()] if line.strip() not in ['', ';'] else []
-            if parsing_storage:
-                storage_list += [line.strip()] if line.strip() not in ['', ';'] else []
-            if parsing_mode:
-                mode_list += [line.strip()] if line.strip() not in ['', ';'] else []
-            if parsing_emission:
-                emission_list += [line.strip()] if line.strip() not in ['', ';'] else []
-
-            if line.startswith('set YEAR'):
-                if len(line.split('=')[1]) > 1:
-                    year_list = line.split(' ')[3:-1]
-                else:
-                    parsing_year = True
-            if line.startswith('set COMMODITY'):  # Extracts list of COMMODITIES from data file. Some models use FUEL instead.
-                if len(line.split('=')[1]) > 1:
-                    fuel_list = line.split(' ')[3:-1]
-                else:
-                    parsing_fuel = True
-            if line.startswith('set FUEL'):  # Extracts list of FUELS from data file. Some models use COMMODITIES instead.
-                if len(line.split('=')[1]) > 1:
-                    fuel_list = line.split(' ')[3:-1]
-                else:
-                    parsing_fuel = True
-            if line.startswith('set TECHNOLOGY'):
-                if len(line.split('=')[1]) > 1:
-                    tech_list = line.split(' ')[3:-1]
-                else:
-                    parsing_tech = True
-            if line.startswith('set STORAGE'):
-                if len(line.split('=')[1]) > 1:
-                    storage_list = line.split(' ')[3:-1]
-                else:
-                    parsing_storage = True
-            if line.startswith('set MODE_OF_OPERATION'):
-                if len(line.split('=')[1]) > 1:
-                    mode_list = line.split(' ')[3:-1]
-                else:
-                    parsing_mode = True
-            if line.startswith('set EMISSION'):
-                if len(line.split('=')[1]) > 1:
-                    emission_list = line.split(' ')[3:-1]
-                else:
-                    parsing_emission = True
-
-            if line.startswith(";"):
-                parsing_year = False
-                parsing_tech = False
-                parsing_fuel = False
-                parsing_mode = False
-                parsing_storage = False
-                parsing_emission = False
-
-    start_year = year_list[0]
-
-    if data_format == 'momani':
-        with open(data_infile, 'r') as f:
-            for line in f:
-                if line.startswith(";"):
-                    parsing = False
-                if parsing:
-                    if line.startswith('['):
-                        fuel = line.split(',')[2]
-                        tech = line.split(',')[1]
-                        emission = line.split(',')[2]
-                    elif line.startswith(start_year):
-                        years = line.rstrip(':= ;\n').split(' ')[0:]
-                        years = [i.strip(':=') for i in years]
-                    else:
-                        values = line.rstrip().split(' ')[1:]
-                        mode = line.split(' ')[0]
-
-                        if param_current == 'OutputActivityRatio':
-                            data_out.append(tuple([fuel, tech, mode]))
-                            for i in range(0, len(years)):
-                                output_table.append(tuple([tech, fuel, mode, years[i], values[i]]))
-
-                        if param_current == 'InputActivityRatio':
-                            data_inp.append(tuple([fuel, tech, mode]))
-
-                        data_all.append(tuple([tech, mode]))
-
-                        if param_current == 'TechnologyToStorage':
-                            if not line.startswith(mode_list[0]):
-                                storage = line.split(' ')[0]
-                                values = line.rstrip().split(' ')[1:]
-                                for i in range(0, len(mode_list)):
-                                    if values[i] != '0':
-                                        storage_to.append(tuple([storage, tech, mode_list[i]]))
-
-                        if param_current == 'TechnologyFromStorage':
-                            if not line.startswith(mode_list[0]):
-                                storage = line.split(' ')[0]
-                                values = line.rstrip().split(' ')[1:]
-                                for i in range(0, len(mode_list)):
-                                    if values[i] != '0':
-                                        storage_from.append(tuple([storage, tech, mode_list[i]]))
-
-                        if param_current == 'EmissionActivityRatio':
-                            emission_table.append(tuple([emission, tech, mode]))
-
-                if line.startswith(('param OutputActivityRatio', 'param InputActivityRatio', 'param TechnologyToStorage', 'param TechnologyFromStorage', 'param EmissionActivityRatio')):
-                    param_current = line.split(' ')[1]
-                    parsing = True
-
-    if data_format == 'otoole':
-        with open(data_infile, 'r') as f:
-            for line in f:
-                details = line.split(' ')
-                if line.startswith(";"):
-                    parsing = False
-                if parsing:
+            if not line.startswith(REPLACED_LINES):
+                file_out.write(line)
+
+            if line.startswith(';'):
+                set_current = None
+                param_current = None
+                continue
+
+            if set_current:
+                member = line.strip()
+                if member:
+                    mode_sets.sets[set_current].append(member)
+                continue
+
+            if param_current:
+                if data_format == 'otoole':
+                    details = line.split()
                     if len(details) > 1:
-                        if param_current == 'OutputActivityRatio':
-                            tech = details[1].strip()
-                            fuel = details[2].strip()
-                            mode = details[3].strip()
-                            year = details[4].strip()
-                            value = details[5].strip()
-
-                            if float(value) != 0.0:
-                                data_out.append(tuple([fuel, tech, mode]))
-                                output_table.append(tuple([tech, fuel, mode, year, value]))
-                                data_all.append(tuple([tech, mode]))
-
-                        if param_current == 'InputActivityRatio':
-                            tech = details[1].strip()
-                            fuel = details[2].strip()
-                            mode = details[3].strip()
-                            value = details[5].strip()
-                            if float(value) != 0.0:
-                                data_inp.append(tuple([fuel, tech, mode]))
-                                data_all.append(tuple([tech, mode]))
-
-                        if param_current == 'TechnologyToStorage':
-                            tech = details[1].strip()
-                            storage = details[2].strip()
-                            mode = details[3].strip()
-                            value = details[4].strip()
-                            if float(value) > 0.0:
-                                storage_to.append(tuple([storage, tech, mode]))
-                                data_all.append(tuple([storage, mode]))
-
-                        if param_current == 'TechnologyFromStorage':
-                            tech = details[1].strip()
-                            storage = details[2].strip()
-                            mode = details[3].strip()
-                            value = details[4].strip()
-                            if float(value) > 0.0:
-                                storage_from.append(tuple([storage, tech, mode]))
-                                data_all.append(tuple([storage, mode]))
-
-                        if param_current == 'EmissionActivityRatio':
-                            tech = details[1].strip()
-                            emission = details[2].strip()
-                            mode = details[3].strip()
-                            value = details[5].strip()
-                            if float(value) != 0.0:
-                                emission_table.append(tuple([emission, tech, mode]))
-                                data_all.append(tuple([tech, mode]))
-
-                if any(param in line for param in params_to_check):
-                    param_current = details[-2]
-                    parsing = True
-
-    data_out = list(set(data_out))
-    data_inp = list(set(data_inp))
-    data_all = list(set(data_all))
-    storage_to = list(set(storage_to))
-    storage_from = list(set(storage_from))
-    emission_table = list(set(emission_table))
-
-    dict_out = defaultdict(list)
-    dict_inp = defaultdict(list)
-    dict_all = defaultdict(list)
-    dict_stt = defaultdict(list)
-    dict_stf = defaultdict(list)
-    dict_emi = defaultdict(list)
-
-    for fuel, tech, mode in data_out:
-        dict_out[fuel].append((mode, tech))
-
-    for fuel, tech, mode in data_inp:
-        dict_inp[fuel].append((mode, tech))
-
-    for tech, mode in data_all:
-        if mode not in dict_all[tech]:
-            dict_all[tech].append(mode)
-
-    for storage, tech, mode in storage_to:
-        dict_stt[storage].append((mode, tech))
-
-    for storage, tech, mode in storage_from:
-        dict_stf[storage].append((mode, tech))
-
-    for emission, tech, mode in emission_table:
-        dict_emi[emission].append((mode, tech))
-
-    def file_output_function(if_dict, str_dict, set_list, set_name, extra_char):
-        for each in set_list:
-            if each in if_dict.keys():
-                line = set_name + str(each) + ']:=' + str(str_dict[each]) + extra_char
-                if set_list == tech_list:
-                    line = line.replace(',','').replace(':=[',':= ').replace(']*','').replace("'","")
+                        mode_sets.add_otoole_line(param_current, details)
+                elif line.startswith('['):
+                    details = line.split(',')
+                    momani_index = (details[1], details[2])
+                elif not (start_year and line.startswith(start_year)):
+                    mode_sets.add_momani_line(param_current, momani_index, line)
+                continue
+
+            set_line = read_set_line(line)
+            if set_line:
+                name, members = set_line
+                if '=' in line and len(line.split('=')[1]) > 1:
+                    mode_sets.sets[name] = members
                 else:
-                    line = line.replace('),',')').replace('[(',' (').replace(')]',')').replace("'","")
-            else:
-                line = set_name + str(each) + ']:='
-
-            file_out.write(line + ';' + '\n')
-
-    storage_list_len = {'otoole': 0,
-                        'momani': 1}
-
-    # Append lines at the end of the data file
-    with open(data_outfile, 'w') as file_out:  # 'a' to open in 'append' mode
-
-        file_out.writelines(lines)
-
-        file_output_function(dict_out, dict_out, fuel_list, 'set MODExTECHNOLOGYperFUELout[', '')
-        file_output_function(dict_inp, dict_inp, fuel_list, 'set MODExTECHNOLOGYperFUELin[', '')
-        file_output_function(dict_all, dict_all, tech_list, 'set MODEperTECHNOLOGY[', '*')
-
-        if len(storage_list) > storage_list_len[data_format]:
-            file_output_function(dict_stt, dict_stt, storage_list, 'set MODExTECHNOLOGYperSTORAGEto[', '')
-            file_output_function(dict_stf, dict_stf, storage_list, 'set MODExTECHNOLOGYperSTORAGEfrom[', '')
+                    mode_sets.sets[name] = []
+                    set_current = name
+                continue
+
+            if line.startswith('param') and any(
+                    param in line for param in PARAMS_TO_CHECK):
+                details = line.split()
+                param_current = details[-2] if data_format == 'otoole' \
+                    else details[1]
+                if start_year is None and mode_sets.sets['YEAR']:
+                    start_year = mode_sets.sets['YEAR'][0]
+
+        # Append the sets at the end of the data file
+        fuel_list = mode_sets.sets['FUEL']
+        storage_list = mode_sets.sets['STORAGE']
+        emission_list = mode_sets.sets['EMISSION']
+
+        write_sets(file_out, 'MODExTECHNOLOGYperFUELout', mode_sets.fuel_out, fuel_list)
+        write_sets(file_out, 'MODExTECHNOLOGYperFUELin', mode_sets.fuel_in, fuel_list)
+        write_sets(file_out, 'MODEperTECHNOLOGY', mode_sets.modes,
+                   mode_sets.sets['TECHNOLOGY'])
+
+        if len(storage_list) > STORAGE_LIST_LEN[data_format]:
+            write_sets(file_out, 'MODExTECHNOLOGYperSTORAGEto', mode_sets.storage_to, storage_list)
+            write_sets(file_out, 'MODExTECHNOLOGYperSTORAGEfrom', mode_sets.storage_from, storage_list)
 
         if len(emission_list) > 0:
-            file_output_function(dict_emi, dict_emi, emission_list, 'set MODExTECHNOLOGYperEMISSION[', '')
+            write_sets(file_out, 'MODExTECHNOLOGYperEMISSION', mode_sets.emission, emission_list)
 
         file_out.write('end;')
 
@@ -321,4 +232,4 @@ if __name__ == '__main__':
         data_format = sys.argv[1]
         data_infile = sys.argv[2]
         data_outfile = sys.argv[3]
-        main(data_format, data_infile, data_outfile)
\ No newline at end of file
+        main(data_format, data_infile, data_outfile)
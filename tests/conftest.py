@@ -1,10 +1,21 @@
 """
-    Dummy conftest.py for osemosys_global.
+    conftest.py for osemosys_global.
+
+    The workflow scripts import their sibling modules by name (e.g.
+    ``from configuration import ConfigFile``), as they are run from their own
+    directory. Both workflow/scripts, for the osemosys_global package, and
+    the scripts directory are put on the path so either form imports here.
 
-    If you don't know what this is for, just leave it empty.
     Read more about conftest.py under:
     - https://docs.pytest.org/en/stable/fixture.html
     - https://docs.pytest.org/en/stable/writing_plugins.html
 """
 
-# import pytest
+import sys
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[1] / "workflow" / "scripts"
+
+for path in [SCRIPTS_DIR, SCRIPTS_DIR / "osemosys_global"]:
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
@@ -64,4 +64,18 @@ class TestAddDefaultTemporalValue:
         )
         assert_frame_equal(actual, expected)
         
-        
\ No newline at end of file
+        
+
+class TestParsePwrCodes:
+
+    def test_parse_pwr_codes(self):
+        df = pd.DataFrame([
+            ["GLOBAL", "PWRCOAINDNE01", 2020, 100],
+            ["GLOBAL", "PWRSPVNPLXX01", 2020, 200],
+        ], columns=["REGION", "TECHNOLOGY", "YEAR", "VALUE"])
+        expected = pd.DataFrame([
+            ["COA", "INDNE", "IND", "NE", 2020, 100],
+            ["SPV", "NPLXX", "NPL", "XX", 2020, 200],
+        ], columns=["CATEGORY", "REGION_CODE", "COUNTRY", "REGION", "YEAR",
+                    "VALUE"])
+        assert_frame_equal(utils.parse_pwr_codes(df), expected)
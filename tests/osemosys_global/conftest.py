@@ -0,0 +1,165 @@
+"""
+    Fixtures of a small scenario, shared by the data file and mode set
+    tests.
+
+    scenario_data holds the set and parameter tables as written by the
+    preprocessing scripts, with CapacityFactor stored without its YEAR
+    column (see data_store.YEAR_BROADCAST). otoole_datafile is the data file
+    otoole writes from the same tables. preprocess_data and cplex_transform
+    are the scripts of the resources directory.
+"""
+
+import importlib.util
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import yaml
+from pytest import fixture, importorskip
+
+import data_store
+
+RESOURCES_DIR = Path(__file__).resolve().parents[2] / "resources"
+
+SET_CONFIG = {
+    "EMISSION": "str",
+    "FUEL": "str",
+    "MODE_OF_OPERATION": "int",
+    "REGION": "str",
+    "STORAGE": "str",
+    "TECHNOLOGY": "str",
+    "TIMESLICE": "str",
+    "YEAR": "int",
+}
+
+PARAM_CONFIG = {
+    "CapacityFactor": (["REGION", "TECHNOLOGY", "TIMESLICE", "YEAR"], 1),
+    "CapitalCost": (["REGION", "TECHNOLOGY", "YEAR"], 0.001),
+    "EmissionActivityRatio": (
+        ["REGION", "TECHNOLOGY", "EMISSION", "MODE_OF_OPERATION", "YEAR"], 0),
+    "InputActivityRatio": (
+        ["REGION", "TECHNOLOGY", "FUEL", "MODE_OF_OPERATION", "YEAR"], 0),
+    "OutputActivityRatio": (
+        ["REGION", "TECHNOLOGY", "FUEL", "MODE_OF_OPERATION", "YEAR"], 0),
+    "TechnologyFromStorage": (
+        ["REGION", "TECHNOLOGY", "STORAGE", "MODE_OF_OPERATION"], 0),
+    "TechnologyToStorage": (
+        ["REGION", "TECHNOLOGY", "STORAGE", "MODE_OF_OPERATION"], 0),
+}
+
+SETS = {
+    "EMISSION": ["CO2IND"],
+    "FUEL": ["COAIND", "ELCINDNE01", "ELCINDNE02"],
+    "MODE_OF_OPERATION": [1, 2],
+    "REGION": ["GLOBAL"],
+    "STORAGE": ["SDSINDNE01"],
+    "TECHNOLOGY": ["PWRCOAINDNE01", "PWRSPVINDNE01", "PWRSDSINDNE01",
+                   "TRNINDNEINDSO"],
+    "TIMESLICE": ["S1D1", "S1D2"],
+    "YEAR": [2025, 2026],
+}
+
+PARAMS = {
+    # Stored without a YEAR column, see data_store.YEAR_BROADCAST
+    "CapacityFactor": [
+        ["GLOBAL", "PWRSPVINDNE01", "S1D1", 0.25],
+        ["GLOBAL", "PWRSPVINDNE01", "S1D2", 1.0],
+        ["GLOBAL", "PWRCOAINDNE01", "S1D1", 0.9],
+    ],
+    "CapitalCost": [
+        ["GLOBAL", "PWRCOAINDNE01", 2025, 98765432.1],
+        ["GLOBAL", "PWRCOAINDNE01", 2026, 0.001],
+        ["GLOBAL", "PWRSPVINDNE01", 2025, 1234.5678901],
+    ],
+    "EmissionActivityRatio": [
+        ["GLOBAL", "PWRCOAINDNE01", "CO2IND", 1, 2025, 0.35],
+        ["GLOBAL", "PWRCOAINDNE01", "CO2IND", 1, 2026, 0.35],
+    ],
+    "InputActivityRatio": [
+        ["GLOBAL", "PWRCOAINDNE01", "COAIND", 1, 2025, 2.5],
+        ["GLOBAL", "PWRCOAINDNE01", "COAIND", 1, 2026, 2.5],
+        ["GLOBAL", "PWRSDSINDNE01", "ELCINDNE01", 2, 2025, 0.0],
+        ["GLOBAL", "TRNINDNEINDSO", "ELCINDNE01", 1, 2025, 1.0],
+    ],
+    "OutputActivityRatio": [
+        ["GLOBAL", "PWRCOAINDNE01", "ELCINDNE01", 1, 2025, 1.0],
+        ["GLOBAL", "PWRSPVINDNE01", "ELCINDNE01", 1, 2026, 1.0],
+        ["GLOBAL", "PWRSDSINDNE01", "ELCINDNE01", 1, 2025, 1.0],
+        ["GLOBAL", "PWRSDSINDNE01", "ELCINDNE02", 2, 2026, 0.0],
+        ["GLOBAL", "TRNINDNEINDSO", "ELCINDNE02", 1, 2025, 0.97],
+    ],
+    "TechnologyFromStorage": [
+        ["GLOBAL", "PWRSDSINDNE01", "SDSINDNE01", 1, 1.0],
+        ["GLOBAL", "PWRSDSINDNE01", "SDSINDNE01", 2, -1.0],
+    ],
+    "TechnologyToStorage": [
+        ["GLOBAL", "PWRSDSINDNE01", "SDSINDNE01", 2, 1.0],
+    ],
+}
+
+
+@fixture
+def otoole_config(tmp_path):
+    config = {name: {"dtype": dtype, "type": "set"}
+              for name, dtype in SET_CONFIG.items()}
+    for name, (indices, default) in PARAM_CONFIG.items():
+        config[name] = {"indices": indices, "type": "param", "dtype": "float",
+                        "default": default}
+    path = tmp_path / "config.yaml"
+    with open(path, "w") as f:
+        yaml.dump(config, f)
+    return config, path
+
+
+@fixture
+def scenario_data(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_store, "_DATA_FORMAT", "csv")
+    monkeypatch.setattr(data_store, "_MEMORY", None)
+    path = tmp_path / "data"
+    path.mkdir()
+    for name, values in SETS.items():
+        pd.DataFrame({"VALUE": values}).to_csv(path / f"{name}.csv",
+                                               index=False)
+    for name, rows in PARAMS.items():
+        indices = [index for index in PARAM_CONFIG[name][0]
+                   if name != "CapacityFactor" or index != "YEAR"]
+        pd.DataFrame(rows, columns=indices + ["VALUE"]).to_csv(
+            path / f"{name}.csv", index=False)
+    return path
+
+
+@fixture
+def otoole_datafile(otoole_config, scenario_data, tmp_path):
+    """Data file written by otoole from the CSV files, as
+    `otoole convert csv datafile` did"""
+    importorskip("otoole")
+    from otoole.read_strategies import ReadCsv
+    from otoole.write_strategies import WriteDatafile
+
+    csv_dir = tmp_path / "otoole_data"
+    config, _ = otoole_config
+    shutil.copytree(scenario_data, csv_dir)
+    data_store.export_csv(csv_dir)
+    inputs, default_values = ReadCsv(user_config=config).read(str(csv_dir))
+    path = tmp_path / "otoole.txt"
+    WriteDatafile(user_config=config).write(inputs, str(path), default_values)
+    return path
+
+
+def load_resource(name):
+    """Imports a script of the resources directory, which is not a package"""
+    spec = importlib.util.spec_from_file_location(
+        name, RESOURCES_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@fixture
+def preprocess_data():
+    return load_resource("preprocess_data")
+
+
+@fixture
+def cplex_transform():
+    return load_resource("cplex_transform")
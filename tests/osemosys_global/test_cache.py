@@ -0,0 +1,158 @@
+"""Module for testing the preprocessing cache"""
+
+from types import SimpleNamespace
+
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from pytest import fixture, importorskip, mark
+
+import cache
+import data_store
+
+SCRIPT = """
+import pandas as pd
+from data_store import read_table, write_table
+
+df = read_table('{data_dir}/TECHNOLOGY.csv')
+df = pd.concat([df, pd.DataFrame({{'VALUE': ['PWRBATINDNE01']}})])
+write_table(df, '{data_dir}/TECHNOLOGY.csv')
+write_table(pd.DataFrame({{'VALUE': ['BATINDNE01']}}),
+            '{data_dir}/STORAGE.csv')
+"""
+
+
+@fixture
+def paths(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_store, "_DATA_FORMAT", "csv")
+    monkeypatch.setattr(data_store, "_MEMORY", None)
+    paths = SimpleNamespace(cache_dir=tmp_path / "cache",
+                            output_data_dir=tmp_path / "data",
+                            py_file_dir=tmp_path)
+    paths.output_data_dir.mkdir()
+    monkeypatch.setattr(cache, "ConfigPaths", lambda: paths)
+    monkeypatch.setitem(cache.STAGES, "storage", {
+        "script": "storage.py", "inputs": [], "upstream": ["TECHNOLOGY.csv"],
+        "config": [], "outputs": ["TECHNOLOGY.csv", "STORAGE.csv"]})
+    (tmp_path / "storage.py").write_text(
+        SCRIPT.format(data_dir=paths.output_data_dir))
+    pd.DataFrame({"VALUE": ["PWRCOAINDNE01"]}).to_csv(
+        paths.output_data_dir / "TECHNOLOGY.csv", index=False)
+    return paths
+
+
+def technologies():
+    return pd.DataFrame({"VALUE": ["PWRCOAINDNE01", "PWRBATINDNE01"]})
+
+
+class TestDigests:
+
+    def test_file_digest_memo(self, tmp_path):
+        path = tmp_path / "table.csv"
+        path.write_text("VALUE\n1\n")
+        index = {}
+        digest = cache.file_digest(path, index)
+        assert index[str(path.resolve())][2] == digest
+        assert cache.file_digest(tmp_path / "missing.csv") == "missing"
+
+    def test_table_digest_in_memory(self, paths):
+        path = paths.output_data_dir / "TECHNOLOGY.csv"
+        data_store.hold_in_memory()
+        data_store.write_table(technologies(), path)
+        digest = cache.table_digest(path)
+        assert digest == cache.table_digest(path)
+        data_store.write_table(technologies().iloc[:1], path)
+        assert digest != cache.table_digest(path)
+
+    @mark.parametrize("data_format", ["csv", "parquet"])
+    def test_same_key_in_memory_and_on_disk(self, paths, monkeypatch,
+                                             data_format):
+        if data_format == "parquet":
+            importorskip("pyarrow")
+        monkeypatch.setattr(data_store, "_DATA_FORMAT", data_format)
+        monkeypatch.setitem(cache.STAGES["storage"], "upstream",
+                            ["YEAR.csv", "TECHNOLOGY.csv",
+                             "CapacityFactor.csv"])
+        tables = {
+            "YEAR": pd.DataFrame({"VALUE": [2025, 2026]}),
+            "TECHNOLOGY": technologies(),
+            # Stored without a YEAR column, see data_store.YEAR_BROADCAST
+            "CapacityFactor": pd.DataFrame({
+                "REGION": "GLOBAL", "TECHNOLOGY": "PWRSPVINDNE01",
+                "TIMESLICE": ["S1D1", "S1D2"], "VALUE": [0.25, 1.0]}),
+        }
+        table_paths = {name: paths.output_data_dir / f"{name}.csv"
+                  for name in tables}
+        data_store.hold_in_memory()
+        for name, df in tables.items():
+            data_store.write_table(df, table_paths[name])
+        digests = {name: cache.table_digest(path)
+                   for name, path in table_paths.items()}
+        key = cache.stage_key("storage")
+
+        data_store.flush()
+        index = {}
+        assert {name: cache.table_digest(path, index)
+                for name, path in table_paths.items()} == digests
+        assert cache.stage_key("storage", index) == key
+        # digests of tables on disk are memoized
+        assert cache.stage_key("storage", index) == key
+        assert len(index) == len(tables) + 1
+
+    def test_stage_key_sources(self, paths):
+        scripts_dir = paths.py_file_dir
+        (scripts_dir / "storage.py").write_text(
+            "import pandas\nimport helper\n")
+        (scripts_dir / "helper.py").write_text(
+            "if __package__:\n    from .constants import X\n"
+            "else:\n    from constants import X\n")
+        (scripts_dir / "constants.py").write_text("X = 1\n")
+        (scripts_dir / "unrelated.py").write_text("Y = 1\n")
+        assert [path.name for path in
+                cache.script_sources(scripts_dir / "storage.py")] == [
+            "constants.py", "helper.py", "storage.py"]
+
+        key = cache.stage_key("storage")
+        (scripts_dir / "unrelated.py").write_text("Y = 2\n")
+        assert cache.stage_key("storage") == key
+        (scripts_dir / "constants.py").write_text("X = 2\n")
+        assert cache.stage_key("storage") != key
+
+
+class TestRunStage:
+
+    def run(self, monkeypatch, in_process):
+        monkeypatch.setattr(cache, "stage_key", lambda stage, index: "key")
+        cache.run_stage("storage", in_process=in_process)
+
+    def test_in_process_run_is_stored(self, paths, monkeypatch):
+        data_store.hold_in_memory()
+        self.run(monkeypatch, in_process=True)
+        assert not (paths.output_data_dir / "STORAGE.csv").exists()
+        entry = paths.cache_dir / "preprocess" / "storage" / "key"
+        assert_frame_equal(pd.read_csv(entry / "TECHNOLOGY.csv"),
+                           technologies())
+
+    def test_restored_into_memory(self, paths, monkeypatch):
+        data_store.hold_in_memory()
+        self.run(monkeypatch, in_process=True)
+        data_store.flush()
+
+        # a changed script is not run again for the same key
+        (paths.py_file_dir / "storage.py").write_text("raise RuntimeError")
+        data_store.hold_in_memory()
+        data_store.write_table(technologies().iloc[:1],
+                               paths.output_data_dir / "TECHNOLOGY.csv")
+        self.run(monkeypatch, in_process=True)
+        assert_frame_equal(
+            data_store.read_table(paths.output_data_dir / "TECHNOLOGY.csv"),
+            technologies())
+
+    def test_restored_on_disk(self, paths, monkeypatch):
+        data_store.hold_in_memory()
+        self.run(monkeypatch, in_process=True)
+        data_store._MEMORY = None
+
+        self.run(monkeypatch, in_process=False)
+        assert_frame_equal(
+            pd.read_csv(paths.output_data_dir / "STORAGE.csv"),
+            pd.DataFrame({"VALUE": ["BATINDNE01"]}))
@@ -0,0 +1,61 @@
+"""Module for testing the code registry"""
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_series_equal
+from pytest import raises
+
+import codes
+
+
+class TestParse:
+
+    def test_technology(self):
+        actual = codes.parse(["PWRCOAINDNE01", "MINCOAIND"], "TECHNOLOGY")
+        assert actual.loc["PWRCOAINDNE01"].dropna().to_dict() == {
+            "TYPE": "PWR", "CATEGORY": "COA", "COUNTRY": "IND",
+            "NODE": "INDNE", "SUFFIX": "01"}
+        assert actual.loc["MINCOAIND", "COUNTRY"] == "IND"
+        assert pd.isna(actual.loc["MINCOAIND", "NODE"])
+
+    def test_transmission(self):
+        actual = codes.parse(["TRNINDNEINDSO"], "TECHNOLOGY").iloc[0]
+        assert actual["TYPE"] == "TRN"
+        assert pd.isna(actual["CATEGORY"])
+        assert actual["COUNTRY"] == "IND"
+        assert actual["FROM_NODE"] == "INDNE"
+        assert actual["TO_NODE"] == "INDSO"
+        assert actual["TO_COUNTRY"] == "IND"
+
+    def test_fuel(self):
+        actual = codes.parse(["ELCINDNE02", "COA"], "FUEL")
+        assert actual.loc["ELCINDNE02", ["TYPE", "COUNTRY", "NODE", "SUFFIX"]
+                          ].to_list() == ["ELC", "IND", "INDNE", "02"]
+        assert actual.loc["COA", "TYPE"] == "COA"
+        assert pd.isna(actual.loc["COA", "COUNTRY"])
+
+    def test_unknown_kind(self):
+        with raises(ValueError):
+            codes.parse(["CO2IND"], "REGION")
+
+
+class TestCodeIndex:
+
+    def test_lookup_keeps_order(self):
+        actual = codes.lookup(["SDSINDNE01", "SDSBTNXX01"], "STORAGE")
+        assert actual.index.to_list() == ["SDSINDNE01", "SDSBTNXX01"]
+        assert actual["COUNTRY"].to_list() == ["IND", "BTN"]
+
+    def test_field_matches_slices(self):
+        techs = pd.Series(["PWRSPVINDNE01", "PWRCOABTNXX01", "PWRSPVINDNE01",
+                           np.nan], index=[10, 11, 12, 13])
+        index = codes.CodeIndex(techs, "TECHNOLOGY")
+        expected = pd.Series(["SPV", "COA", "SPV", np.nan],
+                             index=techs.index, dtype=object)
+        assert_series_equal(index.field("CATEGORY"), expected)
+
+    def test_mask(self):
+        techs = pd.Series(["PWRSPVINDNE01", "PWRCOABTNXX01", np.nan])
+        index = codes.CodeIndex(techs, "TECHNOLOGY")
+        actual = index.mask(index.table["CATEGORY"] == "SPV")
+        assert actual.to_list() == [True, False, False]
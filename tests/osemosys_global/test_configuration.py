@@ -0,0 +1,139 @@
+"""Module for testing configuration"""
+
+from pytest import mark, raises
+
+import configuration
+from configuration import Config, validate
+from utils import apply_timeshift
+
+
+def config(**values):
+    parsed = {
+        "scenario": "baseline",
+        "startYear": 2020,
+        "endYear": 2022,
+        "dayparts": {"D1": [1, 13], "D2": [13, 1]},
+        "seasons": {"S1": [1, 2, 3, 4, 5, 6], "S2": [7, 8, 9, 10, 11, 12]},
+    }
+    parsed.update(values)
+    return parsed
+
+
+class TestValidate:
+
+    def test_valid(self):
+        validate(config(daytype=True))
+        validate(config(representative_days=12))
+
+    def test_representative_days_with_daytype(self):
+        with raises(ValueError, match="'representative_days' can not be "
+                                      "used with 'daytype'"):
+            validate(config(representative_days=12, daytype=True))
+
+    def test_lists_every_error(self):
+        with raises(ValueError) as error:
+            validate(config(startYear="2020", daytype=1, seasons={"S1": 1}))
+        message = str(error.value)
+        assert "'startYear' must be of type int, not str" in message
+        assert "'daytype' must be of type bool, not int" in message
+        assert "'seasons: S1' must be a list of ints" in message
+
+    def test_required(self):
+        parsed = config()
+        del parsed["dayparts"]
+        with raises(ValueError, match="'dayparts' is required"):
+            validate(parsed)
+
+
+class TestConfig:
+
+    def test_read_only(self):
+        loaded = Config(config(), {"solver": "cplex"})
+        assert loaded["solver"] == "cplex"
+        assert loaded["dayparts"]["D1"] == (1, 13)
+        with raises(AttributeError):
+            loaded.solver = "gurobi"
+        with raises(TypeError):
+            loaded["dayparts"]["D3"] = (1, 2)
+
+    def test_derived_values(self):
+        loaded = Config(config(daytype=True, timeshift=2))
+        assert loaded.years == (2020, 2021, 2022)
+        assert loaded.timeslices == ("S1WDD1", "S1WDD2", "S1WED1", "S1WED2",
+                                     "S2WDD1", "S2WDD2", "S2WED1", "S2WED2")
+        assert loaded.month_to_season[6] == "S1"
+        assert loaded.month_to_season[7] == "S2"
+        with raises(AttributeError):
+            loaded.years = (2020,)
+
+    @mark.parametrize("timeshift", [-11, 0, 2, 12])
+    def test_hour_to_daypart(self, timeshift):
+        """Hours and dayparts are shifted alike, as with
+        utils.apply_timeshift in TS_data.py"""
+        dayparts = {"D1": [1, 7], "D2": [7, 13], "D3": [13, 19],
+                    "D4": [19, 1]}
+        loaded = Config(config(dayparts=dayparts, timeshift=timeshift))
+        expected = {hour: dp for dp, (start, end) in dayparts.items()
+                    for hour in range(24)
+                    if (apply_timeshift(hour, timeshift) - apply_timeshift(
+                        start, timeshift)) % 24 < (end - start) % 24}
+        assert dict(loaded.hour_to_daypart) == expected
+        assert loaded.hour_to_daypart[0] == "D4"
+        assert loaded.hour_to_daypart[6] == "D1"
+
+
+class TestGetScope:
+
+    def scope(self, tmp_path, text):
+        path = tmp_path / "config.yaml"
+        path.write_text(text)
+        file = configuration.ConfigFile.__new__(configuration.ConfigFile)
+        file.file_path = path
+        scope = file.get_scope()
+        # The same scope from the loaded config of any scenario
+        for scenario in file.get_scenarios():
+            loaded = Config(configuration._parse(path),
+                            file.get_scenarios()[scenario])
+            assert loaded.get_scope() == scope
+        return scope
+
+    def test_union_of_scenarios(self, tmp_path):
+        text = (
+            "scenario: 'a'\nstartYear: 2020\nendYear: 2022\n"
+            "dayparts: {D1: [1, 13]}\nseasons: {S1: [1, 2]}\n"
+            "geographic_scope: ['IND']\nnodes_to_remove: ['INDNE']\n"
+            "scenarios:\n  a: {}\n  b: {geographic_scope: ['NPL']}\n")
+        assert self.scope(tmp_path, text) == (["IND", "NPL"], ["INDNE"])
+
+    def test_world_run(self, tmp_path):
+        text = (
+            "scenario: 'a'\nstartYear: 2020\nendYear: 2022\n"
+            "dayparts: {D1: [1, 13]}\nseasons: {S1: [1, 2]}\n"
+            "geographic_scope: ['IND']\n"
+            "scenarios:\n  a: {}\n  b: {geographic_scope: []}\n")
+        assert self.scope(tmp_path, text) == ([], [])
+
+
+def test_load_config_parsed_once(tmp_path, monkeypatch):
+    (tmp_path / "config.yaml").write_text(
+        "scenario: 'a'\nstartYear: 2020\nendYear: 2022\n"
+        "dayparts: {D1: [1, 13]}\nseasons: {S1: [1, 2]}\n"
+        "scenarios:\n  a: {}\n  b: {solver: 'cplex'}\n")
+    monkeypatch.setattr(configuration.ConfigFile, "__init__",
+                        lambda self, name: setattr(
+                            self, "file_path", tmp_path / f"{name}.yaml"))
+    monkeypatch.setattr(configuration, "_PARSED", {})
+    monkeypatch.setattr(configuration, "_LOADED", {})
+    monkeypatch.delenv(configuration.SCENARIO_ENV_VAR, raising=False)
+    loaded = configuration.load_config()
+    assert configuration.ConfigPaths().get_scenario_name() == "a"
+    assert configuration.load_config() is loaded
+
+    def parse_again(*args, **kwargs):
+        raise AssertionError("config parsed again")
+    monkeypatch.setattr(configuration.yaml, "load", parse_again)
+    monkeypatch.setattr(configuration.os, "stat", parse_again)
+    monkeypatch.setenv(configuration.SCENARIO_ENV_VAR, "b")
+    assert configuration.load_config().get("solver") == "cplex"
+    assert configuration.ConfigFile("config").get("solver") == "cplex"
+    assert configuration.ConfigFile("config").get("startYear") == 2020
@@ -0,0 +1,151 @@
+"""Module for testing resources/cplex_transform.py against the transform of
+the original script followed by `sort`"""
+
+import random
+
+YEARS = [str(year) for year in range(2015, 2036)]
+
+
+def baseline_transform(finput, foutput):
+    """The original transform, for models of 21 years, followed by `sort`.
+
+    The last variable read from the solution is never written.
+    """
+    out = []
+    with open(finput) as IN:
+        recordedVariables = []
+        lines = []
+        old = ''
+        remember = {}
+        for line in IN:
+            if "<variable name=" in line:
+                lst = line.strip().split()
+                variableContents = lst[1].replace('(', ',').replace(
+                    ")", '').replace('name=', '').replace('"', '').split(',')
+                variable = variableContents[0] + '\t' + '\t'.join(
+                    variableContents[1:-1])
+                if variable not in recordedVariables:
+                    if variable == old:
+                        lines.append(lst)
+                    else:
+                        if len(lines) == 21:
+                            sortedList = sorted(lines)
+                            row = '{0}'.format(old)
+                            for each in sortedList:
+                                row += '\t{0}'.format(float(
+                                    each[-2].replace('"', '').split('=')[1]))
+                            out.append(row + '\n')
+                            lines = []
+                            lines.append(lst)
+                            recordedVariables.append(old)
+                            old = variable
+                        elif len(lines) == 0:
+                            lines.append(lst)
+                            old = variable
+                            if variable in remember.keys():
+                                for each in remember[variable]:
+                                    lines.append(each)
+                                del remember[variable]
+                        else:
+                            remember.setdefault(variable, []).append(lst)
+
+    for variable, values in remember.items():
+        row = '{0}'.format(variable)
+        for each in sorted(values):
+            row += '\t{0}'.format(float(
+                each[-2].replace('"', '').split('=')[1]))
+        out.append(row + '\n')
+
+    with open(foutput, 'w') as f:
+        f.writelines(sorted(out))
+
+
+def variable_line(name, value):
+    return (f'  <variable name="{name}" index="0" status="BS" '
+            f'value="{value}" reducedCost="0"/>\n')
+
+
+def write_data_file(path, years):
+    with open(path, 'w') as f:
+        f.write('set REGION :=\nGLOBAL\n;\nset YEAR :=\n')
+        f.writelines(f'{year}\n' for year in years)
+        f.write(';\nend;\n')
+
+
+def write_solution(path, variables):
+    with open(path, 'w') as f:
+        f.write('<?xml version = "1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<CPLEXSolution version="1.2">\n <variables>\n')
+        for name, value in variables:
+            f.write(variable_line(name, value))
+        f.write(' </variables>\n</CPLEXSolution>\n')
+
+
+def solution_variables(years):
+    rng = random.Random(0)
+    variables = []
+    for name in ['RateOfActivity(GLOBAL,S1D2,PWRSPVINDNE01,1,{})',
+                 'NewCapacity(GLOBAL,PWRCOAINDNE01,{})',
+                 'RateOfActivity(GLOBAL,S1D1,PWRCOAINDNE01,1,{})']:
+        shuffled = list(years)
+        rng.shuffle(shuffled)
+        variables.append([(name.format(year), rng.choice(['0', '0.5', '1e-06',
+                                                         '1234.5678']))
+                          for year in shuffled])
+    # The values of the second variable are split by those of the third
+    first, second, third = variables
+    return first + second[:5] + third + second[5:]
+
+
+def test_matches_baseline(cplex_transform, tmp_path):
+    data_file = tmp_path / 'model.txt'
+    write_data_file(data_file, YEARS)
+    variables = solution_variables(YEARS)
+    # The baseline drops the last variable of the file
+    variables.append(('TotalDiscountedCost(GLOBAL,2015)', '10'))
+    solution = tmp_path / 'model.sol'
+    write_solution(solution, variables)
+
+    expected = tmp_path / 'baseline_sort.sol'
+    baseline_transform(solution, expected)
+    actual = tmp_path / 'model_sort.sol'
+    cplex_transform.main(solution, actual, data_file)
+
+    expected_lines = expected.read_text().splitlines()
+    actual_lines = actual.read_text().splitlines()
+    assert len(expected_lines) == 3
+    assert actual_lines == sorted(
+        expected_lines + ['TotalDiscountedCost\tGLOBAL\t10.0'])
+
+
+def test_model_horizon_from_data_file(cplex_transform, tmp_path):
+    data_file = tmp_path / 'model.txt'
+    write_data_file(data_file, ['2020', '2021', '2022'])
+    solution = tmp_path / 'model.sol'
+    write_solution(solution, [
+        ('NewCapacity(GLOBAL,PWRCOAINDNE01,2022)', '3'),
+        ('NewCapacity(GLOBAL,PWRCOAINDNE01,2020)', '1'),
+        ('NewCapacity(GLOBAL,PWRCOAINDNE01,2021)', '2'),
+        ('NewCapacity(GLOBAL,PWRBIOINDNE01,2020)', '0.25'),
+    ])
+    actual = tmp_path / 'model_sort.sol'
+    cplex_transform.main(solution, actual, data_file)
+    assert actual.read_text().splitlines() == [
+        'NewCapacity\tGLOBAL\tPWRBIOINDNE01\t0.25',
+        'NewCapacity\tGLOBAL\tPWRCOAINDNE01\t1.0\t2.0\t3.0',
+    ]
+
+
+def test_external_merge_sort(cplex_transform, tmp_path, monkeypatch):
+    data_file = tmp_path / 'model.txt'
+    write_data_file(data_file, YEARS)
+    solution = tmp_path / 'model.sol'
+    write_solution(solution, solution_variables(YEARS))
+
+    in_memory = tmp_path / 'in_memory.sol'
+    monkeypatch.setattr(cplex_transform, 'MAX_LINES_IN_MEMORY', 1_000_000)
+    cplex_transform.main(solution, in_memory, data_file)
+    monkeypatch.setattr(cplex_transform, 'MAX_LINES_IN_MEMORY', 1)
+    merged = tmp_path / 'merged.sol'
+    cplex_transform.main(solution, merged, data_file)
+    assert merged.read_text() == in_memory.read_text()
@@ -0,0 +1,44 @@
+"""Module for testing cross_join"""
+
+import itertools
+import warnings
+
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from utils import cross_join
+
+
+def test_cross_join_matches_product():
+    techs = ["PWRCOAINDNE01", "PWRSPVINDNE01", "MINCOAIND"]
+    years = range(2025, 2029)
+    expected = pd.DataFrame(list(itertools.product(techs, years, [1, 2])),
+                            columns=["TECHNOLOGY", "YEAR",
+                                     "MODE_OF_OPERATION"])
+    assert_frame_equal(
+        cross_join(TECHNOLOGY=techs, YEAR=years, MODE_OF_OPERATION=[1, 2]),
+        expected)
+
+
+def test_cross_join_frame():
+    """Rows of the frame vary slowest, as the per-year appends did"""
+    df = pd.DataFrame({"REGION": "GLOBAL", "TECHNOLOGY": ["PWRCOA", "PWRSPV"],
+                       "VALUE": [1.5, 2.5]}, index=[7, 3])
+    years = [2025, 2026, 2027]
+    expected = pd.DataFrame(columns=list(df.columns) + ["YEAR"])
+    for _, row in df.iterrows():
+        for year in years:
+            expected.loc[len(expected)] = list(row) + [year]
+    expected = expected.astype({"VALUE": float, "YEAR": int})
+    assert_frame_equal(cross_join(df, YEAR=years), expected)
+    assert_frame_equal(cross_join(df), df.reset_index(drop=True))
+    assert cross_join(df, YEAR=[]).empty
+
+
+def test_cross_join_empty_column():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        df = cross_join(TECHNOLOGY=[], YEAR=[2025, 2026])
+    assert df.empty
+    assert list(df.columns) == ["TECHNOLOGY", "YEAR"]
+    assert df["TECHNOLOGY"].dtype == object
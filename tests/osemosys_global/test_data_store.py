@@ -0,0 +1,111 @@
+"""Module for testing data_store"""
+
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from pytest import fixture, importorskip
+
+import data_store
+
+
+@fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_store, "_DATA_FORMAT", "csv")
+    monkeypatch.setattr(data_store, "_MEMORY", None)
+    pd.DataFrame({"VALUE": [2020, 2021, 2022]}).to_csv(
+        tmp_path / "YEAR.csv", index=False)
+    return tmp_path
+
+
+def capacity_factor():
+    return pd.DataFrame([
+        ["GLOBAL", "PWRSPVINDNE01", "S1D1", 0.2],
+        ["GLOBAL", "PWRSPVINDNE01", "S1D2", 0.0],
+    ], columns=["REGION", "TECHNOLOGY", "TIMESLICE", "VALUE"])
+
+
+def expected_capacity_factor():
+    return pd.DataFrame([
+        ["GLOBAL", "PWRSPVINDNE01", "S1D1", year, 0.2]
+        for year in [2020, 2021, 2022]
+    ] + [
+        ["GLOBAL", "PWRSPVINDNE01", "S1D2", year, 0.0]
+        for year in [2020, 2021, 2022]
+    ], columns=["REGION", "TECHNOLOGY", "TIMESLICE", "YEAR", "VALUE"])
+
+
+class TestExpandYears:
+
+    def test_expand_years(self):
+        actual = data_store.expand_years(capacity_factor(), [2020, 2021, 2022])
+        assert_frame_equal(actual, expected_capacity_factor())
+
+    def test_is_year_broadcast(self):
+        indices = ["REGION", "TECHNOLOGY", "TIMESLICE", "YEAR"]
+        assert data_store.is_year_broadcast(capacity_factor(), indices)
+        assert not data_store.is_year_broadcast(
+            expected_capacity_factor(), indices)
+
+
+class TestWriteCsv:
+
+    def test_year_broadcast_written_with_years(self, data_dir):
+        path = data_dir / "CapacityFactor.csv"
+        data_store.write_table(capacity_factor(), path)
+        assert_frame_equal(pd.read_csv(path), expected_capacity_factor())
+
+    def test_other_tables_written_as_is(self, data_dir):
+        df = pd.DataFrame({"REGION": ["GLOBAL"], "VALUE": [1.5]})
+        path = data_dir / "DiscountRate.csv"
+        data_store.write_table(df, path)
+        assert_frame_equal(pd.read_csv(path), df)
+
+    def test_flush_writes_years(self, data_dir):
+        path = data_dir / "CapacityFactor.csv"
+        data_store.hold_in_memory()
+        data_store.write_table(capacity_factor(), path)
+        assert not path.exists()
+        assert_frame_equal(data_store.read_table(path), capacity_factor())
+        data_store.flush()
+        assert_frame_equal(pd.read_csv(path), expected_capacity_factor())
+
+
+class TestExportCsv:
+
+    def test_export_from_parquet(self, data_dir, monkeypatch):
+        importorskip("pyarrow")
+        monkeypatch.setattr(data_store, "_DATA_FORMAT", "parquet")
+        pd.read_csv(data_dir / "YEAR.csv").to_parquet(
+            data_dir / "YEAR.parquet", index=False)
+        (data_dir / "YEAR.csv").unlink()
+        data_store.write_table(capacity_factor(), data_dir / "CapacityFactor.csv")
+        assert not (data_dir / "CapacityFactor.csv").exists()
+
+        data_store.export_csv(data_dir)
+
+        assert_frame_equal(pd.read_csv(data_dir / "CapacityFactor.csv"),
+                           expected_capacity_factor())
+        assert pd.read_csv(data_dir / "YEAR.csv")["VALUE"].to_list() == \
+            [2020, 2021, 2022]
+
+
+class TestSchema:
+
+    def test_held_tables_get_schema_dtypes(self, data_dir):
+        data_store.hold_in_memory()
+        df = pd.DataFrame({"REGION": ["GLOBAL"], "TECHNOLOGY": ["PWRCOAINDNE01"],
+                           "YEAR": [2020.0], "VALUE": ["1.5"]})
+        data_store.write_table(df, data_dir / "FixedCost.csv")
+        actual = data_store.read_table(data_dir / "FixedCost.csv")
+        assert actual["YEAR"].dtype == "int64"
+        assert actual["VALUE"].dtype == "float64"
+
+    def test_set_values(self, data_dir):
+        data_store.hold_in_memory()
+        data_store.write_table(pd.DataFrame({"VALUE": [1.0, 2.0]}),
+                               data_dir / "MODE_OF_OPERATION.csv")
+        data_store.write_table(pd.DataFrame({"VALUE": ["S1", "S2"]}),
+                               data_dir / "SEASON.csv")
+        assert data_store.read_table(
+            data_dir / "MODE_OF_OPERATION.csv")["VALUE"].to_list() == [1, 2]
+        assert data_store.read_table(
+            data_dir / "SEASON.csv")["VALUE"].to_list() == ["S1", "S2"]
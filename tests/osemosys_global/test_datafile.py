@@ -0,0 +1,50 @@
+"""Module for testing datafile against otoole's data file writer"""
+
+from pandas.testing import assert_frame_equal
+
+import datafile
+
+
+def read_datafile(config, path):
+    from otoole.read_strategies import ReadDatafile
+    inputs, _ = ReadDatafile(user_config=config).read(str(path))
+    return inputs
+
+
+def write_datafile(otoole_config, scenario_data, tmp_path, **kwargs):
+    path = tmp_path / "datafile.txt"
+    datafile.write_datafile(scenario_data, otoole_config[1], path, **kwargs)
+    return path
+
+
+def test_read_back_as_otoole_datafile(otoole_config, scenario_data,
+                                      otoole_datafile, tmp_path):
+    config, _ = otoole_config
+    expected = read_datafile(config, otoole_datafile)
+    actual = read_datafile(
+        config, write_datafile(otoole_config, scenario_data, tmp_path))
+
+    assert set(actual) == set(expected)
+    for name in config:
+        assert_frame_equal(actual[name].sort_index(),
+                           expected[name].sort_index(), obj=name)
+
+
+def test_full_precision(otoole_config, scenario_data, tmp_path):
+    path = write_datafile(otoole_config, scenario_data, tmp_path)
+    lines = path.read_text().splitlines()
+    assert "GLOBAL PWRCOAINDNE01 2025 98765432.1" in lines
+    assert "GLOBAL PWRSPVINDNE01 2025 1234.5678901" in lines
+
+
+def test_year_broadcast_written_per_year(otoole_config, scenario_data,
+                                         tmp_path):
+    path = write_datafile(otoole_config, scenario_data, tmp_path)
+    lines = path.read_text().splitlines()
+    start = lines.index("param default 1 : CapacityFactor :=")
+    rows = lines[start + 1:lines.index(";", start)]
+    assert sorted(rows) == sorted(
+        f"GLOBAL {tech} {timeslice} {year} {value}"
+        for tech, timeslice, value in [("PWRSPVINDNE01", "S1D1", 0.25),
+                                       ("PWRCOAINDNE01", "S1D1", 0.9)]
+        for year in [2025, 2026])
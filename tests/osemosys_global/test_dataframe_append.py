@@ -0,0 +1,73 @@
+"""Module for testing the preprocessing scripts without DataFrame.append,
+which was removed in pandas 2.0"""
+
+import ast
+from pathlib import Path
+
+import pandas as pd
+from pytest import fixture, mark
+
+import powerplant_data
+
+SCRIPTS_DIR = Path(powerplant_data.__file__).parent
+
+
+@fixture
+def no_append(monkeypatch):
+    monkeypatch.delattr(pd.DataFrame, "append", raising=False)
+
+
+def list_names(tree):
+    """Names bound to a list anywhere in a module"""
+    names = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Assign):
+            continue
+        value = node.value
+        if isinstance(value, ast.BinOp):
+            value = value.left
+        if isinstance(value, (ast.List, ast.ListComp)) or (
+                isinstance(value, ast.Call)
+                and ast.unparse(value.func) in ("list", "sorted")):
+            names.update(target.id for target in node.targets
+                         if isinstance(target, ast.Name))
+    return names
+
+
+@mark.parametrize("script", ["demand_projection.py", "powerplant_data.py",
+                             "max_capacity.py", "user_defined_capacity.py"])
+def test_only_lists_appended(script):
+    """The scripts run on their input workbooks, so their appends are
+    checked to be on lists"""
+    tree = ast.parse((SCRIPTS_DIR / script).read_text(encoding="utf-8"))
+    receivers = {ast.unparse(node.func.value) for node in ast.walk(tree)
+                 if isinstance(node, ast.Call)
+                 and isinstance(node.func, ast.Attribute)
+                 and node.func.attr == "append"}
+    assert receivers <= list_names(tree)
+
+
+def test_user_defined_capacity(scenario_data, no_append):
+    region, years = "GLOBAL", [2025, 2026]
+    columns = ["REGION", "TECHNOLOGY", "YEAR", "VALUE"]
+    for name in ["TotalAnnualMinCapacityInvestment",
+                 "TotalAnnualMaxCapacityInvestment", "ResidualCapacity"]:
+        pd.DataFrame(columns=columns).to_csv(scenario_data / f"{name}.csv",
+                                             index=False)
+    for name in ["OperationalLife", "CapacityToActivityUnit"]:
+        pd.DataFrame(columns=["REGION", "TECHNOLOGY", "VALUE"]).to_csv(
+            scenario_data / f"{name}.csv", index=False)
+
+    powerplant_data.user_defined_capacity(
+        region, years, str(scenario_data),
+        {"TRNINDNEINDSO": [5, 2025, "open", 2026, 2, 700]}, {"TRN": 60})
+
+    def read(name):
+        return pd.read_csv(scenario_data / f"{name}.csv").values.tolist()
+    assert read("TotalAnnualMinCapacityInvestment") == [
+        [region, "TRNINDNEINDSO", 2025, 5]]
+    assert read("TotalAnnualMaxCapacityInvestment") == [
+        [region, "TRNINDNEINDSO", 2025, 5.0],
+        [region, "TRNINDNEINDSO", 2026, 2.0]]
+    assert read("ResidualCapacity") == []
+    assert [region, "TRNINDNEINDSO", 2026, 700] in read("CapitalCost")
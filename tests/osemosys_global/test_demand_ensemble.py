@@ -0,0 +1,94 @@
+"""Module for testing the demand projection ensemble"""
+
+import numpy as np
+import pandas as pd
+from numpy.testing import assert_allclose
+
+import demand_ensemble
+from demand_ensemble import PATHWAYS
+
+COUNTRIES = ["IND", "NPL", "BTN"]
+YEARS = [2020, 2030]
+
+
+def fits():
+    index = ["Asia", "Oceania"]
+    return {
+        "GDP": pd.DataFrame({"intercept": [100.0, 50.0],
+                             "WB_GDPppp": [0.2, 0.1]}, index=index),
+        "GDP_URB": pd.DataFrame({"intercept": [10.0, 5.0],
+                                 "WB_GDPppp": [0.15, 0.1],
+                                 "WB_Urb": [20.0, 10.0]}, index=index),
+    }
+
+
+def inputs(seed=0):
+    rng = np.random.default_rng(seed)
+    shape = (len(PATHWAYS), len(COUNTRIES), len(YEARS))
+    gdp = rng.uniform(10, 5000, shape)
+    pop = rng.uniform(1, 1500, shape)
+    urb = rng.uniform(20, 90, shape)
+    losses = rng.uniform(5, 20, (len(COUNTRIES), len(YEARS)))
+    baseline = np.array([np.nan, 1e9, np.nan])
+    return gdp, pop, urb, losses, baseline
+
+
+def reference(gdp, pop, urb, losses, baseline, groups):
+    """Per-country projection as demand_projection.py computes a spec"""
+    rows = []
+    for spec, fit in fits().items():
+        for p, pathway in enumerate(PATHWAYS):
+            for c, country in enumerate(COUNTRIES):
+                row = fit.loc[groups[country]]
+                for y, year in enumerate(YEARS):
+                    demand_pp = (row["intercept"] + row["WB_GDPppp"]
+                                 * gdp[p, c, y] * 1000 / pop[p, c, y])
+                    if "WB_Urb" in row:
+                        demand_pp += row["WB_Urb"] * urb[p, c, y]
+                    demand = round(demand_pp * pop[p, c, y], 2)
+                    demand = round(demand * losses[c, y] / 100 + demand, 2)
+                    if demand < baseline[c]:
+                        demand = baseline[c]
+                    rows.append([pathway, spec, country, year, demand])
+    return pd.DataFrame(rows, columns=demand_ensemble.COLUMNS)
+
+
+def test_project_ensemble_matches_per_country():
+    groups = pd.Series(["Asia", "Asia", "Oceania"], index=COUNTRIES)
+    gdp, pop, urb, losses, baseline = inputs()
+    actual = demand_ensemble.project_ensemble(
+        gdp, pop, urb, fits(), groups, losses, baseline, YEARS)
+    expected = reference(gdp, pop, urb, losses, baseline, groups)
+
+    keys = ["PATHWAY", "SPEC", "COUNTRY", "YEAR"]
+    actual = actual.sort_values(keys).reset_index(drop=True)
+    expected = expected.sort_values(keys).reset_index(drop=True)
+    assert actual[keys].equals(expected[keys])
+    assert_allclose(actual["VALUE"], expected["VALUE"], rtol=1e-12)
+
+
+def test_select_projection():
+    groups = pd.Series(["Asia", "Asia", "Oceania"], index=COUNTRIES)
+    cube = demand_ensemble.project_ensemble(
+        *inputs()[:3], fits(), groups, *inputs()[3:], YEARS)
+    df = demand_ensemble.select_projection(cube, "SSP2", "GDP")
+    assert sorted(df.index) == sorted(COUNTRIES)
+    assert list(df.columns) == YEARS
+    assert df.loc["NPL", 2020] == 1e9
+
+
+def test_pathway_array():
+    projections = pd.DataFrame({
+        "Model": ["OECD Env-Growth"] * 2 + ["IIASA GDP"],
+        "Scenario": ["SSP1", "SSP2", "SSP1"],
+        "Region": ["IND", "IND", "IND"],
+        2020: [1.0, 2.0, 9.0], 2030: [3.0, 4.0, 9.0],
+    })
+    missing = pd.DataFrame({"Scenario": ["SSP1"], 2020: [5.0], 2030: [6.0]},
+                           index=pd.Index(["BTN"], name="Region"))
+    actual = demand_ensemble.pathway_array(
+        projections, missing, "OECD Env-Growth", ["IND", "BTN"], YEARS)
+    assert actual.shape == (len(PATHWAYS), 2, 2)
+    assert_allclose(actual[0], [[1.0, 3.0], [5.0, 6.0]])
+    assert_allclose(actual[1, 0], [2.0, 4.0])
+    assert np.isnan(actual[1, 1]).all()
@@ -0,0 +1,142 @@
+"""Module for testing the dual value reader"""
+
+import json
+import os
+
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from pytest import fixture, raises
+
+import data_store
+import duals
+
+# (constraint, indices, dual) written by the solver
+DUALS = [
+    ("EBa11_EnergyBalanceEachTS5", "GLOBAL,S1D1,ELCINDNE02,2025", 12.345),
+    ("EBa11_EnergyBalanceEachTS5", "GLOBAL,S1D2,ELCINDNE02,2025", -0.5),
+    ("EBa11_EnergyBalanceEachTS5", "GLOBAL,S1D1,ELCINDSO02,2026", 7.0),
+    ("EBa11_EnergyBalanceEachTS5", "GLOBAL,S1D1,ELCINDNE01,2025", 3.0),
+    ("EBa11_EnergyBalanceEachTS5", "GLOBAL,S1D1,COAIND,2025", 1.5),
+    ("RM3_ReserveMargin_Constraint", "GLOBAL,S1D1,2025", 0.25),
+    ("E8_AnnualEmissionsLimit", "GLOBAL,CO2,2025", 40.0),
+    ("Acc1_FuelProductionByTechnology", "GLOBAL,S1D1,PWRCOA,ELC,2025", 9.0),
+]
+
+
+def write_attr(path):
+    with open(path, "w") as f:
+        f.write("# Constr Pi\n")
+        for constraint, index, value in DUALS:
+            f.write(f"{constraint}({index}) {value}\n")
+
+
+def write_json(path):
+    with open(path, "w") as f:
+        json.dump({"SolutionInfo": {"Status": 2}, "Constrs": [
+            {"ConstrName": f"{constraint}({index})", "Pi": value}
+            for constraint, index, value in DUALS]}, f)
+
+
+def write_cplex(path):
+    with open(path, "w") as f:
+        f.write('<?xml version = "1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<CPLEXSolution version="1.2">\n <linearConstraints>\n')
+        for number, (constraint, index, value) in enumerate(DUALS):
+            f.write(f'  <constraint name="{constraint}({index})" '
+                    f'index="{number}" status="LL" slack="0" '
+                    f'dual="{value}"/>\n')
+        f.write(' </linearConstraints>\n</CPLEXSolution>\n')
+
+
+def baseline_nodal_prices(path):
+    """Duals read by marginal_costs before duals.py, which also rounded
+    them to cents"""
+    rows = []
+    with open(path) as sol_file:
+        for line in sol_file:
+            if line.startswith('EBa11'):
+                ts = line.split(' ')[0].split(',')[1]
+                fuel = line.split(' ')[0].split(',')[2]
+                year = int(line.split(' ')[0].split(',')[3].split(')')[0])
+                value = float(line.split(' ')[1])
+                if fuel.startswith('ELC'):
+                    if fuel.endswith('02'):
+                        rows.append([ts, fuel, year, value])
+    return pd.DataFrame(rows, columns=['TIMESLICE', 'FUEL', 'YEAR', 'VALUE'])
+
+
+@fixture
+def csv_store(monkeypatch):
+    monkeypatch.setattr(data_store, "_DATA_FORMAT", "csv")
+    monkeypatch.setattr(data_store, "_MEMORY", None)
+
+
+def test_nodal_prices_match_baseline(tmp_path):
+    path = tmp_path / "model.attr"
+    write_attr(path)
+    actual = duals.nodal_prices(duals.read_duals(path))
+    assert_frame_equal(actual[['TIMESLICE', 'FUEL', 'YEAR', 'VALUE']],
+                       baseline_nodal_prices(path))
+
+
+def test_read_duals(tmp_path):
+    path = tmp_path / "model.attr"
+    write_attr(path)
+    expected = pd.DataFrame([row for row in DUALS
+                             if row[0] in duals.CONSTRAINTS],
+                            columns=["CONSTRAINT", "INDEX", "VALUE"])
+    assert_frame_equal(duals.read_duals(path), expected)
+
+
+def test_solution_files_read_alike(tmp_path):
+    attr, json_file, sol = (tmp_path / "model.attr", tmp_path / "model.json",
+                            tmp_path / "model.sol")
+    write_attr(attr)
+    write_json(json_file)
+    write_cplex(sol)
+    expected = duals.read_duals(attr)
+    assert_frame_equal(duals.read_duals(json_file), expected)
+    assert_frame_equal(duals.read_duals(sol), expected)
+
+
+def test_unsupported_file(tmp_path):
+    with raises(ValueError):
+        duals.read_duals(tmp_path / "model.csv")
+
+
+def test_get_duals():
+    df = pd.DataFrame(DUALS, columns=["CONSTRAINT", "INDEX", "VALUE"])
+    expected = pd.DataFrame({"REGION": ["GLOBAL"], "TIMESLICE": ["S1D1"],
+                             "YEAR": [2025], "VALUE": [0.25]})
+    assert_frame_equal(duals.get_duals(df, "RM3_ReserveMargin_Constraint"),
+                       expected)
+
+
+def test_find_dual_file(tmp_path):
+    assert duals.find_dual_file(tmp_path, "model", "gurobi") is None
+    write_json(tmp_path / "model.json")
+    assert duals.find_dual_file(tmp_path, "model", "gurobi") == \
+        tmp_path / "model.json"
+    write_attr(tmp_path / "model.attr")
+    assert duals.find_dual_file(tmp_path, "model", "gurobi") == \
+        tmp_path / "model.attr"
+    assert duals.find_dual_file(tmp_path, "model", "cbc") is None
+
+
+def test_load_duals_reads_solution_once(tmp_path, csv_store, monkeypatch):
+    solution = tmp_path / "model.attr"
+    write_attr(solution)
+    duals_file = tmp_path / "duals.csv"
+    expected = duals.load_duals(solution, duals_file)
+    assert duals_file.is_file()
+
+    def read_duals(path):
+        raise AssertionError("solution read again")
+    monkeypatch.setattr(duals, "read_duals", read_duals)
+    assert_frame_equal(duals.load_duals(solution, duals_file), expected)
+
+    # A newer solution is read again
+    mtime = os.path.getmtime(duals_file)
+    os.utime(solution, (mtime + 10, mtime + 10))
+    with raises(AssertionError):
+        duals.load_duals(solution, duals_file)
@@ -0,0 +1,41 @@
+"""Module for testing emissions"""
+
+from types import SimpleNamespace
+
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+import data_store
+import emissions
+
+
+def test_get_ear(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_store, "_DATA_FORMAT", "csv")
+    monkeypatch.setattr(data_store, "_MEMORY", None)
+    monkeypatch.setattr(emissions, "ConfigPaths",
+                        lambda: SimpleNamespace(output_data_dir=tmp_path))
+    monkeypatch.setattr(emissions, "get_co2_emission_factors",
+                        lambda: {"Lignite Coal": 0.1, "Natural Gas": 0.05})
+
+    techs = ["PWRCOAINDNE01", "PWRCCGNPLXX01", "PWRSPVINDNE01",
+             "PWRTRNINDNE", "TRNINDNEINDSO", "MINCOAIND"]
+    pd.DataFrame({
+        "REGION": "GLOBAL", "TECHNOLOGY": techs, "FUEL": "ELC",
+        "MODE_OF_OPERATION": 1, "YEAR": 2020, "VALUE": 1.0,
+    }).to_csv(tmp_path / "OutputActivityRatio.csv", index=False)
+    pd.DataFrame({
+        "REGION": "GLOBAL", "TECHNOLOGY": techs, "FUEL": "COA",
+        "MODE_OF_OPERATION": 1, "YEAR": 2020, "VALUE": 2.0,
+    }).to_csv(tmp_path / "InputActivityRatio.csv", index=False)
+
+    actual = emissions.get_ear("CO2").reset_index(drop=True)
+
+    expected = pd.DataFrame({
+        "REGION": "GLOBAL",
+        "TECHNOLOGY": ["PWRCOAINDNE01", "PWRCCGNPLXX01", "PWRSPVINDNE01"],
+        "EMISSION": ["CO2IND", "CO2NPL", "CO2IND"],
+        "MODE_OF_OPERATION": 1,
+        "YEAR": 2020,
+        "VALUE": [0.2, 0.1, 0.0],
+    })
+    assert_frame_equal(actual, expected)
@@ -0,0 +1,51 @@
+"""Module for testing mode_sets against resources/preprocess_data.py, which
+builds the same sets by parsing the data file written by otoole"""
+
+from pathlib import Path
+
+import datafile
+import mode_sets
+
+
+def set_lines(path):
+    return [line for line in Path(path).read_text().splitlines()
+            if line.startswith(mode_sets.REPLACED_LINES)]
+
+
+def test_main_matches_preprocess_data(scenario_data, otoole_datafile,
+                                      preprocess_data, tmp_path):
+    expected = tmp_path / "preprocess_data.txt"
+    preprocess_data.main("otoole", otoole_datafile, expected)
+    actual = tmp_path / "mode_sets.txt"
+    mode_sets.main(scenario_data, otoole_datafile, actual)
+    assert actual.read_text() == expected.read_text()
+
+
+def test_datafile_sets_match_preprocess_data(otoole_config, scenario_data,
+                                             otoole_datafile, preprocess_data,
+                                             tmp_path):
+    expected = tmp_path / "preprocess_data.txt"
+    preprocess_data.main("otoole", otoole_datafile, expected)
+    actual = tmp_path / "datafile.txt"
+    datafile.write_datafile(scenario_data, otoole_config[1], actual,
+                            mode_sets=True)
+    assert set_lines(actual) == set_lines(expected)
+
+
+def test_sets(scenario_data):
+    sets = mode_sets.get_mode_sets(scenario_data)
+    assert list(sets["MODExTECHNOLOGYperFUELout"]) == [
+        "set MODExTECHNOLOGYperFUELout[COAIND]:=;\n",
+        "set MODExTECHNOLOGYperFUELout[ELCINDNE01]:= (1, PWRCOAINDNE01) "
+        "(1, PWRSDSINDNE01) (1, PWRSPVINDNE01);\n",
+        "set MODExTECHNOLOGYperFUELout[ELCINDNE02]:= (1, TRNINDNEINDSO);\n",
+    ]
+    # Negative storage values and zero activity ratios are no data
+    assert list(sets["MODExTECHNOLOGYperSTORAGEfrom"]) == [
+        "set MODExTECHNOLOGYperSTORAGEfrom[SDSINDNE01]:= (1, PWRSDSINDNE01);\n"]
+    assert list(sets["MODEperTECHNOLOGY"]) == [
+        "set MODEperTECHNOLOGY[PWRCOAINDNE01]:= 1;\n",
+        "set MODEperTECHNOLOGY[PWRSPVINDNE01]:= 1;\n",
+        "set MODEperTECHNOLOGY[PWRSDSINDNE01]:= 1;\n",
+        "set MODEperTECHNOLOGY[TRNINDNEINDSO]:= 1;\n",
+    ]
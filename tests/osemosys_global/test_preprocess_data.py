@@ -0,0 +1,106 @@
+"""Module for testing resources/preprocess_data.py.
+
+The expected sets are those the three-pass version of the script wrote,
+with the members of each set in sorted order, as that version wrote them in
+set iteration order.
+"""
+
+from textwrap import dedent
+
+from mode_sets import REPLACED_LINES
+
+OTOOLE_SETS = """\
+set MODExTECHNOLOGYperFUELout[COAIND]:=;
+set MODExTECHNOLOGYperFUELout[ELCINDNE01]:= (1, PWRCOAINDNE01) (1, PWRSDSINDNE01) (1, PWRSPVINDNE01);
+set MODExTECHNOLOGYperFUELout[ELCINDNE02]:= (1, TRNINDNEINDSO);
+set MODExTECHNOLOGYperFUELin[COAIND]:= (1, PWRCOAINDNE01);
+set MODExTECHNOLOGYperFUELin[ELCINDNE01]:= (1, TRNINDNEINDSO);
+set MODExTECHNOLOGYperFUELin[ELCINDNE02]:=;
+set MODEperTECHNOLOGY[PWRCOAINDNE01]:= 1;
+set MODEperTECHNOLOGY[PWRSPVINDNE01]:= 1;
+set MODEperTECHNOLOGY[PWRSDSINDNE01]:= 1;
+set MODEperTECHNOLOGY[TRNINDNEINDSO]:= 1;
+set MODExTECHNOLOGYperSTORAGEto[SDSINDNE01]:= (2, PWRSDSINDNE01);
+set MODExTECHNOLOGYperSTORAGEfrom[SDSINDNE01]:= (1, PWRSDSINDNE01);
+set MODExTECHNOLOGYperEMISSION[CO2IND]:= (1, PWRCOAINDNE01);
+end;"""
+
+MOMANI_DATA = dedent("""\
+    set YEAR := 2020 2021 ;
+    set COMMODITY := ELC COA ;
+    set TECHNOLOGY := PWRCOA PWRSDS MINCOA ;
+    set STORAGE := SDS1 SDS2 ;
+    set MODE_OF_OPERATION := 1 2 ;
+    set EMISSION := CO2 ;
+    param OutputActivityRatio default 0 :=
+    [GLOBAL,PWRCOA,ELC,*,*]:
+    2020 2021 :=
+    1 1 1
+    [GLOBAL,MINCOA,COA,*,*]:
+    2020 2021 :=
+    1 1 1
+    2 1 1
+    ;
+    param InputActivityRatio default 0 :=
+    [GLOBAL,PWRCOA,COA,*,*]:
+    2020 2021 :=
+    1 2.5 2.5
+    ;
+    param TechnologyToStorage default 0 :=
+    [GLOBAL,PWRSDS,*,*]:
+    1 2 :=
+    SDS1 0 1
+    SDS2 1 0
+    ;
+    param EmissionActivityRatio default 0 :=
+    [GLOBAL,PWRCOA,CO2,*,*]:
+    2020 2021 :=
+    1 0.3 0.3
+    ;
+    set MODEperTECHNOLOGY[PWRCOA]:= 1;
+    end;
+    """)
+
+# The three-pass version also listed the storages and modes of storage rows
+# as modes of the technology, e.g. MODEperTECHNOLOGY[PWRSDS]:= SDS1 SDS2 1,
+# which is not a valid set of MODE_OF_OPERATION
+MOMANI_SETS = """\
+set MODExTECHNOLOGYperFUELout[ELC]:= (1, PWRCOA);
+set MODExTECHNOLOGYperFUELout[COA]:= (1, MINCOA) (2, MINCOA);
+set MODExTECHNOLOGYperFUELin[ELC]:=;
+set MODExTECHNOLOGYperFUELin[COA]:= (1, PWRCOA);
+set MODEperTECHNOLOGY[PWRCOA]:= 1;
+set MODEperTECHNOLOGY[PWRSDS]:=;
+set MODEperTECHNOLOGY[MINCOA]:= 1 2;
+set MODExTECHNOLOGYperSTORAGEto[SDS1]:= (2, PWRSDS);
+set MODExTECHNOLOGYperSTORAGEto[SDS2]:= (1, PWRSDS);
+set MODExTECHNOLOGYperSTORAGEfrom[SDS1]:=;
+set MODExTECHNOLOGYperSTORAGEfrom[SDS2]:=;
+set MODExTECHNOLOGYperEMISSION[CO2]:= (1, PWRCOA);
+end;"""
+
+
+def split(text):
+    """Lines of a pre-processed data file: data lines and set lines"""
+    lines = text.splitlines()
+    return ([line for line in lines if not line.startswith(REPLACED_LINES)],
+            "\n".join(line for line in lines
+                      if line.startswith(REPLACED_LINES)))
+
+
+def test_otoole(otoole_datafile, preprocess_data, tmp_path):
+    path = tmp_path / "preprocessed.txt"
+    preprocess_data.main("otoole", otoole_datafile, path)
+    data, sets = split(path.read_text())
+    assert data == split(otoole_datafile.read_text())[0]
+    assert sets == OTOOLE_SETS
+
+
+def test_momani(preprocess_data, tmp_path):
+    infile = tmp_path / "momani.txt"
+    infile.write_text(MOMANI_DATA)
+    path = tmp_path / "preprocessed.txt"
+    preprocess_data.main("momani", infile, path)
+    data, sets = split(path.read_text())
+    assert data == split(MOMANI_DATA)[0]
+    assert sets == MOMANI_SETS
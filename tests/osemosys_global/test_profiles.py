@@ -0,0 +1,96 @@
+"""Module for testing the profile store against pandas reads of the csv"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal, assert_series_equal
+from pytest import fixture, raises
+
+import profiles
+
+NODES = ["AS-IND-NE", "AS-IND-SO", "EU-FRA-XX", "NA-USA-CA"]
+
+
+@fixture
+def profile_csv(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiles, "ConfigPaths",
+                        lambda: SimpleNamespace(cache_dir=tmp_path / "cache"))
+    monkeypatch.setattr(profiles, "_PROFILES", {})
+    rng = np.random.default_rng(0)
+    datetime = pd.date_range("2015-01-01", periods=72, freq="h")
+    df = pd.DataFrame(rng.random((72, len(NODES))) * 1000, columns=NODES)
+    df.insert(0, "Datetime", datetime.strftime(profiles.DATETIME_FORMAT))
+    path = tmp_path / "All_Demand_UTC_2015.csv"
+    df.to_csv(path, index=False, encoding="latin-1")
+    return path
+
+
+def baseline_read(path):
+    """Profile as read by TS_data.py before the profile store"""
+    return pd.read_csv(path, encoding="latin-1")
+
+
+def test_frame_matches_csv(profile_csv):
+    expected = baseline_read(profile_csv)
+    expected["Datetime"] = pd.to_datetime(expected["Datetime"],
+                                          format=profiles.DATETIME_FORMAT)
+    expected[NODES] = expected[NODES].astype(np.float32)
+    profile = profiles.load_profile(profile_csv)
+    assert profile.columns == NODES
+    assert len(profile) == len(expected)
+    assert_frame_equal(profile.frame(), expected)
+
+    columns = ["NA-USA-CA", "AS-IND-NE", "missing"]
+    assert_frame_equal(profile.frame(columns, slice(24, 48)),
+                       expected[["Datetime", "NA-USA-CA", "AS-IND-NE"]]
+                       .iloc[24:48].reset_index(drop=True))
+
+
+def test_reductions_match_csv(profile_csv):
+    expected = baseline_read(profile_csv)[NODES]
+    profile = profiles.load_profile(profile_csv)
+    assert_series_equal(profile.sum(), expected.sum(), check_exact=False,
+                        rtol=1e-6)
+    assert_series_equal(profile.max(["AS-IND-SO", "EU-FRA-XX"]),
+                        expected[["AS-IND-SO", "EU-FRA-XX"]].max(),
+                        check_exact=False, rtol=1e-6)
+
+
+def test_chunked_conversion(profile_csv, monkeypatch):
+    whole = profiles.load_profile(profile_csv).frame()
+    monkeypatch.setattr(profiles, "CHUNKSIZE", 5)
+    monkeypatch.setattr(profiles, "_PROFILES", {})
+    cache_dir = profiles.ConfigPaths().cache_dir
+    for path in (cache_dir / "profiles").iterdir():
+        path.unlink()
+    assert_frame_equal(profiles.load_profile(profile_csv).frame(), whole)
+
+
+def test_contiguous_columns_are_views(profile_csv):
+    profile = profiles.load_profile(profile_csv)
+    assert isinstance(profile.values(), np.memmap)
+    view = profile.values(["AS-IND-SO", "EU-FRA-XX"], slice(0, 24))
+    assert view.shape == (2, 24)
+    assert np.shares_memory(view, profile.values())
+    copy = profile.values(["EU-FRA-XX", "AS-IND-SO"])
+    assert not np.shares_memory(copy, profile.values())
+
+
+def test_converted_once(profile_csv, monkeypatch):
+    profile = profiles.load_profile(profile_csv)
+    assert profiles.load_profile(profile_csv) is profile
+
+    def convert(path, cache_file):
+        raise AssertionError("profile converted again")
+    monkeypatch.setattr(profiles, "_convert", convert)
+    monkeypatch.setattr(profiles, "_PROFILES", {})
+    assert_frame_equal(profiles.load_profile(profile_csv).frame(),
+                       profile.frame())
+
+    # A changed csv is converted again
+    df = baseline_read(profile_csv)
+    df.loc[0, "AS-IND-NE"] = 1.0
+    df.to_csv(profile_csv, index=False, encoding="latin-1")
+    with raises(AssertionError):
+        profiles.load_profile(profile_csv)
@@ -0,0 +1,57 @@
+"""Module for testing the batched demand regression"""
+
+import numpy as np
+import pandas as pd
+from numpy.testing import assert_allclose
+from pytest import importorskip, mark
+
+import regression
+
+
+def data(n_regressors, seed=0):
+    rng = np.random.default_rng(seed)
+    groups = np.repeat(["Africa", "Asia", "Europe"], [12, 30, 7])
+    X = rng.uniform(1e3, 5e4, (len(groups), n_regressors))
+    y = X @ rng.uniform(0.05, 0.5, n_regressors) + rng.normal(0, 500,
+                                                             len(groups))
+    columns = ["WB_GDPppp", "WB_Urb"][:n_regressors]
+    df = pd.DataFrame(X, columns=columns, index=groups)
+    df["OWID_Elec"] = y
+    return df
+
+
+@mark.parametrize("n_regressors", [1, 2], ids=["gdp", "gdp_urb"])
+def test_fit_groups_matches_sklearn(n_regressors):
+    linear_model = importorskip("sklearn.linear_model")
+    df = data(n_regressors)
+    regressors = list(df.columns[:-1])
+    actual = regression.fit_groups(df, regressors, "OWID_Elec")
+
+    for group, group_df in df.groupby(level=0):
+        model = linear_model.LinearRegression().fit(
+            group_df[regressors], group_df["OWID_Elec"])
+        assert_allclose(actual.loc[group, regressors], model.coef_,
+                        rtol=1e-8)
+        assert_allclose(actual.loc[group, "intercept"], model.intercept_,
+                        rtol=1e-8)
+        assert_allclose(actual.loc[group, "R2"],
+                        model.score(group_df[regressors],
+                                    group_df["OWID_Elec"]), rtol=1e-8)
+
+
+def test_single_point_group():
+    codes = np.array([0, 0, 0, 1])
+    X = np.array([[1.0], [2.0], [3.0], [5.0]])
+    y = np.array([2.0, 4.0, 6.0, 7.0])
+    coefs, intercepts, r2 = regression.fit(codes, X, y, 2)
+    assert_allclose(coefs[:, 0], [2.0, 0.0], atol=1e-12)
+    assert_allclose(intercepts, [0.0, 7.0], atol=1e-12)
+    assert_allclose(r2, [1.0, 1.0])
+
+
+def test_project():
+    coefs = np.array([[2.0], [0.5]])
+    intercepts = np.array([1.0, -1.0])
+    X = np.array([[[1.0], [2.0]], [[4.0], [8.0]]])
+    assert_allclose(regression.project(coefs, intercepts, X),
+                    [[3.0, 5.0], [1.0, 3.0]])
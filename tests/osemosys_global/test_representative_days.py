@@ -0,0 +1,86 @@
+"""Module for testing the clustering of representative days"""
+
+import numpy as np
+import pandas as pd
+from pytest import raises
+
+import representative_days
+from profiles import DATETIME_FORMAT, Profile
+from timeslices import TimesliceMapper
+
+SEASONS = {"S1": [1, 2, 3, 4], "S2": [5, 6, 7, 8], "S3": [9, 10, 11, 12]}
+
+DAYPARTS = {"D1": [1, 7], "D2": [7, 13], "D3": [13, 19], "D4": [19, 1]}
+
+HOURS = pd.date_range("2015-01-01", periods=8760, freq="h")
+
+
+def hourly_profile(values, columns):
+    """Profile of values of shape (columns, hours) over 2015"""
+    return Profile(np.asarray(values, dtype=np.float32), columns,
+                   list(HOURS.strftime(DATETIME_FORMAT)))
+
+
+def month_seasons():
+    """Days of 2015 grouped by the seasons of the config"""
+    season_of_month = {m: s for s, months in SEASONS.items() for m in months}
+    days = HOURS[::24]
+    return pd.DataFrame({"DAY": days.dayofyear,
+                         "SEASON": days.month.map(season_of_month)})
+
+
+def test_month_seasons_as_days():
+    """Days grouped as the seasons of the config assign the same timeslices
+    as the seasons themselves"""
+    df = pd.DataFrame({"Datetime": HOURS})
+    expected = TimesliceMapper(SEASONS, DAYPARTS, 3).assign(df.copy())
+    mapper = TimesliceMapper.from_days(month_seasons(), DAYPARTS, 3)
+    assert mapper.seasons == list(SEASONS)
+    assert mapper.months == list(range(1, 13))
+    assert mapper.assign(df)["TIMESLICE"].tolist() == \
+        expected["TIMESLICE"].tolist()
+
+
+def test_day_features():
+    hour = HOURS.hour.values
+    demand = hourly_profile([hour * 2.0, np.zeros(8760)], ["A", "B"])
+    solar = hourly_profile([np.where(hour == 12, 0.5, 0.0)], ["C"])
+    features = representative_days.day_features(
+        [(demand, ["A", "B"]), (solar, ["C"])], 2015)
+    assert features.shape == (365, 24 * 3)
+    assert features.dtype == np.float32
+    # Columns scaled by their maximum, a column of zeros stays zero
+    demand_features = features[:, :48].reshape(365, 24, 2)
+    np.testing.assert_allclose(demand_features[0, :, 0], np.arange(24) / 23,
+                               rtol=1e-6)
+    assert not demand_features[:, :, 1].any()
+    assert features[:, 48 + 12].tolist() == [1.0] * 365
+    assert features[:, 48:].sum() == 365
+
+
+def test_cluster_days():
+    # Warm days in summer, cold days otherwise
+    days = HOURS[::24]
+    summer = (days.month >= 6) & (days.month <= 8)
+    rng = np.random.default_rng(0)
+    features = np.where(summer[:, None], 1.0, 0.0) + \
+        rng.normal(0, 0.01, (365, 24))
+    actual = representative_days.cluster_days(features, 2)
+    assert actual["DAY"].tolist() == list(range(1, 366))
+    # S2 has the later mean day of the year
+    assert actual["SEASON"].tolist() == np.where(summer, "S2", "S1").tolist()
+    assert actual.equals(representative_days.cluster_days(features, 2))
+
+    mapper = TimesliceMapper.from_days(actual, DAYPARTS)
+    assert mapper.season_days.tolist() == [365 - summer.sum(), summer.sum()]
+
+
+def test_cluster_days_count():
+    features = np.zeros((365, 24))
+    with raises(ValueError):
+        representative_days.cluster_days(features, 0)
+    with raises(ValueError):
+        representative_days.cluster_days(features, 366)
+    # Identical days leave clusters empty, which are dropped
+    assert representative_days.cluster_days(features, 3)["SEASON"] \
+        .unique().tolist() == ["S1"]
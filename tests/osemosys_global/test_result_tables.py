@@ -0,0 +1,202 @@
+"""Module for testing result_tables against `otoole results`"""
+
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import yaml
+from pandas.testing import assert_frame_equal
+from pytest import fixture, importorskip, mark
+
+import data_store
+import result_tables
+
+OTOOLE_CONFIG = Path(__file__).resolve().parents[2] / "resources" / \
+    "otoole" / "config.yaml"
+
+YEARS = [2025, 2026, 2027]
+TIMESLICES = {"S1D1": 0.4, "S1D2": 0.6}
+
+SETS = {
+    "REGION": ["GLOBAL"],
+    "TECHNOLOGY": ["MINCOAIND", "PWRCOAINDNE01", "PWRSPVINDNE01"],
+    "FUEL": ["COAIND", "ELCINDNE02"],
+    "EMISSION": ["CO2IND"],
+    "MODE_OF_OPERATION": [1, 2],
+    "TIMESLICE": list(TIMESLICES),
+    "YEAR": YEARS,
+}
+
+ACTIVITY = ["REGION", "TECHNOLOGY", "FUEL", "MODE_OF_OPERATION", "YEAR"]
+
+# PWRCOAINDNE01 has no OperationalLife and MINCOAIND no VariableCost, which
+# otoole leaves out of AccumulatedNewCapacity and AnnualVariableOperatingCost
+PARAMS = {
+    "YearSplit": (["TIMESLICE", "YEAR"], [
+        [timeslice, year, value] for year in YEARS
+        for timeslice, value in TIMESLICES.items()]),
+    "OutputActivityRatio": (ACTIVITY, [
+        ["GLOBAL", tech, fuel, 1, year, 1.0] for year in YEARS
+        for tech, fuel in [("MINCOAIND", "COAIND"),
+                           ("PWRCOAINDNE01", "ELCINDNE02"),
+                           ("PWRSPVINDNE01", "ELCINDNE02")]]),
+    "InputActivityRatio": (ACTIVITY, [
+        ["GLOBAL", "PWRCOAINDNE01", "COAIND", 1, year, 2.5]
+        for year in YEARS]),
+    "EmissionActivityRatio": (
+        ["REGION", "TECHNOLOGY", "EMISSION", "MODE_OF_OPERATION", "YEAR"], [
+            ["GLOBAL", "PWRCOAINDNE01", "CO2IND", 1, year, 0.3]
+            for year in YEARS]),
+    "VariableCost": (["REGION", "TECHNOLOGY", "MODE_OF_OPERATION", "YEAR"], [
+        ["GLOBAL", tech, 1, year, cost] for year in YEARS
+        for tech, cost in [("PWRCOAINDNE01", 4.0), ("PWRSPVINDNE01", 0.5)]]),
+    "FixedCost": (["REGION", "TECHNOLOGY", "YEAR"], [
+        ["GLOBAL", "PWRSPVINDNE01", year, 10.0] for year in YEARS]),
+    "OperationalLife": (["REGION", "TECHNOLOGY"], [
+        ["GLOBAL", "PWRSPVINDNE01", 2]]),
+    "ResidualCapacity": (["REGION", "TECHNOLOGY", "YEAR"], [
+        ["GLOBAL", "PWRCOAINDNE01", year, 2027 - year + 1.0]
+        for year in YEARS]),
+    "SpecifiedAnnualDemand": (["REGION", "FUEL", "YEAR"], [
+        ["GLOBAL", "ELCINDNE02", year, year - 2015.0] for year in YEARS]),
+    # Stored without a YEAR column, see data_store.YEAR_BROADCAST
+    "SpecifiedDemandProfile": (["REGION", "FUEL", "TIMESLICE"], [
+        ["GLOBAL", "ELCINDNE02", "S1D1", 0.3],
+        ["GLOBAL", "ELCINDNE02", "S1D2", 0.7]]),
+}
+
+
+def solution_variables():
+    """Variables of a solution as (name, indices, value)"""
+    variables = []
+    for year in YEARS:
+        for timeslice in TIMESLICES:
+            spv = 0.25 if timeslice == "S1D1" else 0.0
+            for tech, value in [("MINCOAIND", 1.25), ("PWRCOAINDNE01", 0.5),
+                                ("PWRSPVINDNE01", spv)]:
+                variables.append(("RateOfActivity",
+                                  ["GLOBAL", timeslice, tech, 1, year], value))
+        variables.append(("NewCapacity", ["GLOBAL", "PWRSPVINDNE01", year],
+                          1.0))
+        variables.append(("TotalCapacityAnnual",
+                          ["GLOBAL", "PWRSPVINDNE01", year], 1.5))
+    variables.append(("NewCapacity", ["GLOBAL", "PWRCOAINDNE01", 2026], 0.5))
+    return variables
+
+
+def write_cbc(path):
+    with open(path, "w") as f:
+        f.write("Optimal - objective value 1234.50000000\n")
+        for number, (name, indices, value) in enumerate(solution_variables()):
+            index = ",".join(str(i) for i in indices)
+            f.write(f"{number:>7} {name}({index}) {value:>15} 0\n")
+
+
+def write_gurobi(path):
+    with open(path, "w") as f:
+        f.write("# Solution for model obj\n# Objective value = 1234.5\n")
+        for name, indices, value in solution_variables():
+            index = ",".join(str(i) for i in indices)
+            f.write(f"{name}({index}) {value}\n")
+
+
+def write_cplex(path):
+    """Writes the sorted layout of cplex_transform.py"""
+    rows = {}
+    for name, indices, value in solution_variables():
+        key = "\t".join([name] + [str(i) for i in indices[:-1]])
+        rows.setdefault(key, dict.fromkeys(YEARS, 0.0))[indices[-1]] = value
+    with open(path, "w") as f:
+        for key in sorted(rows):
+            values = "\t".join(str(value) for value in rows[key].values())
+            f.write(f"{key}\t{values}\n")
+
+
+SOLUTION_WRITERS = {"cbc": write_cbc, "gurobi": write_gurobi,
+                    "cplex": write_cplex}
+
+
+@fixture
+def config():
+    with open(OTOOLE_CONFIG) as f:
+        return yaml.safe_load(f)
+
+
+@fixture
+def data_dir(tmp_path, monkeypatch, config):
+    monkeypatch.setattr(data_store, "_DATA_FORMAT", "csv")
+    monkeypatch.setattr(data_store, "_MEMORY", None)
+    path = tmp_path / "data"
+    path.mkdir()
+    for name, details in config.items():
+        if details["type"] == "set":
+            df = pd.DataFrame({"VALUE": SETS.get(name, [])})
+        elif details["type"] == "param":
+            columns, rows = PARAMS.get(name, (details["indices"], []))
+            df = pd.DataFrame(rows, columns=columns + ["VALUE"])
+        else:
+            continue
+        df.to_csv(path / f"{name}.csv", index=False)
+    return path
+
+
+def otoole_results(solver, solution, config, data_dir, tmp_path):
+    """Result tables of `otoole results <solver> csv <solution> <dir>
+    --input_datafile <data file> <config>`"""
+    importorskip("otoole")
+    from otoole.read_strategies import ReadCsv, ReadDatafile
+    from otoole.results.results import ReadCbc, ReadCplex, ReadGurobi
+    from otoole.write_strategies import WriteCsv, WriteDatafile
+
+    csv_dir = tmp_path / "otoole_data"
+    shutil.copytree(data_dir, csv_dir)
+    data_store.export_csv(csv_dir)
+    inputs, default_values = ReadCsv(user_config=config).read(str(csv_dir))
+    data_file = tmp_path / "model.txt"
+    WriteDatafile(user_config=config).write(inputs, str(data_file),
+                                           default_values)
+
+    input_data, _ = ReadDatafile(user_config=config).read(str(data_file))
+    reader = {"cbc": ReadCbc, "cplex": ReadCplex, "gurobi": ReadGurobi}[solver]
+    results, default_values = reader(user_config=config).read(
+        str(solution), input_data=input_data)
+    results_dir = tmp_path / "otoole_results"
+    WriteCsv(user_config=config).write(results, str(results_dir),
+                                       default_values)
+    return results_dir
+
+
+def read_sorted(path, columns):
+    df = pd.read_csv(path)[columns]
+    return df.sort_values(columns[:-1]).reset_index(drop=True)
+
+
+@mark.parametrize("solver", ["cbc", "gurobi", "cplex"])
+def test_matches_otoole(solver, config, data_dir, tmp_path):
+    solution = tmp_path / "model.sol"
+    SOLUTION_WRITERS[solver](solution)
+    expected_dir = otoole_results(solver, solution, config, data_dir,
+                                  tmp_path)
+    actual_dir = tmp_path / "results"
+    result_tables.main(solver, solution, data_dir, actual_dir, OTOOLE_CONFIG)
+
+    expected = sorted(path.name for path in expected_dir.glob("*.csv"))
+    assert "TotalAnnualTechnologyActivityByMode.csv" in expected
+    for name in expected:
+        columns = list(pd.read_csv(expected_dir / name).columns)
+        assert_frame_equal(read_sorted(actual_dir / name, columns),
+                           read_sorted(expected_dir / name, columns),
+                           check_dtype=False, obj=name)
+
+
+def test_activity_by_mode_per_timeslice(data_dir, tmp_path):
+    solution = tmp_path / "model.sol"
+    write_cbc(solution)
+    results_dir = tmp_path / "results"
+    result_tables.main("cbc", solution, data_dir, results_dir, OTOOLE_CONFIG)
+    df = pd.read_csv(results_dir / "TotalAnnualTechnologyActivityByMode.csv")
+    assert list(df.columns) == result_tables.RESULT_COLUMNS[
+        "TotalAnnualTechnologyActivityByMode"] + ["VALUE"]
+    spv = df.loc[(df["TECHNOLOGY"] == "PWRSPVINDNE01")
+                 & (df["YEAR"] == 2025)]
+    assert spv[["TIMESLICE", "VALUE"]].values.tolist() == [["S1D1", 0.1]]
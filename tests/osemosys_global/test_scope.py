@@ -0,0 +1,115 @@
+"""Module for testing the geographic scope"""
+
+import pandas as pd
+from pandas.testing import assert_frame_equal, assert_series_equal
+from pytest import mark
+
+import scope
+
+
+def baseline_technology_mask(techs, countries, remove_nodes=None):
+    """Technology filter of geographic_filter.py before the code registry"""
+    scope_ = list(countries) + ["INT"]
+    mask = (techs.str[3:6].isin(scope_) |
+            techs.str[6:9].isin(scope_) |
+            techs.str[8:11].isin(scope_))
+    mask &= ~(techs.str.startswith("TRN") &
+              (~(techs.str[3:6].isin(scope_)) |
+               ~(techs.str[8:11].isin(scope_))))
+    if remove_nodes:
+        mask &= ~(techs.str[3:8].isin(remove_nodes) |
+                  techs.str[6:11].isin(remove_nodes) |
+                  techs.str[8:13].isin(remove_nodes))
+    return mask
+
+
+def baseline_fuel_mask(fuels, countries, remove_nodes=None):
+    """Fuel filter of geographic_filter.py before the code registry"""
+    scope_ = list(countries) + ["INT"]
+    mask = (fuels.str[3:6].isin(scope_) |
+            fuels.str[6:9].isin(scope_) |
+            fuels.isin(scope.INTERNATIONAL_FUELS))
+    if remove_nodes:
+        mask &= ~(fuels.str[3:8].isin(remove_nodes) |
+                  fuels.str[6:11].isin(remove_nodes))
+    return mask
+
+
+TECHNOLOGIES = pd.Series([
+    "PWRCOAINDNE01", "PWRSPVINDSO01", "PWRGEOIDNXX01", "PWRGEOGEOXX01",
+    "PWRTRNINDNE", "TRNINDNEINDSO", "TRNINDNENPLXX", "TRNNPLXXBTNXX",
+    "MINCOAIND", "MINGASINT", "PWRCOANPLXX01", "RNWSPVIND",
+    "PWRCOAINDNE01",
+])
+
+FUELS = pd.Series([
+    "COA", "GAS", "SPV", "COAIND", "COAINT", "ELCINDNE01", "ELCINDNE02",
+    "ELCINDSO02", "ELCNPLXX02", "GEOGEO", "GEOIDN",
+])
+
+SCOPES = [
+    (["IND"], None),
+    (["IND", "NPL"], None),
+    (["IND"], ["INDSO"]),
+    (["GEO"], None),
+    (["IND", "GEO"], ["INDNE"]),
+]
+
+
+class TestMasks:
+
+    @mark.parametrize("countries, remove_nodes", SCOPES)
+    def test_technology_mask(self, countries, remove_nodes):
+        actual = scope.technology_mask(TECHNOLOGIES, countries, remove_nodes)
+        expected = baseline_technology_mask(TECHNOLOGIES, countries,
+                                            remove_nodes)
+        assert_series_equal(actual, expected, check_names=False)
+
+    @mark.parametrize("countries, remove_nodes", SCOPES)
+    def test_fuel_mask(self, countries, remove_nodes):
+        actual = scope.fuel_mask(FUELS, countries, remove_nodes)
+        expected = baseline_fuel_mask(FUELS, countries, remove_nodes)
+        assert_series_equal(actual, expected, check_names=False)
+
+    @mark.parametrize("countries, remove_nodes", SCOPES)
+    def test_storage_mask(self, countries, remove_nodes):
+        storages = pd.Series(["SDSINDNE01", "SDSINDSO01", "SDSNPLXX01",
+                              "LDSGEOXX01"])
+        actual = scope.storage_mask(storages, countries, remove_nodes)
+        expected = baseline_technology_mask(storages, countries, remove_nodes)
+        assert_series_equal(actual, expected, check_names=False)
+
+
+class TestFilterTable:
+
+    def test_world_run_unfiltered(self):
+        df = pd.DataFrame({"VALUE": TECHNOLOGIES})
+        assert_frame_equal(scope.filter_table(df, "TECHNOLOGY", []), df)
+
+    def test_parameter_table(self):
+        df = pd.DataFrame({
+            "REGION": "GLOBAL",
+            "TECHNOLOGY": ["PWRCOAINDNE01", "PWRCOANPLXX01", "MINCOAIND"],
+            "FUEL": ["ELCINDNE01", "ELCNPLXX01", "COA"],
+            "VALUE": [1.0, 2.0, 3.0],
+        })
+        actual = scope.filter_table(df, "OutputActivityRatio", ["IND"])
+        assert_frame_equal(actual, df.iloc[[0, 2]])
+
+
+class TestProfiles:
+
+    def test_node_code(self):
+        assert scope.node_code("AS-IND-NE") == "INDNE"
+        assert scope.node_code("AF-AGO") == "AGOXX"
+
+    def test_node_fuels(self):
+        nodes = pd.Series(["AS-IND-NE", "AF-AGO", "INDNE", "AS-IND-NE"])
+        assert scope.node_fuels(nodes).to_list() == [
+            "ELCINDNE02", "ELCAGOXX02", "ELCINDNE02", "ELCINDNE02"]
+
+    def test_profile_columns(self):
+        columns = ["Datetime", "AS-IND-NE", "AS-IND-SO", "AS-NPL", "AF-AGO"]
+        assert scope.profile_columns(columns, []) == columns
+        assert scope.profile_columns(columns, ["IND"], ["INDSO"]) == [
+            "Datetime", "AS-IND-NE"]
@@ -0,0 +1,153 @@
+"""Module for testing that the scope applied while preprocessing leaves
+the scenario tables of geographic_filter.py unchanged.
+
+Each run preprocesses a copy of the project once with the scope pushed down
+to TS_data.py, and once with a world run added to the scenario matrix,
+which turns the push down off as before scope.py. Both are then filtered by
+geographic_filter.py for the scenario.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+from pandas.testing import assert_frame_equal
+from pytest import importorskip, mark
+
+import scope as scope_
+from profiles import DATETIME_FORMAT
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[2] / "workflow" / "scripts"
+
+RESOURCES_DIR = Path(__file__).resolve().parents[2] / "resources"
+
+NODES = ["AS-IND", "AS-IND-NE", "AS-IND-SO", "AS-NPL", "AS-BTN"]
+
+CONFIG = {
+    "scenario": "scoped",
+    "startYear": 2025,
+    "endYear": 2027,
+    "daytype": False,
+    "dayparts": {"D1": [1, 13], "D2": [13, 25]},
+    "seasons": {"S1": [1, 2, 3, 4, 5, 6], "S2": [7, 8, 9, 10, 11, 12]},
+    "timeshift": 0,
+    "data_format": "csv",
+}
+
+TABLES = {
+    "TECHNOLOGY": ["PWRCOAINDNE01", "PWRCOANPLXX01", "PWRSPVBTNXX01",
+                   "TRNINDNEINDSO", "TRNINDSONPLXX"],
+    "FUEL": ["COA", "ELCINDNE01", "ELCINDSO01", "ELCNPLXX01", "ELCBTNXX01"],
+}
+
+
+def write_inputs(project_dir):
+    shutil.copytree(SCRIPTS_DIR / "osemosys_global",
+                    project_dir / "workflow" / "scripts" / "osemosys_global",
+                    ignore=shutil.ignore_patterns("__pycache__", "dashboard",
+                                                  "visualisation"))
+    data_dir = project_dir / "resources" / "data"
+    (data_dir / "custom_nodes").mkdir(parents=True)
+    shutil.copy(RESOURCES_DIR / "data" / "storage_costs.csv", data_dir)
+
+    rng = np.random.default_rng(0)
+    hours = pd.date_range("2015-01-01", "2015-12-31 23:00", freq="h")
+    for file_name in ["All_Demand_UTC_2015.csv", "CSP 2015.csv",
+                      "SolarPV 2015.csv", "Won 2015.csv", "Woff 2015.csv"]:
+        df = pd.DataFrame(np.round(rng.random((len(hours), len(NODES))) * 100,
+                                   3), columns=NODES)
+        df.insert(0, "Datetime", hours.strftime(DATETIME_FORMAT))
+        df.to_csv(data_dir / file_name, index=False, encoding="latin-1")
+    pd.DataFrame(
+        [[f"{node}_Hyd_Capacity Scaler"] + [month * 5.5 for month in range(12)]
+         for node in ["IND-NE", "NPL", "BTN"]],
+        columns=["NAME"] + [f"M{month}" for month in range(1, 13)]).to_csv(
+            data_dir / "Hydro_Monthly_Profiles (15 year average).csv",
+            index=False, encoding="latin-1")
+
+    results_dir = project_dir / "results" / "data"
+    results_dir.mkdir(parents=True)
+    for name, values in TABLES.items():
+        pd.DataFrame({"VALUE": values}).to_csv(results_dir / f"{name}.csv",
+                                               index=False)
+    columns = ["REGION", "TECHNOLOGY", "FUEL", "MODE_OF_OPERATION", "YEAR",
+               "VALUE"]
+    for name in ["InputActivityRatio", "OutputActivityRatio"]:
+        pd.DataFrame([["GLOBAL", "TRNINDNEINDSO", "ELCINDNE01", 1, 2025, 1.0],
+                      ["GLOBAL", "TRNINDSONPLXX", "ELCNPLXX01", 1, 2025, 1.0]],
+                     columns=columns).to_csv(results_dir / f"{name}.csv",
+                                             index=False)
+
+
+def run(project_dir, script, scenario=None):
+    env = dict(os.environ)
+    env.pop("OSEMOSYS_GLOBAL_SCENARIO", None)
+    if scenario:
+        env["OSEMOSYS_GLOBAL_SCENARIO"] = scenario
+    subprocess.run([sys.executable, script], check=True, env=env,
+                   cwd=project_dir / "workflow" / "scripts" / "osemosys_global")
+
+
+def scenario_tables(project_dir, config):
+    """Tables of the scoped scenario after geographic_filter.py"""
+    write_inputs(project_dir)
+    (project_dir / "config").mkdir()
+    with open(project_dir / "config" / "config.yaml", "w") as f:
+        yaml.dump(config, f)
+    run(project_dir, "TS_data.py")
+    run(project_dir, "geographic_filter.py", "scoped")
+    data_dir = project_dir / "results" / "scoped" / "data"
+    return {path.stem: pd.read_csv(path) for path in data_dir.glob("*.csv")}
+
+
+@mark.parametrize("scope, remove_nodes", [
+    ([], None),
+    (["IND"], None),
+    (["IND", "NPL"], ["INDSO"]),
+], ids=["world", "country", "nodes_to_remove"])
+def test_tables_match_geographic_filter(tmp_path, scope, remove_nodes):
+    importorskip("seaborn")
+    config = dict(CONFIG, geographic_scope=scope, nodes_to_remove=remove_nodes)
+    actual = scenario_tables(tmp_path / "pushed_down", config)
+    expected = scenario_tables(tmp_path / "filtered", dict(config, scenarios={
+        "world": {"geographic_scope": []},
+        "scoped": {"geographic_scope": scope,
+                   "nodes_to_remove": remove_nodes}}))
+
+    assert sorted(actual) == sorted(expected)
+    for name, df in expected.items():
+        def ordered(df):
+            return df.sort_values(list(df.columns)).reset_index(drop=True)
+        assert_frame_equal(ordered(actual[name]), ordered(df), obj=name)
+    if not scope:
+        # As before scope.py, a world run has no storage
+        assert expected["STORAGE"].empty
+    else:
+        assert not expected["SpecifiedDemandProfile"].empty
+
+
+@mark.parametrize("scope, remove_nodes", [
+    (["IND"], None),
+    (["IND", "NPL"], ["INDSO"]),
+    (["GEO"], ["INDNE"]),
+], ids=["country", "nodes_to_remove", "category_country"])
+def test_powerplant_scaffold_matches_geographic_filter(scope, remove_nodes):
+    """powerplant_data.py keeps the activity ratio scaffold and the
+    international lines of technology_mask() for the scope covering every
+    scenario, without removing nodes"""
+    techs = ["PWRCOAINDNE01", "PWRGEOIDNXX01", "PWRSPVGEOXX01", "MINCOAIND",
+             "MINGASINT", "PWRTRNINDSO", "TRNINDNEINDSO", "TRNINDSONPLXX",
+             "TRNNPLXXBTNXX", "TRNGEOXXIDNXX"]
+    df = pd.DataFrame({"REGION": "GLOBAL", "TECHNOLOGY": techs,
+                       "FUEL": "ELCINDNE01", "MODE_OF_OPERATION": 1,
+                       "YEAR": 2025, "VALUE": 1.0})
+    pushed_down = df.loc[scope_.technology_mask(df["TECHNOLOGY"], scope)]
+    assert_frame_equal(
+        scope_.filter_table(pushed_down, "InputActivityRatio", scope,
+                            remove_nodes),
+        scope_.filter_table(df, "InputActivityRatio", scope, remove_nodes))
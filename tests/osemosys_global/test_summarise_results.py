@@ -0,0 +1,145 @@
+"""Module for testing summarise_results"""
+
+import itertools
+from types import SimpleNamespace
+
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from pytest import importorskip, mark
+
+importorskip("cartopy")
+import data_store  # noqa: E402
+import summarise_results  # noqa: E402
+
+
+def baseline_filter(df, categories):
+    """renewables_filter and fossil_filter before the code registry"""
+    df = df[~df.TECHNOLOGY.str.contains('TRN')]
+    return df.loc[(df.TECHNOLOGY.str.startswith('PWR')) &
+                  (df.TECHNOLOGY.str[3:6].isin(categories))]
+
+
+RESULTS = pd.DataFrame({
+    "REGION": "GLOBAL",
+    "TECHNOLOGY": ["PWRCOAINDNE01", "PWRSPVINDNE01", "PWRGEOGEOXX01",
+                   "PWRTRNINDNE", "TRNINDNEINDSO", "MINCOAIND",
+                   "PWRWONINDNE01", "PWROCGNPLXX01", "PWRSPVINDNE01"],
+    "YEAR": 2020,
+    "VALUE": range(9),
+})
+
+
+@mark.parametrize("filter_, categories", [
+    (summarise_results.renewables_filter,
+     ['BIO', 'CSP', 'GEO', 'HYD', 'SPV', 'WAS', 'WAV', 'WON', 'WOF']),
+    (summarise_results.fossil_filter,
+     ['COA', 'COG', 'OCG', 'CCG', 'PET', 'OIL', 'OTH']),
+], ids=["renewables", "fossil"])
+def test_filter(filter_, categories):
+    assert_frame_equal(filter_(RESULTS), baseline_filter(RESULTS, categories))
+
+
+def test_srmc_written_without_duals(tmp_path, monkeypatch):
+    paths = SimpleNamespace(scenario_dir=str(tmp_path),
+                            scenario_result_summaries_dir=str(tmp_path),
+                            get_scenario_name=lambda: "baseline")
+    monkeypatch.setattr(summarise_results, "ConfigPaths", lambda: paths)
+    monkeypatch.setattr(summarise_results, "load_config",
+                        lambda: {"solver": "cbc"})
+
+    summarise_results.marginal_costs({})
+
+    df = pd.read_csv(tmp_path / "SRMC.csv")
+    assert df.empty
+    assert list(df.columns) == summarise_results.SRMC_COLUMNS
+
+
+def baseline_srmc(attr_file, seasons, dayparts):
+    """SRMC table of marginal_costs before duals.py"""
+    duals = []
+    with open(attr_file) as sol_file:
+        for line in sol_file:
+            if line.startswith('EBa11'):
+                ts = line.split(' ')[0].split(',')[1]
+                fuel = line.split(' ')[0].split(',')[2]
+                year = int(line.split(' ')[0].split(',')[3].split(')')[0])
+                value = float(line.split(' ')[1])
+                if fuel.startswith('ELC'):
+                    if fuel.endswith('02'):
+                        duals.append([ts, fuel, year, round(value, 2)])
+    df_duals = pd.DataFrame(duals, columns=['TS', 'FUEL', 'YEAR', 'VALUE'])
+    df_duals['SEASON'] = df_duals['TS'].str[:2]
+    df_duals['DAYPART'] = df_duals['TS'].str[2:]
+    df_duals_final = pd.DataFrame(
+        list(itertools.product(df_duals['FUEL'].unique(), range(1, 13),
+                               range(1, 25), df_duals['YEAR'].unique())),
+        columns=['FUEL', 'MONTH', 'HOUR', 'YEAR'])
+    seasons_dict = {month: s for s, months in seasons.items()
+                    for month in months}
+    dayparts_dict = {}
+    for dp, hours in dayparts.items():
+        for hour in range(hours[0], hours[1]):
+            dayparts_dict[hour+1] = dp
+    df_duals_final['SEASON'] = df_duals_final['MONTH'].map(seasons_dict)
+    df_duals_final['DAYPART'] = df_duals_final['HOUR'].map(dayparts_dict)
+    df_duals_final = pd.merge(df_duals_final, df_duals, how='left',
+                              on=['FUEL', 'SEASON', 'DAYPART', 'YEAR'])
+    df_duals_final['NODE'] = df_duals_final['FUEL'].str[3:8]
+    df_duals_final = df_duals_final[['NODE', 'MONTH', 'HOUR', 'YEAR', 'VALUE']]
+    df_duals_final['VALUE'] = df_duals_final['VALUE'].mul(3.6)
+    return df_duals_final
+
+
+def test_srmc_matches_baseline(tmp_path, monkeypatch):
+    seasons = {"S1": [1, 2, 3, 4, 5, 6], "S2": [7, 8, 9, 10, 11, 12]}
+    dayparts = {"D1": [1, 7], "D2": [7, 13], "D3": [13, 19], "D4": [19, 25]}
+    attr_file = tmp_path / "baseline.attr"
+    with open(attr_file, "w") as f:
+        f.write("# Constr Pi\n")
+        for year, value in [(2025, 12.345), (2026, 1.0)]:
+            for i, ts in enumerate(["S1D1", "S1D2", "S1D3", "S1D4", "S2D1",
+                                    "S2D2", "S2D3", "S2D4"]):
+                for fuel in ["ELCINDNE02", "ELCINDSO02", "ELCINDNE01"]:
+                    f.write(f"EBa11_EnergyBalanceEachTS5"
+                            f"(GLOBAL,{ts},{fuel},{year}) {value * i}\n")
+    paths = SimpleNamespace(scenario_dir=str(tmp_path),
+                            scenario_result_summaries_dir=str(tmp_path),
+                            get_scenario_name=lambda: "baseline")
+    config = {"solver": "gurobi", "seasons": seasons, "dayparts": dayparts,
+              "timeshift": 0, "daytype": False}
+    monkeypatch.setattr(summarise_results, "ConfigPaths", lambda: paths)
+    monkeypatch.setattr(summarise_results, "load_config", lambda: config)
+    monkeypatch.setattr(data_store, "_DATA_FORMAT", "csv")
+    monkeypatch.setattr(data_store, "_MEMORY", None)
+
+    summarise_results.marginal_costs({})
+
+    sort = ["NODE", "YEAR", "MONTH", "HOUR"]
+    actual = pd.read_csv(tmp_path / "SRMC.csv")
+    expected = baseline_srmc(attr_file, seasons, dayparts)
+    assert_frame_equal(actual.sort_values(sort).reset_index(drop=True),
+                       expected.sort_values(sort).reset_index(drop=True))
+
+
+def test_read_data_from_parquet(tmp_path, monkeypatch):
+    importorskip("pyarrow")
+    monkeypatch.setattr(data_store, "_DATA_FORMAT", "parquet")
+    monkeypatch.setattr(data_store, "_MEMORY", None)
+    technology = pd.DataFrame({"VALUE": ["PWRCOAINDNE01", "PWRSPVINDNE01"]})
+    variable_cost = pd.DataFrame({
+        "REGION": "GLOBAL", "TECHNOLOGY": ["PWRCOAINDNE01", "PWRSPVINDNE01"],
+        "MODE_OF_OPERATION": 1, "YEAR": 2020, "VALUE": [2.5, 0.0]})
+    data_store.write_table(technology, tmp_path / "TECHNOLOGY.csv")
+    data_store.write_table(variable_cost, tmp_path / "VariableCost.csv")
+    assert not list(tmp_path.glob("*.csv"))
+    # A result table written by otoole
+    RESULTS.to_csv(tmp_path / "ProductionByTechnology.csv", index=False)
+
+    actual = summarise_results.read_data(tmp_path)
+
+    assert sorted(actual) == ["ProductionByTechnology", "TECHNOLOGY",
+                              "VariableCost"]
+    assert_frame_equal(actual["TECHNOLOGY"], technology)
+    assert_frame_equal(actual["VariableCost"], variable_cost,
+                       check_dtype=False)
+    assert_frame_equal(actual["ProductionByTechnology"], RESULTS)
@@ -0,0 +1,138 @@
+"""Module for testing the timeslice mapper"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pytest import importorskip, mark
+
+import configuration
+import representative_days
+import timeslices
+import weather_years
+from timeslices import TimesliceMapper
+from utils import apply_timeshift
+
+SEASONS = {"S1": [1, 2, 3, 4], "S2": [5, 6, 7, 8], "S3": [9, 10, 11, 12]}
+
+DAYPARTS = {"D1": [1, 7], "D2": [7, 13], "D3": [13, 19], "D4": [19, 1]}
+
+
+def baseline_timeshift(x, timeshift):
+    """apply_timeshift before it was vectorized"""
+    x += timeshift
+    if x > 23:
+        return x - 24
+    elif x < 0:
+        return x + 24
+    return x
+
+
+def baseline_timeslices(seasons, dayparts, timeshift, daytype):
+    """Per-hour timeslice assignment of TS_data.py before the mapper"""
+    df = pd.DataFrame({"Datetime": pd.date_range("2015-01-01", periods=8760,
+                                                 freq="H")})
+    season_of_month = {m: s for s, months in seasons.items() for m in months}
+    df["Season"] = df["Datetime"].dt.month.map(season_of_month)
+    df["Day-of-week"] = np.where(df["Datetime"].dt.dayofweek < 5, "WD", "WE")
+    df["Hour"] = df["Datetime"].dt.hour.map(
+        lambda x: baseline_timeshift(int(x), timeshift))
+    bounds = {dp: [baseline_timeshift(start, timeshift),
+                   baseline_timeshift(end, timeshift)]
+              for dp, (start, end) in dayparts.items()}
+    for daypart, (start, end) in bounds.items():
+        if start > end:  # loops over 24hrs
+            in_daypart = (df["Hour"] >= start) | (df["Hour"] < end)
+        else:
+            in_daypart = (df["Hour"] >= start) & (df["Hour"] < end)
+        df.loc[in_daypart, "Daypart"] = daypart
+    if daytype:
+        return df["Season"] + df["Day-of-week"] + df["Daypart"]
+    return df["Season"] + df["Daypart"]
+
+
+@mark.parametrize("timeshift", range(-11, 13))
+def test_apply_timeshift(timeshift):
+    hours = np.arange(0, 25)
+    expected = [baseline_timeshift(int(x), timeshift) for x in hours]
+    assert [apply_timeshift(int(x), timeshift) for x in hours] == expected
+    assert apply_timeshift(hours, timeshift).tolist() == expected
+
+
+@mark.parametrize("timeshift, daytype", [
+    (0, False), (0, True), (-5, False), (8, True), (12, False),
+])
+def test_assign_matches_per_hour_mapping(timeshift, daytype):
+    mapper = TimesliceMapper(SEASONS, DAYPARTS, timeshift, daytype, 2015)
+    df = pd.DataFrame({"Datetime": pd.date_range("2015-01-01", periods=8760,
+                                                 freq="H")})
+    actual = mapper.assign(df)["TIMESLICE"]
+    expected = baseline_timeslices(SEASONS, DAYPARTS, timeshift, daytype)
+    assert actual.tolist() == expected.tolist()
+
+
+def test_aggregate():
+    mapper = TimesliceMapper(SEASONS, DAYPARTS)
+    df = pd.DataFrame({"Datetime": pd.date_range("2015-01-01", periods=8760,
+                                                 freq="H"),
+                       "VALUE": 1.0})
+    df.loc[df["Datetime"].dt.month <= 4, "VALUE"] = 2.0
+    actual = mapper.aggregate(df, how="sum")["VALUE"]
+    assert actual["S1D1"] == 2.0 * 6 * 120
+    assert actual["S2D2"] == 6 * 123
+    assert list(actual.index) == sorted(mapper.timeslices)
+
+
+def test_from_days():
+    days = pd.DataFrame({"DAY": range(1, 366),
+                         "SEASON": ["S1"] * 100 + ["S2"] * 265})
+    mapper = TimesliceMapper.from_days(days, DAYPARTS)
+    assert mapper.seasons == ["S1", "S2"]
+    assert mapper.season_days.tolist() == [100, 265]
+    assert mapper.daytypes == [""]
+
+
+def test_single_module_instances():
+    """The scripts share one configuration and mapper cache"""
+    assert timeslices.load_config is configuration.load_config
+    assert representative_days.TimesliceMapper is TimesliceMapper
+    assert weather_years.TimesliceMapper is TimesliceMapper
+
+
+def test_from_data():
+    config = {"seasons": SEASONS, "dayparts": DAYPARTS, "timeshift": 2,
+              "daytype": False}
+    days = pd.DataFrame({"DAY": range(1, 366),
+                         "SEASON": ["S1"] * 100 + ["S2"] * 265})
+    mapper = TimesliceMapper.from_data({"RepresentativeDays": days}, config)
+    assert mapper.seasons == ["S1", "S2"]
+    assert mapper.season_days.tolist() == [100, 265]
+
+    expected = TimesliceMapper(SEASONS, DAYPARTS, 2)
+    for data in [{}, {"RepresentativeDays": days.iloc[:0]}]:
+        mapper = TimesliceMapper.from_data(data, config)
+        assert mapper.timeslices == expected.timeslices
+        assert (mapper.timeslice == expected.timeslice).all()
+
+
+def test_package_imports():
+    """The plotting utilities import the shared modules within the
+    osemosys_global package, with only workflow/scripts on the path"""
+    importorskip("cartopy")
+    scripts_dir = Path(timeslices.__file__).resolve().parents[1]
+    code = (
+        "import sys\n"
+        "import osemosys_global.visualisation.utils\n"
+        "print(' '.join(sorted(sys.modules)))\n")
+    modules = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True,
+        text=True, cwd=scripts_dir.parent,
+        env=dict(os.environ, PYTHONPATH=str(scripts_dir))).stdout.split()
+    assert "osemosys_global.timeslices" in modules
+    assert "osemosys_global.configuration" in modules
+    for name in ["configuration", "utils", "timeslices", "data_store",
+                 "osemosys_global.powerplant_data"]:
+        assert name not in modules
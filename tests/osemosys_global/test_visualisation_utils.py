@@ -0,0 +1,36 @@
+"""Module for testing visualisation utils"""
+
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from pytest import importorskip, mark
+
+importorskip("cartopy")
+import osemosys_global.visualisation.utils as utils  # noqa: E402
+
+
+def baseline_powerplant_filter(df, country=None):
+    """powerplant_filter before the code registry"""
+    filtered_df = df[~df.TECHNOLOGY.str.contains('TRN')]
+    filtered_df = filtered_df.loc[filtered_df.TECHNOLOGY.str[0:3] == 'PWR']
+    filtered_df['TYPE'] = filtered_df.TECHNOLOGY.str[3:6]
+    filtered_df['COUNTRY'] = filtered_df.TECHNOLOGY.str[6:9]
+    if country:
+        filtered_df = filtered_df.loc[filtered_df['COUNTRY'] == country]
+    filtered_df['LABEL'] = filtered_df['TYPE']
+    return filtered_df.drop(['TECHNOLOGY', 'TYPE', 'COUNTRY'], axis=1)
+
+
+class TestPowerplantFilter:
+
+    df = pd.DataFrame({
+        "TECHNOLOGY": ["PWRCOAINDNE01", "PWRSPVNPLXX01", "PWRTRNINDNE",
+                       "TRNINDNEINDSO", "MINCOAIND", "PWRCOAINDNE01"],
+        "YEAR": [2020, 2020, 2020, 2020, 2020, 2021],
+        "VALUE": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+    })
+
+    @mark.parametrize("country", [None, "IND"], ids=["system", "country"])
+    def test_powerplant_filter(self, country):
+        actual = utils.powerplant_filter(self.df.copy(), country)
+        expected = baseline_powerplant_filter(self.df.copy(), country)
+        assert_frame_equal(actual, expected)
@@ -0,0 +1,175 @@
+"""Module for testing the weather year profiles against the single 2015
+profiles of TS_data.py"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from pytest import fixture, mark, raises
+
+import profiles
+import weather_years
+from profiles import DATETIME_FORMAT
+from weather_years import WeatherYears, combine, combine_demand
+
+SEASONS = {"S1": [1, 2, 3, 4], "S2": [5, 6, 7, 8], "S3": [9, 10, 11, 12]}
+
+DAYPARTS = {"D1": [1, 7], "D2": [7, 13], "D3": [13, 19], "D4": [19, 1]}
+
+TIMESLICES = {"seasons": SEASONS, "dayparts": DAYPARTS, "timeshift": 2,
+              "daytype": False}
+
+NODES = ["AF-AGO", "AS-IND-NE", "AS-IND-SO"]
+
+
+def write_year(input_data_dir, year):
+    rng = np.random.default_rng(year)
+    hours = pd.date_range(f"{year}-01-01", f"{year}-12-31 23:00", freq="h")
+    datetime = hours.strftime(DATETIME_FORMAT)
+    for file_name in [weather_years.DEMAND_FILE,
+                      *weather_years.RE_FILES.values()]:
+        df = pd.DataFrame(np.round(rng.random((len(hours), len(NODES))) * 100,
+                                   3), columns=NODES)
+        df.insert(0, "Datetime", datetime)
+        df.to_csv(input_data_dir / file_name.format(year=year), index=False,
+                  encoding="latin-1")
+
+
+@fixture
+def input_data_dir(tmp_path, monkeypatch):
+    paths = SimpleNamespace(cache_dir=tmp_path / "cache")
+    monkeypatch.setattr(profiles, "ConfigPaths", lambda: paths)
+    monkeypatch.setattr(weather_years, "ConfigPaths", lambda: paths)
+    monkeypatch.setattr(profiles, "_PROFILES", {})
+    path = tmp_path / "data"
+    path.mkdir()
+    write_year(path, 2015)
+    pd.DataFrame([
+        [f"{name}_Hyd_Capacity Scaler"] + [month * 5.5 for month in range(12)]
+        for name in ["AGO", "IND-NE", "BRA-J1"]
+    ] + [["AGO_Hyd_Other", *range(12)]],
+        columns=["NAME"] + [f"M{month}" for month in range(1, 13)]).to_csv(
+            path / weather_years.HYDRO_FILE, index=False, encoding="latin-1")
+    return path
+
+
+def weather(input_data_dir):
+    return WeatherYears(input_data_dir, input_data_dir / "custom_nodes", [],
+                        [], [], TIMESLICES)
+
+
+def baseline_profiles(input_data_dir):
+    """Profiles of TS_data.py per timeslice before weather_years.py"""
+    def read(file_name):
+        df = pd.read_csv(input_data_dir / file_name.format(year=2015),
+                         encoding="latin-1")
+        df["Datetime"] = pd.to_datetime(df["Datetime"],
+                                        format=DATETIME_FORMAT)
+        return df
+
+    demand_df = read(weather_years.DEMAND_FILE)
+    months = {m: s for s, months in SEASONS.items() for m in months}
+    demand_df["Season"] = demand_df["Datetime"].dt.month.map(months)
+    demand_df["Hour"] = (demand_df["Datetime"].dt.hour + 2) % 24
+    for daypart, (start, end) in DAYPARTS.items():
+        start, end = (start + 2) % 24, (end + 2) % 24
+        if start > end:
+            in_daypart = (demand_df["Hour"] >= start) | (
+                demand_df["Hour"] < end)
+        else:
+            in_daypart = (demand_df["Hour"] >= start) & (
+                demand_df["Hour"] < end)
+        demand_df.loc[in_daypart, "Daypart"] = daypart
+    demand_df["TIMESLICE"] = demand_df["Season"] + demand_df["Daypart"]
+    datetime_ts_df = demand_df[["Datetime", "TIMESLICE"]]
+
+    def by_timeslice(df, how):
+        df = df.set_index("Datetime").join(
+            datetime_ts_df.set_index("Datetime"), on="Datetime")
+        df = pd.melt(df.reset_index(drop=True), id_vars="TIMESLICE",
+                     var_name="node", value_name="VALUE")
+        return df.groupby(["TIMESLICE", "node"], as_index=False).agg(how)
+
+    spv_df = read(weather_years.RE_FILES["SPV"])
+    hyd_df = pd.read_csv(input_data_dir / weather_years.HYDRO_FILE,
+                         encoding="latin-1")
+    hyd_df = hyd_df.loc[hyd_df["NAME"].str.endswith("Capacity Scaler")]
+    hyd_df["NAME"] = hyd_df["NAME"].str.split("_").str[0]
+    hyd_df = hyd_df.loc[~hyd_df["NAME"].isin(["BRA-J1", "BRA-J2", "BRA-J3"])]
+    hyd_df = hyd_df.set_index("NAME").T.reset_index()
+    hyd_df.rename(columns={"index": "MONTH"}, inplace=True)
+    hyd_df["MONTH"] = hyd_df["MONTH"].str.replace("M", "").astype(int)
+    hyd_df_processed = pd.DataFrame({"Datetime": spv_df["Datetime"]})
+    hyd_df_processed["MONTH"] = spv_df["Datetime"].dt.strftime(
+        DATETIME_FORMAT).str.split("/").str[1].astype(int)
+    hyd_df_processed = pd.merge(hyd_df_processed, hyd_df, how="left",
+                                on="MONTH").drop(columns="MONTH")
+    node_region_dict = {"-".join(x.split("-")[1:]): x for x in NODES}
+    hyd_df_processed.rename(columns=node_region_dict, inplace=True)
+
+    expected = {"DEMAND": by_timeslice(demand_df[["Datetime"] + NODES], "sum"),
+                "HYD": by_timeslice(hyd_df_processed, "mean")}
+    for name, file_name in weather_years.RE_FILES.items():
+        expected[name] = by_timeslice(read(file_name), "mean")
+    return expected
+
+
+def test_aggregate_matches_baseline(input_data_dir):
+    actual = weather(input_data_dir).aggregate(2015)
+    expected = baseline_profiles(input_data_dir)
+    assert list(actual) == ["DEMAND", "HYD", *weather_years.RE_FILES]
+    for name, df in expected.items():
+        # Profiles are stored as float32
+        assert_frame_equal(actual[name], df, check_dtype=False, rtol=1e-6,
+                           obj=name)
+    assert set(actual["HYD"]["node"]) == {"AF-AGO", "AS-IND-NE"}
+
+
+@mark.parametrize("statistic", ["mean", "min", "max", "worst", "p10"])
+def test_single_year_unchanged(input_data_dir, statistic):
+    profiles_2015 = weather(input_data_dir).load([2015])
+    for name, (df,) in profiles_2015.items():
+        assert_frame_equal(combine([df], statistic), df, check_dtype=False,
+                           obj=name)
+    demand = profiles_2015["DEMAND"][0]
+    assert_frame_equal(combine_demand([demand], statistic), demand,
+                       check_dtype=False)
+
+
+def test_combine():
+    frames = [pd.DataFrame({"TIMESLICE": ["S1D1", "S1D2"], "node": "AF-AGO",
+                            "VALUE": values})
+              for values in [[1.0, 4.0], [3.0, 0.0], [2.0, 2.0]]]
+    assert combine(frames, "mean")["VALUE"].tolist() == [2.0, 2.0]
+    assert combine(frames, "worst")["VALUE"].tolist() == [1.0, 0.0]
+    assert combine(frames, "p50")["VALUE"].tolist() == [2.0, 2.0]
+    # The highest share of demand, scaled to the mean annual demand of 4.0
+    demand = combine_demand(frames, "worst")
+    assert demand["VALUE"].tolist() == [4.0 * 1.0 / 1.8, 4.0 * 0.8 / 1.8]
+    with raises(ValueError):
+        combine(frames, "median")
+
+
+def test_years_cached(input_data_dir, monkeypatch):
+    write_year(input_data_dir, 2016)
+    write_year(input_data_dir, 2017)
+    pooled = weather(input_data_dir).load([2016, 2017])
+    assert_frame_equal(pooled["SPV"][0],
+                       weather(input_data_dir).aggregate(2016)["SPV"])
+    aggregated = []
+    original = WeatherYears.aggregate
+
+    def aggregate(self, year):
+        aggregated.append(year)
+        return original(self, year)
+    monkeypatch.setattr(WeatherYears, "aggregate", aggregate)
+    actual = weather(input_data_dir).load([2015, 2016, 2017])
+    assert aggregated == [2015]
+    assert_frame_equal(actual["SPV"][1], pooled["SPV"][0])
+
+    # Other timeslices are aggregated again
+    other = WeatherYears(input_data_dir, input_data_dir / "custom_nodes", [],
+                         [], [], dict(TIMESLICES, timeshift=0))
+    other.load([2015])
+    assert aggregated == [2015, 2015]
@@ -0,0 +1,86 @@
+"""Module for testing the workbook cache against pd.read_excel"""
+
+from types import SimpleNamespace
+
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from pytest import fixture, importorskip, mark, raises
+
+import workbooks
+
+
+@fixture
+def workbook(tmp_path, monkeypatch):
+    importorskip("openpyxl")
+    monkeypatch.setattr(workbooks, "ConfigPaths",
+                        lambda: SimpleNamespace(cache_dir=tmp_path / "cache"))
+    path = tmp_path / "PLEXOS_World_2015_Gold_V1.1.xlsx"
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame({
+            "child_object": ["AS-IND-NE", "AS-IND-SO", "EU-FRA"],
+            "property": ["Load", "Load", "Max Capacity"],
+            "value": [1.5, 2, 3.25],
+            "band_id": [1, 1, None],
+        }).to_excel(writer, sheet_name="Properties", index=False)
+        pd.DataFrame({
+            "parent_object": ["AS-IND", "AS-IND"],
+            "child_object": ["AS-IND-NE", "AS-IND-SO"],
+        }).to_excel(writer, sheet_name="Memberships", index=False)
+        pd.DataFrame([[2020, 2030], [1, 2]]).to_excel(
+            writer, sheet_name="Years", index=False, header=False)
+    return path
+
+
+@mark.parametrize("sheet_name, kwargs", [
+    ("Properties", {}),
+    ("Properties", {"usecols": "A:C"}),
+    ("Memberships", {}),
+    (1, {}),
+    # Integer column names, cached as a pickle
+    ("Years", {"header": None}),
+])
+def test_matches_read_excel(workbook, sheet_name, kwargs):
+    expected = pd.read_excel(workbook, sheet_name=sheet_name, **kwargs)
+    assert_frame_equal(workbooks.read_excel(workbook, sheet_name, **kwargs),
+                       expected)
+    # Read again from the cache
+    assert_frame_equal(workbooks.read_excel(workbook, sheet_name, **kwargs),
+                       expected)
+
+
+@mark.parametrize("sheet_name", [None, ["Memberships", 0]])
+def test_sheets_match_read_excel(workbook, sheet_name, monkeypatch):
+    expected = pd.read_excel(workbook, sheet_name=sheet_name)
+    actual = workbooks.read_excel(workbook, sheet_name)
+    assert list(actual) == list(expected)
+    for name, df in expected.items():
+        assert_frame_equal(actual[name], df)
+
+    def parse(*args, **kwargs):
+        raise AssertionError("workbook parsed again")
+    monkeypatch.setattr(workbooks.pd, "read_excel", parse)
+    monkeypatch.setattr(workbooks.pd, "ExcelFile", parse)
+    cached = workbooks.read_excel(workbook, sheet_name)
+    assert list(cached) == list(expected)
+    for name, df in expected.items():
+        assert_frame_equal(cached[name], df)
+    # Each sheet is cached on its own
+    assert_frame_equal(workbooks.read_excel(workbook, "Memberships"),
+                       expected["Memberships"])
+
+
+def test_sheet_parsed_once(workbook, monkeypatch):
+    expected = workbooks.read_excel(workbook, "Memberships")
+
+    def read_excel(*args, **kwargs):
+        raise AssertionError("workbook parsed again")
+    monkeypatch.setattr(workbooks.pd, "read_excel", read_excel)
+    assert_frame_equal(workbooks.read_excel(workbook, "Memberships"),
+                       expected)
+    with raises(AssertionError):
+        workbooks.read_excel(workbook, "Properties")
+
+
+def test_missing_workbook(tmp_path):
+    with raises(FileNotFoundError):
+        workbooks.read_excel(tmp_path / "missing.xlsx")
@@ -16,19 +16,35 @@ rule geographic_filter:
     message:
         'Applying geographic filter...'
     input: 
-        csv_files = expand('results/data/{osemosys_file}', osemosys_file = osemosys_files),
+        csv_files = data_files('results/data', osemosys_files),
     params:
-        geographic_scope = config['geographic_scope']
+        geographic_scope = lambda wildcards: scenario_config(wildcards.scenario, 'geographic_scope'),
+        nodes_to_remove = lambda wildcards: scenario_config(wildcards.scenario, 'nodes_to_remove'),
     output:
-        csv_files = expand('results/{{scenario}}/data/{osemosys_file}', osemosys_file = osemosys_files),
+        csv_files = data_files('results/{scenario}/data', osemosys_files),
         # datapackage = 'results/{scenario}/datapackage.json'
     # conda:
     #     '../envs/data_processing.yaml'
     log:
         log = 'results/{scenario}/logs/geographicFilter.log'
     shell:
+        'OSEMOSYS_GLOBAL_SCENARIO={wildcards.scenario} '
         'python workflow/scripts/osemosys_global/geographic_filter.py 2> {log}'
 
+if DATA_FORMAT != 'csv':
+
+    rule export_csv:
+        message:
+            'Exporting CSV files for otoole...'
+        input:
+            data_files('results/{scenario}/data', osemosys_files),
+        output:
+            csv_files = expand('results/{{scenario}}/data/{osemosys_file}', osemosys_file = osemosys_files),
+        log:
+            log = 'results/{scenario}/logs/export_csv.log'
+        shell:
+            'python workflow/scripts/osemosys_global/data_store.py to_csv results/{wildcards.scenario}/data 2> {log}'
+
 rule copy_otoole_confg:
     message:
         'Copying otoole configuration file...'
@@ -53,24 +69,27 @@ rule otoole_convert:
     message:
         'Creating data file...'
     params:
-        csv_dir = 'results/{scenario}/data/'
+        data_dir = 'results/{scenario}/data'
     input:
         #datapackage = 'results/{scenario}/datapackage.json',
         otoole_config = 'results/{scenario}/otoole.yaml',
-        csv_files = expand('results/{{scenario}}/data/{osemosys_file}', osemosys_file = osemosys_files),
+        csv_files = data_files('results/{scenario}/data', osemosys_files),
     output:
         data_file = 'results/{scenario}/{scenario}.txt'
     log:
         log = 'results/{scenario}/logs/otoole_convert.log'
     shell:
         #'otoole convert datapackage datafile {input.datapackage} {output} 2> {log}'
-        'otoole convert csv datafile {params.csv_dir} {output} {input.otoole_config} 2> {log}'
+        'python workflow/scripts/osemosys_global/datafile.py {params.data_dir} {input.otoole_config} {output} 2> {log}'
 
 rule preprocess_data_file:
     message:
         'Preprocessing data file...'
+    params:
+        data_dir = 'results/{scenario}/data'
     input:
-        data_file = 'results/{scenario}/{scenario}.txt'
+        otoole_config = 'results/{scenario}/otoole.yaml',
+        csv_files = data_files('results/{scenario}/data', osemosys_files),
     output:
         data_file = 'results/{scenario}/PreProcessed_{scenario}.txt'
     #conda:
@@ -78,7 +97,7 @@ rule preprocess_data_file:
     log:
         log = 'results/{scenario}/logs/preprocess_data_file.log'
     shell:
-        'python resources/preprocess_data.py otoole {input} {output} 2> {log}'
+        'python workflow/scripts/osemosys_global/datafile.py {params.data_dir} {input.otoole_config} {output} --mode-sets 2> {log}'
 
 rule create_lp_file:
     message:
@@ -95,12 +114,13 @@ rule create_lp_file:
 
 rule solve_lp:
     message:
-        'Solving model via {config[solver]}...'
+        'Solving {wildcards.scenario} via {params.solver}...'
     input:
         lp_file = 'results/{scenario}/{scenario}.lp'
     output:
         solution = 'results/{scenario}/{scenario}.sol',
     params:
+        solver = lambda wildcards: scenario_config(wildcards.scenario, 'solver'),
         json = 'results/{scenario}/{scenario}.json',
         ilp = 'results/{scenario}/{scenario}.ilp',
         duals = 'results/{scenario}/{scenario}.attr'
@@ -108,10 +128,10 @@ rule solve_lp:
         log = 'results/{scenario}/logs/solve_lp.log'
     shell: 
         '''
-        if [ {config[solver]} = gurobi ]
+        if [ {params.solver} = gurobi ]
         then
           gurobi_cl Method=2 ResultFile={output.solution} ResultFile={params.duals} ResultFile={params.json} ResultFile={params.ilp} {input.lp_file}
-        elif [ {config[solver]} = cplex ]
+        elif [ {params.solver} = cplex ]
         then
           cplex -c "read {input.lp_file}" "optimize" "write {output.solution}"
         else
@@ -123,22 +143,11 @@ rule transform_cplex:
     message:
         'Transforming cplex results...'
     input:
-        solution = 'results/{scenario}/{scenario}.sol'
-    output: 
-        transform = 'results/{scenario}/{scenario}_transform.sol'
-    log:
-        log = 'results/{scenario}/logs/transform_cplex.log'
-    shell: 
-        'python resources/cplex_transform.py {input.solution} {output.transform} 2> {log}'
-
-rule sort_cplex:
-    message:
-        'Sorting cplex results...'
-    input:
-        transform = 'results/{scenario}/{scenario}_transform.sol'
+        solution = 'results/{scenario}/{scenario}.sol',
+        data_file = 'results/{scenario}/{scenario}.txt'
     output: 
         sort = 'results/{scenario}/{scenario}_sort.sol'
     log:
-        log = 'results/{scenario}/logs/sort_cplex.log'
+        log = 'results/{scenario}/logs/transform_cplex.log'
     shell: 
-        'sort {input.transform} > {output.sort} 2> {log}'
\ No newline at end of file
+        'python resources/cplex_transform.py {input.solution} {output.sort} {input.data_file} 2> {log}'
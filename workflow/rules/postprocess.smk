@@ -37,13 +37,14 @@ result_figures = [
 ]
 
 result_summaries = [
-    'Metrics'
+    'Metrics',
+    'SRMC'
 ]
 
 # imput functions
 
 def solver_file_type(wildcards):
-    if config['solver'] == 'cplex':
+    if scenario_config(wildcards.scenario, 'solver') == 'cplex':
         return 'results/{scenario}/{scenario}_sort.sol'
     else: 
         return 'results/{scenario}/{scenario}.sol'
@@ -55,8 +56,12 @@ rule otoole_results:
         'Generating result csv files...'
     input:
         solution_file = solver_file_type,
-        pre_process_file = 'results/{scenario}/{scenario}.txt',
         otoole_config = 'results/{scenario}/otoole.yaml',
+        data_files = data_files('results/{scenario}/data', osemosys_files),
+    params:
+        solver = lambda wildcards: scenario_config(wildcards.scenario, 'solver'),
+        data_dir = 'results/{scenario}/data',
+        results_dir = 'results/{scenario}/results',
     output:
         expand('results/{{scenario}}/results/{result_file}', result_file = result_files),
     # conda:
@@ -65,10 +70,9 @@ rule otoole_results:
         log = 'results/{scenario}/logs/otoole_results.log'
     shell: 
         '''
-        otoole results {config[solver]} csv \
-        {input.solution_file} results/{wildcards.scenario}/results \
-        --input_datafile {input.pre_process_file} \
-        {input.otoole_config}
+        python workflow/scripts/osemosys_global/result_tables.py \
+        {params.solver} {input.solution_file} {params.data_dir} \
+        {params.results_dir} {input.otoole_config} \
         2> {log} 
         '''
 
@@ -77,6 +81,7 @@ rule visualisation:
         'Generating result figures...'
     input:
         csv_files = expand('results/{{scenario}}/results/{result_file}', result_file = result_files),
+        data_files = data_files('results/{scenario}/data', osemosys_files),
     params:
         # start_year = config['startYear'],
         # end_year = config['endYear'],
@@ -88,8 +93,8 @@ rule visualisation:
         result_data = "results/{scenario}/results/",
         scenario_figs_dir = "results/{scenario}/figures/",
         cost_line_expansion_xlsx = "'resources/data/Costs Line expansion.xlsx'",
-        countries = config['geographic_scope'],
-        results_by_country = config['results_by_country'],
+        countries = lambda wildcards: scenario_config(wildcards.scenario, 'geographic_scope'),
+        results_by_country = lambda wildcards: scenario_config(wildcards.scenario, 'results_by_country'),
         years = [config['endYear']],
     output:
         expand('results/{{scenario}}/figures/{result_figure}.html', result_figure = result_figures)
@@ -103,6 +108,7 @@ rule summarise_results:
         'Generating summary of results...'
     input:
         csv_files = expand('results/{{scenario}}/results/{result_file}', result_file = result_files),
+        data_files = data_files('results/{scenario}/data', osemosys_files),
     params:
         start_year = config['startYear'],
         end_year = config['endYear'],
@@ -114,4 +120,5 @@ rule summarise_results:
     log:
         log = 'results/{scenario}/logs/summarise_results.log'
     shell: 
+        'OSEMOSYS_GLOBAL_SCENARIO={wildcards.scenario} '
         'python workflow/scripts/osemosys_global/summarise_results.py 2> {log}'
\ No newline at end of file
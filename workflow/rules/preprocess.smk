@@ -10,14 +10,8 @@ configfile: 'config/config.yaml'
 #osemosys_files.remove('default_values.csv') #taken form /resources
 osemosys_files = os.listdir('resources/otoole/data')
 
-demand_figures = [
-    'South America',
-    'Oceania',
-    'North America',
-    'Europe',
-    'Asia',
-    'Africa'
-]
+# weather years of the hourly profiles, see weather_years.py
+weather_years = config.get('weather_years') or [2015]
 
 # output script files
 
@@ -69,6 +63,12 @@ demand_files = [
     'SpecifiedAnnualDemand.csv'
     ]
 
+# data of the demand figures, see demand_figures.py
+demand_figure_files = [
+    'DemandRegression.csv',
+    'DemandRegressionProjections.csv'
+    ]
+
 emission_files = [
     'EmissionActivityRatio.csv',
     'EmissionsPenalty.csv',
@@ -122,50 +122,57 @@ rule powerplant:
         end_year = config['endYear'],
         invest_techs = config['no_invest_technologies']
     output:
-        csv_files = expand('results/data/{output_file}', output_file = power_plant_files)
+        csv_files = data_files('results/data', power_plant_files)
     log:
         log = 'results/data/logs/powerplant.log'
     shell:
-        'python workflow/scripts/osemosys_global/powerplant_data.py 2> {log}'
+        'python workflow/scripts/osemosys_global/cache.py powerplant 2> {log}'
 
 rule timeslice:
     message:
         'Generating timeslice data...'
     input:
-        'resources/data/All_Demand_UTC_2015.csv',
-        'resources/data/CSP 2015.csv',
-        'resources/data/SolarPV 2015.csv',
+        expand('resources/data/All_Demand_UTC_{year}.csv', year = weather_years),
+        expand('resources/data/CSP {year}.csv', year = weather_years),
+        expand('resources/data/SolarPV {year}.csv', year = weather_years),
         'resources/data/Hydro_Monthly_Profiles (15 year average).csv',
-        'resources/data/Won 2015.csv',
-        'resources/data/Woff 2015.csv',
+        expand('resources/data/Won {year}.csv', year = weather_years),
+        expand('resources/data/Woff {year}.csv', year = weather_years),
+        data_files('results/data', ['TECHNOLOGY.csv', 'InputActivityRatio.csv', 
+            'OutputActivityRatio.csv', 'FUEL.csv']),
     params:
         start_year = config['startYear'],
         end_year = config['endYear'],
         daytype = config['daytype'],
         daypart = config['dayparts'],
         seasons = config['seasons'],
+        representative_days = config.get('representative_days'),
+        weather_years = weather_years,
+        weather_year_statistic = config.get('weather_year_statistic'),
     output:
-        csv_files = expand('results/data/{output_file}', output_file=timeslice_files),
+        csv_files = data_files('results/data', timeslice_files),
+        day_files = data_files('results/data', ['RepresentativeDays.csv']),
     log:
         log = 'results/data/logs/timeslice.log'    
     shell:
-        'python workflow/scripts/osemosys_global/TS_data.py 2> {log}'
+        'python workflow/scripts/osemosys_global/cache.py timeslice 2> {log}'
 
 rule variable_costs:
     message:
         'Generating variable cost data...'
     input:
         'resources/data/CMO-April-2020-forecasts.xlsx',
-        'results/data/TECHNOLOGY.csv',
+        data_files('results/data', ['TECHNOLOGY.csv']),
+        rules.timeslice.output.csv_files,
     params:
         start_year = config['startYear'],
         end_year = config['endYear'],
     output:
-        csv_files = expand('results/data/{output_file}', output_file=variable_cost_files),
+        csv_files = data_files('results/data', variable_cost_files),
     log:
         log = 'results/data/logs/variable_costs.log'
     shell:
-        'python workflow/scripts/osemosys_global/variablecosts.py 2> {log}'
+        'python workflow/scripts/osemosys_global/cache.py variable_costs 2> {log}'
 
 rule demand_projections:
     message:
@@ -180,46 +187,69 @@ rule demand_projections:
     params:
         start_year = config['startYear'],
         end_year = config['endYear'],
+        demand_ensemble = config.get('demand_ensemble'),
     output:
-        csv_files = expand('results/data/{output_file}', output_file = demand_files),
-        figures = expand('results/data/../figs/Demand projection {demand_figure}.jpg', demand_figure = demand_figures),
+        csv_files = data_files('results/data', demand_files),
+        projection_files = data_files('results/data', ['DemandProjections.csv']),
+        figure_files = data_files('results/data', demand_figure_files),
     log:
         log = 'results/data/logs/demand_projections.log'
     shell:
-        'python workflow/scripts/osemosys_global/demand_projection.py 2> {log}'
+        'python workflow/scripts/osemosys_global/cache.py demand_projections 2> {log}'
+
+# Optional, run with 'snakemake demand_figures' or 'demand_figures: True' in
+# the config file. The figures are not declared as outputs, as snakemake
+# would delete them before every run; demand_figures.py itself only renders
+# the groups whose data has changed.
+
+rule demand_figures:
+    message:
+        'Generating demand figures...'
+    input:
+        data_files('results/data', demand_figure_files),
+    output:
+        touch('results/figs/demand_figures.done'),
+    log:
+        log = 'results/data/logs/demand_figures.log'
+    shell:
+        'python workflow/scripts/osemosys_global/demand_figures.py 2> {log}'
 
 rule emissions:
     message:
         'Generating emission data...'
     input:
         'resources/data/emission_factors.csv',
-        'results/data/InputActivityRatio.csv',
+        data_files('results/data', ['InputActivityRatio.csv', 'OutputActivityRatio.csv']),
+        rules.timeslice.output.csv_files,
     params:
         start_year = config['startYear'],
         end_year = config['endYear'],
         emission = config['emission_penalty']
     output: 
-        csv_files = expand('results/data/{output_file}', output_file = emission_files),
+        csv_files = data_files('results/data', emission_files),
     log:
         log = 'results/data/../logs/emissions.log'
     shell:
-        'python workflow/scripts/osemosys_global/emissions.py 2> {log}'
+        'python workflow/scripts/osemosys_global/cache.py emissions 2> {log}'
 
 rule max_capacity:
     message: 
         'Generating capacity limits...'
     input:
         'resources/data/PLEXOS_World_MESSAGEix_GLOBIOM_Softlink.xlsx',
-        'results/data/ResidualCapacity.csv'
+        data_files('results/data', ['ResidualCapacity.csv']),
+        rules.timeslice.output.csv_files,
+        rules.demand_projections.output.csv_files,
+        rules.emissions.output.csv_files,
     params:
         start_year = config['startYear'],
         end_year = config['endYear'],
     output:
-        csv_files = expand('results/data/{output_file}', output_file = max_capacity_files),
+        csv_files = data_files('results/data', max_capacity_files),
     log:
         log = 'results/data/logs/max_capacity.log'
     shell:
-        'python workflow/scripts/osemosys_global/max_capacity.py 2> {log}'
+        'python workflow/scripts/osemosys_global/cache.py max_capacity 2> {log}'
 
 rule file_check:
     message:
@@ -233,10 +263,48 @@ rule file_check:
         rules.max_capacity.output.csv_files,
         #'resources/data/default_values.csv'
     output: 
-        expand('results/data/{check_file}', check_file = check_files),
+        data_files('results/data', check_files),
     log: 
         log = 'results/data/logs/file_check.log'
     shell:
         'python workflow/scripts/osemosys_global/file_check.py 2> {log}'
 
 
+
+# Runs all stages above in one process, handing data between them in memory.
+# Enabled with 'single_process_preprocessing: True' in the config file.
+
+if config.get('single_process_preprocessing', False):
+
+    # resource inputs of all stages; intermediate results/data files are
+    # produced by this rule itself
+    single_process_inputs = sorted({
+        f for rule_input in [
+            rules.powerplant.input, 
+            rules.timeslice.input, 
+            rules.variable_costs.input,
+            rules.demand_projections.input, 
+            rules.emissions.input, 
+            rules.max_capacity.input]
+        for f in rule_input if f.startswith('resources/')})
+
+    rule preprocess_single_process:
+        message:
+            'Generating all preprocessed data in a single process...'
+        input:
+            single_process_inputs,
+        output:
+            csv_files = data_files('results/data', sorted(set(osemosys_files))),
+            figure_files = data_files('results/data', demand_figure_files),
+        log:
+            log = 'results/data/logs/preprocess_single_process.log'
+        shell:
+            'python workflow/scripts/osemosys_global/run_preprocessing.py 2> {log}'
+
+    ruleorder: preprocess_single_process > powerplant
+    ruleorder: preprocess_single_process > timeslice
+    ruleorder: preprocess_single_process > variable_costs
+    ruleorder: preprocess_single_process > demand_projections
+    ruleorder: preprocess_single_process > emissions
+    ruleorder: preprocess_single_process > max_capacity
+    ruleorder: preprocess_single_process > file_check
@@ -0,0 +1,469 @@
+'''Content-addressed cache for the global preprocessing stage.
+
+Each preprocessing script is registered as a stage together with the
+resource files it reads, the results/data files it depends on and the
+configuration keys it uses. The cache key of a stage is a hash of all of
+these plus the source of its script and of the modules that script imports,
+so a change that only touches one stage (e.g. ``emission_penalty``) re-runs
+that stage only; every other stage restores its tables from
+``results/cache``.
+
+Usage:
+    python workflow/scripts/osemosys_global/cache.py <stage>
+'''
+
+import ast
+import hashlib
+import json
+import logging
+import os
+import runpy
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from configuration import ConfigFile, ConfigPaths
+from data_store import (data_format, in_memory, read_table,
+                        read_table_as_csv, save_table, table_path,
+                        write_table)
+
+logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
+
+# Stage definitions. 'inputs' are relative to resources/data, 'upstream' and
+# 'outputs' are table names in results/data, stored in the configured
+# data_format. Outputs include tables that a stage modifies in place (e.g.
+# TS_data.py appends storage to TECHNOLOGY.csv).
+STAGES = {
+    'powerplant': {
+        'script': 'powerplant_data.py',
+        'inputs': [
+            'PLEXOS_World_2015_Gold_V1.1.xlsx',
+            'weo_2020_powerplant_costs.csv',
+            'operational_life.csv',
+            'naming_convention_tech.csv',
+            'Costs Line expansion.xlsx',
+            'weo_region_mapping.csv',
+            'availability_factors.csv',
+            'gem_region_mapping.csv',
+            'Global-Coal-Plant-Tracker-Jan-2022.xlsx',
+            'Global-Gas-Plant-Tracker-Feb-2022.xlsx',
+            'custom_nodes',
+        ],
+        'upstream': [],
+        'config': ['startYear', 'endYear', 'crossborderTrade',
+                   'no_invest_technologies', 'user_defined_capacity',
+                   'nodes_to_add', 'geographic_scope', 'scenarios'],
+        'outputs': [
+            'CapitalCost.csv',
+            'FixedCost.csv',
+            'CapacityToActivityUnit.csv',
+            'OperationalLife.csv',
+            'TotalAnnualMaxCapacityInvestment.csv',
+            'TotalAnnualMinCapacityInvestment.csv',
+            'TotalTechnologyModelPeriodActivityUpperLimit.csv',
+            'FUEL.csv',
+            'InputActivityRatio.csv',
+            'OutputActivityRatio.csv',
+            'MODE_OF_OPERATION.csv',
+            'REGION.csv',
+            'ResidualCapacity.csv',
+            'TECHNOLOGY.csv',
+            'YEAR.csv',
+            'AvailabilityFactor.csv',
+        ],
+    },
+    'timeslice': {
+        'script': 'TS_data.py',
+        'inputs': [
+            'All_Demand_UTC_{weather_year}.csv',
+            'CSP {weather_year}.csv',
+            'SolarPV {weather_year}.csv',
+            'Hydro_Monthly_Profiles (15 year average).csv',
+            'Won {weather_year}.csv',
+            'Woff {weather_year}.csv',
+            'storage_costs.csv',
+            'custom_nodes',
+        ],
+        'upstream': [
+            'TECHNOLOGY.csv',
+            'InputActivityRatio.csv',
+            'OutputActivityRatio.csv',
+            'FUEL.csv',
+        ],
+        'config': ['startYear', 'endYear', 'daytype', 'dayparts', 'seasons',
+                   'timeshift', 'representative_days', 'weather_years',
+                   'weather_year_statistic', 'geographic_scope',
+                   'reserve_margin', 'nodes_to_add', 'nodes_to_remove',
+                   'scenarios'],
+        'outputs': [
+            'CapacityFactor.csv',
+            'TIMESLICE.csv',
+            'SpecifiedDemandProfile.csv',
+            'YearSplit.csv',
+            'STORAGE.csv',
+            'TechnologyToStorage.csv',
+            'TechnologyFromStorage.csv',
+            'Conversionls.csv',
+            'Conversionld.csv',
+            'Conversionlh.csv',
+            'SEASON.csv',
+            'DAYTYPE.csv',
+            'DAILYTIMEBRACKET.csv',
+            'CapitalCostStorage.csv',
+            'DaySplit.csv',
+            'ReserveMargin.csv',
+            'ReserveMarginTagTechnology.csv',
+            'ReserveMarginTagFuel.csv',
+            'RepresentativeDays.csv',
+            'TECHNOLOGY.csv',
+            'InputActivityRatio.csv',
+            'OutputActivityRatio.csv',
+        ],
+    },
+    'variable_costs': {
+        'script': 'variablecosts.py',
+        'inputs': [
+            'CMO-April-2020-forecasts.xlsx',
+            'fuel_prices.csv',
+        ],
+        'upstream': ['TECHNOLOGY.csv'],
+        'config': ['startYear', 'endYear'],
+        'outputs': ['VariableCost.csv'],
+    },
+    'demand_projections': {
+        'script': 'demand_projection.py',
+        'inputs': [
+            'PLEXOS_World_2015_Gold_V1.1.xlsx',
+            'iamc_db_GDPppp_Countries.xlsx',
+            'iamc_db_POP_Countries.xlsx',
+            'iamc_db_URB_Countries.xlsx',
+            'iamc_db_POP_GDPppp_URB_Countries_Missing.xlsx',
+            'T&D Losses.xlsx',
+            'All_Demand_UTC_2015.csv',
+            'owid_pcconsumption.csv',
+            'custom_nodes',
+        ],
+        'upstream': [],
+        'config': ['startYear', 'endYear', 'nodes_to_add', 'demand_ensemble'],
+        'outputs': ['SpecifiedAnnualDemand.csv', 'DemandProjections.csv',
+                    'DemandRegression.csv', 'DemandRegressionProjections.csv'],
+    },
+    'emissions': {
+        'script': 'emissions.py',
+        'inputs': ['emission_factors.csv'],
+        'upstream': [
+            'InputActivityRatio.csv',
+            'OutputActivityRatio.csv',
+        ],
+        'config': ['startYear', 'endYear', 'emission_penalty',
+                   'emission_limit'],
+        'outputs': [
+            'EmissionActivityRatio.csv',
+            'EmissionsPenalty.csv',
+            'EMISSION.csv',
+            'AnnualEmissionLimit.csv',
+        ],
+    },
+    'max_capacity': {
+        'script': 'max_capacity.py',
+        'inputs': [
+            'PLEXOS_World_MESSAGEix_GLOBIOM_Softlink.xlsx',
+            'powerplant_build_rates.csv',
+            'fuel_limits.csv',
+            'custom_nodes',
+        ],
+        'upstream': [
+            'ResidualCapacity.csv',
+            'TECHNOLOGY.csv',
+            'FUEL.csv',
+            'OutputActivityRatio.csv',
+            'TotalAnnualMaxCapacityInvestment.csv',
+            'TotalTechnologyModelPeriodActivityUpperLimit.csv',
+            'SpecifiedAnnualDemand.csv',
+            'SpecifiedDemandProfile.csv',
+        ],
+        'config': ['startYear', 'endYear', 'nodes_to_add', 'nodes_to_remove',
+                   'powerplant_build_rates', 'fuel_limits', 'calibration',
+                   're_targets'],
+        'outputs': [
+            'TotalAnnualMaxCapacity.csv',
+            'TotalTechnologyAnnualActivityUpperLimit.csv',
+            'AccumulatedAnnualDemand.csv',
+            'TotalAnnualMaxCapacityInvestment.csv',
+            'OutputActivityRatio.csv',
+            'FUEL.csv',
+        ],
+    },
+}
+
+def file_digest(path: Path, index: Optional[Dict] = None) -> str:
+    """Returns the sha256 digest of a file or of every file in a directory.
+
+    Arguments:
+        path: Path
+            File or directory to hash
+        index: Dict
+            Optional memo of {path: [size, mtime_ns, digest]} used to skip
+            re-hashing files that have not changed on disk
+
+    Returns:
+        str
+            Hex digest, or 'missing' if the path does not exist
+    """
+    path = Path(path)
+    if path.is_dir():
+        digest = hashlib.sha256()
+        for child in sorted(path.rglob('*')):
+            if child.is_file():
+                digest.update(str(child.relative_to(path)).encode())
+                digest.update(file_digest(child, index).encode())
+        return digest.hexdigest()
+    if not path.is_file():
+        return 'missing'
+
+    stat = path.stat()
+    key = str(path.resolve())
+    if index is not None:
+        memo = index.get(key)
+        if memo and memo[0] == stat.st_size and memo[1] == stat.st_mtime_ns:
+            return memo[2]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+
+    if index is not None:
+        index[key] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+    return digest.hexdigest()
+
+def table_digest(path, index: Optional[Dict] = None) -> str:
+    """Returns the sha256 digest of the values of a results/data table.
+
+    Tables are hashed as they are read back from CSV (see
+    data_store.read_table_as_csv), so a table held in memory (see
+    run_preprocessing.py) has the same digest as the same table on disk, in
+    either data format.
+
+    Arguments:
+        path: str
+            CSV path of the table
+        index: Dict
+            Optional digest memo, see file_digest(). Only tables on disk are
+            memoized.
+
+    Returns:
+        str
+            Hex digest, or 'missing' if the table does not exist
+    """
+    memo_key = None
+    if not in_memory(path):
+        file_path = table_path(path)
+        if not file_path.is_file():
+            return 'missing'
+        stat = file_path.stat()
+        # kept apart from the file digests of the same path
+        memo_key = f'table:{file_path.resolve()}'
+        memo = index.get(memo_key) if index is not None else None
+        if memo and memo[0] == stat.st_size and memo[1] == stat.st_mtime_ns:
+            return memo[2]
+
+    df = read_table_as_csv(path)
+    digest = hashlib.sha256(json.dumps(list(map(str, df.columns))).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+
+    if memo_key and index is not None:
+        index[memo_key] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+    return digest.hexdigest()
+
+def load_digest_index(cache_dir: Path) -> Dict:
+    """Reads the memo of previously hashed files"""
+    index_file = Path(cache_dir, 'digests.json')
+    if index_file.is_file():
+        with open(index_file, encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+def save_digest_index(cache_dir: Path, index: Dict) -> None:
+    """Writes the memo of previously hashed files"""
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    # unique per process, as weather years are hashed in parallel
+    tmp_file = Path(cache_dir, f'digests.json.{os.getpid()}.tmp')
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    os.replace(tmp_file, Path(cache_dir, 'digests.json'))
+
+def stage_inputs(stage: str, config: ConfigFile) -> List[str]:
+    """Returns the resource files of a stage, with a file per weather year
+    for names with a {weather_year} field"""
+    inputs = []
+    for name in STAGES[stage]['inputs']:
+        if '{weather_year}' in name:
+            inputs.extend(name.format(weather_year=year)
+                          for year in config.get_weather_years())
+        else:
+            inputs.append(name)
+    return inputs
+
+def script_sources(script: Path) -> List[Path]:
+    """Returns a script and the modules of its directory that it imports,
+    directly or through other such modules.
+
+    Modules are found by name in the directory of the script, for sibling
+    imports (e.g. ``from utils import cross_join``) as well as imports
+    within the osemosys_global package.
+    """
+    script = Path(script)
+    sources, pending = set(), [script]
+    while pending:
+        path = pending.pop()
+        if path in sources or not path.is_file():
+            continue
+        sources.add(path)
+        for node in ast.walk(ast.parse(path.read_text(encoding='utf-8'))):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module:
+                names = [node.module]
+            elif isinstance(node, ast.ImportFrom):
+                names = [alias.name for alias in node.names]
+            else:
+                continue
+            for name in names:
+                parts = name.split('.')
+                if parts[0] == script.parent.name and len(parts) > 1:
+                    parts = parts[1:]
+                pending.append(Path(script.parent, f'{parts[0]}.py'))
+    return sorted(sources)
+
+def stage_key(stage: str, index: Optional[Dict] = None) -> str:
+    """Computes the cache key for a preprocessing stage.
+
+    Arguments:
+        stage: str
+            Name of the stage in STAGES
+        index: Dict
+            Optional digest memo, see file_digest()
+
+    Returns:
+        str
+            Hex digest identifying the stage inputs
+    """
+    config_paths = ConfigPaths()
+    config = ConfigFile('config')
+    definition = STAGES[stage]
+
+    digest = hashlib.sha256(stage.encode())
+
+    # a change to the script or the modules it imports invalidates the stage
+    script = Path(config_paths.py_file_dir, definition['script'])
+    for source in script_sources(script):
+        digest.update(source.name.encode())
+        digest.update(file_digest(source, index).encode())
+
+    for name in stage_inputs(stage, config):
+        digest.update(name.encode())
+        digest.update(
+            file_digest(Path(config_paths.input_data_dir, name), index).encode())
+
+    for name in definition['upstream']:
+        digest.update(name.encode())
+        digest.update(table_digest(
+            Path(config_paths.output_data_dir, name), index).encode())
+
+    digest.update(data_format().encode())
+
+    config_values = {key: config.get(key) for key in definition['config']}
+    digest.update(json.dumps(config_values, sort_keys=True, default=str).encode())
+
+    return digest.hexdigest()
+
+def restore(stage: str, key: str) -> bool:
+    """Copies cached outputs of a stage into results/data, or into memory
+    while tables are held in memory.
+
+    Returns:
+        bool
+            True if the stage was found in the cache
+    """
+    config_paths = ConfigPaths()
+    entry = Path(config_paths.cache_dir, 'preprocess', stage, key)
+    names = STAGES[stage]['outputs']
+    if not all(table_path(Path(entry, name)).is_file() for name in names):
+        return False
+
+    Path(config_paths.output_data_dir).mkdir(parents=True, exist_ok=True)
+    for name in names:
+        output = Path(config_paths.output_data_dir, name)
+        if in_memory():
+            write_table(read_table(Path(entry, name)), output)
+        else:
+            shutil.copy2(table_path(Path(entry, name)), table_path(output))
+    return True
+
+def store(stage: str, key: str) -> None:
+    """Copies the outputs of a stage from results/data, or from memory, into
+    the cache"""
+    config_paths = ConfigPaths()
+    entry = Path(config_paths.cache_dir, 'preprocess', stage, key)
+    tmp_entry = entry.with_name(f'{key}.tmp')
+    if tmp_entry.exists():
+        shutil.rmtree(tmp_entry)
+    tmp_entry.mkdir(parents=True)
+
+    for name in STAGES[stage]['outputs']:
+        output = Path(config_paths.output_data_dir, name)
+        if in_memory(output):
+            save_table(read_table(output), Path(tmp_entry, name))
+        else:
+            shutil.copy2(table_path(output), table_path(Path(tmp_entry, name)))
+
+    if entry.exists():
+        shutil.rmtree(entry)
+    os.replace(tmp_entry, entry)
+
+def run_stage(stage: str, in_process: bool = False) -> None:
+    """Restores a stage from the cache, or runs its script and caches it.
+
+    Arguments:
+        stage: str
+            Name of the stage in STAGES
+        in_process: bool
+            Run the script in this process rather than a subprocess, so it
+            shares the tables held in memory (see run_preprocessing.py)
+    """
+    config_paths = ConfigPaths()
+    cache_dir = config_paths.cache_dir
+    index = load_digest_index(cache_dir)
+    key = stage_key(stage, index)
+
+    if restore(stage, key):
+        logging.info(f'{stage}: restored from cache ({key[:12]})')
+        save_digest_index(cache_dir, index)
+        return
+
+    logging.info(f'{stage}: not cached ({key[:12]}), running')
+    script = Path(config_paths.py_file_dir, STAGES[stage]['script'])
+    if in_process:
+        runpy.run_path(str(script), run_name='__main__')
+    else:
+        subprocess.run([sys.executable, str(script)], check=True)
+
+    # stored under the key of the pre-run state, as some stages modify their
+    # upstream files in place
+    store(stage, key)
+    save_digest_index(cache_dir, index)
+
+def main(stages: List[str]):
+    for stage in stages:
+        run_stage(stage)
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or any(stage not in STAGES for stage in sys.argv[1:]):
+        msg = f'Usage: python {sys.argv[0]} <stage> [<stage> ...] where stage is one of {", ".join(STAGES)}'
+        sys.exit(msg)
+    main(sys.argv[1:])
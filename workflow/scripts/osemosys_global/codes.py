@@ -0,0 +1,134 @@
+"""Registry of the parsed OSeMOSYS Global set codes.
+
+TECHNOLOGY, FUEL, STORAGE and EMISSION codes are fixed-width strings, e.g.
+
+    PWRCOAINDNE01   power plant: TYPE PWR, CATEGORY COA, NODE INDNE, SUFFIX 01
+    TRNINDNEINDSO   transmission: FROM_NODE INDNE, TO_NODE INDSO
+    MINCOAIND       mining: TYPE MIN, CATEGORY COA, COUNTRY IND
+    ELCINDNE02      fuel: TYPE ELC, NODE INDNE, SUFFIX 02
+    SDSINDNE01      storage: TYPE SDS, NODE INDNE, SUFFIX 01
+    CO2IND          emission: TYPE CO2, COUNTRY IND
+
+Each unique code is parsed once into a row of the registry, which is kept
+for the lifetime of the process. CodeIndex factorizes a column of a table
+into integer positions into the registry rows of its unique codes, so the
+fields of millions of rows are looked up by position instead of slicing
+every row's string again.
+
+Example:
+    index = CodeIndex(df['TECHNOLOGY'], 'TECHNOLOGY')
+    df['COUNTRY'] = index.field('COUNTRY')
+    df = df.loc[index.mask(index.table['TYPE'] == 'PWR')]
+"""
+
+from typing import Dict, Iterable
+
+import numpy as np
+import pandas as pd
+
+KINDS = ['TECHNOLOGY', 'FUEL', 'STORAGE', 'EMISSION']
+
+FIELDS = ['TYPE', 'CATEGORY', 'COUNTRY', 'NODE', 'SUFFIX',
+          'FROM_NODE', 'TO_NODE', 'TO_COUNTRY']
+
+def _slice(codes: pd.Series, start: int, stop: int) -> pd.Series:
+    '''Characters start to stop of each code, NaN for shorter codes'''
+    part = codes.str[start:stop]
+    return part.where(part.str.len() == stop - start)
+
+def parse(codes: Iterable[str], kind: str) -> pd.DataFrame:
+    '''Parses codes into their fields.
+
+    Arguments:
+        codes: Iterable[str]
+            Unique codes
+        kind: str
+            One of KINDS
+
+    Returns:
+        pd.DataFrame
+            A column per field of FIELDS, NaN where a code has no such
+            field, indexed by code
+    '''
+    if kind not in KINDS:
+        raise ValueError(f"kind must be one of {KINDS}, not '{kind}'")
+    codes = pd.Series(list(codes), dtype=object)
+    codes.index = codes.values
+    df = pd.DataFrame(index=codes.index, columns=FIELDS, dtype=object)
+    df['TYPE'] = _slice(codes, 0, 3)
+
+    if kind == 'TECHNOLOGY':
+        # Transmission between nodes, other technologies are of a category
+        # (e.g. a fuel) in a country or node
+        trn = df['TYPE'] == 'TRN'
+        df['CATEGORY'] = _slice(codes, 3, 6).where(~trn)
+        df['COUNTRY'] = _slice(codes, 6, 9).where(~trn, _slice(codes, 3, 6))
+        df['NODE'] = _slice(codes, 6, 11).where(~trn)
+        df['SUFFIX'] = _slice(codes, 11, 13).where(~trn)
+        df['FROM_NODE'] = _slice(codes, 3, 8).where(trn)
+        df['TO_NODE'] = _slice(codes, 8, 13).where(trn)
+        df['TO_COUNTRY'] = _slice(codes, 8, 11).where(trn)
+    else:
+        df['COUNTRY'] = _slice(codes, 3, 6)
+        df['NODE'] = _slice(codes, 3, 8)
+        df['SUFFIX'] = _slice(codes, 8, 10)
+    return df
+
+def lookup(codes: Iterable[str], kind: str) -> pd.DataFrame:
+    '''Fields of codes from the registry, parsing codes not seen before.
+
+    Arguments:
+        codes: Iterable[str]
+            Unique codes
+        kind: str
+            One of KINDS
+
+    Returns:
+        pd.DataFrame
+            Categorical column per field of FIELDS, indexed by code in the
+            order of codes
+    '''
+    codes = pd.Index(codes, dtype=object)
+    known = _REGISTRY.get(kind)
+    new = codes if known is None else codes.difference(known.index)
+    if len(new) or known is None:
+        parsed = parse(new, kind)
+        _REGISTRY[kind] = parsed if known is None else pd.concat([known, parsed])
+    return _REGISTRY[kind].reindex(codes).astype('category')
+
+class CodeIndex:
+    '''Fields of a column of codes, looked up once per unique code
+
+    table holds the registry row of each unique code of the column. Values
+    computed per row of table (e.g. a mask of technologies in scope) are
+    broadcast to the rows of the column with take() and mask().
+
+    Example:
+        index = CodeIndex(df['TECHNOLOGY'], 'TECHNOLOGY')
+        renewables = index.table['CATEGORY'].isin(['SPV', 'WON'])
+        df = df.loc[index.mask(renewables)]
+    '''
+
+    def __init__(self, values: pd.Series, kind: str):
+        positions, uniques = pd.factorize(values)
+        self.positions = positions
+        self.index = values.index
+        self.table = lookup(np.asarray(uniques, dtype=object), kind)
+
+    def take(self, values, fill=np.nan) -> pd.Series:
+        '''Values of each row of the column, from values aligned with the
+        rows of table. Missing codes get fill.'''
+        values = np.append(np.asarray(values, dtype=object), [fill])
+        return pd.Series(values[self.positions], index=self.index)
+
+    def field(self, name: str) -> pd.Series:
+        '''A field of FIELDS for each row of the column'''
+        return self.take(self.table[name])
+
+    def mask(self, values) -> pd.Series:
+        '''Boolean mask of the rows of the column, from a mask aligned with
+        the rows of table'''
+        return self.take(values, False).astype(bool)
+
+# Parsed codes as {kind: pd.DataFrame}, kept for the lifetime of the process
+_REGISTRY: Dict[str, pd.DataFrame] = {}
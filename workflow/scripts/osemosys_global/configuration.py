@@ -1,8 +1,106 @@
 '''Functionality to interface with configuration files. '''
 
+import copy
+import os
 from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, List, Tuple
 import yaml
 
+# Config keys that are only read after the global preprocessing stage. These
+# are the only keys a scenario in the 'scenarios' matrix can override, as
+# results/data is built once and shared by all scenarios.
+SCENARIO_KEYS = ['geographic_scope', 'nodes_to_remove', 'solver',
+                 'results_by_country']
+
+# Year of the hourly demand and renewable profiles, unless 'weather_years'
+# lists others
+PROFILE_YEAR = 2015
+
+# Environment variable used by the workflow to select the active scenario
+SCENARIO_ENV_VAR = 'OSEMOSYS_GLOBAL_SCENARIO'
+
+# Expected types of config keys as {key: (types, required)}. Optional keys
+# may also be left empty in the config file.
+CONFIG_SCHEMA = {
+    'scenario': ((str,), True),
+    'scenarios': ((dict,), False),
+    'custom_data': ((bool,), False),
+    'startYear': ((int,), True),
+    'endYear': ((int,), True),
+    'daytype': ((bool,), False),
+    'dayparts': ((dict,), True),
+    'seasons': ((dict,), True),
+    'timeshift': ((int,), False),
+    'representative_days': ((int,), False),
+    'weather_years': ((list,), False),
+    'weather_year_statistic': ((str,), False),
+    'demand_ensemble': ((bool,), False),
+    'demand_figures': ((bool,), False),
+    'geographic_scope': ((list,), False),
+    'crossborderTrade': ((bool,), False),
+    'emission_penalty': ((list,), False),
+    'no_invest_technologies': ((list,), False),
+    'results_by_country': ((bool,), False),
+    'solver': ((str,), False),
+    'user_defined_capacity': ((dict,), False),
+    'nodes_to_add': ((list,), False),
+    'nodes_to_remove': ((list,), False),
+    'powerplant_build_rates': ((list,), False),
+    'reserve_margin': ((dict,), False),
+    'emission_limit': ((list,), False),
+    'fuel_limits': ((dict, list), False),
+    'calibration': ((dict,), False),
+    're_targets': ((list,), False),
+    'data_format': ((str,), False),
+    'single_process_preprocessing': ((bool,), False),
+}
+
+# Parsed and validated config files as {file_path: parsed}
+_PARSED: Dict[str, Dict] = {}
+
+def _parse(file_path) -> Dict:
+    '''Parses and validates a config file once per process'''
+    file_path = str(file_path)
+    if file_path not in _PARSED:
+        with open(file_path, encoding='utf-8') as yaml_file:
+            parsed_yaml_file = yaml.load(yaml_file,
+                                         Loader = yaml.FullLoader) or {}
+        validate(parsed_yaml_file, file_path)
+        _PARSED[file_path] = parsed_yaml_file
+    return _PARSED[file_path]
+
+def validate(parsed_yaml_file, file_name = 'config') -> None:
+    '''Checks the keys of a parsed config file against CONFIG_SCHEMA
+
+    Raises:
+        ValueError listing every missing or mistyped key
+    '''
+    errors = []
+    for key, (types, required) in CONFIG_SCHEMA.items():
+        value = parsed_yaml_file.get(key)
+        if value is None:
+            if required:
+                errors.append(f"'{key}' is required")
+            continue
+        # bool is a subclass of int, so check it explicitly
+        if not isinstance(value, types) or (
+                isinstance(value, bool) and bool not in types):
+            expected = ' or '.join(t.__name__ for t in types)
+            errors.append(f"'{key}' must be of type {expected}, not "
+                          f"{type(value).__name__}")
+    for key in ('dayparts', 'seasons'):
+        for name, values in (parsed_yaml_file.get(key) or {}).items():
+            if not isinstance(values, list) or not all(
+                    isinstance(v, int) for v in values):
+                errors.append(f"'{key}: {name}' must be a list of ints")
+    if parsed_yaml_file.get('representative_days') and \
+            parsed_yaml_file.get('daytype'):
+        errors.append("'representative_days' can not be used with 'daytype'")
+    if errors:
+        raise ValueError(f'Invalid config file {file_name}: '
+                         + '; '.join(errors))
+
 class ConfigFile:
     '''Class to hold yaml configuration file data
     
@@ -23,15 +121,86 @@ class ConfigFile:
             '../../../config', f'{config_file_name}.yaml')
 
     def get(self, name):
-        with open(self.file_path, encoding='utf-8') as yaml_file:
-            parsed_yaml_file = yaml.load(yaml_file, Loader = yaml.FullLoader).get(name)
-        return parsed_yaml_file
+        '''Returns a config value, with lists and mappings copied so callers
+        can modify them. See load_config() for read only access without
+        copies.'''
+        parsed_yaml_file = _parse(self.file_path)
+        overrides = self._get_overrides(parsed_yaml_file,
+                                        os.environ.get(SCENARIO_ENV_VAR))
+        value = overrides.get(name, parsed_yaml_file.get(name))
+        if isinstance(value, (dict, list)):
+            return copy.deepcopy(value)
+        return value
+
+    def get_scenarios(self) -> Dict[str, Dict]:
+        '''Returns the scenario matrix as {scenario_name: overrides}
+
+        Without a 'scenarios' entry, the single 'scenario' is returned with
+        no overrides.
+        '''
+        return _get_scenarios(_parse(self.file_path))
+
+    @staticmethod
+    def _get_overrides(parsed_yaml_file, scenario_name) -> Dict:
+        '''Validated config overrides of a scenario in the matrix'''
+        scenarios = parsed_yaml_file.get('scenarios') or {}
+        if not scenario_name or scenario_name not in scenarios:
+            return {}
+        overrides = scenarios[scenario_name] or {}
+        invalid = [key for key in overrides if key not in SCENARIO_KEYS]
+        if invalid:
+            raise ValueError(
+                f"Scenario '{scenario_name}' overrides {invalid}, which are used "
+                f"by the shared preprocessing stage. Only {SCENARIO_KEYS} can "
+                "be set per scenario.")
+        return overrides
+
+    def get_scope(self) -> Tuple[List[str], List[str]]:
+        '''Returns the geographic scope covering every scenario as
+        (countries, nodes_to_remove), for use by the shared preprocessing
+        stage.
+
+        Countries are the union of the scenario scopes, or empty if any
+        scenario is a world run. Nodes are only removed if every scenario
+        removes them.
+        '''
+        return _get_scope(_parse(self.file_path))
+
+    def get_weather_years(self) -> List[int]:
+        '''Returns the years of the hourly profiles, the first being the
+        reference year that timeslices are defined on'''
+        return self.get('weather_years') or [PROFILE_YEAR]
 
     def get_years(self):
-        start_year = self.get('startYear')
-        end_year = self.get('endYear')
+        parsed_yaml_file = _parse(self.file_path)
+        start_year = parsed_yaml_file['startYear']
+        end_year = parsed_yaml_file['endYear']
         return list(range(start_year, end_year + 1))
 
+def _get_scenarios(parsed_yaml_file) -> Dict[str, Dict]:
+    '''Scenario matrix of a parsed config file, see ConfigFile.get_scenarios()'''
+    scenarios = parsed_yaml_file.get('scenarios')
+    if not scenarios:
+        return {parsed_yaml_file.get('scenario'): {}}
+    return {name: copy.deepcopy(ConfigFile._get_overrides(parsed_yaml_file,
+                                                          name))
+            for name in scenarios}
+
+def _get_scope(parsed_yaml_file) -> Tuple[List[str], List[str]]:
+    '''Scope of a parsed config file, see ConfigFile.get_scope()'''
+    countries, removed = set(), None
+    for overrides in _get_scenarios(parsed_yaml_file).values():
+        scope = overrides.get('geographic_scope',
+                              parsed_yaml_file.get('geographic_scope'))
+        if not scope:
+            return [], []
+        countries.update(scope)
+        nodes = set(overrides.get('nodes_to_remove',
+                                  parsed_yaml_file.get('nodes_to_remove'))
+                    or [])
+        removed = nodes if removed is None else removed & nodes
+    return sorted(countries), sorted(removed or [])
+
 class ConfigPaths:
     '''Class to hold relative paths from file called from. '''    
 
@@ -46,6 +215,7 @@ class ConfigPaths:
 
         self.output_dir = Path(self.py_file_dir, '../../../', self.output_dir_name)
         self.output_data_dir = Path(self.output_dir, 'data')
+        self.cache_dir = Path(self.output_dir, 'cache')
 
         self.scenario_dir = Path(self.output_dir, self.get_scenario_name())
         self.scenario_data_dir = Path(self.scenario_dir, 'data')
@@ -61,5 +231,118 @@ class ConfigPaths:
         self.custom_nodes_dir = Path(self.input_dir, 'data/custom_nodes')
 
     def get_scenario_name(self):
-        config = ConfigFile('config')
-        return config.get('scenario') 
\ No newline at end of file
+        scenario_name = os.environ.get(SCENARIO_ENV_VAR)
+        if scenario_name:
+            return scenario_name
+        return load_config().get('scenario')
+
+def _freeze(value):
+    '''Returns an immutable copy of a parsed yaml value'''
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+class Config:
+    '''Immutable, validated view of a configuration file with derived values
+
+    Lists are returned as tuples and mappings as read-only mappings. Use
+    load_config() rather than creating instances directly, so the file is
+    only parsed once per process.
+
+    Example:
+        config = load_config()
+        config.get('dayparts')
+        -> {'D1': (1, 7), 'D2': (7, 13), ...}
+        config.years
+        -> (2025, 2026, ..., 2050)
+        config.timeslices
+        -> ('S1D1', 'S1D2', ..., 'S2D4')
+    '''
+
+    # non changing parameters
+    region_name = ConfigFile.region_name
+
+    def __init__(self, parsed_yaml_file: Dict, overrides: Dict = None):
+        values = dict(parsed_yaml_file)
+        values.update(overrides or {})
+        object.__setattr__(self, '_parsed', parsed_yaml_file)
+        object.__setattr__(self, '_values', _freeze(values))
+
+        start_year, end_year = values['startYear'], values['endYear']
+        seasons = self._values['seasons']
+        dayparts = self._values['dayparts']
+        timeshift = values.get('timeshift') or 0
+        daytypes = ('WD', 'WE') if values.get('daytype') else ('',)
+
+        derived = {
+            'years': tuple(range(start_year, end_year + 1)),
+            'timeslices': tuple(f'{s}{d}{dp}' for s in seasons
+                                for d in daytypes for dp in dayparts),
+            'month_to_season': MappingProxyType(
+                {month: s for s, months in seasons.items()
+                 for month in months}),
+            'hour_to_daypart': MappingProxyType(
+                self._map_hours(dayparts, timeshift)),
+        }
+        for name, value in derived.items():
+            object.__setattr__(self, name, value)
+
+    @staticmethod
+    def _map_hours(dayparts, timeshift) -> Dict[int, str]:
+        '''Maps hours of the (UTC) demand data to dayparts, shifting both by
+        timeshift as utils.apply_timeshift does'''
+        hours = {}
+        for hour in range(24):
+            shifted = (hour + timeshift) % 24
+            for daypart, (start, end) in dayparts.items():
+                start = (start + timeshift) % 24
+                end = (end + timeshift) % 24
+                if start > end:  # loops over 24hrs
+                    in_daypart = shifted >= start or shifted < end
+                else:
+                    in_daypart = start <= shifted < end
+                if in_daypart:
+                    hours[hour] = daypart
+        return hours
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Config is read only')
+
+    def __getitem__(self, name):
+        return self._values[name]
+
+    def __contains__(self, name):
+        return name in self._values
+
+    def get(self, name, default = None) -> Any:
+        return self._values.get(name, default)
+
+    def get_scope(self) -> Tuple[List[str], List[str]]:
+        '''Returns the geographic scope covering every scenario, see
+        ConfigFile.get_scope()'''
+        return _get_scope(self._parsed)
+
+    def get_weather_years(self) -> Tuple[int, ...]:
+        '''Returns the years of the hourly profiles, the first being the
+        reference year that timeslices are defined on'''
+        return self.get('weather_years') or (PROFILE_YEAR,)
+
+# Loaded configs as {(config_file_name, scenario): Config}
+_LOADED: Dict[Tuple[str, str], Config] = {}
+
+def load_config(config_file_name = 'config') -> Config:
+    '''Returns the validated config of the active scenario, parsed once per
+    process.
+
+    Args:
+        config_file_name = yaml file name in the config/ folder
+    '''
+    scenario_name = os.environ.get(SCENARIO_ENV_VAR)
+    key = (config_file_name, scenario_name)
+    if key not in _LOADED:
+        parsed_yaml_file = _parse(ConfigFile(config_file_name).file_path)
+        overrides = ConfigFile._get_overrides(parsed_yaml_file, scenario_name)
+        _LOADED[key] = Config(parsed_yaml_file, overrides)
+    return _LOADED[key]
@@ -10,7 +10,6 @@ https://community.plotly.com/t/dash-graphs-and-callbacks-multiple-tabs-and-modul
 
 from pathlib import Path
 from typing import Dict, List
-import yaml 
 from dash import Dash, dcc, html
 from dash.dependencies import Input, Output, State
 from osemosys_global.dashboard.components import ids
@@ -35,7 +34,8 @@ from osemosys_global.dashboard.utils import (
     add_default_values,
     get_production_by_mode
 )
-from osemosys_global.configuration import ConfigPaths, ConfigFile
+from osemosys_global.configuration import ConfigPaths
+from osemosys_global.data_store import YEAR_BROADCAST, expand_years
 
 import logging 
 logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
@@ -52,9 +52,7 @@ logger.info("Reading configuration options")
 # config = ConfigPaths()
 # config_file = ConfigFile("config")
 # SCENARIO = config_file.get("scenario")
-config_file_path = "config/config.yaml"
-with open(config_file_path, encoding='utf-8') as yaml_file:
-    scenario = yaml.load(yaml_file, Loader = yaml.FullLoader).get("scenario")
+scenario = ConfigPaths().get_scenario_name()
 input_data_dir = Path("resources","data")
 
 SCENARIO = scenario
@@ -64,6 +62,12 @@ logger.info("Reading input and result data")
 INPUT_DATA = read_csv(str(Path("results", scenario, "data")))
 RESULT_DATA = read_csv((Path("results", scenario, "results")))
 
+# year-invariant parameters may be stored without a YEAR column
+# (see data_store.YEAR_BROADCAST)
+for param in YEAR_BROADCAST:
+    if param in INPUT_DATA and "YEAR" not in INPUT_DATA[param].columns:
+        INPUT_DATA[param] = expand_years(INPUT_DATA[param], INPUT_DATA["YEAR"]["VALUE"])
+
 # add in prodution by mode values to result data 
 logger.info("Adding production by mode data")
 RESULT_DATA["ProductionByTechnologyByMode"] = get_production_by_mode(
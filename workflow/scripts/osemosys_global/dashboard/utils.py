@@ -6,7 +6,8 @@ import geopandas as gpd
 from shapely.geometry import LineString
 from pathlib import Path 
 import os
-from osemosys_global.configuration import ConfigFile, ConfigPaths
+from osemosys_global.configuration import ConfigPaths
+from osemosys_global.codes import CodeIndex
 # from osemosys_global.visualisation.utils import (
 #     load_node_data_demand_center, 
 #     load_node_data_centroid, 
@@ -152,10 +153,11 @@ def parse_pwr_codes(df: pd.DataFrame) -> pd.DataFrame:
     
     if not df.empty:
         df = df.drop(columns=["REGION"])
-        df["CATEGORY"] = df["TECHNOLOGY"].str[3:6]
-        df["REGION_CODE"] = df["TECHNOLOGY"].str[6:11]
-        df["COUNTRY"] = df["TECHNOLOGY"].str[6:9]
-        df["REGION"] = df["TECHNOLOGY"].str[9:11]
+        techs = CodeIndex(df["TECHNOLOGY"], "TECHNOLOGY")
+        df["CATEGORY"] = techs.field("CATEGORY")
+        df["REGION_CODE"] = techs.field("NODE")
+        df["COUNTRY"] = techs.field("COUNTRY")
+        df["REGION"] = techs.take(techs.table["NODE"].str[3:5])
         df = df.drop(columns=["TECHNOLOGY"])
         df = sort_columns(df)
     else:
@@ -0,0 +1,305 @@
+"""Reading and writing of preprocessed data tables.
+
+Tables are addressed by their CSV path, e.g. results/data/TECHNOLOGY.csv,
+and stored in the format set by 'data_format' in the config file: CSV
+(default) or Parquet, with set columns stored as categoricals. CSV files for
+otoole are exported from the Parquet store with
+
+    python workflow/scripts/osemosys_global/data_store.py to_csv <data_dir>
+
+When the preprocessing stages run in a single process (see
+run_preprocessing.py), tables are instead held in memory, handed from one
+stage to the next, and written to disk once at the end of the stage chain.
+
+Parameters in YEAR_BROADCAST hold the same values in every model year and
+are stored once, without their YEAR column, in the Parquet store and in
+memory. CSV files are read by otoole, so these tables are expanded to the
+model years by expand_years() whenever they are written as CSV, as is the
+data file (see datafile.py).
+"""
+
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+if __package__:
+    # imported as osemosys_global.data_store, e.g. by the dashboard
+    from .configuration import ConfigFile
+    from .constants import SET_DTYPES
+else:
+    from configuration import ConfigFile
+    from constants import SET_DTYPES
+
+import logging
+logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
+
+DATA_FORMATS = ['csv', 'parquet']
+
+# Set columns stored as categoricals in the Parquet format
+CATEGORICAL_COLUMNS = ['REGION', 'TECHNOLOGY', 'FUEL', 'EMISSION', 'STORAGE',
+                       'TIMESLICE', 'SEASON']
+
+# Parameters indexed by YEAR that are stored without a YEAR column, as their
+# values do not change between years
+YEAR_BROADCAST = ['CapacityFactor', 'SpecifiedDemandProfile']
+
+# Tables held in memory keyed by resolved file path. None when tables are
+# written straight to disk.
+_MEMORY: Optional[Dict[str, pd.DataFrame]] = None
+
+_DATA_FORMAT: Optional[str] = None
+
+def data_format() -> str:
+    """Returns the configured storage format of data tables"""
+    global _DATA_FORMAT
+    if _DATA_FORMAT is None:
+        data_format = ConfigFile('config').get('data_format') or 'csv'
+        if data_format not in DATA_FORMATS:
+            raise ValueError(
+                f"data_format must be one of {DATA_FORMATS}, not '{data_format}'")
+        _DATA_FORMAT = data_format
+    return _DATA_FORMAT
+
+def table_path(path) -> Path:
+    """Returns the file path of a table in the configured data format.
+
+    Arguments:
+        path: str
+            CSV path of the table, e.g. results/data/TECHNOLOGY.csv
+
+    Returns:
+        Path
+    """
+    return Path(path).with_suffix(f'.{data_format()}')
+
+def _key(path) -> str:
+    return str(table_path(path).resolve())
+
+def _to_categorical(df: pd.DataFrame) -> pd.DataFrame:
+    """Stores set columns, and the VALUE column of set tables, as categoricals"""
+    columns = [col for col in df.columns if col in CATEGORICAL_COLUMNS]
+    if list(df.columns) == ['VALUE'] and df['VALUE'].dtype == object:
+        columns.append('VALUE')
+    return df.astype({col: 'category' for col in columns})
+
+def _from_categorical(df: pd.DataFrame) -> pd.DataFrame:
+    """Decodes categorical columns to the dtype of their categories"""
+    for col in df.columns[df.dtypes == 'category']:
+        df[col] = df[col].astype(df[col].cat.categories.dtype)
+    return df
+
+def _model_years(path) -> List[int]:
+    """Model years of the tables in the directory of path, from its YEAR
+    table or else from the config file"""
+    year_path = Path(path).with_name('YEAR.csv')
+    if table_exists(year_path):
+        return read_table(year_path)['VALUE'].to_list()
+    config = ConfigFile('config')
+    return list(range(config.get('startYear'), config.get('endYear') + 1))
+
+def _write_file(df: pd.DataFrame, path: Path) -> None:
+    if path.suffix == '.parquet':
+        _to_categorical(df).to_parquet(path, index=False)
+    else:
+        if path.stem in YEAR_BROADCAST and 'YEAR' not in df.columns:
+            df = expand_years(df, _model_years(path))
+        df.to_csv(path, index=None)
+
+def _apply_schema(df: pd.DataFrame, name: str) -> pd.DataFrame:
+    """Returns a copy of df with the dtypes of the otoole schema.
+
+    Set columns (e.g. YEAR), and the VALUE column of set tables, get their
+    dtype from SET_DTYPES. Parameter values are numeric. Tables held in
+    memory or stored as Parquet so have the dtypes they would have been
+    read back from CSV with.
+    """
+    df = df.reset_index(drop=True).copy()
+    dtypes = {col: SET_DTYPES[col] for col in df.columns if col in SET_DTYPES}
+    if list(df.columns) == ['VALUE']:
+        if name in SET_DTYPES:
+            dtypes['VALUE'] = SET_DTYPES[name]
+    elif 'VALUE' in df.columns:
+        df['VALUE'] = pd.to_numeric(df['VALUE'])
+    return df.astype(dtypes)
+
+def hold_in_memory() -> None:
+    """Keeps written tables in memory until flush() is called"""
+    global _MEMORY
+    if _MEMORY is None:
+        _MEMORY = {}
+
+def in_memory(path=None) -> bool:
+    """Checks if tables are held in memory, or with path if that table is"""
+    if path is None:
+        return _MEMORY is not None
+    return _MEMORY is not None and _key(path) in _MEMORY
+
+def flush() -> None:
+    """Writes all tables held in memory to disk"""
+    global _MEMORY
+    if _MEMORY is None:
+        return
+    for path, df in _MEMORY.items():
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        _write_file(df, Path(path))
+    logging.info(f'{len(_MEMORY)} tables written to disk')
+    _MEMORY = None
+
+def read_table(path, categorical: bool = False) -> pd.DataFrame:
+    """Reads a data table.
+
+    Arguments:
+        path: str
+            CSV path of the table
+        categorical: bool
+            Keep set columns of Parquet tables as categoricals
+
+    Returns:
+        pd.DataFrame
+    """
+    if _MEMORY is not None and _key(path) in _MEMORY:
+        return _MEMORY[_key(path)].copy()
+    path = table_path(path)
+    if path.suffix == '.parquet':
+        df = pd.read_parquet(path)
+        return df if categorical else _from_categorical(df)
+    return pd.read_csv(path)
+
+def read_table_as_csv(path) -> pd.DataFrame:
+    """Reads a data table as it is read back from its CSV export, whether it
+    is held in memory or stored in either data format: parameters in
+    YEAR_BROADCAST are expanded to every year, and columns have the dtypes
+    of the otoole schema.
+
+    Arguments:
+        path: str
+            CSV path of the table
+
+    Returns:
+        pd.DataFrame
+    """
+    df = read_table(path)
+    if Path(path).stem in YEAR_BROADCAST and 'YEAR' not in df.columns:
+        df = expand_years(df, _model_years(path))
+    return _apply_schema(df, Path(path).stem)
+
+def read_table_chunks(path, chunksize: int, dtype=None) -> Iterator[pd.DataFrame]:
+    """Reads a data table in chunks of rows.
+
+    Arguments:
+        path: str
+            CSV path of the table
+        chunksize: int
+            Number of rows per chunk
+        dtype:
+            Column dtypes, as passed to pd.read_csv
+
+    Returns:
+        Iterator[pd.DataFrame]
+    """
+    if (_MEMORY is not None and _key(path) in _MEMORY) or \
+            table_path(path).suffix == '.parquet':
+        df = read_table(path)
+        if isinstance(dtype, dict):
+            dtype = {col: t for col, t in dtype.items() if col in df.columns}
+        if dtype is not None:
+            df = df.astype(dtype)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+        return
+    yield from pd.read_csv(table_path(path), chunksize=chunksize, dtype=dtype)
+
+def write_table(df: pd.DataFrame, path) -> None:
+    """Writes a data table.
+
+    Arguments:
+        df: pd.DataFrame
+            otoole formatted dataframe
+        path: str
+            CSV path of the table
+    """
+    if _MEMORY is not None:
+        _MEMORY[_key(path)] = _apply_schema(df, Path(path).stem)
+    elif data_format() == 'csv':
+        _write_file(df, table_path(path))
+    else:
+        _write_file(_apply_schema(df, Path(path).stem), table_path(path))
+
+def save_table(df: pd.DataFrame, path) -> None:
+    """Writes a data table to disk, also while tables are held in memory.
+
+    Arguments:
+        df: pd.DataFrame
+            otoole formatted dataframe
+        path: str
+            CSV path of the table
+    """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    _write_file(_apply_schema(df, Path(path).stem), table_path(path))
+
+def is_year_broadcast(df: pd.DataFrame, indices) -> bool:
+    """Checks if a table of a parameter indexed by indices is stored once for
+    all years"""
+    return 'YEAR' in indices and 'YEAR' not in df.columns
+
+def expand_years(df: pd.DataFrame, years) -> pd.DataFrame:
+    """Expands a year-invariant table to every year.
+
+    Arguments:
+        df: pd.DataFrame
+            otoole formatted dataframe without a YEAR column
+        years: List[int]
+            Model years
+
+    Returns:
+        pd.DataFrame
+            df with a row per year, and the YEAR column before VALUE
+    """
+    df = df.merge(pd.DataFrame({'YEAR': list(years)}), how='cross')
+    columns = [col for col in df.columns if col not in ('YEAR', 'VALUE')]
+    return df[columns + ['YEAR', 'VALUE']]
+
+def table_exists(path) -> bool:
+    """Checks if a data table has been written"""
+    if _MEMORY is not None and _key(path) in _MEMORY:
+        return True
+    return os.path.exists(table_path(path))
+
+def list_tables(data_dir) -> Dict[str, Path]:
+    """Returns the CSV paths of all tables in a directory, keyed by name"""
+    tables = {f.stem: f.with_suffix('.csv')
+              for f in Path(data_dir).glob(f'*.{data_format()}')}
+    if _MEMORY is not None:
+        for key in _MEMORY:
+            if Path(key).parent == Path(data_dir).resolve():
+                tables[Path(key).stem] = Path(data_dir, f'{Path(key).stem}.csv')
+    return dict(sorted(tables.items()))
+
+def read_tables(data_dir) -> Dict[str, pd.DataFrame]:
+    """Reads every table in a directory, keyed by name.
+
+    Tables in the configured data format are read with read_table(), and
+    CSV files without such a table (e.g. result tables) as CSV.
+    """
+    data = {name: read_table(path)
+            for name, path in list_tables(data_dir).items()}
+    for path in sorted(Path(data_dir).glob('*.csv')):
+        if path.stem not in data:
+            data[path.stem] = pd.read_csv(path)
+    return data
+
+def export_csv(data_dir) -> None:
+    """Writes a CSV file for every Parquet table in a directory, with the
+    parameters in YEAR_BROADCAST expanded to every year"""
+    for path in list_tables(data_dir).values():
+        _write_file(read_table(path), Path(path))
+    logging.info(f'CSV files exported to {data_dir}')
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3 or sys.argv[1] != 'to_csv':
+        msg = f'Usage: python {sys.argv[0]} to_csv <data_dir>'
+        sys.exit(msg)
+    export_csv(sys.argv[2])
@@ -0,0 +1,132 @@
+"""Writes the GMPL data file of a scenario from its data tables.
+
+This replaces `otoole convert csv datafile`. The otoole config file gives
+the indices, dtype and default value of every set and parameter, and the file
+is written in the same layout as otoole's:
+
+    param default 0 : AccumulatedAnnualDemand :=
+    GLOBAL ELCIND01 2025 1.5
+    ;
+    set EMISSION :=
+    CO2
+    ;
+
+Tables are streamed to the file in chunks, and rows equal to the default
+value of the parameter are dropped. Year-invariant parameters stored without
+a YEAR column (see data_store.YEAR_BROADCAST) are written once per year.
+
+With --mode-sets, the pre-processed sets used by
+resources/osemosys_fast_preprocessed.txt (see mode_sets.py) are built from
+the same chunks and appended to the file.
+
+    python workflow/scripts/osemosys_global/datafile.py <data_dir> <otoole_config> <outfile> [--mode-sets]
+"""
+
+import os
+import sys
+from typing import Dict, List
+
+import pandas as pd
+import yaml
+
+from data_store import (is_year_broadcast, read_table, read_table_chunks,
+                        table_exists)
+from mode_sets import (MODE_SETS_BY_PARAM, active_rows, format_mode_sets,
+                       write_mode_sets)
+
+import logging
+logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
+
+CHUNKSIZE = 1_000_000
+
+# Sets needed to index the pre-processed sets
+MODE_SET_INDICES = ['FUEL', 'TECHNOLOGY', 'STORAGE', 'EMISSION']
+
+def read_otoole_config(otoole_config) -> Dict[str, Dict]:
+    '''Returns the sets and parameters of an otoole config file, sorted by
+    name as otoole writes them'''
+    with open(otoole_config, encoding='utf-8') as yaml_file:
+        parsed = yaml.load(yaml_file, Loader = yaml.FullLoader)
+    return {name: parsed[name] for name in sorted(parsed)
+            if parsed[name]['type'] in ('set', 'param')}
+
+def _write_set(handle, data_dir, name) -> List[str]:
+    '''Writes a set and returns its members'''
+    path = os.path.join(data_dir, f'{name}.csv')
+    members = []
+    handle.write(f'set {name} :=\n')
+    if table_exists(path):
+        for chunk in read_table_chunks(path, CHUNKSIZE, dtype=str):
+            chunk['VALUE'].to_csv(handle, header=False, index=False)
+            members.extend(chunk['VALUE'].to_list())
+    handle.write(';\n')
+    return members
+
+def _write_param(handle, data_dir, name, details, active, years) -> None:
+    '''Writes a parameter without its default values. Rows of parameters in
+    MODE_SETS_BY_PARAM with data are collected in active.'''
+    path = os.path.join(data_dir, f'{name}.csv')
+    default = details['default']
+    handle.write(f'param default {default} : {name} :=\n')
+    if table_exists(path):
+        dtype = {index: str for index in details['indices']}
+        dtype['VALUE'] = float
+        for chunk in read_table_chunks(path, CHUNKSIZE, dtype=dtype):
+            chunk = chunk.loc[chunk['VALUE'] != default]
+            if is_year_broadcast(chunk, details['indices']):
+                for year in years:
+                    chunk.assign(YEAR=year)[
+                        details['indices'] + ['VALUE']].to_csv(
+                        handle, sep=' ', header=False, index=False)
+            else:
+                chunk = chunk[details['indices'] + ['VALUE']]
+                chunk.to_csv(handle, sep=' ', header=False, index=False)
+            if name in MODE_SETS_BY_PARAM:
+                active.setdefault(name, []).append(active_rows(chunk, name))
+    handle.write(';\n')
+
+def write_datafile(data_dir, otoole_config, data_outfile,
+                   mode_sets: bool = False) -> None:
+    '''Writes a GMPL data file.
+
+    Arguments:
+        data_dir: str
+            Directory of the otoole formatted data tables
+        otoole_config: str
+            Path to the otoole config file
+        data_outfile: str
+            Path of the data file to write
+        mode_sets: bool
+            Append the pre-processed MODEx and MODEperTECHNOLOGY sets
+    '''
+    sets = {}
+    active = {}
+    years = read_table(os.path.join(data_dir, 'YEAR.csv'))['VALUE'].astype(
+        str).to_list()
+    with open(data_outfile, 'w', newline='') as handle:
+        handle.write('# Model file written by datafile.py\n')
+        for name, details in read_otoole_config(otoole_config).items():
+            if details['type'] == 'set':
+                sets[name] = _write_set(handle, data_dir, name)
+            else:
+                _write_param(handle, data_dir, name, details, active, years)
+
+        if mode_sets:
+            active = {
+                param: (pd.concat(active[param]).drop_duplicates()
+                        if param in active else
+                        pd.DataFrame(columns=[index, 'MODE_OF_OPERATION',
+                                              'TECHNOLOGY']))
+                for param, index in MODE_SETS_BY_PARAM.items()}
+            write_mode_sets(handle, format_mode_sets(
+                active, {name: sets.get(name, []) for name in MODE_SET_INDICES}))
+        handle.write('end;\n')
+    logging.info(f'Data file written to {data_outfile}')
+
+if __name__ == '__main__':
+    args = [arg for arg in sys.argv[1:] if arg != '--mode-sets']
+    if len(args) != 3:
+        msg = (f'Usage: python {sys.argv[0]} <data_dir> <otoole_config> '
+               '<outfile> [--mode-sets]')
+        sys.exit(msg)
+    write_datafile(*args, mode_sets='--mode-sets' in sys.argv)
@@ -0,0 +1,127 @@
+'''Ensemble of the country-level demand projections.
+
+With 'demand_ensemble: True' in the config file, demand_projection.py
+projects the demand of every SSP pathway (SSP1 to SSP5) with both regression
+specs: GDP|PPP per capita ('GDP'), and GDP|PPP per capita with the urban
+population share ('GDP_URB'). The population, GDP|PPP and urbanization
+projections are laid out as (pathway x country x year) arrays, so each spec
+is projected for all pathways and countries in one pass (see
+regression.py).
+
+The ensemble is written to DemandProjections.csv as a tidy table of
+PATHWAY, SPEC, COUNTRY, YEAR and VALUE, the country demand including T&D
+losses in GWh. select_projection() takes the projection of a single pathway
+and spec from it.
+'''
+
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from regression import project
+
+PATHWAYS = ['SSP1', 'SSP2', 'SSP3', 'SSP4', 'SSP5']
+
+# Regressors of each regression spec
+SPECS = {
+    'GDP': ['WB_GDPppp'],
+    'GDP_URB': ['WB_GDPppp', 'WB_Urb'],
+}
+
+COLUMNS = ['PATHWAY', 'SPEC', 'COUNTRY', 'YEAR', 'VALUE']
+
+def pathway_array(projections: pd.DataFrame, missing: pd.DataFrame,
+                  source: str, countries: List[str],
+                  years: List[int]) -> np.ndarray:
+    '''Projections of a variable for every pathway.
+
+    Arguments:
+        projections: pd.DataFrame
+            IAMC projections, with Model, Scenario and Region columns and a
+            column per year
+        missing: pd.DataFrame
+            Custom projections of countries missing from the SSP data, with
+            a Scenario column and indexed by Region
+        source: str
+            Model of the projections, e.g. 'OECD Env-Growth'
+        countries: List[str]
+            Countries to project
+        years: List[int]
+            Years to project
+
+    Returns:
+        np.ndarray
+            Array of shape (pathways, countries, years), NaN where a
+            pathway has no data for a country
+    '''
+    df = projections.loc[projections['Model'] == source].set_index('Region')
+    df = pd.concat([df, missing])
+    df = df.loc[df['Scenario'].isin(PATHWAYS)]
+    df = df.set_index('Scenario', append=True).swaplevel()
+    df = df.loc[~df.index.duplicated(keep='first'), years]
+    index = pd.MultiIndex.from_product([PATHWAYS, countries])
+    return df.reindex(index).values.astype(np.float64).reshape(
+        len(PATHWAYS), len(countries), len(years))
+
+def project_ensemble(gdp: np.ndarray, pop: np.ndarray, urb: np.ndarray,
+                     fits: Dict[str, pd.DataFrame], groups: pd.Series,
+                     losses: np.ndarray, baseline: np.ndarray,
+                     years: List[int]) -> pd.DataFrame:
+    '''Projects country demand for every pathway and regression spec.
+
+    Arguments:
+        gdp: np.ndarray
+            GDP|PPP in billions, of shape (pathways, countries, years)
+        pop: np.ndarray
+            Population in millions, of the same shape
+        urb: np.ndarray
+            Urban population share, of the same shape
+        fits: Dict[str, pd.DataFrame]
+            Output of regression.fit_groups() for each spec in SPECS
+        groups: pd.Series
+            Regression group of each country, indexed by country
+        losses: np.ndarray
+            T&D losses in %, of shape (countries, years)
+        baseline: np.ndarray
+            Minimum demand of each country in GWh, NaN for none
+
+    Returns:
+        pd.DataFrame
+            Tidy table of COLUMNS
+    '''
+    n_pathways, n_countries, n_years = gdp.shape
+    regressors = {'WB_GDPppp': gdp * 1000 / pop, 'WB_Urb': urb}
+
+    cubes = []
+    for spec, fit in fits.items():
+        names = SPECS[spec]
+        X = np.stack([regressors[name] for name in names], axis=-1)
+        coefs = fit[names].reindex(groups.values).values
+        intercepts = fit['intercept'].reindex(groups.values).values
+        demand_pp = project(
+            np.tile(coefs, (n_pathways, 1)),
+            np.tile(intercepts, n_pathways),
+            X.reshape(n_pathways * n_countries, n_years, len(names)),
+        ).reshape(n_pathways, n_countries, n_years)
+
+        # Demand pp (kWh) times population (millions) is demand in GWh
+        demand = (demand_pp * pop).round(2)
+        demand = (demand * losses / 100 + demand).round(2)
+        demand = np.where(demand < baseline[:, None], baseline[:, None],
+                          demand)
+        cubes.append(demand)
+
+    index = pd.MultiIndex.from_product(
+        [list(fits), PATHWAYS, groups.index, years],
+        names=['SPEC', 'PATHWAY', 'COUNTRY', 'YEAR'])
+    df = pd.DataFrame({'VALUE': np.stack(cubes).ravel()}, index=index)
+    return df.reset_index()[COLUMNS].dropna(subset=['VALUE'])
+
+def select_projection(cube: pd.DataFrame, pathway: str,
+                      spec: str) -> pd.DataFrame:
+    '''Country demand of one pathway and spec of the ensemble, with a row
+    per country and a column per year'''
+    df = cube.loc[(cube['PATHWAY'] == pathway) & (cube['SPEC'] == spec)]
+    return df.pivot(index='COUNTRY', columns='YEAR',
+                    values='VALUE').rename_axis(index=None, columns=None)
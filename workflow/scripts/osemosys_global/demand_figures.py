@@ -0,0 +1,205 @@
+'''Diagnostic figures of the demand projections.
+
+demand_projection.py writes the historical data and regression of every
+spatial group (e.g. continent) to DemandRegression.csv, and the projected
+GDP|PPP and electricity demand per capita of every country to
+DemandRegressionProjections.csv. This script renders two figures per group
+from these tables in results/figs:
+
+    Demand regression {group}.jpg   historical data and regression fit
+    Demand projection {group}.jpg   historical data and 2035, 2050 and 2100
+                                    projections
+
+Groups are rendered in a process pool. The digest of each group's data is
+kept in results/cache/demand_figures.json, so a group is only rendered again
+when its data, or this script, has changed.
+
+Usage:
+    python workflow/scripts/osemosys_global/demand_figures.py
+'''
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from cache import file_digest
+from configuration import ConfigPaths
+from data_store import read_table
+
+import logging
+logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
+
+FIGSIZE = [8, 4]
+
+# Projection years and colours of the projection figures
+PROJECTION_YEARS = {2035: 'green', 2050: 'blue', 2100: 'red'}
+
+X_LABEL = 'GDPppp per capita (constant 2017 international $)'
+Y_LABEL = 'Electricity demand per capita (kWh)'
+
+def figure_paths(figs_dir: Path, group: str) -> List[Path]:
+    '''Regression and projection figures of a group'''
+    return [Path(figs_dir, f'Demand regression {group}.jpg'),
+            Path(figs_dir, f'Demand projection {group}.jpg')]
+
+def plot_regression(group: str, regression: pd.DataFrame, path: Path) -> None:
+    '''Plots the historical data of a group with its regression.
+
+    Arguments:
+        group: str
+            Spatial group
+        regression: pd.DataFrame
+            Rows of the group in DemandRegression.csv
+        path: Path
+            Figure file
+    '''
+    x = regression['WB_GDPppp']
+    y = regression['OWID_Elec']
+    r2 = regression['R2'].iloc[0]
+    fig = plt.figure(figsize=FIGSIZE)
+    ax1 = fig.add_subplot(111)
+    ax1.scatter(x, y, color='blue', alpha=0.5, label='GDPppp per capita')
+
+    if 'WB_Urb' in regression:
+        ax2 = ax1.twiny()
+        ax2.scatter(regression['WB_Urb'], y, color='red', alpha=0.5,
+                    label='Urban population')
+        ax2.set_xlabel('Urban population (% of total population)')
+        ax2.legend(loc='upper right')
+    else:
+        m = regression['coef_GDPppp'].iloc[0]
+        b = regression['intercept'].iloc[0]
+        ax1.plot(x, m * x + b, color='black', alpha=0.5)
+
+    plt.title(f'{group} R2 = {r2:.3f}')
+    ax1.legend(loc='upper left')
+    ax1.set_xlabel(X_LABEL)
+    ax1.set_ylabel(Y_LABEL)
+    fig.savefig(path)
+    plt.close(fig)
+
+def plot_projection(group: str, regression: pd.DataFrame,
+                    projections: pd.DataFrame, path: Path) -> None:
+    '''Plots the projected demand per capita of the countries of a group.
+
+    Arguments:
+        group: str
+            Spatial group
+        regression: pd.DataFrame
+            Rows of the group in DemandRegression.csv
+        projections: pd.DataFrame
+            Rows of the group in DemandRegressionProjections.csv
+        path: Path
+            Figure file
+    '''
+    # Lines of the regression are only drawn without urbanization, as the
+    # demand then only depends on GDP|PPP
+    line = 'WB_Urb' not in regression
+    m = regression['coef_GDPppp'].iloc[0]
+    b = regression['intercept'].iloc[0]
+
+    fig = plt.figure(figsize=FIGSIZE)
+    ax1 = fig.add_subplot(111)
+    x = regression['WB_GDPppp']
+    ax1.scatter(x, regression['OWID_Elec'], color='grey', alpha=0.5,
+                label='1985-2020')
+    if line:
+        ax1.plot(x, m * x + b, color='black', alpha=0.5)
+    for year, color in PROJECTION_YEARS.items():
+        projection = projections.loc[projections['YEAR'] == year]
+        x = projection['GDPppp_pp']
+        ax1.scatter(x, projection['Demand_pp'], color=color, alpha=0.5,
+                    label=str(year))
+        if line:
+            ax1.plot(x, m * x + b, color='black', alpha=0.5)
+
+    ax1.legend(loc='upper left')
+    plt.title(f'Demand projection {group}')
+    ax1.set_xlabel(X_LABEL)
+    ax1.set_ylabel(Y_LABEL)
+    fig.savefig(path)
+    plt.close(fig)
+
+def render(group: str, regression: pd.DataFrame, projections: pd.DataFrame,
+           figs_dir: Path) -> str:
+    '''Renders the figures of a group'''
+    regression_path, projection_path = figure_paths(figs_dir, group)
+    plot_regression(group, regression, regression_path)
+    plot_projection(group, regression, projections, projection_path)
+    return group
+
+def group_digest(script: str, regression: pd.DataFrame,
+                 projections: pd.DataFrame) -> str:
+    '''Digest of the data of a group and the script rendering it'''
+    digest = hashlib.sha256(script.encode())
+    for df in [regression, projections]:
+        digest.update(df.to_csv(index=False).encode())
+    return digest.hexdigest()
+
+def load_rendered(index_file: Path) -> Dict[str, str]:
+    '''Reads the digests of the data of previously rendered groups'''
+    if index_file.is_file():
+        with open(index_file, encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+def save_rendered(index_file: Path, rendered: Dict[str, str]) -> None:
+    '''Writes the digests of the data of rendered groups'''
+    index_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = index_file.with_name(f'{index_file.name}.tmp')
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(rendered, f)
+    os.replace(tmp_file, index_file)
+
+def main(processes: Optional[int] = None) -> None:
+    '''Renders the figures of groups whose data has changed.
+
+    Arguments:
+        processes: int
+            Maximum number of worker processes, by default the number of
+            CPUs
+    '''
+    config_paths = ConfigPaths()
+    regression = read_table(os.path.join(config_paths.output_data_dir,
+                                         'DemandRegression.csv'))
+    projections = read_table(os.path.join(config_paths.output_data_dir,
+                                          'DemandRegressionProjections.csv'))
+    figs_dir = Path(config_paths.output_dir, 'figs')
+    figs_dir.mkdir(parents=True, exist_ok=True)
+
+    script = file_digest(Path(__file__).resolve())
+    by_group = {
+        group: (df, projections.loc[projections['GROUP'] == group])
+        for group, df in regression.groupby('GROUP')}
+    digests = {group: group_digest(script, *data)
+               for group, data in by_group.items()}
+
+    index_file = Path(config_paths.cache_dir, 'demand_figures.json')
+    rendered = load_rendered(index_file)
+    stale = [group for group, digest in digests.items()
+             if rendered.get(group) != digest
+             or not all(path.is_file() for path in figure_paths(figs_dir, group))]
+
+    args = [(group, *by_group[group], figs_dir) for group in stale]
+    if len(stale) > 1:
+        workers = min(len(stale), processes or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(render, *zip(*args)))
+    else:
+        for arg in args:
+            render(*arg)
+
+    save_rendered(index_file, digests)
+    logging.info(f'Demand figures of {len(stale)} of {len(digests)} groups '
+                 'rendered')
+
+if __name__ == '__main__':
+    main()
@@ -6,14 +6,18 @@
 import pandas as pd
 import world_bank_data as wb
 import numpy as np
-import matplotlib.pyplot as plt
-import itertools
 import urllib
 import os
-from sklearn.linear_model import LinearRegression
 # from osemosys_global.configuration import ConfigFile, ConfigPaths
 from configuration import ConfigFile, ConfigPaths
-from utils import apply_dtypes
+from utils import apply_dtypes, cross_join
+from scope import node_fuels
+from data_store import write_table
+from workbooks import read_excel
+from profiles import load_profile
+from regression import fit_groups, project
+from demand_ensemble import (COLUMNS, SPECS, pathway_array, project_ensemble,
+                             select_projection)
 import logging 
 logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
 
@@ -26,6 +30,7 @@ config_paths = ConfigPaths()
 config = ConfigFile('config')
 
 custom_nodes = config.get('nodes_to_add')
+demand_ensemble = config.get('demand_ensemble')
 
 input_dir = config_paths.input_dir
 input_data_dir = config_paths.input_data_dir
@@ -48,25 +53,25 @@ except IOError:
 finally:
     Open.close()
 
-Import_memberships = pd.read_excel(os.path.join(input_data_dir,"PLEXOS_World_2015_Gold_V1.1.xlsx") , sheet_name = "Memberships")
+Import_memberships = read_excel(os.path.join(input_data_dir,"PLEXOS_World_2015_Gold_V1.1.xlsx") , sheet_name = "Memberships")
 
 # Imports SSP GDPppp and Population projections (https://tntcat.iiasa.ac.at/SspDb/dsd?Action=htmlpage&page=30)
-Import_iamc_db_GDPppp_Countries = pd.read_excel(os.path.join(input_data_dir,'iamc_db_GDPppp_Countries.xlsx'))
-Import_iamc_db_POP_Countries = pd.read_excel(os.path.join(input_data_dir,'iamc_db_POP_Countries.xlsx'))
-Import_iamc_db_URB_Countries = pd.read_excel(os.path.join(input_data_dir,'iamc_db_URB_Countries.xlsx'))
+Import_iamc_db_GDPppp_Countries = read_excel(os.path.join(input_data_dir,'iamc_db_GDPppp_Countries.xlsx'))
+Import_iamc_db_POP_Countries = read_excel(os.path.join(input_data_dir,'iamc_db_POP_Countries.xlsx'))
+Import_iamc_db_URB_Countries = read_excel(os.path.join(input_data_dir,'iamc_db_URB_Countries.xlsx'))
 
 # Imports custom GDPppp and Population projections for countries not included in the SSP datasets.
-Import_POP_Missing = pd.read_excel(os.path.join(input_data_dir,'iamc_db_POP_GDPppp_URB_Countries_Missing.xlsx') , 
+Import_POP_Missing = read_excel(os.path.join(input_data_dir,'iamc_db_POP_GDPppp_URB_Countries_Missing.xlsx') , 
                                    sheet_name = 'POP').set_index('Region')
 
-Import_GDP_Missing = pd.read_excel(os.path.join(input_data_dir,'iamc_db_POP_GDPppp_URB_Countries_Missing.xlsx') , 
+Import_GDP_Missing = read_excel(os.path.join(input_data_dir,'iamc_db_POP_GDPppp_URB_Countries_Missing.xlsx') , 
                                    sheet_name = 'GDP|PPP').set_index('Region')
 
-Import_URB_Missing = pd.read_excel(os.path.join(input_data_dir,'iamc_db_POP_GDPppp_URB_Countries_Missing.xlsx') , 
+Import_URB_Missing = read_excel(os.path.join(input_data_dir,'iamc_db_POP_GDPppp_URB_Countries_Missing.xlsx') , 
                                    sheet_name = 'URB').set_index('Region')
 
 # Imports T&D losses projections (https://www.sciencedirect.com/science/article/pii/S0142061518335075?via%3Dihub)
-Import_Incl_Losses = pd.read_excel(os.path.join(input_data_dir,'T&D Losses.xlsx'))
+Import_Incl_Losses = read_excel(os.path.join(input_data_dir,'T&D Losses.xlsx'))
 
 # ### Set boundaries for the regression
 
@@ -106,22 +111,19 @@ Spatial_Mapping_Node = Spatial_Mapping_Node.loc[~Spatial_Mapping_Node.index.dupl
 try:
     Open = open(os.path.join(input_data_dir,'All_Demand_UTC_2015.csv'))
     
-    Import_Hourly_Demand_2015 = pd.read_csv(os.path.join(input_data_dir,'All_Demand_UTC_2015.csv') , encoding='latin-1')
-    
 except IOError:
     urllib.request.urlretrieve ('https://dataverse.harvard.edu/api/access/datafile/3985039?format=original&gbrecs=true', 
                                 os.path.join(input_data_dir,'All_Demand_UTC_2015.csv'))
-    
-    Import_Hourly_Demand_2015 = pd.read_csv(os.path.join(input_data_dir,'All_Demand_UTC_2015.csv') , encoding='latin-1')
-
-# ### Determines relative 2015 share of demand per sub-country node
 
-#Sums the hourly demand as retrieved from the PLEXOS-World dataset to year total (in MWh) and drops all hourly values.
-Demand_2015_Raw = Import_Hourly_Demand_2015.drop(columns = ['Datetime'])
+# Hourly demand is read from the profile store (see profiles.py), which
+# TS_data.py shares
+Hourly_Demand_2015 = load_profile(os.path.join(input_data_dir,'All_Demand_UTC_2015.csv'))
 
-Demand_2015_Raw.loc['Node_Demand_2015'] = Demand_2015_Raw.sum()
+# ### Determines relative 2015 share of demand per sub-country node
 
-Demand_2015_Raw = Demand_2015_Raw.iloc[8760:]
+#Sums the hourly demand as retrieved from the PLEXOS-World dataset to year total (in MWh).
+Demand_2015_Raw = pd.DataFrame([Hourly_Demand_2015.sum()], 
+                               index = ['Node_Demand_2015'])
 
 # Transposes the dataframe and uses the original headers as column entry. 
 Demand_2015_Raw = Demand_2015_Raw.transpose().reset_index().rename(columns = {'index' : 
@@ -198,106 +200,60 @@ Country_Regression = pd.merge(Country_GDPppp_WB[['Year' ,
                                   right_on = ['Year' , 
                                               'Country'])
 
-if Urbanization == 'Yes':
-    Country_Regression = pd.merge(Country_Regression[['Year' , 
-                                                            'WB_GDPppp' , 
-                                                            'OWID_Elec']] , 
-                                     Country_Urb_WB[['Year' , 
-                                                     'WB_Urb']] , 
-                                  left_on = ['Year' , 
-                                             'Country'] , 
-                                  right_on = ['Year' , 
-                                              'Country'])
-
-# Drops all entries that don't have an inner match
-Country_Regression = Country_Regression.dropna()
+# Historical data of each regression spec (see demand_ensemble.py), with or without urbanization
+Country_Regression_Specs = {'GDP' : Country_Regression , 
+                            'GDP_URB' : pd.merge(Country_Regression[['Year' , 
+                                                                     'WB_GDPppp' , 
+                                                                     'OWID_Elec']] , 
+                                                 Country_Urb_WB[['Year' , 
+                                                                 'WB_Urb']] , 
+                                                 left_on = ['Year' , 
+                                                            'Country'] , 
+                                                 right_on = ['Year' , 
+                                                             'Country'])}
+
+for Spec, Country_Regression in Country_Regression_Specs.items():
+
+    # Drops all entries that don't have an inner match
+    Country_Regression = Country_Regression.dropna()
+
+    Country_Regression = pd.merge(Country_Regression, 
+                                      Spatial_Mapping_Country[['parent_object' , 
+                                                               'child_object']] , 
+                                      left_index = True , 
+                                      right_index = True)
+
+    Country_Regression_Specs[Spec] = Country_Regression.set_index(Spatial_Resolution)
+
+Regression_Spec = 'GDP_URB' if Urbanization == 'Yes' else 'GDP'
+Country_Regression = Country_Regression_Specs[Regression_Spec]
+
+# Groups the entries by <Spatial_Resolution> and calculates the regional linear fit based on all historical values.
+# All groups are solved at once (see regression.py).
+
+# If Urbanization is included linear regression occurs with multiple independent variables (GDPppp and % Urban population)
+# for the dependent variable (Electricity demand). Otherwise with a single independent variable (GDPppp).
+# The ensemble fits both.
+Regression_Fits = {Spec : fit_groups(Country_Regression_Specs[Spec] , 
+                                     SPECS[Spec] , 
+                                     'OWID_Elec')
+                   for Spec in (SPECS if demand_ensemble else [Regression_Spec])}
 
-Country_Regression = pd.merge(Country_Regression, 
-                                  Spatial_Mapping_Country[['parent_object' , 
-                                                           'child_object']] , 
-                                  left_index = True , 
-                                  right_index = True)
-
-Country_Regression = Country_Regression.set_index(Spatial_Resolution)
+if Urbanization == 'Yes':
+    R2_Column = 'R2_GDPppp_Urb/Elec'
+else:
+    R2_Column = 'R2_GDPppp/Elec'
 
-# Groups the entries by <Spatial_Resolution> and calculates the regional linear fit based on all historical values 
-sklearn_lr = LinearRegression()
-Country_Regression_Grouped = pd.DataFrame()
+Regression_Fit = Regression_Fits[Regression_Spec].rename(columns = {'WB_GDPppp' : 'coef_GDPppp' , 
+                                                                    'WB_Urb' : 'coef_Urb' , 
+                                                                    'R2' : R2_Column})
 
-for x in Country_Regression.index.unique():
-    
-    Country_Regression_Temp = Country_Regression.copy().loc[x]
-    
-    # If Urbanization is included linear regression occurs with multiple independent variables (GDPppp and % Urban population)
-    # for the dependent variable (Electricity demand). 
-    if Urbanization == 'Yes':
-        
-        sklearn_lr.fit(Country_Regression_Temp[['WB_GDPppp' , 
-                                                   'WB_Urb']] , 
-                       Country_Regression_Temp['OWID_Elec'])
-        
-        Country_Regression_Temp['intercept'
-                                  ] ,  Country_Regression_Temp['coef_GDPppp'
-                                                                 ] ,  Country_Regression_Temp['coef_Urb'
-                                                                                                ] = [sklearn_lr.intercept_ , 
-                                                                                                float(sklearn_lr.coef_[0]) , 
-                                                                                               float(sklearn_lr.coef_[1])]
-               
-        Country_Regression_Temp['R2_GDPppp_Urb/Elec'] = sklearn_lr.score(Country_Regression_Temp[['WB_GDPppp' , 
-                                                   'WB_Urb']] , Country_Regression_Temp['OWID_Elec'])
-        
-        Country_Regression_Grouped = Country_Regression_Grouped.append(Country_Regression_Temp)
-        
-    # If Urbanization is not included linear regression occurs with single independent variables (GDPppp) for the dependent
-    # variable (Electricity demand).    
-    else:
-        
-        sklearn_lr.fit(Country_Regression_Temp[['WB_GDPppp']], 
-                       Country_Regression_Temp['OWID_Elec'])
-              
-        Country_Regression_Temp['intercept'
-                                  ] ,  Country_Regression_Temp['coef_GDPppp'] = [sklearn_lr.intercept_ , 
-                                                                                    float(sklearn_lr.coef_)]
-        
-        Country_Regression_Temp['R2_GDPppp/Elec'] = sklearn_lr.score(Country_Regression_Temp[['WB_GDPppp']] , 
-                                                                   Country_Regression_Temp['OWID_Elec'])
-        
-        Country_Regression_Grouped = Country_Regression_Grouped.append(Country_Regression_Temp)
-
-for a in Country_Regression_Grouped.index.unique():
-    Country_Regression_plot = Country_Regression_Grouped.loc[a]
-    b = Country_Regression_plot['WB_GDPppp']
-    c = Country_Regression_plot['OWID_Elec']
-    x = Country_Regression_plot.loc[a , 'WB_GDPppp']
-    m = Country_Regression_plot.loc[a , 'coef_GDPppp']
-    z = Country_Regression_plot.loc[a , 'intercept']
-    fig = plt.figure()
-    ax1 = fig.add_subplot(111)
-    ax1.scatter(b , c , color = 'blue' , alpha = 0.5 , label = 'GDPppp per capita')
-    
-    if Urbanization == 'Yes':
-        
-        w2 = Country_Regression_plot.loc[a , 'R2_GDPppp_Urb/Elec'].unique()
-        d = Country_Regression_plot['WB_Urb']
-        ax2 = ax1.twiny()
-        ax2.scatter(d , c , color = 'red' , alpha = 0.5 , label = 'Urban population') 
-        ax2.set_xlabel('Urban population (% of total population)')
-        ax2.legend(loc = 'upper right')
-        plt.title(f'{a} R2 = {w2}')
-        
-    else:
-        ax1.plot(x , m * x + z , color = 'black' , alpha = 0.5)
-        w = Country_Regression_plot.loc[a , 'R2_GDPppp/Elec'].unique()
-        plt.title(f'{a} R2 = {w}')
-    
-    ax1.legend(loc='upper left')
-    ax1.set_xlabel('GDPppp per capita (constant 2017 international $)')
-    ax1.set_ylabel('Electricity demand per capita (kWh)')
-    plt.rcParams["figure.figsize"] = [8,4]
+Country_Regression_Grouped = Country_Regression.join(Regression_Fit)
 
-    if not os.path.exists(os.path.join(output_dir,'figs')):
-        os.makedirs(os.path.join(output_dir,'figs'))
-    plt.savefig(os.path.join(output_dir,'figs',f'{a} R2 = {w2}'+'.jpg'))
+# Historical data and regression of each group, for the figures of demand_figures.py
+Demand_Regression = Country_Regression_Grouped.drop(columns = 'parent_object').rename(columns = {R2_Column : 'R2'})
+write_table(Demand_Regression.rename_axis('GROUP').reset_index() , 
+            os.path.join(output_data_dir, 'DemandRegression.csv'))
 
 # ## Country-level Projections
 
@@ -325,10 +281,10 @@ for x in Country_POP_SSP_Missing.index:
         logging.info('Country data for %s included from custom dataset.', x)
 
 # Filters data for relevant SSP
-Import_POP_Missing = Import_POP_Missing.loc[(Import_POP_Missing['Scenario'] == Pathway)]
+Import_POP_Missing_SSP = Import_POP_Missing.loc[(Import_POP_Missing['Scenario'] == Pathway)]
 
 # Appends both dataframes
-Country_POP_SSP = Country_POP_SSP.append(Import_POP_Missing, ignore_index = False)
+Country_POP_SSP = pd.concat([Country_POP_SSP, Import_POP_Missing_SSP])
 
 # Filters data for relevant to be modelled countries
 Country_POP_SSP = pd.merge(Spatial_Mapping_Country[['child_object']] , 
@@ -360,10 +316,10 @@ for x in Country_GDPppp_SSP_Missing.index:
         logging.info('Country data for %s included from custom dataset.', x)
 
 # Filters data for relevant SSP
-Import_GDP_Missing = Import_GDP_Missing.loc[(Import_GDP_Missing['Scenario'] == Pathway)]
+Import_GDP_Missing_SSP = Import_GDP_Missing.loc[(Import_GDP_Missing['Scenario'] == Pathway)]
 
 # Appends both dataframes
-Country_GDPppp_SSP = Country_GDPppp_SSP.append(Import_GDP_Missing, ignore_index = False)
+Country_GDPppp_SSP = pd.concat([Country_GDPppp_SSP, Import_GDP_Missing_SSP])
 
 # Filters data for relevant to be modelled countries
 Country_GDPppp_SSP = pd.merge(Spatial_Mapping_Country[['child_object']] , 
@@ -395,10 +351,10 @@ for x in Country_URB_SSP_Missing.index:
         logging.info('Country data for %s included from custom dataset.', x)
 
 # Filters data for relevant SSP
-Import_URB_Missing = Import_URB_Missing.loc[(Import_URB_Missing['Scenario'] == Pathway)]
+Import_URB_Missing_SSP = Import_URB_Missing.loc[(Import_URB_Missing['Scenario'] == Pathway)]
 
 # Appends both dataframes
-Country_URB_SSP = Country_URB_SSP.append(Import_URB_Missing, ignore_index = False)
+Country_URB_SSP = pd.concat([Country_URB_SSP, Import_URB_Missing_SSP])
 
 # Filters data for relevant to be modelled countries
 Country_URB_SSP = pd.merge(Spatial_Mapping_Country[['child_object']] , 
@@ -430,8 +386,7 @@ Country_GDPppp_pp_SSP = pd.merge(Base_df_projections ,
                            right_index = True , 
                            how = 'left')
 
-for x in Years_List_5:
-    Country_GDPppp_pp_SSP[x] = (Country_GDPppp_SSP[x] * 1000) / Country_POP_SSP[x]
+Country_GDPppp_pp_SSP[Years_List_5] = (Country_GDPppp_SSP[Years_List_5] * 1000) / Country_POP_SSP[Years_List_5]
     
 if Urbanization == 'Yes':
     y = ['child_object' , 
@@ -450,66 +405,29 @@ Country_Demand_projected_SSP = Country_GDPppp_pp_SSP.copy([[y]])
 
 Country_Demand_projected_SSP['Variable'] = 'Demand|projected|pp'
 
+# Regressors of every country and 5-year step, of shape (countries, years, regressors), projected in one product
+Projection_Regressors = [Country_GDPppp_pp_SSP[Years_List_5].values]
 if Urbanization == 'Yes':
-    for z in Years_List_5:
-         Country_Demand_projected_SSP[z] = (Country_Demand_projected_SSP['coef_GDPppp'] * 
-                                            Country_GDPppp_pp_SSP[z] + 
-                                            Country_Demand_projected_SSP['coef_Urb'] * 
-                                            Country_URB_SSP[z] + 
-                                            Country_Demand_projected_SSP['intercept'])
-else:
-    for z in Years_List_5:
-         Country_Demand_projected_SSP[z] = (Country_Demand_projected_SSP['coef_GDPppp'] * 
-                                            Country_GDPppp_pp_SSP[z] + 
-                                            Country_Demand_projected_SSP['intercept'])
-
-for a in Spatial_Mapping_Country['child_object'].unique():
-    Country_Regression_Grouped_plot = Country_Regression_Grouped.loc[a]
-    
-    Country_GDPppp_pp_SSP_plot = Country_GDPppp_pp_SSP.loc[(Country_GDPppp_pp_SSP['child_object'] == a)]
-    
-    Country_Demand_projected_SSP_plot = Country_Demand_projected_SSP.loc[(Country_Demand_projected_SSP['child_object'
-                                                                                                         ] == a)]
-    x = Country_Regression_Grouped_plot['WB_GDPppp']
-    x2 = Country_GDPppp_pp_SSP_plot[2035]
-    x3 = Country_GDPppp_pp_SSP_plot[2050]
-    x4 = Country_GDPppp_pp_SSP_plot[2100]
-    y = Country_Regression_Grouped_plot['OWID_Elec']
-    y2 = Country_Demand_projected_SSP_plot[2035]
-    y3 = Country_Demand_projected_SSP_plot[2050]
-    y4 = Country_Demand_projected_SSP_plot[2100]
-    m = Country_Regression_Grouped_plot['coef_GDPppp'].unique()
-    b = Country_Regression_Grouped_plot['intercept'].unique()
-    fig = plt.figure()
-    ax1 = fig.add_subplot(111)
-    ax1.scatter(x , y , color = 'grey' , alpha = 0.5 , label = '1985-2020')
-    ax1.scatter(x2 , y2 , color = 'green' , alpha = 0.5 , label = '2035')
-    ax1.scatter(x3 , y3 , color = 'blue' , alpha = 0.5 , label = '2050')
-    ax1.scatter(x4 , y4 , color = 'red' , alpha = 0.5 , label = '2100')
-    ax1.legend(loc='upper left')
-    
-    if Urbanization == 'No':
-        plt.plot(x , m * x + b , color = 'black' , alpha = 0.5)
-        plt.plot(x2 , m * x2 + b , color = 'black' , alpha = 0.5)
-        plt.plot(x3 , m * x3 + b , color = 'black' , alpha = 0.5)
-        plt.plot(x4 , m * x4 + b , color = 'black' , alpha = 0.5)
-        
-    plt.title(f'Demand projection {a}')
-    ax1.set_xlabel('GDPppp per capita (constant 2017 international $)')
-    ax1.set_ylabel('Electricity demand per capita (kWh)')
-    plt.rcParams["figure.figsize"] = [8,4]
+    Projection_Regressors.append(Country_URB_SSP[Years_List_5].reindex(Country_GDPppp_pp_SSP.index).values)
 
-    plt.savefig(os.path.join(output_dir,'figs',f'Demand projection {a}'+'.jpg'))
+Country_Demand_projected_SSP[Years_List_5] = project(Country_Demand_projected_SSP[w[:-1]].values , 
+                                                     Country_Demand_projected_SSP['intercept'].values , 
+                                                     np.stack(Projection_Regressors , axis = -1))
 
+# Projected GDP|PPP and demand pp of each country, for the figures of demand_figures.py
+Demand_Regression_Projections = pd.concat([Country_GDPppp_pp_SSP[Years_List_5].stack().rename('GDPppp_pp') , 
+                                           Country_Demand_projected_SSP[Years_List_5].stack().rename('Demand_pp')] , 
+                                          axis = 1).rename_axis(['COUNTRY' , 'YEAR']).reset_index()
+Demand_Regression_Projections.insert(0 , 'GROUP' , Demand_Regression_Projections['COUNTRY'].map(Country_GDPppp_pp_SSP['child_object']))
+write_table(Demand_Regression_Projections , 
+            os.path.join(output_data_dir, 'DemandRegressionProjections.csv'))
 
 # ### Aggregates projected demand per person to full country-level
 
 # Multiplies the country-level projected demand pp (in kWh) with the total population (in millions) to get country-level 
 # total projected demand (in GWh).
-Country_Demand_projected_SSP_Aggregated = pd.DataFrame()
-for x in Years_List_5:
-     Country_Demand_projected_SSP_Aggregated[x] = (Country_Demand_projected_SSP[x] * 
-                                                   Country_POP_SSP[x]).round(2)
+Country_Demand_projected_SSP_Aggregated = (Country_Demand_projected_SSP[Years_List_5] * 
+                                           Country_POP_SSP[Years_List_5]).round(2)
 
 # ### Adds transmission and distribution losses to country-level demand
 # Explicit modelling of domestic transmission and distribution is not incorporated in PLEXOS-World. Country-level T&D losses 
@@ -527,30 +445,46 @@ Country_Demand_Incl_Losses = Country_Demand_Incl_Losses[Country_Demand_Incl_Loss
                                                         (Spatial_Mapping_Country.index)
                                                        ].reindex(Spatial_Mapping_Country.index)
 
-Country_Demand_projected_SSP_Incl_Losses_Raw = pd.DataFrame()
-
 # Add T&D losses to the projected country-level demand.
-for z in Years_List_5:
-     Country_Demand_projected_SSP_Incl_Losses_Raw[z] = (Country_Demand_projected_SSP_Aggregated[z] * 
-                                                    Country_Demand_Incl_Losses[z] / 100 + 
-                                                    Country_Demand_projected_SSP_Aggregated[z]
-                                                   ).round(2).astype(float)
+Country_Demand_projected_SSP_Incl_Losses_Raw = (Country_Demand_projected_SSP_Aggregated[Years_List_5] * 
+                                                Country_Demand_Incl_Losses[Years_List_5] / 100 + 
+                                                Country_Demand_projected_SSP_Aggregated[Years_List_5]
+                                               ).round(2).astype(float)
 
 # ### Constraints the forecasted final demand to 2015 baseline values as minimum
 # In case of linear regression, smaller countries with signficantly lower projected independent variables (GDP, Urbanization) compared to the regional average can lead to very low and often negative projected demand values (e.g. EU-KOS). Hence, a comparison is being made to the 2015 baseline demand values with the assumption that a decline in electricity demand is not realistic (note: as of now no decoupling of GDP growth and energy demand reduction has been assumed).
 
-Country_Demand_projected_SSP_Incl_Losses = pd.DataFrame()
+Country_Demand_Baseline = Node_Demand_2015.drop_duplicates('Country').set_index('Country')['Country_Demand_2015'] / 1000
+
+Country_Demand_projected_SSP_Incl_Losses = Country_Demand_projected_SSP_Incl_Losses_Raw.clip(
+    lower = Country_Demand_Baseline.reindex(Country_Demand_projected_SSP_Incl_Losses_Raw.index) , axis = 0)
+
+# ### Ensemble of all SSP pathways and regression specs (see demand_ensemble.py)
+
+if demand_ensemble:
+    Ensemble_Countries = list(Spatial_Mapping_Country.index)
+    Ensemble_Arrays = [pathway_array(Import , Missing , Source , Ensemble_Countries , Years_List_5)
+                       for Import , Missing , Source in [(Import_iamc_db_GDPppp_Countries , Import_GDP_Missing , GDPppp_Countries_Source) , 
+                                                         (Import_iamc_db_POP_Countries , Import_POP_Missing , POP_Countries_Source) , 
+                                                         (Import_iamc_db_URB_Countries , Import_URB_Missing , URB_Countries_Source)]]
+
+    Demand_Projections = project_ensemble(*Ensemble_Arrays , 
+                                          Regression_Fits , 
+                                          Spatial_Mapping_Country[Spatial_Resolution] , 
+                                          Country_Demand_Incl_Losses[Years_List_5].values , 
+                                          Country_Demand_Baseline.reindex(Ensemble_Countries).values , 
+                                          Years_List_5)
+    logging.info('Projected demand of %s pathway and regression spec combinations', 
+                 len(Demand_Projections[['PATHWAY' , 'SPEC']].drop_duplicates()))
+
+    # The projection of this run is the selected pathway and spec of the ensemble
+    Country_Demand_projected_SSP_Incl_Losses = select_projection(Demand_Projections , 
+                                                                 Pathway , 
+                                                                 Regression_Spec)
+else:
+    Demand_Projections = pd.DataFrame(columns = COLUMNS)
 
-for x in Country_Demand_projected_SSP_Incl_Losses_Raw.index.unique():
-    Country_Demand_projected_SSP_Incl_Losses_x = Country_Demand_projected_SSP_Incl_Losses_Raw.loc[x]
-    
-    Node_Demand_2015_x = Node_Demand_2015[Node_Demand_2015['Country'].str.contains(x)]
-
-    Country_Demand_projected_SSP_Incl_Losses_x = Country_Demand_projected_SSP_Incl_Losses_x.clip(
-        (Node_Demand_2015_x.iloc[0]['Country_Demand_2015'] / 1000) , )
-    
-    Country_Demand_projected_SSP_Incl_Losses = Country_Demand_projected_SSP_Incl_Losses.append(
-        Country_Demand_projected_SSP_Incl_Losses_x)
+write_table(Demand_Projections, os.path.join(output_data_dir, 'DemandProjections.csv'))
 
 # ## Downscaling from country-level to nodal-level
 
@@ -607,9 +541,7 @@ Node_Demand_SSP_projected_Incl_Losses = pd.merge(Node_Demand_SSP_projected_Incl_
 # ### Determines hourly peak demand per node per year
 
 #Calculates 2015 hourly peak demand per node in MWh
-Node_Peak_Demand_2015 = Import_Hourly_Demand_2015.drop(columns = ['Datetime'])
-
-Node_Peak_Demand_2015 = pd.DataFrame(Node_Peak_Demand_2015.max()).reset_index()
+Node_Peak_Demand_2015 = pd.DataFrame(Hourly_Demand_2015.max()).reset_index()
 
 Node_Peak_Demand_2015.columns = ['PLEXOS_Nodes' , 
                                  'Node_Peak_Demand_2015']
@@ -644,48 +576,30 @@ Node_Peak_Demand_SSP_projected['Unit'] = 'MW'
 model_start_year = config.get('startYear')
 model_end_year = config.get('endYear')
 
-# Format demand projections
-with open(os.path.join(output_data_dir, 'SpecifiedAnnualDemand.csv'),'w') as f:
-    f.write('REGION,FUEL,YEAR,VALUE\n')
-    for x in Node_Demand_SSP_projected_Incl_Losses.index:
-        if len(x) == 6:
-            FUEL = 'ELC' + x[3:6] + 'XX02'
-        if len(x) == 9:
-            FUEL = 'ELC' + x[3:6] + x[7:9] + '02'
-        for year in range(model_start_year,model_end_year+1):
-            f.write(region_name + ',' + str(FUEL) + ',' + str(year) + ',' + str(Node_Demand_SSP_projected_Incl_Losses.at[x, year]*(0.0036)) + '\n')
-
+# Format demand projections. Demand of every node and model year in PJ (from GWh), with the FUEL code of each node.
 years = list(range(model_start_year, model_end_year + 1))
+df_demands = (Node_Demand_SSP_projected_Incl_Losses[years] * 0.0036).stack(dropna = False)
+df_demands = df_demands.rename_axis(['NODE' , 'YEAR']).rename('VALUE').reset_index()
+
 if custom_nodes:
-    df_demands = pd.DataFrame(list(itertools.product(custom_nodes,
-                                                    years)),
-                            columns = ['CUSTOM_NODE',
-                                        'YEAR']
-                            )
-    df_demands['REGION'] = region_name
-    df_demands['FUEL'] = ('ELC' +
-                        df_demands['CUSTOM_NODE'] + 
-                        '02')
     df_custom_demands = pd.read_csv(os.path.join(input_data_dir,
                                                  "custom_nodes",
                                                  "specified_annual_demand.csv")
-                                 )
-    df_demands = pd.merge(df_demands,
-                          df_custom_demands,
-                          how='left',
-                          on=['CUSTOM_NODE','YEAR'])
-    df_demands = df_demands[['REGION','FUEL','YEAR','VALUE']]
-    df_sp_annual_demand = pd.read_csv(os.path.join(output_data_dir, 
-                                                   'SpecifiedAnnualDemand.csv'))
-    df_demands = pd.concat([df_demands,
-                            df_sp_annual_demand],
+                                    ).rename(columns = {'CUSTOM_NODE' : 'NODE'})
+    df_custom_demands = pd.merge(cross_join(NODE=custom_nodes, YEAR=years),
+                                 df_custom_demands,
+                                 how='left',
+                                 on=['NODE','YEAR'])
+    df_demands = pd.concat([df_custom_demands,
+                            df_demands],
                             ignore_index=True)
-    df_demands = apply_dtypes(df_demands, "SpecifiedAnnualDemand")                   
     df_demands['VALUE'] = df_demands['VALUE'].round(2)
-    df_demands.drop_duplicates(keep='first',
-                               subset=['REGION', 'FUEL', 'YEAR'],
-                               inplace=True)            
-    df_demands.to_csv(os.path.join(output_data_dir, 
-                                   "SpecifiedAnnualDemand.csv"),
-                      index=None)
+
+df_demands['REGION'] = region_name
+df_demands['FUEL'] = node_fuels(df_demands['NODE'])
+df_demands = df_demands[['REGION','FUEL','YEAR','VALUE']]
+df_demands = apply_dtypes(df_demands, "SpecifiedAnnualDemand")
+df_demands = df_demands.drop_duplicates(keep='first',
+                                        subset=['REGION', 'FUEL', 'YEAR'])
+write_table(df_demands, os.path.join(output_data_dir, "SpecifiedAnnualDemand.csv"))
 logging.info('Demand Projections Completed')
\ No newline at end of file
@@ -0,0 +1,150 @@
+"""Dual values (shadow prices) of a solved model.
+
+Duals are read from the Gurobi attribute (.attr) or JSON solution files, or
+from the CPLEX solution (.sol), in a single vectorized pass. They are kept in
+one table keyed by constraint name, with the constraint's indices as a comma
+separated INDEX column, e.g.
+
+    CONSTRAINT                  INDEX                           VALUE
+    EBa11_EnergyBalanceEachTS5  GLOBAL,S1D1,ELCINDNE02,2025     12.3
+
+The table is stored next to the solution, so nodal prices, reserve margin
+duals and emission constraint duals can be queried without reading the
+solver output again.
+"""
+
+import itertools
+import json
+import os
+from pathlib import Path
+from typing import Dict, List
+
+import pandas as pd
+
+from data_store import read_table, table_path, write_table
+
+import logging
+logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
+
+CHUNKSIZE = 1_000_000
+
+# Constraints duals are kept for, with their indices
+CONSTRAINTS = {
+    'EBa11_EnergyBalanceEachTS5': ['REGION', 'TIMESLICE', 'FUEL', 'YEAR'],
+    'RM3_ReserveMargin_Constraint': ['REGION', 'TIMESLICE', 'YEAR'],
+    'RE4_EnergyConstraint': ['REGION', 'YEAR'],
+    'E8_AnnualEmissionsLimit': ['REGION', 'EMISSION', 'YEAR'],
+    'E9_ModelPeriodEmissionsLimit': ['REGION', 'EMISSION'],
+}
+
+# Lines holding duals as (constraint, index, value)
+DUAL_LINES = {
+    # "EBa11_EnergyBalanceEachTS5(GLOBAL,S1D1,ELCINDNE02,2025) 12.3"
+    '.attr': r'^(\w+)\(([^)]*)\)\s+(\S+)',
+    # <constraint name="EBa11_...(GLOBAL,S1D1,ELCINDNE02,2025)" ... dual="12.3"/>
+    '.sol': r'<constraint\s[^>]*?name="(\w+)\(([^)]*)\)"[^>]*?dual="([^"]*)"',
+}
+
+# Solution files duals are read from, in order of preference
+DUAL_FILES = {
+    'gurobi': ['.attr', '.json'],
+    'cplex': ['.sol'],
+}
+
+def _line_chunks(path, chunksize) -> pd.Series:
+    with open(path, 'r') as f:
+        while True:
+            lines = list(itertools.islice(f, chunksize))
+            if not lines:
+                break
+            yield pd.Series(lines)
+
+def _read_lines(path, pattern, constraints) -> pd.DataFrame:
+    found = []
+    for lines in _line_chunks(path, CHUNKSIZE):
+        df = lines.str.extract(pattern).dropna()
+        found.append(df.loc[df[0].isin(constraints)])
+    if not found:
+        return pd.DataFrame(columns=[0, 1, 2])
+    return pd.concat(found)
+
+def _read_json(path, constraints) -> pd.DataFrame:
+    with open(path, 'r') as f:
+        constrs = pd.DataFrame(json.load(f).get('Constrs', []))
+    if constrs.empty or 'Pi' not in constrs.columns:
+        return pd.DataFrame(columns=[0, 1, 2])
+    df = constrs['ConstrName'].str.extract(r'^(\w+)\(([^)]*)\)')
+    df[2] = constrs['Pi']
+    df = df.dropna()
+    return df.loc[df[0].isin(constraints)]
+
+def read_duals(path, constraints: List[str] = None) -> pd.DataFrame:
+    '''Reads the duals of a solution file.
+
+    Arguments:
+        path: str
+            Gurobi .attr or .json, or CPLEX .sol file
+        constraints: List[str]
+            Constraints to keep, by default those in CONSTRAINTS
+
+    Returns:
+        pd.DataFrame
+            CONSTRAINT, INDEX and VALUE of each dual
+    '''
+    constraints = list(constraints or CONSTRAINTS)
+    suffix = Path(path).suffix
+    if suffix == '.json':
+        df = _read_json(path, constraints)
+    elif suffix in DUAL_LINES:
+        df = _read_lines(path, DUAL_LINES[suffix], constraints)
+    else:
+        raise ValueError(f'Duals can not be read from {suffix} files')
+    df.columns = ['CONSTRAINT', 'INDEX', 'VALUE']
+    df['VALUE'] = df['VALUE'].astype(float)
+    return df.reset_index(drop=True)
+
+def find_dual_file(scenario_dir, scenario, solver):
+    '''Returns the solution file duals are read from, or None if the solver
+    did not write one'''
+    for suffix in DUAL_FILES.get(solver, []):
+        path = Path(scenario_dir, f'{scenario}{suffix}')
+        if path.is_file():
+            return path
+    return None
+
+def load_duals(solution, duals_file) -> pd.DataFrame:
+    '''Reads the duals table, parsing the solution file only if the table is
+    missing or older than the solution.
+
+    Arguments:
+        solution: str
+            Solution file, see read_duals()
+        duals_file: str
+            CSV path of the stored duals table
+    '''
+    stored = table_path(duals_file)
+    if stored.is_file() and \
+            os.path.getmtime(stored) >= os.path.getmtime(solution):
+        return read_table(duals_file)
+    logging.info(f'Reading duals from {solution}')
+    df = read_duals(solution)
+    write_table(df, duals_file)
+    return df
+
+def get_duals(duals: pd.DataFrame, constraint) -> pd.DataFrame:
+    '''Returns the duals of one constraint with a column per index'''
+    indices = CONSTRAINTS[constraint]
+    df = duals.loc[duals['CONSTRAINT'] == constraint]
+    split = df['INDEX'].str.split(',', expand=True)
+    split.columns = indices
+    split['VALUE'] = df['VALUE'].values
+    if 'YEAR' in indices:
+        split['YEAR'] = split['YEAR'].astype(int)
+    return split.reset_index(drop=True)
+
+def nodal_prices(duals: pd.DataFrame) -> pd.DataFrame:
+    '''Duals of the energy balance of electricity delivered to each node
+    (ELC*02 fuels), in $m/PJ'''
+    df = get_duals(duals, 'EBa11_EnergyBalanceEachTS5')
+    df = df.loc[df['FUEL'].str.startswith('ELC') & df['FUEL'].str.endswith('02')]
+    return df.reset_index(drop=True)
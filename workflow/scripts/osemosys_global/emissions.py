@@ -4,7 +4,9 @@ import logging
 import pandas as pd
 from pathlib import Path
 from configuration import ConfigFile, ConfigPaths
-import itertools
+from data_store import read_table, write_table
+from utils import cross_join
+from codes import CodeIndex
 
 
 # Logging formatting
@@ -51,7 +53,7 @@ def main():
     # ASSIGN EMISSION ACTIVITY RATIOS
 
     df_ear = get_ear(_EMISSION)
-    df_ear.to_csv(Path(output_data_dir, "EmissionActivityRatio.csv"), index=False)
+    write_table(df_ear, Path(output_data_dir, "EmissionActivityRatio.csv"))
     logging.info("Successfully generated emission activity ratio")
 
     # ASSIGN EMISSION
@@ -59,7 +61,7 @@ def main():
     # df_emission = pd.DataFrame([_EMISSION], columns=['VALUE'])
     df_emission = df_ear[["EMISSION"]].drop_duplicates()
     df_emission.rename(columns={"EMISSION": "VALUE"}, inplace=True)
-    df_emission.to_csv(Path(output_data_dir, "EMISSION.csv"), index=False)
+    write_table(df_emission, Path(output_data_dir, "EMISSION.csv"))
     logging.info("Successfully generated emission set")
 
     # Create of list of EMISSIONS
@@ -77,9 +79,7 @@ def main():
         df_emission_penalty = pd.DataFrame(
             columns=["REGION", "EMISSION", "YEAR", "VALUE"]
         )
-    df_emission_penalty.to_csv(
-        Path(output_data_dir, "EmissionsPenalty.csv"), index=False
-    )
+    write_table(df_emission_penalty, Path(output_data_dir, "EmissionsPenalty.csv"))
     logging.info("Successfully generated emission penalty")
 
     # ADD EMISSION LIMITS
@@ -89,9 +89,7 @@ def main():
         df_emission_limits = pd.DataFrame(
             columns=["REGION", "EMISSION", "YEAR", "VALUE"]
         )
-    df_emission_limits.to_csv(
-        Path(output_data_dir, "AnnualEmissionLimit.csv"), index=False
-    )
+    write_table(df_emission_limits, Path(output_data_dir, "AnnualEmissionLimit.csv"))
     logging.info("Successfully generated annual emissions limit")
 
 
@@ -183,19 +181,20 @@ def get_ear(emission):
 
     # GET INFO FROM INPUT ACTIVITY RATIO
 
-    df_oar = pd.read_csv(Path(output_data_dir, "OutputActivityRatio.csv"))
+    df_oar = read_table(Path(output_data_dir, "OutputActivityRatio.csv"))
     df = df_oar.drop(["FUEL", "VALUE"], axis=1)
     # df = df[(df['TECHNOLOGY'].str.startswith('MIN')) |
     #        (df['TECHNOLOGY'].str.startswith('PWRCCS'))]
-    df = df[
-        (df["TECHNOLOGY"].str.startswith("PWR"))
-        & ~(df["TECHNOLOGY"].str.startswith("PWRTRN"))
-    ]
+    techs = CodeIndex(df["TECHNOLOGY"], "TECHNOLOGY")
+    mask = techs.mask(
+        (techs.table["TYPE"] == "PWR") & (techs.table["CATEGORY"] != "TRN")
+    )
+    df = df.loc[mask]
 
     # ADD MAPPING OF TECHNOLOGY TO EMISSION ACTIVITY RATIO
 
-    df["TECH_CODE"] = df["TECHNOLOGY"].str[3:6]
-    df["COUNTRY"] = df["TECHNOLOGY"].str[6:9]
+    df["TECH_CODE"] = techs.field("CATEGORY")[mask].values
+    df["COUNTRY"] = techs.field("COUNTRY")[mask].values
     df["FUEL_NAME"] = df["TECH_CODE"].map(_TECH_TO_FUEL)
     df["VALUE"] = df["FUEL_NAME"].map(co2_factors)
     """
@@ -210,7 +209,7 @@ def get_ear(emission):
     # df['VALUE'] = fuels.map(co2_factors)
 
     # Multiply by InputActivityRatio
-    df_iar = pd.read_csv(Path(output_data_dir, "InputActivityRatio.csv"))
+    df_iar = read_table(Path(output_data_dir, "InputActivityRatio.csv"))
     df_iar.rename(columns={"VALUE": "IAR"}, inplace=True)
     df = pd.merge(
         df, df_iar, how="left", on=["REGION", "TECHNOLOGY", "MODE_OF_OPERATION", "YEAR"]
@@ -258,35 +257,21 @@ def get_emission_penalty(emissions, emission_penalty):
 
     # GENERATE DATA
 
-    # Create dataframe template to calculate SpecifiedAnnualDemand
+    # Expand each penalty to the years between its start and end year. Later
+    # penalties take precedence where they overlap.
     df = pd.DataFrame(
-        list(itertools.product(emissions, years)), columns=["EMISSION", "YEAR"]
+        [
+            [ep_params[0] + ep_params[1], ep_params[2], ep_params[3], ep_params[4]]
+            for ep_params in emission_penalty
+        ],
+        columns=["EMISSION", "START_YEAR", "END_YEAR", "VALUE"],
     )
-
-    for ep_params in emission_penalty:
-        df.loc[
-            (df["YEAR"].between(ep_params[2], ep_params[3]))
-            & (df["EMISSION"].isin([ep_params[0] + ep_params[1]])),
-            "VALUE",
-        ] = ep_params[4]
-
-    df = df.pivot(index=["YEAR"], columns=["EMISSION"], values="VALUE").reset_index()
-    # df = df.interpolate()
-
-    # Drop all columns with only NaN
-    df.dropna(axis=1, how="all", inplace=True)
-
-    # Melt to get 'COUNTRY' column and remove all rows with NaN
-    df = pd.melt(
-        df,
-        id_vars=["YEAR"],
-        value_vars=[x for x in df.columns if x not in ["YEAR"]],
-        var_name="EMISSION",
-        value_name="VALUE",
-    )
-    df.dropna(axis=0, inplace=True)
+    df = cross_join(df.loc[df["EMISSION"].isin(emissions)], YEAR=years)
+    df = df.loc[df["YEAR"].between(df["START_YEAR"], df["END_YEAR"])]
+    df = df.drop_duplicates(subset=["EMISSION", "YEAR"], keep="last")
+    df = df.dropna(subset=["VALUE"]).sort_values(by=["EMISSION", "YEAR"])
     df["REGION"] = region
-    df = df[["REGION", "EMISSION", "YEAR", "VALUE"]]
+    df = df[["REGION", "EMISSION", "YEAR", "VALUE"]].reset_index(drop=True)
 
     return df
 
@@ -302,17 +287,17 @@ def add_emission_limits(emissions, emission_limit):
 
     # GENERATE DATA
 
-    # Create dataframe template to calculate SpecifiedAnnualDemand
-    df = pd.DataFrame(
-        list(itertools.product(emissions, years)), columns=["EMISSION", "YEAR"]
-    )
-
-    for el_params in emission_limit:
-        df.loc[
-            (df["YEAR"] == el_params[2])
-            & (df["EMISSION"].isin([el_params[0] + el_params[1]])),
-            "VALUE",
-        ] = el_params[3]
+    # Limits of each emission in the years they are set for, with later
+    # limits taking precedence
+    el_df = pd.DataFrame(
+        [
+            [el_params[0] + el_params[1], el_params[2], el_params[3]]
+            for el_params in emission_limit
+        ],
+        columns=["EMISSION", "YEAR", "VALUE"],
+    ).drop_duplicates(subset=["EMISSION", "YEAR"], keep="last")
+    df = cross_join(EMISSION=emissions, YEAR=years)
+    df = df.merge(el_df, how="left", on=["EMISSION", "YEAR"])
 
     df = df.pivot(index=["YEAR"], columns=["EMISSION"], values="VALUE").reset_index()
 
@@ -6,6 +6,7 @@ import os
 import shutil
 # from osemosys_global.configuration import ConfigPaths
 from configuration import ConfigFile, ConfigPaths
+from data_store import write_table, table_exists
 import logging 
 logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
 
@@ -26,10 +27,10 @@ for each_csv in os.listdir(otoole_data):
     ## Default values csv already copied from resources/
     #if each_csv == "default_values.csv":
     #    continue
-    if each_csv not in os.listdir(output_data_dir): 
+    if not table_exists(os.path.join(output_data_dir, each_csv)): 
         # csv_df_in = pd.read_csv(os.path.join(simplicity_data, each_csv))
         csv_df_in = pd.read_csv(os.path.join(otoole_data, each_csv))
         csv_df_out = pd.DataFrame(columns = list(csv_df_in.columns))
-        csv_df_out.to_csv(os.path.join(output_data_dir, each_csv), index = None)
+        write_table(csv_df_out, os.path.join(output_data_dir, each_csv))
     
 logging.info('File Check Completed')
@@ -4,10 +4,11 @@ import pandas as pd
 
 # from osemosys_global.configuration import ConfigFile, ConfigPaths
 from configuration import ConfigFile, ConfigPaths
-from utils import apply_dtypes
+from utils import apply_dtypes, cross_join
+from data_store import read_table, write_table, table_exists
+from workbooks import read_excel
 
 # from OPG_configuration import ConfigFile, ConfigPaths
-import itertools
 
 # LOGGING
 import logging
@@ -37,7 +38,7 @@ def main():
     ## Checks whether PLEXOS-World/MESSAGEix-GLOBIOM soft-link model data needs to be
     # retrieved from the PLEXOS-World Harvard Dataverse.
     try:
-        df_reslimit = pd.read_excel(
+        df_reslimit = read_excel(
             os.path.join(
                 input_dir, "data/PLEXOS_World_MESSAGEix_GLOBIOM_Softlink.xlsx"
             ),
@@ -55,7 +56,7 @@ def main():
         ) as outfile:
             outfile.write(r.content)
 
-        df_reslimit = pd.read_excel(
+        df_reslimit = read_excel(
             os.path.join(
                 input_dir, "data/PLEXOS_World_MESSAGEix_GLOBIOM_Softlink.xlsx"
             ),
@@ -129,7 +130,7 @@ def main():
 
     # GET RESIDUAL CAPACITY VALUES
 
-    df_res_cap_raw = pd.read_csv(os.path.join(output_data_dir, "ResidualCapacity.csv"))
+    df_res_cap_raw = read_table(os.path.join(output_data_dir, "ResidualCapacity.csv"))
     df_res_cap_raw["VALUE"] = df_res_cap_raw.loc[:, "VALUE"].round(4)
     df_res_cap = df_res_cap_raw.loc[
         df_res_cap_raw["TECHNOLOGY"].str[3:6].isin(list(dict_reslimit.values()))
@@ -139,29 +140,29 @@ def main():
 
     # CALCULATE AND FORMAT DATA
 
-    out_data = []
-    for tech, maxad in cap_addition_limit.items():
-        breakpoint()
-        try:
-            max_capacity = float(res_cap[tech]) + float(maxad)
-        except KeyError:
-            max_capacity = float(maxad)
-
-        # Add 0.0002 to enusre there is no rounding mismathch between total
-        # annual max capacity and residual capacity
-        max_capacity = round(max_capacity, 4) + 0.0002
-
-        for year in years:
-            out_data.append([region, tech, year, max_capacity])
-
-    df_max_capacity = pd.DataFrame(
-        out_data, columns=["REGION", "TECHNOLOGY", "YEAR", "VALUE"]
+    max_capacity = pd.Series(cap_addition_limit, dtype=float)
+    max_capacity += (
+        pd.Series(res_cap, dtype=float).reindex(max_capacity.index).fillna(0)
     )
+
+    # Add 0.0002 to enusre there is no rounding mismathch between total
+    # annual max capacity and residual capacity
+    max_capacity = max_capacity.round(4) + 0.0002
+
+    df_max_capacity = cross_join(
+        pd.DataFrame(
+            {
+                "REGION": region,
+                "TECHNOLOGY": max_capacity.index,
+                "VALUE": max_capacity.values,
+            }
+        ),
+        YEAR=years,
+    )[["REGION", "TECHNOLOGY", "YEAR", "VALUE"]]
     # df_max_capacity = apply_dtypes(df_max_capacity, "TotalAnnualMaxCapacity")
     df_max_capacity.dropna(inplace=True)
-    df_max_capacity.to_csv(
-        os.path.join(output_data_dir, "TotalAnnualMaxCapacity.csv"), index=None
-    )
+    write_table(df_max_capacity, os.path.join(output_data_dir,
+                                              "TotalAnnualMaxCapacity.csv"))
 
     apply_build_rates(region, years, output_data_dir, input_dir, max_build)
     apply_fuel_limits(region, years, output_data_dir, input_dir, max_fuel)
@@ -266,27 +267,23 @@ def apply_build_rates(region, years, output_data_dir, input_dir, max_build):
     max_build_df = max_build_df[["TYPE", "METHOD", "MAX_BUILD", "YEAR", "COUNTRY"]]
     max_build_df["TYPE"] = max_build_df["TYPE"].str[0:3]
     # Create a list of powerplant technologies
-    tech_set = pd.read_csv(os.path.join(output_data_dir, "TECHNOLOGY.csv"))
+    tech_set = read_table(os.path.join(output_data_dir, "TECHNOLOGY.csv"))
     pwr_tech_list = [x for x in list(tech_set["VALUE"]) if x.startswith("PWR")]
 
     # Create scaffold dataframe with all powerplant technologies for all years
-    df_techs = pd.DataFrame(
-        list(itertools.product(pwr_tech_list, years)), columns=["TECHNOLOGY", "YEAR"]
-    )
+    df_techs = cross_join(TECHNOLOGY=pwr_tech_list, YEAR=years)
 
     # Filter out technologies for which a max. capacity investment has already
     # been set
-    df_max_cap_inv = pd.read_csv(
-        os.path.join(output_data_dir, "TotalAnnualMaxCapacityInvestment.csv")
-    )
+    df_max_cap_inv = read_table(os.path.join(output_data_dir,
+                                             "TotalAnnualMaxCapacityInvestment.csv"))
     max_cap_inv_techs = list(df_max_cap_inv["TECHNOLOGY"].unique())
     df_techs = df_techs[~(df_techs["TECHNOLOGY"].isin(max_cap_inv_techs))]
 
     # Create dataframe of max capacity by technology
-    if os.path.isfile(os.path.join(output_data_dir, "TotalAnnualMaxCapacity.csv")):
-        df_max_cap = pd.read_csv(
-            os.path.join(output_data_dir, "TotalAnnualMaxCapacity.csv")
-        )
+    if table_exists(os.path.join(output_data_dir, "TotalAnnualMaxCapacity.csv")):
+        df_max_cap = read_table(os.path.join(output_data_dir,
+                                             "TotalAnnualMaxCapacity.csv"))
         df_max_cap = df_max_cap.loc[df_max_cap["TECHNOLOGY"].str.startswith("PWR")]
     else:
         df_max_cap = pd.DataFrame(columns=["REGION", "TECHNOLOGY", "YEAR", "VALUE"])
@@ -310,10 +307,8 @@ def apply_build_rates(region, years, output_data_dir, input_dir, max_build):
     df_max_cap = df_max_cap[["REGION", "TECHNOLOGY", "YEAR", "VALUE"]]
     df_max_cap = pd.concat([df_max_cap_inv, df_max_cap], ignore_index=True)
     df_max_cap["VALUE"] = df_max_cap["VALUE"].astype(float).round(3)
-    df_max_cap.to_csv(
-        os.path.join(output_data_dir, "TotalAnnualMaxCapacityInvestment.csv"),
-        index=None,
-    )
+    write_table(df_max_cap, os.path.join(output_data_dir,
+                                         "TotalAnnualMaxCapacityInvestment.csv"))
 
 
 def apply_fuel_limits(region, years, output_data_dir, input_dir, max_fuel):
@@ -332,31 +327,30 @@ def apply_fuel_limits(region, years, output_data_dir, input_dir, max_fuel):
 
     mf_df = pd.read_csv(os.path.join(input_dir, "data", "fuel_limits.csv"))
     mf_df["TECHNOLOGY"] = "MIN" + mf_df["FUEL"] + mf_df["COUNTRY"]
-    mf_df = mf_df[["TECHNOLOGY", "YEAR", "VALUE"]]
+    mf_df = mf_df[["TECHNOLOGY", "YEAR", "VALUE"]].drop_duplicates(
+        subset=["TECHNOLOGY", "YEAR"], keep="last"
+    )
 
     tech_list = mf_df["TECHNOLOGY"].unique()
-    mf_df_final = pd.DataFrame(
-        list(itertools.product(tech_list, years)), columns=["TECHNOLOGY", "YEAR"]
-    )
+    mf_df_final = cross_join(TECHNOLOGY=tech_list, YEAR=years)
     mf_df_final = pd.merge(mf_df_final, mf_df, how="left", on=["TECHNOLOGY", "YEAR"])
     mf_df_final["VALUE"] = mf_df_final["VALUE"].astype(float)
-    for each_tech in tech_list:
-        mf_df_final.loc[mf_df_final["TECHNOLOGY"].isin([each_tech]), "VALUE"] = (
-            mf_df_final.loc[mf_df_final["TECHNOLOGY"].isin([each_tech]), "VALUE"]
-            .interpolate()
-            .round(0)
-        )
+
+    # Interpolate the limits of all technologies at once, with a column per
+    # technology
+    mf_values = mf_df_final["VALUE"].values.reshape(len(tech_list), len(years))
+    mf_df_final["VALUE"] = (
+        pd.DataFrame(mf_values.T).interpolate().round(0).values.T.ravel()
+    )
 
     mf_df_final["REGION"] = region
     mf_df_final = mf_df_final[["REGION", "TECHNOLOGY", "YEAR", "VALUE"]]
     mf_df_final.dropna(inplace=True)
-    mf_df_final.to_csv(
-        os.path.join(output_data_dir, "TotalTechnologyAnnualActivityUpperLimit.csv"),
-        index=None,
-    )
+    write_table(mf_df_final, os.path.join(output_data_dir,
+                                          "TotalTechnologyAnnualActivityUpperLimit.csv"))
 
     # Model Period Activity Upper Limit for 'MINCOA***01'
-    min_tech_df = pd.read_csv(os.path.join(output_data_dir, "TECHNOLOGY.csv"))
+    min_tech_df = read_table(os.path.join(output_data_dir, "TECHNOLOGY.csv"))
     min_tech = [
         x
         for x in min_tech_df["VALUE"].unique()
@@ -367,17 +361,13 @@ def apply_fuel_limits(region, years, output_data_dir, input_dir, max_fuel):
     min_tech_df_final["TECHNOLOGY"] = min_tech
     min_tech_df_final["REGION"] = region
     min_tech_df_final["VALUE"] = 0
-    min_tech_df_final.to_csv(
-        os.path.join(
-            output_data_dir, "TotalTechnologyModelPeriodActivityUpperLimit.csv"
-        ),
-        index=None,
-    )
+    write_table(min_tech_df_final, os.path.join(output_data_dir,
+                                                "TotalTechnologyModelPeriodActivityUpperLimit.csv"))
 
 
 def apply_calibration(region, years, output_data_dir, calibration):
 
-    oar_df = pd.read_csv(os.path.join(output_data_dir, "OutputActivityRatio.csv"))
+    oar_df = read_table(os.path.join(output_data_dir, "OutputActivityRatio.csv"))
     cal_df = oar_df.loc[
         (oar_df["TECHNOLOGY"].str.startswith("PWR"))
         & ~(oar_df["TECHNOLOGY"].str.startswith("PWRTRN"))
@@ -440,29 +430,25 @@ def apply_calibration(region, years, output_data_dir, calibration):
         cal_df_final = cal_df[[x for x in cal_df.columns if x not in ["DEMAND"]]]
         oar_df = pd.concat([oar_df, cal_df_final])
 
-        oar_df.to_csv(
-            os.path.join(output_data_dir, "OutputActivityRatio.csv"), index=None
-        )
+        write_table(oar_df, os.path.join(output_data_dir, "OutputActivityRatio.csv"))
 
         cal_dem_df = cal_df[["REGION", "FUEL", "YEAR", "DEMAND"]]
         cal_dem_final = cal_dem_df.rename(columns={"DEMAND": "VALUE"})
         cal_dem_final.drop_duplicates(inplace=True)
         cal_dem_final.dropna(inplace=True)
-        cal_dem_final.to_csv(
-            os.path.join(output_data_dir, "AccumulatedAnnualDemand.csv"), index=None
-        )
+        write_table(cal_dem_final, os.path.join(output_data_dir,
+                                                "AccumulatedAnnualDemand.csv"))
 
         cal_fuels = list(cal_dem_final["FUEL"].unique())
 
-        fuel_list_df = pd.read_csv(os.path.join(output_data_dir, "FUEL.csv"))
+        fuel_list_df = read_table(os.path.join(output_data_dir, "FUEL.csv"))
         fuel_list = list(fuel_list_df["VALUE"].unique()) + cal_fuels
         fuel_list_df_final = pd.DataFrame(fuel_list, columns=["VALUE"])
-        fuel_list_df_final.to_csv(os.path.join(output_data_dir, "FUEL.csv"), index=None)
+        write_table(fuel_list_df_final, os.path.join(output_data_dir, "FUEL.csv"))
     else:
         cal_dem_final = pd.DataFrame(columns=["REGION", "FUEL", "YEAR", "VALUE"])
-        cal_dem_final.to_csv(
-            os.path.join(output_data_dir, "AccumulatedAnnualDemand.csv"), index=None
-        )
+        write_table(cal_dem_final, os.path.join(output_data_dir,
+                                                "AccumulatedAnnualDemand.csv"))
 
 
 def apply_re_targets(region, years, output_data_dir, re_targets, remove_nodes):
@@ -471,7 +457,7 @@ def apply_re_targets(region, years, output_data_dir, re_targets, remove_nodes):
     if not remove_nodes:
         remove_nodes = []
 
-    oar_df = pd.read_csv(os.path.join(output_data_dir, "OutputActivityRatio.csv"))
+    oar_df = read_table(os.path.join(output_data_dir, "OutputActivityRatio.csv"))
 
     # List of RE technologies
     re_techs = ["BIO", "CSP", "GEO", "HYD", "SPV", "WON", "WOF", "WAS", "WAV"]
@@ -483,21 +469,19 @@ def apply_re_targets(region, years, output_data_dir, re_targets, remove_nodes):
     # Create dummy commodity starting with 'REN' for renewables
     re_df["FUEL"] = "REN" + re_df["FUEL"].str[3:6]
     oar_df = pd.concat([oar_df, re_df])
-    oar_df.to_csv(os.path.join(output_data_dir, "OutputActivityRatio.csv"), index=None)
+    write_table(oar_df, os.path.join(output_data_dir, "OutputActivityRatio.csv"))
 
     # Create list of fuels
     re_fuels = list(re_df.loc[re_df["FUEL"].str.startswith("REN"), "FUEL"].unique())
-    fuels_df = pd.read_csv(os.path.join(output_data_dir, "FUEL.csv"))
+    fuels_df = read_table(os.path.join(output_data_dir, "FUEL.csv"))
     fuels_ren_df = re_df[["FUEL"]]
     fuels_ren_df.rename(columns={"FUEL": "VALUE"}, inplace=True)
-    fuels_df = fuels_df.append(fuels_ren_df)
+    fuels_df = pd.concat([fuels_df, fuels_ren_df])
     fuels_df.drop_duplicates(inplace=True)
-    fuels_df.to_csv(os.path.join(output_data_dir, "FUEL.csv"), index=None)
+    write_table(fuels_df, os.path.join(output_data_dir, "FUEL.csv"))
 
     # Create dataframe template to calculate SpecifiedAnnualDemand
-    re_targets_df = pd.DataFrame(
-        list(itertools.product(re_fuels, years)), columns=["FUEL", "YEAR"]
-    )
+    re_targets_df = cross_join(FUEL=re_fuels, YEAR=years)
     re_targets_df["COUNTRY"] = re_targets_df["FUEL"].str[3:6]
     re_targets_df = re_targets_df[["COUNTRY", "YEAR"]]
 
@@ -530,9 +514,8 @@ def apply_re_targets(region, years, output_data_dir, re_targets, remove_nodes):
         re_targets_df.dropna(axis=0, inplace=True)
 
         # Read 'SpecifiedAnnualDemand'
-        sp_demand_df = pd.read_csv(
-            os.path.join(output_data_dir, "SpecifiedAnnualDemand.csv")
-        )
+        sp_demand_df = read_table(os.path.join(output_data_dir,
+                                               "SpecifiedAnnualDemand.csv"))
         sp_demand_df = sp_demand_df.loc[
             ~(sp_demand_df["FUEL"].str[3:8].isin(remove_nodes))
         ]
@@ -551,16 +534,14 @@ def apply_re_targets(region, years, output_data_dir, re_targets, remove_nodes):
         re_targets_df = re_targets_df[["REGION", "FUEL", "YEAR", "VALUE"]]
 
         # Read 'SpecifiedAnnualDemand'
-        ac_demand_df = pd.read_csv(
-            os.path.join(output_data_dir, "AccumulatedAnnualDemand.csv")
-        )
+        ac_demand_df = read_table(os.path.join(output_data_dir,
+                                               "AccumulatedAnnualDemand.csv"))
 
         # Append RE target demands and write new AccumulatedAnnualDemand file
         ac_demand_df.drop_duplicates(inplace=True)
         ac_demand_df = pd.concat([ac_demand_df, re_targets_df])
-        ac_demand_df.to_csv(
-            os.path.join(output_data_dir, "AccumulatedAnnualDemand.csv"), index=None
-        )
+        write_table(ac_demand_df, os.path.join(output_data_dir,
+                                               "AccumulatedAnnualDemand.csv"))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,143 @@
+"""Pre-processed OSeMOSYS sets built from the scenario data tables.
+
+The fast OSeMOSYS model file (resources/osemosys_fast_preprocessed.txt) needs
+sets that list the mode-technology combinations data is provided for, e.g.
+
+    set MODExTECHNOLOGYperFUELout[ELCIND01]:= (1, PWRCOAIND01) (1, PWRNGSIND01);
+    set MODEperTECHNOLOGY[PWRCOAIND01]:= 1;
+
+These used to be found by parsing the data file written by otoole (see
+resources/preprocess_data.py). Here they are computed from the
+InputActivityRatio, OutputActivityRatio, TechnologyToStorage,
+TechnologyFromStorage and EmissionActivityRatio tables directly, and
+appended to the data file with
+
+    python workflow/scripts/osemosys_global/mode_sets.py <data_dir> <infile> <outfile>
+"""
+
+import os
+import sys
+from typing import Dict, List
+
+import pandas as pd
+
+from data_store import read_table, table_exists
+
+# Lines of the data file that are replaced by the pre-processed sets
+REPLACED_LINES = ('set MODEper', 'set MODEx', 'end;')
+
+# {set name: (parameter, set the entries are indexed over)}
+MODE_SETS = {
+    'MODExTECHNOLOGYperFUELout': ('OutputActivityRatio', 'FUEL'),
+    'MODExTECHNOLOGYperFUELin': ('InputActivityRatio', 'FUEL'),
+    'MODExTECHNOLOGYperSTORAGEto': ('TechnologyToStorage', 'STORAGE'),
+    'MODExTECHNOLOGYperSTORAGEfrom': ('TechnologyFromStorage', 'STORAGE'),
+    'MODExTECHNOLOGYperEMISSION': ('EmissionActivityRatio', 'EMISSION'),
+}
+MODE_SETS_BY_PARAM = {param: index for param, index in MODE_SETS.values()}
+
+# Storage parameters only count positive values, others any non-zero value
+STORAGE_PARAMS = ['TechnologyToStorage', 'TechnologyFromStorage']
+
+# Parameters whose technology-mode combinations make up MODEperTECHNOLOGY
+MODE_PER_TECHNOLOGY_PARAMS = ['OutputActivityRatio', 'InputActivityRatio',
+                              'EmissionActivityRatio']
+
+def _read_set(data_dir, name) -> List[str]:
+    path = os.path.join(data_dir, f'{name}.csv')
+    if not table_exists(path):
+        return []
+    return read_table(path)['VALUE'].astype(str).to_list()
+
+def active_rows(df: pd.DataFrame, param) -> pd.DataFrame:
+    '''Returns the distinct [index, MODE_OF_OPERATION, TECHNOLOGY] rows of
+    a parameter with data, as strings'''
+    columns = [MODE_SETS_BY_PARAM[param], 'MODE_OF_OPERATION', 'TECHNOLOGY']
+    if param in STORAGE_PARAMS:
+        df = df.loc[df['VALUE'] > 0]
+    else:
+        df = df.loc[df['VALUE'] != 0]
+    return df[columns].astype(str).drop_duplicates()
+
+def _format_entries(name, members: pd.Series, keys: List[str]) -> pd.Series:
+    '''Formats one set line per key. Members are indexed by key and written
+    in sorted order, keys without members are left empty.'''
+    members = members.sort_values().groupby(level=0).agg(' '.join)
+    members = members.reindex(keys).fillna('')
+    members = members.where(members == '', ' ' + members)
+    keys = pd.Series(keys, index=keys)
+    return f'set {name}[' + keys + ']:=' + members + ';\n'
+
+def format_mode_sets(active: Dict[str, pd.DataFrame],
+                     sets: Dict[str, List[str]]) -> Dict[str, pd.Series]:
+    '''Formats the pre-processed sets of a model.
+
+    Arguments:
+        active: Dict[str, pd.DataFrame]
+            active_rows() of each parameter in MODE_SETS
+        sets: Dict[str, List[str]]
+            Members of the FUEL, TECHNOLOGY, STORAGE and EMISSION sets
+
+    Returns:
+        Dict[str, pd.Series]
+            Set lines of each set, ordered as the set they are indexed over
+    '''
+    mode_sets = {}
+    modes = []
+    for name, (param, index) in MODE_SETS.items():
+        if not sets.get(index):
+            continue
+        df = active[param]
+        if param in MODE_PER_TECHNOLOGY_PARAMS:
+            modes.append(df[['TECHNOLOGY', 'MODE_OF_OPERATION']])
+        members = ('(' + df['MODE_OF_OPERATION'] + ', '
+                   + df['TECHNOLOGY'] + ')')
+        mode_sets[name] = _format_entries(
+            name, pd.Series(members.values, index=df[index].values),
+            sets[index])
+
+    modes = pd.concat(modes).drop_duplicates() if modes else pd.DataFrame(
+        columns=['TECHNOLOGY', 'MODE_OF_OPERATION'])
+    mode_sets['MODEperTECHNOLOGY'] = _format_entries(
+        'MODEperTECHNOLOGY',
+        pd.Series(modes['MODE_OF_OPERATION'].values,
+                  index=modes['TECHNOLOGY'].values),
+        sets.get('TECHNOLOGY', []))
+    return mode_sets
+
+def get_mode_sets(data_dir) -> Dict[str, pd.Series]:
+    '''Computes the pre-processed sets from the data tables in data_dir'''
+    sets = {name: _read_set(data_dir, name)
+            for name in ['FUEL', 'TECHNOLOGY', 'STORAGE', 'EMISSION']}
+    active = {}
+    for param, index in MODE_SETS_BY_PARAM.items():
+        path = os.path.join(data_dir, f'{param}.csv')
+        if table_exists(path):
+            active[param] = active_rows(read_table(path), param)
+        else:
+            active[param] = pd.DataFrame(
+                columns=[index, 'MODE_OF_OPERATION', 'TECHNOLOGY'])
+    return format_mode_sets(active, sets)
+
+def write_mode_sets(file_out, mode_sets: Dict[str, pd.Series]) -> None:
+    '''Writes the pre-processed sets in the order OSeMOSYS expects them'''
+    for name in ['MODExTECHNOLOGYperFUELout', 'MODExTECHNOLOGYperFUELin',
+                 'MODEperTECHNOLOGY', 'MODExTECHNOLOGYperSTORAGEto',
+                 'MODExTECHNOLOGYperSTORAGEfrom', 'MODExTECHNOLOGYperEMISSION']:
+        if name in mode_sets:
+            file_out.writelines(mode_sets[name])
+
+def main(data_dir, data_infile, data_outfile):
+    mode_sets = get_mode_sets(data_dir)
+    with open(data_infile, 'r') as f, open(data_outfile, 'w') as file_out:
+        for line in f:
+            if not line.startswith(REPLACED_LINES):
+                file_out.write(line)
+        write_mode_sets(file_out, mode_sets)
+        file_out.write('end;')
+
+if __name__ == '__main__':
+    if len(sys.argv) != 4:
+        msg = f'Usage: python {sys.argv[0]} <data_dir> <infile> <outfile>'
+        sys.exit(msg)
+    main(sys.argv[1], sys.argv[2], sys.argv[3])
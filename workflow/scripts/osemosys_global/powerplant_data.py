@@ -10,14 +10,16 @@ import pandas as pd
 from datetime import datetime
 pd.options.mode.chained_assignment = None  # default='warn'
 import numpy as np
-import itertools
 import urllib
 import os
 # from osemosys_global.configuration import ConfigFile, ConfigPaths
 from configuration import ConfigFile, ConfigPaths
 import yaml
 from constants import SET_DTYPES
-from utils import apply_dtypes
+from utils import apply_dtypes, cross_join, format_transmission_name
+from data_store import read_table, write_table
+from scope import technology_mask
+from workbooks import read_excel
 import logging 
 logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
 import os
@@ -68,6 +70,11 @@ def main():
     tech_capacity = config.get('user_defined_capacity')
     custom_nodes = config.get('nodes_to_add')
 
+    # Scope covering every scenario. Only technologies geographic_filter.py
+    # can keep are built. Nodes are removed by geographic_filter.py, as
+    # upstream technologies of their country may still be in scope.
+    geographic_scope, _ = config.get_scope()
+
     # Create output directory 
     if not os.path.exists(output_data_dir):
         os.makedirs(output_data_dir)
@@ -90,13 +97,13 @@ def main():
     finally:
         Open.close()
 
-    df = pd.read_excel(os.path.join(input_data_dir,
-                                    "PLEXOS_World_2015_Gold_V1.1.xlsx"), 
-                       sheet_name = "Properties")
+    df = read_excel(os.path.join(input_data_dir,
+                                 "PLEXOS_World_2015_Gold_V1.1.xlsx"), 
+                    sheet_name = "Properties")
 
-    df_dict = pd.read_excel(os.path.join(input_data_dir, 
-                                         "PLEXOS_World_2015_Gold_V1.1.xlsx"), 
-                            sheet_name = "Memberships")
+    df_dict = read_excel(os.path.join(input_data_dir, 
+                                      "PLEXOS_World_2015_Gold_V1.1.xlsx"), 
+                         sheet_name = "Memberships")
 
     df_dict = df_dict[df_dict["parent_class"] == "Generator"].rename(
         {"parent_object": "powerplant"}, axis=1
@@ -110,10 +117,10 @@ def main():
     df_tech_code = pd.read_csv(os.path.join(input_data_dir,
                                             "naming_convention_tech.csv")
                                )
-    df_trn_efficiencies = pd.read_excel(os.path.join(input_data_dir,
-                                                     "Costs Line expansion.xlsx"),
-                                        sheet_name = 'Interface'
-                                        )
+    df_trn_efficiencies = read_excel(os.path.join(input_data_dir,
+                                                  "Costs Line expansion.xlsx"),
+                                     sheet_name = 'Interface'
+                                     )
     df_weo_regions = pd.read_csv(os.path.join(input_data_dir,
                                               "weo_region_mapping.csv")
                                  )
@@ -398,7 +405,7 @@ def main():
                                                            region_name, 
                                                            years, 
                                                            tech_list)
-        df_res_cap = df_res_cap.append(df_res_cap_custom)
+        df_res_cap = pd.concat([df_res_cap, df_res_cap_custom])
 
     # df_res_cap = apply_dtypes(df_res_cap, "Residual Capacity")
     # df_res_cap.to_csv(r"osemosys_global_model/data/ResidualCapacity.csv", index=None)
@@ -407,9 +414,7 @@ def main():
                                inplace=True)
     df_res_cap = df_res_cap.loc[(df_res_cap['TECHNOLOGY'].str.startswith('PWR')) &
                                 (~df_res_cap['TECHNOLOGY'].str.endswith('00'))]
-    df_res_cap.to_csv(os.path.join(output_data_dir, 
-                                   "ResidualCapacity.csv"),
-                      index=None)
+    write_table(df_res_cap, os.path.join(output_data_dir, "ResidualCapacity.csv"))
 
     # ### Calculate planned capacities based on the Global Energy Observatory datasets
         
@@ -418,7 +423,7 @@ def main():
                                                   "gem_region_mapping.csv"), encoding = "ISO-8859-1")
     
     # pull locations from existing powerplants in PLEXOS-World dataset
-    gen_locationsinput = pd.read_excel(os.path.join(input_data_dir, 
+    gen_locationsinput = read_excel(os.path.join(input_data_dir, 
                                          "PLEXOS_World_2015_Gold_V1.1.xlsx"), 
                             sheet_name = "Attributes")
     
@@ -462,12 +467,12 @@ def main():
     old_criteria = ['mothballed', 'retired', 'operating']# operating added because currently operating plants can already have an intended retirement year added
     
     # Import gem Datasets
-    gem_coal = pd.read_excel(os.path.join(input_data_dir, 
+    gem_coal = read_excel(os.path.join(input_data_dir, 
                                                      'Global-Coal-Plant-Tracker-Jan-2022.xlsx'),
                                         sheet_name = 'Units', usecols = gem_coal_col.keys())
     
     
-    gem_gas = pd.read_excel(os.path.join(input_data_dir, 
+    gem_gas = read_excel(os.path.join(input_data_dir, 
                                                      'Global-Gas-Plant-Tracker-Feb-2022.xlsx'),
                                         sheet_name = 'Gas Units', usecols = gem_gas_col.keys())
     
@@ -586,15 +591,15 @@ def main():
 
     mode_list = [1,2]
 
-    df_ratios = pd.DataFrame(list(itertools.product(node_list,
-                                                    master_fuel_list,
-                                                    mode_list,
-                                                    years)
-                                  ),
-                             columns = ['node_code', 'tech_code', 'MODE_OF_OPERATION', 'YEAR']
-                             )
+    df_ratios = cross_join(node_code=node_list,
+                           tech_code=master_fuel_list,
+                           MODE_OF_OPERATION=mode_list,
+                           YEAR=years)
 
     df_ratios = createPwrTechs(df_ratios, duplicate_techs)
+    if geographic_scope:
+        df_ratios = df_ratios.loc[technology_mask(df_ratios['TECHNOLOGY'],
+                                                  geographic_scope)]
 
     thermal_fuel_list = ['COA',
                          'COG',
@@ -861,14 +866,12 @@ def main():
     df_int_trn["REGION"] = region_name
 
     df_int_trn = df_int_trn.drop(["property", "child_object", "codes"], axis=1)
-    df_int_trn["YEAR"] = model_start_year
+    if geographic_scope:
+        df_int_trn = df_int_trn.loc[technology_mask(df_int_trn["TECHNOLOGY"],
+                                                    geographic_scope)]
     # Add in the years:
-    df_temp = df_int_trn.copy()
-    for year in range(model_start_year + 1, model_end_year + 1):
-        df_temp["YEAR"] = year
-        df_int_trn = df_int_trn.append(df_temp)
-
-    df_int_trn = df_int_trn.reset_index(drop=True)
+    df_int_trn = cross_join(df_int_trn,
+                            YEAR=range(model_start_year, model_end_year + 1))
 
 
     # Now create the input and output activity ratios
@@ -934,10 +937,13 @@ def main():
 
     # Combine the pieces from above and output to csv:
 
-    df_oar_final = df_oar_final.append(df_oar_upstream) # add upstream production technologies
-    df_oar_final = df_oar_final.append(df_oar_int) # Add in path through international markets
-    df_oar_final = df_oar_final.append(df_oar_trn) # Add in domestic transmission
-    df_oar_final = df_oar_final.append(df_int_trn_oar) # Add in international transmission
+    df_oar_final = pd.concat([
+        df_oar_final,
+        df_oar_upstream, # add upstream production technologies
+        df_oar_int, # Add in path through international markets
+        df_oar_trn, # Add in domestic transmission
+        df_int_trn_oar, # Add in international transmission
+    ])
 
     # Select columns for final output table
     df_oar_final = df_oar_final.dropna()
@@ -948,9 +954,12 @@ def main():
                                  'YEAR', 
                                  'VALUE',]]
 
-    ### df_iar_final = df_iar_final.append(df_iar_int) # Add in path through international markets
-    df_iar_final = df_iar_final.append(df_iar_trn) # Add in domestic transmission
-    df_iar_final = df_iar_final.append(df_int_trn_iar) # Add in international transmission
+    df_iar_final = pd.concat([
+        df_iar_final,
+        ### df_iar_int, # Add in path through international markets
+        df_iar_trn, # Add in domestic transmission
+        df_int_trn_iar, # Add in international transmission
+    ])
 
     # Select columns for final output table
     df_iar_final = df_iar_final.dropna()
@@ -963,13 +972,13 @@ def main():
 
     # Add iar for techs not using PLEXOS values 
     df_iar_newTechs = duplicatePlexosTechs(df_iar_final, duplicate_techs)
-    for duplicate_tech in duplicate_techs:
-        df_new_iar = newIar(df_iar_newTechs, duplicate_tech)
-        df_iar_final = df_iar_final.append(df_new_iar)
+    df_iar_final = pd.concat(
+        [df_iar_final] + [newIar(df_iar_newTechs, duplicate_tech)
+                          for duplicate_tech in duplicate_techs])
 
     # Add oar for techs not using PLEXOS values 
     df_oar_newTechs = duplicatePlexosTechs(df_oar_final, duplicate_techs)
-    df_oar_final = df_oar_final.append(df_oar_newTechs, ignore_index=True)
+    df_oar_final = pd.concat([df_oar_final, df_oar_newTechs], ignore_index=True)
 
     # df_oar_final = apply_dtypes(df_oar_final, "OutputActivityRatio")
     #df_oar_final.to_csv(r"osemosys_global_model/data/OutputActivityRatio.csv", index = None)
@@ -980,14 +989,10 @@ def main():
                                          'YEAR'],
                                  keep='last',
                                  inplace=True)
-    df_oar_final.to_csv(os.path.join(output_data_dir,
-                                     "OutputActivityRatio.csv"),
-                        index=None)
+    write_table(df_oar_final, os.path.join(output_data_dir, "OutputActivityRatio.csv"))
     
     df_iar_final = apply_dtypes(df_iar_final, "InputActivityRatio")
-    df_iar_final.to_csv(os.path.join(output_data_dir,
-                                     "InputActivityRatio.csv"),
-                        index=None)
+    write_table(df_iar_final, os.path.join(output_data_dir, "InputActivityRatio.csv"))
 
     # ### Costs: Capital, fixed, and variable
 
@@ -1155,15 +1160,12 @@ def main():
         if each_cost in ['Capital']:
             df_costs_final = df_costs_final.merge(df_trans_capex, how='outer')
             df_costs_final = apply_dtypes(df_costs_final, "CapitalCost")
-            df_costs_final.to_csv(os.path.join(output_data_dir, 
-                                               "CapitalCost.csv"),
-                                  index = None)
+            write_table(df_costs_final, os.path.join(output_data_dir,
+                                                     "CapitalCost.csv"))
         if each_cost in ['O&M']:
             df_costs_final = df_costs_final.merge(df_trans_fix, how='outer')
             df_costs_final = apply_dtypes(df_costs_final, "FixedCost")
-            df_costs_final.to_csv(os.path.join(output_data_dir, 
-                                               "FixedCost.csv"),
-                                  index = None)
+            write_table(df_costs_final, os.path.join(output_data_dir, "FixedCost.csv"))
 
 
     # Create CapacityToActivityUnit csv
@@ -1184,9 +1186,8 @@ def main():
     df_capact_final['VALUE'] = 31.536
     # df_capact_final = apply_dtypes(df_capact_final, "CapacityToActivityUnit")
     df_capact_final.drop_duplicates(inplace=True)
-    df_capact_final.to_csv(os.path.join(output_data_dir,
-                                        "CapacityToActivityUnit.csv"),
-                           index = None)
+    write_table(df_capact_final, os.path.join(output_data_dir,
+                                              "CapacityToActivityUnit.csv"))
 
     # Set cross-border trade to 0 if False
     if not cross_border_trade:
@@ -1206,9 +1207,8 @@ def main():
                                                     'VALUE'])
 
     df_crossborder_final = apply_dtypes(df_crossborder_final, "TotalTechnologyModelPeriodActivityUpperLimit")
-    df_crossborder_final.to_csv(os.path.join(output_data_dir,
-                                            "TotalTechnologyModelPeriodActivityUpperLimit.csv"),
-                                index = None)
+    write_table(df_crossborder_final, os.path.join(output_data_dir,
+                                                   "TotalTechnologyModelPeriodActivityUpperLimit.csv"))
 
 
     # Create Operational Life data
@@ -1234,46 +1234,36 @@ def main():
     df_op_life_Out = pd.DataFrame(op_life_out, columns = ['REGION', 'TECHNOLOGY', 'VALUE'])
 
     df_op_life_Out = apply_dtypes(df_op_life_Out, "OperationalLife")
-    df_op_life_Out.to_csv(os.path.join(output_data_dir,
-                                                "OperationalLife.csv"),
-                                    index = None)
+    write_table(df_op_life_Out, os.path.join(output_data_dir, "OperationalLife.csv"))
 
     # Create totalAnnualMaxCapacityInvestment data 
 
     # Do not allow capacity investment for all PWRxxxxxxxx00 technolgoies 
     max_cap_invest_techs = list(set(
         df_iar_final.loc[df_iar_final['TECHNOLOGY'].str.endswith('00')]['TECHNOLOGY'].tolist()))
-    max_cap_invest_data = []
-    for tech in max_cap_invest_techs:
-        for year in years: 
-            max_cap_invest_data.append([region_name, tech, year, 0])
 
     # Do not allow investment for all xxxABCxxxxxxx technologies
     no_investment_techs = config.get('no_invest_technologies')
     if not no_investment_techs:
         no_investment_techs = [] # Change from None type to empty list
-    max_cap_invest_techs = list(set(df_iar_final.loc[
+    max_cap_invest_techs += list(set(df_iar_final.loc[
         df_iar_final['TECHNOLOGY'].str[3:6].isin(no_investment_techs)][
         'TECHNOLOGY'].tolist()))
-    for tech in max_cap_invest_techs:
-        for year in years: 
-            max_cap_invest_data.append([region_name, tech, year, 0])
-    
+
     # Save totalAnnualMaxCapacityInvestment
-    df_max_cap_invest = pd.DataFrame(max_cap_invest_data,
-                                    columns = ['REGION', 'TECHNOLOGY', 'YEAR', 'VALUE']
-                                    )
+    df_max_cap_invest = cross_join(REGION=[region_name],
+                                   TECHNOLOGY=max_cap_invest_techs,
+                                   YEAR=years)
+    df_max_cap_invest['VALUE'] = 0
     df_max_cap_invest = apply_dtypes(df_max_cap_invest, "TotalAnnualMaxCapacityInvestment")
-    df_max_cap_invest.to_csv(os.path.join(output_data_dir, 
-                                            'TotalAnnualMaxCapacityInvestment.csv'),
-                                        index = None)
+    write_table(df_max_cap_invest, os.path.join(output_data_dir,
+                                                'TotalAnnualMaxCapacityInvestment.csv'))
     
     df_min_cap_invest = pd.DataFrame(columns = ['REGION', 'TECHNOLOGY', 'YEAR', 'VALUE']
                                     )
     df_min_cap_invest = apply_dtypes(df_min_cap_invest, "TotalAnnualMinCapacityInvestment")
-    df_min_cap_invest.to_csv(os.path.join(output_data_dir, 
-                                            'TotalAnnualMinCapacityInvestment.csv'),
-                                        index = None)
+    write_table(df_min_cap_invest, os.path.join(output_data_dir,
+                                                'TotalAnnualMinCapacityInvestment.csv'))
 
     # ## Create sets for TECHNOLOGIES, FUELS
     if custom_nodes:
@@ -1285,20 +1275,14 @@ def main():
     # ## Create set for YEAR, REGION, MODE_OF_OPERATION
 
     years_df = pd.DataFrame(years, columns = ['VALUE']).astype(SET_DTYPES["YEAR"])
-    years_df.to_csv(os.path.join(output_data_dir, 
-                                 "YEAR.csv"),
-                    index = None)
+    write_table(years_df, os.path.join(output_data_dir, "YEAR.csv"))
 
     mode_list_df = pd.DataFrame(mode_list, columns = ['VALUE']).astype(SET_DTYPES["MODE_OF_OPERATION"])
-    mode_list_df.to_csv(os.path.join(output_data_dir, 
-                                     "MODE_OF_OPERATION.csv"),
-                        index = None)
+    write_table(mode_list_df, os.path.join(output_data_dir, "MODE_OF_OPERATION.csv"))
 
     regions_df = pd.DataFrame(columns = ['VALUE']).astype(SET_DTYPES["REGION"])
     regions_df.loc[0] = region_name
-    regions_df.to_csv(os.path.join(output_data_dir, 
-                                   "REGION.csv"),
-                      index = None)
+    write_table(regions_df, os.path.join(output_data_dir, "REGION.csv"))
 
     user_defined_capacity(region_name, years, output_data_dir, tech_capacity, op_life_dict)
     availability_factor(region_name, years, output_data_dir, df_af)
@@ -1323,11 +1307,7 @@ def create_sets(x, df, output_dir, custom_node_elements):
     set_elements = [x for x in set_elements if x != 'nan']
     set_elements.sort()
     set_elements_df = pd.DataFrame(set_elements, columns = ['VALUE'])
-    return set_elements_df.to_csv(os.path.join(output_dir,
-                                               str(x) + '.csv'
-                                              ),
-                                  index = None
-                                 )
+    return write_table(set_elements_df, os.path.join(output_dir, str(x) + '.csv'))
 
 def duplicatePlexosTechs(df_in, techs):
     """Creates new technologies to replace PLEXOS technolgoies.
@@ -1439,7 +1419,7 @@ def get_transmission_costs():
     input_data_dir = config_paths.input_data_dir
 
     # Read in raw data
-    df = pd.read_excel(os.path.join(input_data_dir,
+    df = read_excel(os.path.join(input_data_dir,
                                                  "Costs Line expansion.xlsx"),
                                     sheet_name = 'Lines')
 
@@ -1480,53 +1460,6 @@ def get_transmission_costs():
 
     return df_capex, df_fix
 
-def format_transmission_name(df):
-    '''Formats PLEXOS transmission names into OSeMOSYS Global names.
-
-    Args:
-        :param df: Pandas DataFrame with columns 'From' and 'To' describing the 
-               transmission from and to contries. ie. 
-    
-    Returns: 
-        :param df: Same as df_in, except the 'From' and 'To' columns are replaced 
-            with a single 'TECHNOLOGY' column holding OSeMOSYS Global 
-            naming conventions 
-
-    Example:
-        df = pd.DataFrame(
-            [[AF-COD, AF-COG, 0.001],
-            [EU-AUT, EU-SVK, 0.004],
-            [AS-LBN, AS-SYR, 0.006]], 
-            columns = ['From', 'To', 'Losses']
-        )
-        pd.DataFrame(
-            [[0.001,TRNCODXXCOGXX],
-            [0.004,TRNAUTXXSVKXX],
-            [0.006,TRNLBNXXSYRXX]] 
-            columns = ['Losses','TECHNOLOGY'])'''
-
-    # If from column has length 6 then it's the last three chars plus XX
-    df.loc[df["From"].str.len() == 6, "From"] = (df["From"].str[3:6] + "XX")
-
-    # If from column has length 9 then it's the 3:6 and 7:9 three chars plus XX
-    df.loc[df["From"].str.len() == 9, "From"] = (
-        df["From"].str[3:6] + df["From"].str[7:9])
-
-    # If to column has length 6 then it's the last three chars plus XX
-    df.loc[df["To"].str.len() == 6, "To"] = (df["To"].str[3:6] + "XX")
-
-    # If to column has length 9 then it's the 3:6 and 7:9 three chars plus XX
-    df.loc[df["To"].str.len() == 9, "To"] = (
-        df["To"].str[3:6] + df["To"].str[7:9])
-
-    # Combine From and To columns.
-    df["TECHNOLOGY"] = ("TRN" + df["From"] + df["To"])
-
-    # Drop to and from columns
-    df = df.drop(["From", "To"], axis=1)
-
-    return df
-
 def user_defined_capacity(region, years, output_data_dir, tech_capacity, op_life_dict):
     """User-defined capacities are used when a specific technology must be 
     invested, for a given year and capacity. This is applied hrough the 
@@ -1564,27 +1497,23 @@ def user_defined_capacity(region, years, output_data_dir, tech_capacity, op_life
         tech_capacity_df['REGION'] = region
         tech_capacity_df = tech_capacity_df[['REGION', 'TECHNOLOGY', 'YEAR', 'VALUE']]
         
-        tech_set = pd.read_csv(os.path.join(output_data_dir, 'TECHNOLOGY.csv'))
+        tech_set = read_table(os.path.join(output_data_dir, 'TECHNOLOGY.csv'))
 
-        for each_tech in list(tech_capacity_df['TECHNOLOGY'].unique()):
-            if each_tech not in list(tech_set['VALUE']):
-        #        tech_capacity_df = tech_capacity_df.loc[~(tech_capacity_df['TECHNOLOGY'].isin([each_tech]))]
-                tech_set = tech_set.append(pd.DataFrame({'VALUE':[each_tech]}))
+        existing_techs = set(tech_set['VALUE'])
+        new_techs = [x for x in tech_capacity_df['TECHNOLOGY'].unique()
+                     if x not in existing_techs]
+        tech_set = pd.concat([tech_set, pd.DataFrame({'VALUE': new_techs})])
 
-        df_min_cap_inv = pd.read_csv(os.path.join(output_data_dir,
-                                                  'TotalAnnualMinCapacityInvestment.csv'))
-        df_min_cap_inv = df_min_cap_inv.append(tech_capacity_df)
+        df_min_cap_inv = read_table(os.path.join(output_data_dir,
+                                                 'TotalAnnualMinCapacityInvestment.csv'))
+        df_min_cap_inv = pd.concat([df_min_cap_inv, tech_capacity_df])
         df_min_cap_inv.drop_duplicates(inplace=True)
 
-        df_max_cap_inv = pd.read_csv(os.path.join(output_data_dir,
-                                                  'TotalAnnualMaxCapacityInvestment.csv'))
+        df_max_cap_inv = read_table(os.path.join(output_data_dir,
+                                                 'TotalAnnualMaxCapacityInvestment.csv'))
         
-        df = pd.DataFrame(list(itertools.product(list(tech_capacity_df['TECHNOLOGY'].unique()),
-                                                 years)
-                               ),
-                          columns = ['TECHNOLOGY', 
-                                     'YEAR']
-                          )
+        df = cross_join(TECHNOLOGY=tech_capacity_df['TECHNOLOGY'].unique(),
+                        YEAR=years)
         df['REGION'] = region
         df = pd.merge(df, df_min_cap_inv,
                       how='left',
@@ -1612,11 +1541,11 @@ def user_defined_capacity(region, years, output_data_dir, tech_capacity, op_life
                        'VALUE']]
         
         # Append existing TotalAnnualMaxCapacityInvestment data with MAX_BUILD for TRN
-        df_max_cap_inv = df_max_cap_inv.append(max_cap_techs_df)
+        df_max_cap_inv = pd.concat([df_max_cap_inv, max_cap_techs_df])
         df_max_cap_inv.drop_duplicates(inplace=True)
         
         # Append existing CapitalCost data with CAPEX for TRN
-        df_capex = df_max_cap_inv.append(capex_df)
+        df_capex = pd.concat([df_max_cap_inv, capex_df])
         df_capex.drop_duplicates(inplace=True)
 
         # df_min_cap_inv = apply_dtypes(df_min_cap_inv, "TotalAnnualMinCapacityInvestment")
@@ -1659,9 +1588,8 @@ def user_defined_capacity(region, years, output_data_dir, tech_capacity, op_life
                                                'YEAR'],
                                        keep='last',
                                        inplace=True)
-        df_max_cap_inv.to_csv(os.path.join(output_data_dir,
-                                           "TotalAnnualMaxCapacityInvestment.csv"),
-                              index=None)
+        write_table(df_max_cap_inv, os.path.join(output_data_dir,
+                                                 "TotalAnnualMaxCapacityInvestment.csv"))
         
         # Print CapitalCost.csv with CAPEX for TRN
         #df_capex.to_csv(os.path.join(output_data_dir,
@@ -1673,12 +1601,8 @@ def user_defined_capacity(region, years, output_data_dir, tech_capacity, op_life
         df_res_cap_ud = df_min_cap_inv.loc[df_min_cap_inv['YEAR'] < min(years)]
         df_res_cap_ud.rename(columns={'YEAR':'START_YEAR'},
                              inplace=True)
-        df_res_cap_ud_final = pd.DataFrame(list(itertools.product(df_res_cap_ud['TECHNOLOGY'].unique(),
-                                                                  years)
-                                                ),
-                                           columns = ['TECHNOLOGY',
-                                                      'YEAR']
-                                           )
+        df_res_cap_ud_final = cross_join(
+            TECHNOLOGY=df_res_cap_ud['TECHNOLOGY'].unique(), YEAR=years)
         df_res_cap_ud_final = pd.merge(df_res_cap_ud_final,
                                        df_res_cap_ud,
                                        how='left',
@@ -1698,12 +1622,9 @@ def user_defined_capacity(region, years, output_data_dir, tech_capacity, op_life
                                                    'TECHNOLOGY',
                                                    'YEAR',
                                                    'VALUE']]
-        df_res_cap = pd.read_csv(os.path.join(output_data_dir,
-                                              'ResidualCapacity.csv'))
+        df_res_cap = read_table(os.path.join(output_data_dir, 'ResidualCapacity.csv'))
         df_res_cap = pd.concat([df_res_cap, df_res_cap_ud_final])
-        df_res_cap.to_csv(os.path.join(output_data_dir,
-                                       'ResidualCapacity.csv'),
-                          index=None)
+        write_table(df_res_cap, os.path.join(output_data_dir, 'ResidualCapacity.csv'))
                 
         # For technologies with start year at or after model start year, add to 
         # TotalAnnualMinCapacityInvestment      
@@ -1713,36 +1634,21 @@ def user_defined_capacity(region, years, output_data_dir, tech_capacity, op_life
                                                'YEAR'],
                                        keep='last',
                                        inplace=True)
-        df_min_cap_inv.to_csv(os.path.join(output_data_dir,
-                                        "TotalAnnualMinCapacityInvestment.csv"),
-                            index=None)
+        write_table(df_min_cap_inv, os.path.join(output_data_dir,
+                                                 "TotalAnnualMinCapacityInvestment.csv"))
         tech_set.drop_duplicates(inplace=True)
-        tech_set.to_csv(os.path.join(output_data_dir,
-                                     "TECHNOLOGY.csv"),
-                        index=None)
+        write_table(tech_set, os.path.join(output_data_dir, "TECHNOLOGY.csv"))
         
         # Add IAR and OAR for custom technologies
-        df_iar = pd.read_csv(os.path.join(output_data_dir,
-                                                  'InputActivityRatio.csv'))
-        df_oar = pd.read_csv(os.path.join(output_data_dir,
-                                                  'OutputActivityRatio.csv'))
+        df_iar = read_table(os.path.join(output_data_dir, 'InputActivityRatio.csv'))
+        df_oar = read_table(os.path.join(output_data_dir, 'OutputActivityRatio.csv'))
         tech_list = list(tech_capacity_df['TECHNOLOGY'].unique())
-        df_iar_custom = pd.DataFrame(list(itertools.product(tech_list,
-                                                        [1, 2],
-                                                        years)
-                                      ),
-                                 columns = ['TECHNOLOGY',
-                                            'MODE_OF_OPERATION',
-                                            'YEAR']
-                                 )
-        df_oar_custom = pd.DataFrame(list(itertools.product(tech_list,
-                                                        [1, 2],
-                                                        years)
-                                      ),
-                                 columns = ['TECHNOLOGY',
-                                            'MODE_OF_OPERATION',
-                                            'YEAR']
-                                 )  
+        df_iar_custom = cross_join(TECHNOLOGY=tech_list,
+                                   MODE_OF_OPERATION=[1, 2],
+                                   YEAR=years)
+        df_oar_custom = cross_join(TECHNOLOGY=tech_list,
+                                   MODE_OF_OPERATION=[1, 2],
+                                   YEAR=years)
         # IAR in modes 1 and 2 are primary electricity commodity ('ELC*01') in 
         # node_from and node_to, respectively. 
         # OAR is the inverse of the above
@@ -1790,9 +1696,7 @@ def user_defined_capacity(region, years, output_data_dir, tech_capacity, op_life
                                          'YEAR'],
                                keep='last',
                                inplace=True)
-        df_iar.to_csv(os.path.join(output_data_dir,
-                                   'InputActivityRatio.csv'),
-                      index=None)
+        write_table(df_iar, os.path.join(output_data_dir, 'InputActivityRatio.csv'))
         df_oar.drop_duplicates(subset=['REGION', 
                                          'TECHNOLOGY',
                                          'FUEL',  
@@ -1800,24 +1704,19 @@ def user_defined_capacity(region, years, output_data_dir, tech_capacity, op_life
                                          'YEAR'],
                                  keep='last',
                                  inplace=True)
-        df_oar.to_csv(os.path.join(output_data_dir,
-                                   'OutputActivityRatio.csv'),
-                      index=None)
+        write_table(df_oar, os.path.join(output_data_dir, 'OutputActivityRatio.csv'))
         # Add new fuels to FUEL set, if not already present
-        fuel_set = pd.read_csv(os.path.join(output_data_dir, 'FUEL.csv'))
+        fuel_set = read_table(os.path.join(output_data_dir, 'FUEL.csv'))
         fuel_list = []
         fuel_list = list(df_iar_custom['FUEL'].unique()) + list(df_oar_custom['FUEL'].unique())
         fuel_list = list(set(fuel_list))
-        for each_fuel in fuel_list:
-            if each_fuel not in list(fuel_set['VALUE']):
-                fuel_set = fuel_set.append(pd.DataFrame({'VALUE':[each_fuel]}))
+        existing_fuels = set(fuel_set['VALUE'])
+        new_fuels = [x for x in fuel_list if x not in existing_fuels]
+        fuel_set = pd.concat([fuel_set, pd.DataFrame({'VALUE': new_fuels})])
 
-        fuel_set.to_csv(os.path.join(output_data_dir,
-                                     "FUEL.csv"),
-                        index=None)
+        write_table(fuel_set, os.path.join(output_data_dir, "FUEL.csv"))
 
-        op_life = pd.read_csv(os.path.join(output_data_dir,
-                                           'OperationalLife.csv'))
+        op_life = read_table(os.path.join(output_data_dir, 'OperationalLife.csv'))
         op_life_custom = pd.DataFrame({'TECHNOLOGY': tech_list})
 
         op_life_custom.loc[op_life_custom['TECHNOLOGY'].str.contains('TRN'),
@@ -1832,12 +1731,10 @@ def user_defined_capacity(region, years, output_data_dir, tech_capacity, op_life
                                         'TECHNOLOGY'],
                                 keep='last',
                                 inplace=True)
-        op_life.to_csv(os.path.join(output_data_dir,
-                                    'OperationalLife.csv'),
-                       index=None)
+        write_table(op_life, os.path.join(output_data_dir, 'OperationalLife.csv'))
         # Add CapacityToActivityUnit for custom technologies
-        cap_act = pd.read_csv(os.path.join(output_data_dir,
-                                           'CapacityToActivityUnit.csv'))
+        cap_act = read_table(os.path.join(output_data_dir,
+                                          'CapacityToActivityUnit.csv'))
         cap_act_custom = pd.DataFrame({'TECHNOLOGY': tech_list})
         cap_act_custom.loc[cap_act_custom['TECHNOLOGY'].str.contains('TRN'),
                            'VALUE'] = 31.536
@@ -1849,18 +1746,13 @@ def user_defined_capacity(region, years, output_data_dir, tech_capacity, op_life
                                          'VALUE']]
         cap_act = pd.concat([cap_act, cap_act_custom])
         cap_act.drop_duplicates(inplace=True)
-        cap_act.to_csv(os.path.join(output_data_dir,
-                                    'CapacityToActivityUnit.csv'),
-                       index=None)
+        write_table(cap_act, os.path.join(output_data_dir,
+                                          'CapacityToActivityUnit.csv'))
         
         # Add CapitalCost for custom technologies
-        cap_cost = pd.read_csv(os.path.join(output_data_dir,
-                                            'CapitalCost.csv'))
+        cap_cost = read_table(os.path.join(output_data_dir, 'CapitalCost.csv'))
         tech_list = list(tech_capacity_df['TECHNOLOGY'].unique())
-        cap_cost_trn = pd.DataFrame(list(itertools.product(tech_list,
-                                                           years)),
-                                    columns = ['TECHNOLOGY',
-                                               'YEAR'])
+        cap_cost_trn = cross_join(TECHNOLOGY=tech_list, YEAR=years)
 
         # Update CapitalCost with user-defined costs by transmission line
         for each_trn in tech_list:
@@ -1880,9 +1772,7 @@ def user_defined_capacity(region, years, output_data_dir, tech_capacity, op_life
         cap_cost.drop_duplicates(subset=['REGION', 'TECHNOLOGY', 'YEAR'],
                                  keep="last",
                                  inplace=True)
-        cap_cost.to_csv(os.path.join(output_data_dir,
-                                     'CapitalCost.csv'),
-                        index=None)
+        write_table(cap_cost, os.path.join(output_data_dir, 'CapitalCost.csv'))
 
 def custom_nodes_csv(custom_nodes, df_custom, region, years, tech_list):
     '''Add custom nodes to the model for each relevant input parameter data csv.
@@ -1895,14 +1785,9 @@ def custom_nodes_csv(custom_nodes, df_custom, region, years, tech_list):
         df_out : 
 
     '''
-    df_param = pd.DataFrame(list(itertools.product(custom_nodes,
-                                                   tech_list,
-                                                   years)
-                                  ),
-                             columns = ['CUSTOM_NODE',
-                                        'FUEL_TYPE',
-                                        'YEAR']
-                             )
+    df_param = cross_join(CUSTOM_NODE=custom_nodes,
+                          FUEL_TYPE=tech_list,
+                          YEAR=years)
     df_param['REGION'] = region
     df_custom = df_custom.groupby(['CUSTOM_NODE',
                                    'FUEL_TYPE',
@@ -1942,15 +1827,10 @@ def availability_factor(region,
     af_dict = dict(zip(list(availability['technology']),
                        list(availability['value'])))
     
-    df_tech = pd.read_csv(os.path.join(output_data_dir,
-                                       'TECHNOLOGY.csv'))
+    df_tech = read_table(os.path.join(output_data_dir, 'TECHNOLOGY.csv'))
     tech_list = [x for x in df_tech['VALUE']
                  if x.startswith('PWR')]
-    df_af_final = pd.DataFrame(list(itertools.product(tech_list,
-                                                      years)
-                                    ),
-                               columns = ['TECHNOLOGY', 'YEAR']
-                               )
+    df_af_final = cross_join(TECHNOLOGY=tech_list, YEAR=years)
     df_af_final['TECH'] = df_af_final['TECHNOLOGY'].str[3:6]
     df_af_final['VALUE'] = df_af_final['TECH'].map(af_dict)
     df_af_final.dropna(inplace=True)
@@ -1960,9 +1840,7 @@ def availability_factor(region,
                                'TECHNOLOGY',
                                'YEAR',
                                'VALUE']]
-    df_af_final.to_csv(os.path.join(output_data_dir,
-                                    'AvailabilityFactor.csv'),
-                       index=None)
+    write_table(df_af_final, os.path.join(output_data_dir, 'AvailabilityFactor.csv'))
 
 if __name__ == "__main__":
     main()
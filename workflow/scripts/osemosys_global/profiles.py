@@ -0,0 +1,168 @@
+'''Memory mapped store of the hourly demand and renewable profiles.
+
+Each hourly profile csv (e.g. All_Demand_UTC_2015.csv or SolarPV 2015.csv)
+is converted once to a float32 array in results/cache/profiles, keyed by
+the hash of the csv file. The array is stored node-major, so the hours of a
+node are contiguous, next to an index of its node columns and datetimes.
+
+Later reads memory map the array, and consumers take only the nodes and
+hours they need:
+
+    demand = load_profile(path)
+    demand.values(['AS-IND-NE'])     # zero-copy view, shape (1, 8760)
+    demand.frame(columns)            # csv-like frame of a few nodes
+    demand.sum()                     # totals per node, without a frame
+'''
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from cache import file_digest, load_digest_index, save_digest_index
+from configuration import ConfigPaths
+
+import logging
+logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
+
+CHUNKSIZE = 1000
+
+# Datetimes of the profiles, e.g. '31/12/2015 23:00'
+DATETIME_FORMAT = '%d/%m/%Y %H:%M'
+
+# Loaded profiles as {cache file: Profile}
+_PROFILES: Dict[str, 'Profile'] = {}
+
+class Profile:
+    '''Hourly profile of a set of nodes
+
+    Arguments:
+        values: np.ndarray
+            float32 array of shape (nodes, hours), usually memory mapped
+        columns: List[str]
+            Node column names, e.g. 'AS-IND-NE'
+        datetime: List[str]
+            Datetime of each hour as written in the csv file
+    '''
+
+    def __init__(self, values: np.ndarray, columns: List[str],
+                 datetime: List[str]):
+        self._values = values
+        self.columns = list(columns)
+        self.datetime = list(datetime)
+        self.index = {column: i for i, column in enumerate(self.columns)}
+        self._timestamps = None
+
+    def __len__(self):
+        return len(self.datetime)
+
+    @property
+    def timestamps(self) -> pd.DatetimeIndex:
+        '''Parsed datetimes, day first as the hydro profiles read months'''
+        if self._timestamps is None:
+            try:
+                self._timestamps = pd.to_datetime(self.datetime,
+                                                  format=DATETIME_FORMAT)
+            except ValueError:
+                self._timestamps = pd.to_datetime(self.datetime, dayfirst=True)
+        return self._timestamps
+
+    def _rows(self, columns):
+        '''Row selector of columns, a slice where they are contiguous'''
+        if columns is None:
+            return slice(None)
+        rows = [self.index[column] for column in columns]
+        if rows and rows == list(range(rows[0], rows[0] + len(rows))):
+            return slice(rows[0], rows[0] + len(rows))
+        return rows
+
+    def values(self, columns: Optional[List[str]] = None,
+               hours: Optional[slice] = None) -> np.ndarray:
+        '''Values of columns as an array of shape (columns, hours). A view of
+        the memory mapped file if the columns are contiguous.'''
+        return self._values[self._rows(columns), hours or slice(None)]
+
+    def frame(self, columns: Optional[List[str]] = None,
+              hours: Optional[slice] = None) -> pd.DataFrame:
+        '''Columns as a frame laid out as the csv file, with the parsed
+        'Datetime' column first'''
+        columns = self.columns if columns is None else [
+            column for column in columns if column in self.index]
+        hours = hours or slice(None)
+        values = np.ascontiguousarray(self.values(columns, hours).T)
+        df = pd.DataFrame(values, columns=columns)
+        df.insert(0, 'Datetime', self.timestamps[hours])
+        return df
+
+    def sum(self, columns: Optional[List[str]] = None) -> pd.Series:
+        '''Total of each column, accumulated in float64'''
+        columns = self.columns if columns is None else columns
+        return pd.Series(self.values(columns).sum(axis=1, dtype=np.float64),
+                         index=columns)
+
+    def max(self, columns: Optional[List[str]] = None) -> pd.Series:
+        '''Maximum of each column'''
+        columns = self.columns if columns is None else columns
+        return pd.Series(self.values(columns).max(axis=1).astype(np.float64),
+                         index=columns)
+
+def _convert(path: Path, cache_file: Path) -> None:
+    '''Converts a profile csv to a float32 .npy file and a .json index'''
+    columns = pd.read_csv(path, nrows=0, encoding='latin-1').columns
+    nodes = [column for column in columns if column != 'Datetime']
+    with open(path, 'rb') as f:
+        n_hours = sum(1 for line in f if line.strip()) - 1
+
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_file.with_name(f'{cache_file.stem}.tmp.npy')
+    values = np.lib.format.open_memmap(tmp_file, mode='w+', dtype=np.float32,
+                                       shape=(len(nodes), n_hours))
+    datetime = []
+    start = 0
+    dtype = {node: np.float32 for node in nodes}
+    for chunk in pd.read_csv(path, encoding='latin-1', dtype=dtype,
+                             chunksize=CHUNKSIZE):
+        end = start + len(chunk)
+        values[:, start:end] = chunk[nodes].values.T
+        datetime.extend(chunk['Datetime'].astype(str))
+        start = end
+    values.flush()
+    del values
+
+    with open(cache_file.with_suffix('.json'), 'w', encoding='utf-8') as f:
+        json.dump({'columns': nodes, 'datetime': datetime}, f)
+    os.replace(tmp_file, cache_file)
+
+def load_profile(path) -> Profile:
+    '''Loads an hourly profile csv through the profile store.
+
+    Arguments:
+        path: str
+            Path to the profile csv, with a 'Datetime' column and a column
+            per node
+
+    Returns:
+        Profile
+    '''
+    path = Path(path)
+    cache_dir = Path(ConfigPaths().cache_dir)
+    index = load_digest_index(cache_dir)
+    key = file_digest(path, index)
+    save_digest_index(cache_dir, index)
+
+    cache_file = Path(cache_dir, 'profiles', f'{key}.npy')
+    if str(cache_file) in _PROFILES:
+        return _PROFILES[str(cache_file)]
+    if not cache_file.is_file():
+        logging.info(f'Caching profile {path.name}')
+        _convert(path, cache_file)
+
+    with open(cache_file.with_suffix('.json'), encoding='utf-8') as f:
+        meta = json.load(f)
+    values = np.load(cache_file, mmap_mode='r')
+    profile = Profile(values, meta['columns'], meta['datetime'])
+    _PROFILES[str(cache_file)] = profile
+    return profile
@@ -0,0 +1,116 @@
+'''Batched linear regression for the demand projections.
+
+demand_projection.py fits electricity demand per capita against GDP|PPP per
+capita, and optionally the urban population share, for every spatial group
+(e.g. continent). Instead of fitting one model per group, all groups are
+solved at once from their stacked normal equations:
+
+    (Xc_g' Xc_g) b_g = Xc_g' yc_g
+
+with Xc_g and yc_g the regressors and target of group g centred on their
+group means, as sklearn's LinearRegression does. The intercept of each group
+is then mean(y_g) - mean(X_g) b_g. Groups with too few points for a unique
+solution get the minimum norm solution through the pseudo-inverse, as
+sklearn's least squares solver.
+
+Projecting every country and year is then a single product of the
+regressors, of shape (countries, years, regressors), with the coefficients
+of each country's group.
+'''
+
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+def fit(codes: np.ndarray, X: np.ndarray, y: np.ndarray,
+        n_groups: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    '''Fits an ordinary least squares regression per group.
+
+    Arguments:
+        codes: np.ndarray
+            Group (0 to n_groups - 1) of each observation
+        X: np.ndarray
+            Regressors of shape (observations, regressors)
+        y: np.ndarray
+            Target of each observation
+        n_groups: int
+            Number of groups
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]
+            Coefficients of shape (groups, regressors), and the intercept
+            and R2 of each group
+    '''
+    X = np.asarray(X, dtype=np.float64).reshape(len(y), -1)
+    y = np.asarray(y, dtype=np.float64)
+    counts = np.bincount(codes, minlength=n_groups).astype(np.float64)
+    counts = np.maximum(counts, 1)
+
+    # Centre on the group means
+    X_mean = np.zeros((n_groups, X.shape[1]))
+    np.add.at(X_mean, codes, X)
+    X_mean /= counts[:, None]
+    y_mean = np.bincount(codes, weights=y, minlength=n_groups) / counts
+    Xc = X - X_mean[codes]
+    yc = y - y_mean[codes]
+
+    # Stacked normal equations of shape (groups, regressors, regressors)
+    XtX = np.zeros((n_groups, X.shape[1], X.shape[1]))
+    np.add.at(XtX, codes, Xc[:, :, None] * Xc[:, None, :])
+    Xty = np.zeros((n_groups, X.shape[1]))
+    np.add.at(Xty, codes, Xc * yc[:, None])
+
+    coefs = (np.linalg.pinv(XtX) @ Xty[:, :, None])[:, :, 0]
+    intercepts = y_mean - (X_mean * coefs).sum(axis=1)
+
+    residuals = yc - (Xc * coefs[codes]).sum(axis=1)
+    ss_res = np.bincount(codes, weights=residuals ** 2, minlength=n_groups)
+    ss_tot = np.bincount(codes, weights=yc ** 2, minlength=n_groups)
+    # A constant target is fitted perfectly, or not at all
+    r2 = np.where(ss_tot > 0, 1 - ss_res / np.where(ss_tot > 0, ss_tot, 1),
+                  np.where(ss_res > 0, 0.0, 1.0))
+    return coefs, intercepts, r2
+
+def fit_groups(df: pd.DataFrame, regressors: List[str],
+               target: str) -> pd.DataFrame:
+    '''Fits a regression of target on regressors per index value of df.
+
+    Arguments:
+        df: pd.DataFrame
+            Observations, indexed by their group
+        regressors: List[str]
+            Columns of the regressors
+        target: str
+            Column of the target
+
+    Returns:
+        pd.DataFrame
+            'intercept', a coefficient per regressor named as the regressor
+            and 'R2', indexed by group
+    '''
+    codes, groups = pd.factorize(df.index)
+    coefs, intercepts, r2 = fit(codes, df[regressors].values,
+                                df[target].values, len(groups))
+    result = pd.DataFrame(coefs, index=groups, columns=regressors)
+    result.insert(0, 'intercept', intercepts)
+    result['R2'] = r2
+    return result
+
+def project(coefs: np.ndarray, intercepts: np.ndarray,
+            X: np.ndarray) -> np.ndarray:
+    '''Applies the regression of each row to its regressors.
+
+    Arguments:
+        coefs: np.ndarray
+            Coefficients of shape (rows, regressors)
+        intercepts: np.ndarray
+            Intercept of each row
+        X: np.ndarray
+            Regressors of shape (rows, years, regressors)
+
+    Returns:
+        np.ndarray
+            Projected values of shape (rows, years)
+    '''
+    return np.einsum('ryk,rk->ry', X, coefs) + intercepts[:, None]
@@ -0,0 +1,133 @@
+'''Representative days for timeslice generation.
+
+With 'representative_days: N' in the config file, the seasons of the config
+are replaced by N clusters of similar days. The days of the profile year are
+clustered with k-means on their joint demand and renewable profiles, each
+node's hourly values scaled by its maximum, so a day is a point with
+24 x nodes coordinates.
+
+Every cluster becomes a season of the model (S1, S2, ...), numbered in order
+of the mean day of the year of its days, and is split into the dayparts of
+the config. TimesliceMapper.from_days() then assigns every hour of the year
+to the timeslice of its day's cluster, so YearSplit, CapacityFactor and
+SpecifiedDemandProfile are averages over all days of a cluster, weighted by
+its number of days.
+'''
+
+import calendar
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from timeslices import PROFILE_YEAR, TimesliceMapper
+from profiles import Profile
+
+import logging
+logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
+
+ITERATIONS = 100
+SEED = 0
+
+def day_features(profiles: List[Tuple[Profile, List[str]]],
+                 year: int = PROFILE_YEAR) -> np.ndarray:
+    '''Hourly values of each day, scaled by the maximum of each column.
+
+    Arguments:
+        profiles: List[Tuple[Profile, List[str]]]
+            Profiles and the columns of each to cluster on
+        year: int
+            Year of the profiles
+
+    Returns:
+        np.ndarray
+            float32 array of shape (days, 24 x columns)
+    '''
+    n_days = 366 if calendar.isleap(year) else 365
+    features = []
+    for profile, columns in profiles:
+        day, hour = np.divmod(TimesliceMapper.hour_of_year(profile.timestamps),
+                              24)
+        values = profile.values(columns).astype(np.float32)
+        peak = values.max(axis=1, keepdims=True)
+        values = np.divide(values, peak, out=np.zeros_like(values),
+                           where=peak > 0)
+        by_day = np.zeros((n_days, 24, len(values)), dtype=np.float32)
+        by_day[day, hour] = values.T
+        features.append(by_day.reshape(n_days, 24 * len(values)))
+    return np.concatenate(features, axis=1)
+
+def _distances(features: np.ndarray, centers: np.ndarray) -> np.ndarray:
+    '''Squared distances of shape (points, centers)'''
+    return np.maximum(
+        (features ** 2).sum(axis=1)[:, None]
+        - 2 * features @ centers.T
+        + (centers ** 2).sum(axis=1)[None, :], 0)
+
+def kmeans(features: np.ndarray, n_clusters: int,
+           iterations: int = ITERATIONS, seed: int = SEED) -> np.ndarray:
+    '''Clusters points with k-means, initialised with k-means++.
+
+    Arguments:
+        features: np.ndarray
+            Points of shape (points, dimensions)
+        n_clusters: int
+            Number of clusters
+
+    Returns:
+        np.ndarray
+            Cluster of each point
+    '''
+    features = features.astype(np.float64)
+    rng = np.random.default_rng(seed)
+    n_points = len(features)
+    centers = features[[rng.integers(n_points)]]
+    closest = _distances(features, centers)[:, 0]
+    for _ in range(1, n_clusters):
+        p = closest / closest.sum() if closest.sum() > 0 else None
+        center = features[[rng.choice(n_points, p=p)]]
+        centers = np.vstack([centers, center])
+        closest = np.minimum(closest, _distances(features, center)[:, 0])
+
+    labels = np.full(n_points, -1)
+    for _ in range(iterations):
+        new_labels = _distances(features, centers).argmin(axis=1)
+        if (new_labels == labels).all():
+            break
+        labels = new_labels
+        members = np.eye(n_clusters)[labels]
+        counts = members.sum(axis=0)
+        # Clusters left without days keep their center
+        filled = counts > 0
+        centers[filled] = (members.T @ features)[filled] / counts[filled, None]
+    return labels
+
+def cluster_days(features: np.ndarray, n_clusters: int) -> pd.DataFrame:
+    '''Groups the days of the year into representative days.
+
+    Arguments:
+        features: np.ndarray
+            Output of day_features()
+        n_clusters: int
+            Number of representative days
+
+    Returns:
+        pd.DataFrame
+            SEASON (S1, S2, ...) of each DAY (1, 2, ...) of the year
+    '''
+    n_days = len(features)
+    if not 0 < n_clusters <= n_days:
+        raise ValueError(
+            f'representative_days must be between 1 and {n_days}, '
+            f'not {n_clusters}')
+    labels = kmeans(features, n_clusters)
+
+    # Number clusters in order of their mean day of the year, so seasons
+    # follow the calendar as far as possible. Empty clusters are dropped.
+    days = pd.DataFrame({'DAY': np.arange(1, n_days + 1), 'CLUSTER': labels})
+    order = days.groupby('CLUSTER')['DAY'].mean().sort_values().index
+    seasons = {cluster: f'S{i + 1}' for i, cluster in enumerate(order)}
+    days['SEASON'] = days['CLUSTER'].map(seasons)
+    logging.info(f'{n_days} days clustered into {len(seasons)} representative '
+                 'days')
+    return days[['DAY', 'SEASON']]
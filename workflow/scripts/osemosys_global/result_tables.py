@@ -0,0 +1,314 @@
+"""Result tables computed directly from a solver solution.
+
+This replaces `otoole results`. The solution file is streamed once and only
+the variables listed as results in the otoole config are kept. Their names
+are split into index columns, and the calculated results (e.g.
+ProductionByTechnology, RateOfProductionByTechnologyByMode or
+UseByTechnology) are derived with vectorized merges against the input data
+tables of the scenario, instead of re-reading the GMPL data file. The
+tables hold the same rows as the ones otoole writes.
+
+Supported solution files are the CBC and Gurobi solutions, and CPLEX
+solutions after cplex_transform.py. Tables are written as CSV files, and as
+Parquet files too when 'data_format' is set to parquet.
+
+    python workflow/scripts/osemosys_global/result_tables.py <solver> <solution> <data_dir> <results_dir> <otoole_config>
+"""
+
+import itertools
+import os
+import sys
+from typing import Callable, Dict, List
+
+import pandas as pd
+import yaml
+
+from data_store import data_format, read_table, table_exists, write_table
+
+import logging
+logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
+
+SOLVERS = ['cbc', 'cplex', 'gurobi']
+
+CHUNKSIZE = 1_000_000
+
+# Lines holding variable values as (name, indices, value)
+SOLUTION_LINES = {
+    # "    12 RateOfActivity(GLOBAL,S1D1,PWRCOA,1,2025)  0.5  0", where
+    # infeasible rows are marked with '**'
+    'cbc': r'^\s*(?:\*\*\s*)?\d+\s+(\w+)\(([^)]*)\)\s+(\S+)',
+    # "RateOfActivity(GLOBAL,S1D1,PWRCOA,1,2025) 0.5"
+    'gurobi': r'^(\w+)\(([^)]*)\)\s+(\S+)',
+}
+
+# Sorted CPLEX lines hold the values of all years, as
+# "RateOfActivity\tGLOBAL\tS1D1\tPWRCOA\t1\t0.5\t0.4 ..."
+CPLEX_LINE = r'^(\w+)\t([^\n]*)'
+
+INDEX_DTYPES = {'YEAR': int, 'MODE_OF_OPERATION': int}
+
+# Columns of results written with other columns than their indices in the
+# otoole config. otoole writes TotalAnnualTechnologyActivityByMode per
+# timeslice, which the trade flows of summarise_results.py rely on.
+RESULT_COLUMNS = {
+    'TotalAnnualTechnologyActivityByMode': [
+        'TIMESLICE', 'YEAR', 'REGION', 'TECHNOLOGY', 'MODE_OF_OPERATION'],
+}
+
+def read_result_config(otoole_config) -> Dict[str, Dict]:
+    '''Returns the parameters and results of an otoole config file'''
+    with open(otoole_config, encoding='utf-8') as yaml_file:
+        parsed = yaml.load(yaml_file, Loader = yaml.FullLoader)
+    config = {name: details for name, details in parsed.items()
+              if details['type'] in ('param', 'result')}
+    for details in config.values():
+        # Repeated indices, e.g. Trade[REGION, REGION], get an underscore
+        indices = []
+        for index in details.get('indices', []):
+            indices.append(f'_{index}' if index in indices else index)
+        details['indices'] = indices
+    return config
+
+def _line_chunks(solution, chunksize) -> pd.Series:
+    with open(solution, 'r') as f:
+        while True:
+            lines = list(itertools.islice(f, chunksize))
+            if not lines:
+                break
+            yield pd.Series(lines)
+
+def _index_columns(df: pd.DataFrame, indices: List[str]) -> pd.DataFrame:
+    # Year-invariant parameters have no YEAR column, and are broadcast over
+    # the years of the table they are merged with
+    for index in indices:
+        if index.lstrip('_') in INDEX_DTYPES and index in df.columns:
+            df[index] = df[index].astype(INDEX_DTYPES[index.lstrip('_')])
+    return df
+
+def _empty(indices: List[str]) -> pd.DataFrame:
+    df = pd.DataFrame(columns=indices + ['VALUE']).astype({'VALUE': float})
+    return _index_columns(df, indices)
+
+def read_solution(solver, solution, config, years) -> Dict[str, pd.DataFrame]:
+    '''Reads the values of the result variables in a solution file.
+
+    Arguments:
+        solver: str
+            One of SOLVERS
+        solution: str
+            Path to the solution file
+        config: Dict[str, Dict]
+            Output of read_result_config()
+        years: List[int]
+            Model years, used to read CPLEX solutions
+
+    Returns:
+        Dict[str, pd.DataFrame]
+            Index columns and VALUE of each variable found in the solution
+    '''
+    wanted = {name for name, details in config.items()
+              if details['type'] == 'result'}
+    pattern = CPLEX_LINE if solver == 'cplex' else SOLUTION_LINES[solver]
+    chunks = {}
+    for lines in _line_chunks(solution, CHUNKSIZE):
+        found = lines.str.extract(pattern).dropna()
+        found = found.loc[found[0].isin(wanted)]
+        for name, df in found.groupby(0):
+            chunks.setdefault(name, []).append(df)
+
+    variables = {}
+    for name, dfs in chunks.items():
+        df = pd.concat(dfs)
+        indices = config[name]['indices']
+        if solver == 'cplex':
+            # index columns apart from YEAR, followed by one value per year
+            split = df[1].str.split('\t', expand=True)
+            if indices[-1] != 'YEAR' or \
+                    split.shape[1] != len(indices) - 1 + len(years):
+                logging.warning(f'Skipping {name}, which is not read from '
+                                'CPLEX solutions')
+                continue
+            split.columns = indices[:-1] + years
+            df = split.melt(id_vars=indices[:-1], var_name='YEAR',
+                            value_name='VALUE')
+        else:
+            split = df[1].str.split(',', expand=True)
+            split.columns = indices
+            df = split.assign(VALUE=df[2].values)
+        df['VALUE'] = df['VALUE'].astype(float)
+        if solver != 'cbc':
+            # otoole keeps zero values of CBC solutions only
+            df = df.loc[df['VALUE'] != 0]
+        variables[name] =_index_columns(df.reset_index(drop=True), indices)
+    return variables
+
+class ResultTables:
+    '''Variables of a solution and the results calculated from them'''
+
+    def __init__(self, variables: Dict[str, pd.DataFrame], data_dir, config):
+        self.tables = dict(variables)
+        self.variables = set(variables)
+        self.data_dir = data_dir
+        self.config = config
+        self.years = self.read_set('YEAR')
+
+    def read_set(self, name) -> List:
+        return read_table(os.path.join(self.data_dir, f'{name}.csv'))[
+            'VALUE'].to_list()
+
+    def param(self, name) -> pd.DataFrame:
+        '''Reads an input parameter'''
+        path = os.path.join(self.data_dir, f'{name}.csv')
+        indices = self.config[name]['indices']
+        if not table_exists(path):
+            return _empty(indices)
+        return _index_columns(read_table(path), indices)
+
+    def get(self, name) -> pd.DataFrame:
+        '''Returns a variable of the solution, or calculates a result'''
+        if name not in self.tables:
+            if name in CALCULATIONS:
+                self.tables[name] = CALCULATIONS[name](self)
+            else:
+                self.tables[name] = _empty(self.config[name]['indices'])
+        return self.tables[name]
+
+    def multiply(self, left: pd.DataFrame, name) -> pd.DataFrame:
+        '''Multiplies a table by an input parameter. As in otoole, rows
+        without data for the parameter are dropped rather than multiplied by
+        its default value.'''
+        right = self.param(name)
+        on = [col for col in right.columns if col in left.columns
+              and col != 'VALUE']
+        df = left.merge(right, on=on)
+        df['VALUE'] = df['VALUE_x'] * df['VALUE_y']
+        return df.drop(columns=['VALUE_x', 'VALUE_y'])
+
+    def sum(self, df: pd.DataFrame, name) -> pd.DataFrame:
+        '''Sums a table over the indices that are not indices of result name'''
+        indices = self.config[name]['indices']
+        if df.empty:
+            return _empty(indices)
+        return df.groupby(indices, as_index=False)['VALUE'].sum()
+
+def _activity_by_mode(tables: ResultTables) -> pd.DataFrame:
+    # Kept per timeslice, see RESULT_COLUMNS
+    return tables.multiply(tables.get('RateOfActivity'), 'YearSplit')
+
+def _accumulated_new_capacity(tables: ResultTables) -> pd.DataFrame:
+    new_capacity = tables.get('NewCapacity').rename(columns={'YEAR': 'BUILD'})
+    df = new_capacity.merge(pd.DataFrame({'YEAR': tables.years}), how='cross')
+    # As in otoole, capacity of technologies without an OperationalLife is
+    # not accumulated
+    life = tables.param('OperationalLife')
+    df = df.merge(life.rename(columns={'VALUE': 'LIFE'}),
+                  on=['REGION', 'TECHNOLOGY'])
+    df = df.loc[(df['BUILD'] <= df['YEAR'])
+                & (df['YEAR'] - df['BUILD'] < df['LIFE'])]
+    return tables.sum(df, 'AccumulatedNewCapacity')
+
+def _total_capacity_annual(tables: ResultTables) -> pd.DataFrame:
+    df = pd.concat([tables.get('AccumulatedNewCapacity'),
+                    tables.param('ResidualCapacity')])
+    return tables.sum(df, 'TotalCapacityAnnual')
+
+def _annual_variable_operating_cost(tables: ResultTables) -> pd.DataFrame:
+    df = tables.multiply(tables.get('TotalAnnualTechnologyActivityByMode'),
+                         'VariableCost')
+    return tables.sum(df, 'AnnualVariableOperatingCost')
+
+def _annual_technology_emission_by_mode(tables: ResultTables) -> pd.DataFrame:
+    df = tables.multiply(tables.get('TotalAnnualTechnologyActivityByMode'),
+                         'EmissionActivityRatio')
+    return tables.sum(df, 'AnnualTechnologyEmissionByMode')
+
+def _demand(tables: ResultTables) -> pd.DataFrame:
+    df = tables.multiply(tables.param('SpecifiedAnnualDemand'),
+                         'SpecifiedDemandProfile')
+    return tables.sum(df, 'Demand')
+
+def _times_year_split(name, result) -> Callable:
+    def calculate(tables: ResultTables) -> pd.DataFrame:
+        df = tables.multiply(tables.get(name), 'YearSplit')
+        return tables.sum(df, result)
+    return calculate
+
+def _times_param(name, param, result) -> Callable:
+    def calculate(tables: ResultTables) -> pd.DataFrame:
+        return tables.sum(tables.multiply(tables.get(name), param), result)
+    return calculate
+
+def _sum_of(name, result) -> Callable:
+    def calculate(tables: ResultTables) -> pd.DataFrame:
+        return tables.sum(tables.get(name), result)
+    return calculate
+
+# Results calculated from variables and input data, as in otoole
+CALCULATIONS = {
+    'AccumulatedNewCapacity': _accumulated_new_capacity,
+    'AnnualEmissions': _sum_of('AnnualTechnologyEmission', 'AnnualEmissions'),
+    'AnnualFixedOperatingCost': _times_param(
+        'TotalCapacityAnnual', 'FixedCost', 'AnnualFixedOperatingCost'),
+    'AnnualTechnologyEmission': _sum_of(
+        'AnnualTechnologyEmissionByMode', 'AnnualTechnologyEmission'),
+    'AnnualTechnologyEmissionByMode': _annual_technology_emission_by_mode,
+    'AnnualVariableOperatingCost': _annual_variable_operating_cost,
+    'CapitalInvestment': _times_param(
+        'NewCapacity', 'CapitalCost', 'CapitalInvestment'),
+    'Demand': _demand,
+    'ProductionByTechnology': _times_year_split(
+        'RateOfProductionByTechnology', 'ProductionByTechnology'),
+    'ProductionByTechnologyAnnual': _sum_of(
+        'ProductionByTechnology', 'ProductionByTechnologyAnnual'),
+    'RateOfProductionByTechnology': _sum_of(
+        'RateOfProductionByTechnologyByMode', 'RateOfProductionByTechnology'),
+    'RateOfProductionByTechnologyByMode': _times_param(
+        'RateOfActivity', 'OutputActivityRatio',
+        'RateOfProductionByTechnologyByMode'),
+    'RateOfUseByTechnology': _sum_of(
+        'RateOfUseByTechnologyByMode', 'RateOfUseByTechnology'),
+    'RateOfUseByTechnologyByMode': _times_param(
+        'RateOfActivity', 'InputActivityRatio', 'RateOfUseByTechnologyByMode'),
+    'TotalAnnualTechnologyActivityByMode': _activity_by_mode,
+    'TotalCapacityAnnual': _total_capacity_annual,
+    'TotalTechnologyAnnualActivity': _sum_of(
+        'TotalAnnualTechnologyActivityByMode', 'TotalTechnologyAnnualActivity'),
+    'TotalTechnologyModelPeriodActivity': _sum_of(
+        'TotalTechnologyAnnualActivity', 'TotalTechnologyModelPeriodActivity'),
+    'UseByTechnology': _times_year_split(
+        'RateOfUseByTechnology', 'UseByTechnology'),
+}
+
+def write_results(tables: ResultTables, results_dir) -> None:
+    '''Writes every result of the otoole config. As in otoole, zero values
+    are dropped from calculated results but kept for variables of the
+    solution.'''
+    os.makedirs(results_dir, exist_ok=True)
+    for name, details in tables.config.items():
+        if details['type'] != 'result':
+            continue
+        df = tables.get(name)
+        columns = RESULT_COLUMNS.get(name, details['indices']) + ['VALUE']
+        if name not in tables.variables:
+            df = df.loc[df['VALUE'] != 0]
+        df = df.reindex(columns=columns)
+        path = os.path.join(results_dir, f'{name}.csv')
+        df.to_csv(path, index=None)
+        if data_format() != 'csv':
+            write_table(df, path)
+
+def main(solver, solution, data_dir, results_dir, otoole_config):
+    if solver not in SOLVERS:
+        raise ValueError(f"solver must be one of {SOLVERS}, not '{solver}'")
+    config = read_result_config(otoole_config)
+    years = read_table(os.path.join(data_dir, 'YEAR.csv'))['VALUE'].to_list()
+    variables = read_solution(solver, solution, config, years)
+    write_results(ResultTables(variables, data_dir, config), results_dir)
+    logging.info(f'Result tables written to {results_dir}')
+
+if __name__ == '__main__':
+    if len(sys.argv) != 6:
+        msg = (f'Usage: python {sys.argv[0]} <solver> <solution> <data_dir> '
+               '<results_dir> <otoole_config>')
+        sys.exit(msg)
+    main(*sys.argv[1:])
@@ -0,0 +1,44 @@
+"""Runs all preprocessing stages in a single process.
+
+Stages hand their tables to each other in memory and results/data is
+written once, after the last stage. As in the per-stage rules, a stage whose
+cache key is unchanged restores its tables from results/cache instead of
+running (see cache.py). Each stage script can still be run on its own, e.g.
+python workflow/scripts/osemosys_global/TS_data.py
+"""
+
+import runpy
+from pathlib import Path
+
+import cache
+import data_store
+
+import logging
+logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
+
+# Preprocessing scripts in the order the workflow runs them
+STAGES = [
+    'powerplant_data.py',
+    'TS_data.py',
+    'variablecosts.py',
+    'demand_projection.py',
+    'emissions.py',
+    'max_capacity.py',
+    'file_check.py',
+]
+
+def main():
+    script_dir = Path(__file__).resolve().parent
+    cached = {definition['script']: stage
+              for stage, definition in cache.STAGES.items()}
+    data_store.hold_in_memory()
+    for script in STAGES:
+        if script in cached:
+            cache.run_stage(cached[script], in_process=True)
+        else:
+            logging.info(f'Running {script}')
+            runpy.run_path(str(Path(script_dir, script)), run_name='__main__')
+    data_store.flush()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""Geographic scope of the model.
+
+The rules geographic_filter.py applies to the tables of a scenario are kept
+here, so preprocessing can apply the same rules early. TS_data.py reads only
+the profile columns of countries in scope, and powerplant_data.py builds the
+technology scaffolds of in-scope nodes only. Both use the scope covering
+every scenario (see ConfigFile.get_scope()), so the tables after
+geographic_filter.py are unchanged.
+
+An empty scope is a world run, where nothing is filtered.
+"""
+
+from typing import List, Optional
+
+import pandas as pd
+
+from codes import CodeIndex
+
+# International fuels are kept in every scope
+INTERNATIONAL_FUELS = ['COA', 'COG', 'GAS', 'OIL', 'PET', 'OTH', 'URN']
+
+def _with_int(countries) -> List[str]:
+    '''Scope with 'INT' for international fuels and technologies'''
+    return list(countries) + ['INT']
+
+def _unique_codes(index: CodeIndex) -> pd.Series:
+    '''The unique codes of a column, in the order of the rows of its
+    registry table'''
+    return pd.Series(index.table.index, index=index.table.index)
+
+def technology_mask(techs: pd.Series, countries: List[str],
+                    remove_nodes: Optional[List[str]] = None) -> pd.Series:
+    '''Technologies in scope. Transmission between countries needs both
+    ends in scope.'''
+    scope = _with_int(countries)
+    index = CodeIndex(techs, 'TECHNOLOGY')
+    codes = _unique_codes(index)
+    mask = (codes.str[3:6].isin(scope) |
+            codes.str[6:9].isin(scope) |
+            codes.str[8:11].isin(scope))
+
+    # Filter out all international TRN techs
+    mask &= ~(codes.str.startswith('TRN') &
+              (~(codes.str[3:6].isin(scope)) |
+               ~(codes.str[8:11].isin(scope))))
+
+    if remove_nodes:
+        mask &= ~(codes.str[3:8].isin(remove_nodes) |
+                  codes.str[6:11].isin(remove_nodes) |
+                  codes.str[8:13].isin(remove_nodes))
+    return index.mask(mask)
+
+def storage_mask(storages: pd.Series, countries: List[str],
+                 remove_nodes: Optional[List[str]] = None) -> pd.Series:
+    '''Storages in scope'''
+    scope = _with_int(countries)
+    index = CodeIndex(storages, 'STORAGE')
+    codes = _unique_codes(index)
+    mask = (codes.str[3:6].isin(scope) |
+            codes.str[6:9].isin(scope) |
+            codes.str[8:11].isin(scope))
+
+    if remove_nodes:
+        mask &= ~(codes.str[3:8].isin(remove_nodes) |
+                  codes.str[6:11].isin(remove_nodes) |
+                  codes.str[8:13].isin(remove_nodes))
+    return index.mask(mask)
+
+def fuel_mask(fuels: pd.Series, countries: List[str],
+              remove_nodes: Optional[List[str]] = None) -> pd.Series:
+    '''Fuels in scope, including the international fuels'''
+    scope = _with_int(countries)
+    index = CodeIndex(fuels, 'FUEL')
+    codes = _unique_codes(index)
+    mask = (codes.str[3:6].isin(scope) |
+            codes.str[6:9].isin(scope) |
+            codes.isin(INTERNATIONAL_FUELS))
+
+    if remove_nodes:
+        mask &= ~(codes.str[3:8].isin(remove_nodes) |
+                  codes.str[6:11].isin(remove_nodes))
+    return index.mask(mask)
+
+def filter_table(df: pd.DataFrame, name: str, countries: List[str],
+                 remove_nodes: Optional[List[str]] = None) -> pd.DataFrame:
+    '''Keeps the rows of an otoole table in scope.
+
+    Arguments:
+        df: pd.DataFrame
+            Table to filter
+        name: str
+            Name of the table, e.g. 'FUEL' or 'CapacityFactor'
+        countries: List[str]
+            Countries in scope, empty for a world run
+        remove_nodes: List[str]
+            Nodes to remove, e.g. ['INDNE']
+
+    Returns:
+        pd.DataFrame
+    '''
+    if df.empty or not countries:
+        return df
+    if 'TECHNOLOGY' in df.columns:
+        df = df.loc[technology_mask(df['TECHNOLOGY'], countries, remove_nodes)]
+    if 'STORAGE' in df.columns:
+        df = df.loc[storage_mask(df['STORAGE'], countries, remove_nodes)]
+    if 'FUEL' in df.columns:
+        df = df.loc[fuel_mask(df['FUEL'], countries, remove_nodes)]
+    if name == 'FUEL':
+        df = df.loc[fuel_mask(df['VALUE'], countries, remove_nodes)]
+    if name == 'TECHNOLOGY':
+        df = df.loc[technology_mask(df['VALUE'], countries, remove_nodes)]
+    return df
+
+def node_code(column: str) -> str:
+    '''Node code of a profile column, e.g. 'AS-IND-NE' -> 'INDNE' and
+    'AF-AGO' -> 'AGOXX\''''
+    parts = column.split('-')
+    code = ''.join(parts[1:])
+    return code + 'XX' if len(parts) == 2 else code
+
+def node_fuel(node: str) -> str:
+    '''Electricity demand fuel of a node, e.g. 'AS-IND-NE' -> 'ELCINDNE02',
+    'AF-AGO' -> 'ELCAGOXX02' and the custom node 'INDNE' -> 'ELCINDNE02\''''
+    return 'ELC' + (node_code(node) if '-' in node else node) + '02'
+
+def node_fuels(nodes: pd.Series) -> pd.Series:
+    '''node_fuel() of each node, computed once per unique node'''
+    return nodes.map({node: node_fuel(node) for node in nodes.unique()})
+
+def profile_columns(columns: List[str], countries: List[str],
+                    remove_nodes: Optional[List[str]] = None) -> List[str]:
+    '''Columns of an hourly profile to keep for a scope.
+
+    A node is kept if any of the technologies built for it
+    (PWRxxxAAAXX01) can be in scope. All columns of the node's country are
+    kept with it, so country aggregates are handled as for a world run.
+    Columns that are not nodes (e.g. 'Datetime') are always kept.
+    '''
+    if not countries:
+        return list(columns)
+    scope = set(_with_int(countries))
+    removed = set(remove_nodes or [])
+    nodes = [c for c in columns if '-' in c]
+    kept = {c.split('-')[1] for c in nodes
+            if node_code(c)[:3] in scope or node_code(c)[2:5] in scope}
+    return [c for c in columns if '-' not in c or (
+        c.split('-')[1] in kept and node_code(c) not in removed)]
@@ -1,15 +1,21 @@
 import pandas as pd
 import itertools
 import os
-from pathlib import Path
 from typing import Dict
 # from osemosys_global.configuration import ConfigFile, ConfigPaths
-from configuration import ConfigFile, ConfigPaths
-from osemosys_global.visualisation.utils import transform_ts, powerplant_filter
-from osemosys_global.visualisation.constants import DAYS_PER_MONTH, MONTH_NAMES
-from osemosys_global.utils import apply_timeshift
+from configuration import ConfigPaths, load_config
+from osemosys_global.visualisation.utils import powerplant_filter, transform_ts
+from data_store import read_table, read_tables
+from duals import find_dual_file, load_duals, nodal_prices
+from codes import CodeIndex
+from timeslices import TimesliceMapper
+import logging
+logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
 pd.set_option('mode.chained_assignment', None)
 
+# Columns of SRMC.csv
+SRMC_COLUMNS = ['NODE', 'MONTH', 'HOUR', 'YEAR', 'VALUE']
+
 
 def main():
     '''Creates summaries of results'''
@@ -40,16 +46,17 @@ def main():
     new_capacity_summary_trn()
     investment_summary()
     investment_summary_trn()
-    # marginal_costs()
+    marginal_costs(input_data)
 
 
 def renewables_filter(df):
     '''Function to filter and keep only renewable
     technologies'''
     renewables = ['BIO', 'CSP', 'GEO', 'HYD', 'SPV', 'WAS', 'WAV', 'WON', 'WOF']
-    df = df[~df.TECHNOLOGY.str.contains('TRN')]
-    df = df.loc[(df.TECHNOLOGY.str.startswith('PWR')) &
-                (df.TECHNOLOGY.str[3:6].isin(renewables))
+    techs = CodeIndex(df.TECHNOLOGY, 'TECHNOLOGY')
+    df = df.loc[techs.mask(~techs.table.index.str.contains('TRN') &
+                           (techs.table['TYPE'] == 'PWR') &
+                           (techs.table['CATEGORY'].isin(renewables)))
                 ]
     return df
 
@@ -58,9 +65,10 @@ def fossil_filter(df):
     '''Function to filter and keep only fossil fuel
     technologies'''
     fossil_fuels = ['COA', 'COG', 'OCG', 'CCG', 'PET', 'OIL', 'OTH']
-    df = df[~df.TECHNOLOGY.str.contains('TRN')]
-    df = df.loc[(df.TECHNOLOGY.str.startswith('PWR')) &
-                (df.TECHNOLOGY.str[3:6].isin(fossil_fuels))
+    techs = CodeIndex(df.TECHNOLOGY, 'TECHNOLOGY')
+    df = df.loc[techs.mask(~techs.table.index.str.contains('TRN') &
+                           (techs.table['TYPE'] == 'PWR') &
+                           (techs.table['CATEGORY'].isin(fossil_fuels)))
                 ]
     return df
 
@@ -343,7 +351,7 @@ def generation_by_node_summary(input_data: Dict[str,pd.DataFrame], result_data:
         save_dir: str
             Location to save table
     """
-    config = ConfigFile('config')
+    config = load_config()
 
     # Generation
     df_gen_by_node = result_data["ProductionByTechnology"]
@@ -356,107 +364,17 @@ def generation_by_node_summary(input_data: Dict[str,pd.DataFrame], result_data:
 
     # GET TIMESLICE DEFINITION
 
-    seasons_raw = config.get('seasons')
-    seasonsData = []
-
-    for s, months in seasons_raw.items():
-        for month in months:
-            seasonsData.append([month, s]) 
-    seasons_df = pd.DataFrame(seasonsData, 
-                              columns=['month', 'season'])
-    seasons_df = seasons_df.sort_values(by=['month']).reset_index(drop=True)
-    dayparts_raw = config.get('dayparts')
-    daypartData = []
-    for dp, hr in dayparts_raw.items():
-        daypartData.append([dp, hr[0], hr[1]])
-    dayparts_df = pd.DataFrame(daypartData,
-                               columns=['daypart', 'start_hour', 'end_hour'])
-    timeshift = config.get('timeshift')
-    dayparts_df['start_hour'] = dayparts_df['start_hour'].map(lambda x: apply_timeshift(x, timeshift))
-    dayparts_df['end_hour'] = dayparts_df['end_hour'].map(lambda x: apply_timeshift(x, timeshift))
-
-    month_names = MONTH_NAMES
-    days_per_month = DAYS_PER_MONTH
-
-    seasons_df['month_name'] = seasons_df['month'].map(month_names)
-    seasons_df['days'] = seasons_df['month_name'].map(days_per_month)
-    seasons_df_grouped = seasons_df.groupby(['season'],
-                                            as_index=False)['days'].sum()
-    days_dict = dict(zip(list(seasons_df_grouped['season']),
-                         list(seasons_df_grouped['days'])
-                         )
-                     )
-    seasons_df['days'] = seasons_df['season'].map(days_dict)
-
-    years = config.get_years()
-
-    seasons_dict = dict(zip(list(seasons_df['month']),
-                            list(seasons_df['season'])
-                            )
-                        )
-
-    dayparts_dict = {i: [j, k]
-                     for i, j, k
-                     in zip(list(dayparts_df['daypart']),
-                            list(dayparts_df['start_hour']),
-                            list(dayparts_df['end_hour'])
-                            )
-                     }
-
-    hours_dict = {i: abs(k-j)
-                  for i, j, k
-                  in zip(list(dayparts_df['daypart']),
-                         list(dayparts_df['start_hour']),
-                         list(dayparts_df['end_hour'])
-                         )
-                  }
-
-    months = list(seasons_dict)
-    hours = list(range(1, 25))
+    mapper = TimesliceMapper.from_data(input_data, config)
+    years = list(config.years)
+    labels = powerplant_filter(pd.DataFrame({'TECHNOLOGY': generation}))['LABEL'].unique()
 
     # APPLY TRANSFORMATION
-    df_ts_template = pd.DataFrame(list(itertools.product(generation,
-                                                         months,
-                                                         hours,
-                                                         years)
-                                       ),
-                                  columns=['TECHNOLOGY',
-                                           'MONTH',
-                                           'HOUR',
-                                           'YEAR']
-                                  )
 
-    df_ts_template = df_ts_template.sort_values(by=['TECHNOLOGY', 'YEAR'])
-    df_ts_template['SEASON'] = df_ts_template['MONTH'].map(seasons_dict)
-    df_ts_template['DAYS'] = df_ts_template['SEASON'].map(days_dict)
-    df_ts_template['YEAR'] = df_ts_template['YEAR'].astype(int)
-    df_ts_template = powerplant_filter(df_ts_template)
-
-    for daypart in dayparts_dict:
-        if dayparts_dict[daypart][0] > dayparts_dict[daypart][1]: # loops over 24hrs
-            df_ts_template.loc[(df_ts_template['HOUR'] >= dayparts_dict[daypart][0]) |
-                          (df_ts_template['HOUR'] < dayparts_dict[daypart][1]),
-                          'DAYPART'] = daypart
-        else:
-            df_ts_template.loc[(df_ts_template['HOUR'] >= dayparts_dict[daypart][0]) &
-                               (df_ts_template['HOUR'] < dayparts_dict[daypart][1]),
-                               'DAYPART'] = daypart
-
-    df_ts_template = df_ts_template.drop_duplicates()
-
-    df_gen_by_node['SEASON'] = df_gen_by_node['TIMESLICE'].str[0:2]
-    df_gen_by_node['DAYPART'] = df_gen_by_node['TIMESLICE'].str[2:]
     df_gen_by_node['YEAR'] = df_gen_by_node['YEAR'].astype(int)
-    df_gen_by_node.drop(['REGION', 'TIMESLICE'],
-                        axis=1,
-                        inplace=True)
-
-    df_gen_by_node = pd.merge(df_gen_by_node,
-                              df_ts_template,
-                              how='left',
-                              on=['LABEL', 'SEASON', 'DAYPART', 'YEAR']).dropna()
-    df_gen_by_node['HOUR_COUNT'] = df_gen_by_node['DAYPART'].map(hours_dict)
-    df_gen_by_node['VALUE'] = (df_gen_by_node['VALUE'].mul(1e6))/(df_gen_by_node['DAYS']*df_gen_by_node['HOUR_COUNT'].mul(3600))
+    df_gen_by_node = df_gen_by_node.loc[df_gen_by_node['LABEL'].isin(labels) &
+                                        df_gen_by_node['YEAR'].isin(years)]
+    df_gen_by_node = df_gen_by_node.drop(['REGION'], axis=1)
+    df_gen_by_node = mapper.to_power(mapper.expand(df_gen_by_node))
 
     df_gen_by_node = df_gen_by_node.pivot_table(index=['MONTH', 'HOUR', 'YEAR', 'NODE'],
                                               columns='LABEL',
@@ -464,7 +382,7 @@ def generation_by_node_summary(input_data: Dict[str,pd.DataFrame], result_data:
                                               aggfunc='sum').reset_index().fillna(0)
 
     df_gen_by_node['MONTH'] = pd.Categorical(df_gen_by_node['MONTH'],
-                                            categories=months,
+                                            categories=mapper.months,
                                             ordered=True)
     df_gen_by_node = df_gen_by_node.sort_values(by=['MONTH', 'HOUR'])
     '''
@@ -492,7 +410,7 @@ def trade_flows(input_data: Dict[str,pd.DataFrame], result_data: Dict[str,pd.Dat
             Location to save table
     """
 
-    config = ConfigFile('config')
+    config = load_config()
 
     # GET TECHS TO PLOT
 
@@ -503,111 +421,18 @@ def trade_flows(input_data: Dict[str,pd.DataFrame], result_data: Dict[str,pd.Dat
     if len(interconnections) > 0:
         # GET TIMESLICE DEFINITION
 
-        seasons_raw = config.get('seasons')
-        seasonsData = []
-
-        for s, months in seasons_raw.items():
-            for month in months:
-                seasonsData.append([month, s]) 
-        seasons_df = pd.DataFrame(seasonsData, 
-                                columns=['month', 'season'])
-        seasons_df = seasons_df.sort_values(by=['month']).reset_index(drop=True)
-        dayparts_raw = config.get('dayparts')
-        daypartData = []
-        for dp, hr in dayparts_raw.items():
-            daypartData.append([dp, hr[0], hr[1]])
-        dayparts_df = pd.DataFrame(daypartData,
-                                columns=['daypart', 'start_hour', 'end_hour'])
-        timeshift = config.get('timeshift')
-        dayparts_df['start_hour'] = dayparts_df['start_hour'].map(lambda x: apply_timeshift(x, timeshift))
-        dayparts_df['end_hour'] = dayparts_df['end_hour'].map(lambda x: apply_timeshift(x, timeshift))
-
-        month_names = MONTH_NAMES
-        days_per_month = DAYS_PER_MONTH
-
-        seasons_df['month_name'] = seasons_df['month'].map(month_names)
-        seasons_df['days'] = seasons_df['month_name'].map(days_per_month)
-        seasons_df_grouped = seasons_df.groupby(['season'],
-                                                as_index=False)['days'].sum()
-        days_dict = dict(zip(list(seasons_df_grouped['season']),
-                            list(seasons_df_grouped['days'])
-                            )
-                        )
-        seasons_df['days'] = seasons_df['season'].map(days_dict)
-
-        years = config.get_years()
-
-        seasons_dict = dict(zip(list(seasons_df['month']),
-                                list(seasons_df['season'])
-                                )
-                            )
-
-        dayparts_dict = {i: [j, k]
-                        for i, j, k
-                        in zip(list(dayparts_df['daypart']),
-                                list(dayparts_df['start_hour']),
-                                list(dayparts_df['end_hour'])
-                                )
-                        }
-
-        hours_dict = {i: abs(k-j)
-                    for i, j, k
-                    in zip(list(dayparts_df['daypart']),
-                            list(dayparts_df['start_hour']),
-                            list(dayparts_df['end_hour'])
-                            )
-                    }
-
-        months = list(seasons_dict)
-        hours = list(range(1, 25))
-
-        # APPLY TRANSFORMATION
-
-        df_ts_template = pd.DataFrame(list(itertools.product(interconnections,
-                                                            months,
-                                                            hours,
-                                                            years)
-                                        ),
-                                    columns=['TECHNOLOGY',
-                                            'MONTH',
-                                            'HOUR',
-                                            'YEAR']
-                                    )
-
-        df_ts_template = df_ts_template.sort_values(by=['TECHNOLOGY', 'YEAR'])
-        df_ts_template['SEASON'] = df_ts_template['MONTH'].map(seasons_dict)
-        df_ts_template['DAYS'] = df_ts_template['SEASON'].map(days_dict)
-        df_ts_template['YEAR'] = df_ts_template['YEAR'].astype(int)
-
-        for daypart in dayparts_dict:
-            if dayparts_dict[daypart][0] > dayparts_dict[daypart][1]: # loops over 24hrs
-                df_ts_template.loc[(df_ts_template['HOUR'] >= dayparts_dict[daypart][0]) |
-                            (df_ts_template['HOUR'] < dayparts_dict[daypart][1]),
-                            'DAYPART'] = daypart
-            else:
-                df_ts_template.loc[(df_ts_template['HOUR'] >= dayparts_dict[daypart][0]) &
-                        (df_ts_template['HOUR'] < dayparts_dict[daypart][1]),
-                        'DAYPART'] = daypart
-
-        df_ts_template = df_ts_template.drop_duplicates()
+        mapper = TimesliceMapper.from_data(input_data, config)
+        years = list(config.years)
+        months = mapper.months
 
         # Trade flows
         df = result_data["TotalAnnualTechnologyActivityByMode"]
 
-        df['SEASON'] = df['TIMESLICE'].str[0:2]
-        df['DAYPART'] = df['TIMESLICE'].str[2:]
         df['YEAR'] = df['YEAR'].astype(int)
-        df.drop(['REGION', 'TIMESLICE'],
-                axis=1,
-                inplace=True)
-
-        df = pd.merge(df,
-                    df_ts_template,
-                    how='left',
-                    on=['TECHNOLOGY', 'SEASON', 'DAYPART', 'YEAR']).dropna()
-
-        df['HOUR_COUNT'] = df['DAYPART'].map(hours_dict)
-        df['VALUE'] = (df['VALUE'].mul(1e6))/(df['DAYS']*df['HOUR_COUNT'].mul(3600))
+        df = df.loc[df['TECHNOLOGY'].isin(interconnections) &
+                    df['YEAR'].isin(years)]
+        df = df.drop(['REGION'], axis=1)
+        df = mapper.to_power(mapper.expand(df)).dropna()
 
         df = df[['YEAR',
                 'MONTH',
@@ -667,7 +492,7 @@ def trade_flows(input_data: Dict[str,pd.DataFrame], result_data: Dict[str,pd.Dat
 def system_cost_by_node():
     # CONFIGURATION PARAMETERS
     config_paths = ConfigPaths()
-    config = ConfigFile('config')
+    config = load_config()
     scenario_results_dir = config_paths.scenario_results_dir
     #scenario_results_dir = '/Users/adminuser/Documents/repositories/feo-esmod-osemosys/workflow/scripts/osemosys_global/../../../results/Indonesia_BA/results'
     scenario_result_summaries_dir = config_paths.scenario_result_summaries_dir
@@ -679,8 +504,8 @@ def system_cost_by_node():
     penalty = config.get('emission_penalty')
     
     '''
-    df = pd.read_csv(os.path.join(scenario_data_dir,
-                                  'TECHNOLOGY.csv'))
+    df = read_table(os.path.join(scenario_data_dir,
+                                 'TECHNOLOGY.csv'))
     df.rename(columns = {'VALUE': 'TECHNOLOGY'},
               inplace=True)
     
@@ -706,9 +531,9 @@ def system_cost_by_node():
         df_sto = pd.read_csv(os.path.join(scenario_results_dir,
                                           'NewStorageCapacity.csv'
                                           ))
-        df_sto_cost = pd.read_csv(os.path.join(scenario_data_dir,
-                                               'CapitalCostStorage.csv'
-                                               ))
+        df_sto_cost = read_table(os.path.join(scenario_data_dir,
+                                              'CapitalCostStorage.csv'
+                                              ))
         df_sto_cost.rename(columns={'VALUE':'COST'},
                         inplace=True)
         
@@ -738,9 +563,9 @@ def system_cost_by_node():
     df_emi = pd.read_csv(os.path.join(scenario_results_dir,
                                       'AnnualTechnologyEmission.csv'
                                       ))
-    df_pen = pd.read_csv(os.path.join(scenario_data_dir,
-                                      'EmissionsPenalty.csv'
-                                      ))
+    df_pen = read_table(os.path.join(scenario_data_dir,
+                                     'EmissionsPenalty.csv'
+                                     ))
     df_pen.rename(columns={'VALUE': 'PENALTY'},
                   inplace=True)
     
@@ -787,9 +612,9 @@ def system_cost_by_node():
     df_use['VALUE'] = df_use['VALUE'].round(4)
     
     # Get InputActivityRatios to calculate use by mode of operation
-    df_iar = pd.read_csv(os.path.join(scenario_data_dir,
-                                      'InputActivityRatio.csv'
-                                      ))
+    df_iar = read_table(os.path.join(scenario_data_dir,
+                                     'InputActivityRatio.csv'
+                                     ))
     df_iar = df_iar[['TECHNOLOGY','FUEL','MODE_OF_OPERATION','YEAR','VALUE']]
     df_iar.rename(columns={'VALUE':'IAR'},
                   inplace=True)
@@ -801,18 +626,18 @@ def system_cost_by_node():
     df_use['USE'] = df_use['VALUE']*df_use['IAR'] 
     
     # Get OutputActivityRatio to get fuel costs
-    df_oar = pd.read_csv(os.path.join(scenario_data_dir,
-                                      'OutputActivityRatio.csv'
-                                      ))
+    df_oar = read_table(os.path.join(scenario_data_dir,
+                                     'OutputActivityRatio.csv'
+                                     ))
     df_oar = df_oar[['TECHNOLOGY',
                      'FUEL',
                      'MODE_OF_OPERATION',
                      'YEAR']]
     
     # Get VAR for each technology
-    df_var = pd.read_csv(os.path.join(scenario_data_dir,
-                                      'VariableCost.csv'
-                                      ))
+    df_var = read_table(os.path.join(scenario_data_dir,
+                                     'VariableCost.csv'
+                                     ))
     df_var = df_var[['TECHNOLOGY',
                      'MODE_OF_OPERATION',
                      'YEAR',
@@ -822,9 +647,9 @@ def system_cost_by_node():
                   inplace=True)
     
     # Get EAR for each technology
-    df_ear = pd.read_csv(os.path.join(scenario_data_dir,
-                                      'EmissionActivityRatio.csv'
-                                      ))
+    df_ear = read_table(os.path.join(scenario_data_dir,
+                                     'EmissionActivityRatio.csv'
+                                     ))
     df_ear = df_ear[['TECHNOLOGY',
                      'MODE_OF_OPERATION',
                      'YEAR',
@@ -922,108 +747,73 @@ def system_cost_by_node():
                      )
 
 
-def marginal_costs():
+def marginal_costs(input_data: Dict[str,pd.DataFrame]):
     # CONFIGURATION PARAMETERS
     config_paths = ConfigPaths()
-    config = ConfigFile('config')
-    scenario_results_dir = config_paths.scenario_results_dir
-    scenario = config.get('scenario')
+    config = load_config()
+    scenario = config_paths.get_scenario_name()
     scenario_dir = config_paths.scenario_dir
-    #scenario = 'ASEAN_v4_APG_LC'
-    #scenario_results_dir = '/Users/adminuser/Documents/repositories/feo-esmod-osemosys/results/' + scenario
     scenario_result_summaries_dir = config_paths.scenario_result_summaries_dir
-    
-    
-    duals = []
-    
-    with open(os.path.join(scenario_dir,
-                           scenario + '.attr')) as sol_file:
-        for line in sol_file:
-            if line.startswith('EBa11'):
-                ts = line.split(' ')[0].split(',')[1]
-                fuel = line.split(' ')[0].split(',')[2]
-                year = int(line.split(' ')[0].split(',')[3].split(')')[0])
-                value = float(line.split(' ')[1])
-                if fuel.startswith('ELC'):
-                    if fuel.endswith('02'):
-                        duals.append([ts, fuel, year, round(value, 2)])
-    
-    df_duals = pd.DataFrame(duals,
-                            columns=['TS',
-                                     'FUEL',
-                                     'YEAR',
-                                     'VALUE'])
-    df_duals['SEASON'] = df_duals['TS'].str[:2]
-    df_duals['DAYPART'] = df_duals['TS'].str[2:]
-    months = list(range(1, 13))
-    hours = list(range(1, 25))
-    
-    # Create DataFrame scaffold for dual values
-    df_duals_final = pd.DataFrame(list(itertools.product(df_duals['FUEL'].unique(),
-                                                         months,
-                                                         hours,
-                                                         df_duals['YEAR'].unique())
-                                       ),
-                                       columns=['FUEL',
-                                                'MONTH',
-                                                'HOUR',
-                                                'YEAR']
-                                  )
-    # Create dictionaries of seasons and dayparts
-    seasons_raw = config.get('seasons')
-    seasons_dict = {}
 
-    for s, months in seasons_raw.items():
-        for month in months:
-            seasons_dict[month] = s
-    
-    dayparts_raw = config.get('dayparts')
+    srmc_file = os.path.join(scenario_result_summaries_dir, 'SRMC.csv')
+
+    # SRMC.csv is a rule output, so it is written without rows if the
+    # solver wrote no dual values
+    dual_file = find_dual_file(scenario_dir, scenario, config.get('solver'))
+    if dual_file is None:
+        logging.info('No dual values written by the solver, SRMC.csv is empty')
+        return pd.DataFrame(columns=SRMC_COLUMNS).to_csv(srmc_file, index=None)
+
+    duals = load_duals(dual_file, os.path.join(scenario_dir, 'duals.csv'))
+    df_duals = nodal_prices(duals)
+    # Python's round, as Series.round rounds some values the other way,
+    # e.g. 12.345 to 12.34
+    df_duals['VALUE'] = df_duals['VALUE'].map(lambda x: round(x, 2))
+    mapper = TimesliceMapper.from_data(input_data, config)
+    df_duals = df_duals.merge(
+        mapper.timeslice_table()[['TIMESLICE', 'SEASON', 'DAYPART']],
+        on='TIMESLICE')
+
+    # Season and daypart of each hour and month
+    seasons_dict = {month: mapper.seasons[mapper.month_season[month]]
+                    for month in mapper.months}
+
     dayparts_dict = {}
-    for dp, hours in dayparts_raw.items():
+    for dp, hours in config.get('dayparts').items():
         for hour in range(hours[0], hours[1]):
             dayparts_dict[hour+1] = dp
 
-    # Create SEASON and DAYPART columns for each hour and month
-    df_duals_final['SEASON'] = df_duals_final['MONTH'].map(seasons_dict)
-    df_duals_final['DAYPART'] = df_duals_final['HOUR'].map(dayparts_dict)
-    
-    df_duals_final = pd.merge(df_duals_final, df_duals,
+    df_hours = pd.DataFrame(list(itertools.product(range(1, 13), range(1, 25))),
+                            columns=['MONTH', 'HOUR'])
+    df_hours['SEASON'] = df_hours['MONTH'].map(seasons_dict)
+    df_hours['DAYPART'] = df_hours['HOUR'].map(dayparts_dict)
+
+    # Hourly dual values of each fuel and year
+    df_duals_final = df_hours.merge(
+        df_duals[['FUEL', 'YEAR']].drop_duplicates(), how='cross')
+    df_duals_final = pd.merge(df_duals_final,
+                              df_duals[['FUEL', 'SEASON', 'DAYPART', 'YEAR', 'VALUE']],
                               how='left',
                               on=['FUEL', 'SEASON', 'DAYPART', 'YEAR'])
-    
+
     df_duals_final['NODE'] = df_duals_final['FUEL'].str[3:8]
-    
+
     # Filter columns for final DataFrame
-    df_duals_final = df_duals_final[['NODE',
-                                     'MONTH',
-                                     'HOUR',
-                                     'YEAR',
-                                     'VALUE']]
-    
+    df_duals_final = df_duals_final[SRMC_COLUMNS]
+
     # Convert $mn/PJ to $/MWh i.e. 3.6
     df_duals_final['VALUE'] = df_duals_final['VALUE'].mul(3.6)
-    
-    # Apply timeshift
-    timeshift = config.get('timeshift')
-    #df_duals_final['HOUR'] = df_duals_final['HOUR'].map(lambda x: apply_timeshift(x, timeshift))    
-    
-    #print(df_duals_final)
 
-    return df_duals_final.to_csv(os.path.join(scenario_result_summaries_dir,
-                                              'SRMC.csv'),
-                                 index=None)
+    return df_duals_final.to_csv(srmc_file, index=None)
 
 
 def read_data(dirpath: str) -> Dict[str,pd.DataFrame]:
-    """Reads in result CSVs
+    """Reads in result CSVs, or data tables in the configured data_format
+    (see data_store.read_tables)
     
     Replace with ReadCSV in otoole v1.0
     """
-    data = {}
-    files = [Path(x) for x in Path(dirpath).iterdir()]
-    for f in files:
-        data[f.stem] = pd.read_csv(f)
-    return data
+    return read_tables(dirpath)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,278 @@
+"""Mapping between hours of the year and model timeslices.
+
+The seasons, dayparts, daytype and timeshift in the config file define which
+timeslice each hour of the year belongs to. With representative days (see
+representative_days.py), each season is instead a cluster of days of the
+year. TimesliceMapper builds this mapping once as int16 lookup arrays over
+the hours of the profile year, and uses it to
+
+    - assign timeslices to hourly data (TS_data.py)
+    - aggregate hourly data to timeslices
+    - expand timesliced results to the hours of a representative day in
+      each month (summaries and plots)
+"""
+
+import calendar
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+if __package__:
+    # imported as osemosys_global.timeslices, e.g. by the dashboard
+    from .configuration import Config, PROFILE_YEAR, load_config
+    from .utils import apply_timeshift
+else:
+    from configuration import Config, PROFILE_YEAR, load_config
+    from utils import apply_timeshift
+
+class TimesliceMapper:
+    '''Lookup of the timeslice, season, daypart and daytype of each hour
+
+    Codes index the label lists (e.g. self.seasons[self.season[h]]), with -1
+    for hours outside of any season or daypart.
+
+    Seasons are groups of months, or with day_season the season code of each
+    day of the year, as for representative days. Months are then mapped to
+    the season most of their days belong to.
+
+    Example:
+        mapper = TimesliceMapper.from_config()
+        mapper.assign(demand_df, 'Datetime')
+        mapper.expand(result_df)
+    '''
+
+    def __init__(self, seasons: Dict[str, List[int]],
+                 dayparts: Dict[str, List[int]], timeshift: int = 0,
+                 daytype: bool = False, year: int = PROFILE_YEAR,
+                 day_season: Optional[np.ndarray] = None):
+        self.seasons = list(seasons)
+        self.dayparts = list(dayparts)
+        self.daytypes = ['WD', 'WE'] if daytype else ['']
+        self.timeshift = timeshift or 0
+        self.timeslices = [s + d + dp for s in self.seasons
+                           for d in self.daytypes for dp in self.dayparts]
+
+        n_hours = (366 if calendar.isleap(year) else 365) * 24
+        hours = pd.date_range(f'{year}-01-01', periods=n_hours, freq='H')
+
+        # season of each month, indexed 1-12
+        self.month_season = np.full(13, -1, dtype=np.int16)
+        if day_season is None:
+            for code, months in enumerate(seasons.values()):
+                self.month_season[list(months)] = code
+            self.season = self.month_season[hours.month.values]
+        else:
+            # the last day is repeated for leap years
+            day_season = np.asarray(day_season, dtype=np.int16)[:n_hours // 24]
+            day_season = np.pad(day_season,
+                                (0, n_hours // 24 - len(day_season)),
+                                mode='edge')
+            self.season = day_season[hours.dayofyear.values - 1]
+            days = hours[::24]
+            for month in range(1, 13):
+                self.month_season[month] = np.bincount(
+                    day_season[days.month == month]).argmax()
+
+        # number of days in each season
+        self.season_days = np.bincount(self.season[self.season >= 0],
+                                       minlength=len(self.seasons)) // 24
+
+        # start and end hours of the dayparts after the timeshift
+        self.daypart_bounds = np.array(
+            [[self.shift(start), self.shift(end)]
+             for start, end in dayparts.values()], dtype=np.int16)
+
+        self.daypart = self.dayparts_of(self.shift(hours.hour.values))
+        self.daytype = ((hours.dayofweek.values >= 5).astype(np.int16)
+                        if daytype else np.zeros(len(hours), dtype=np.int16))
+        self.timeslice = self._timeslice_codes(
+            self.season, self.daytype, self.daypart)
+
+    @classmethod
+    def from_config(cls, config: Config = None,
+                    year: int = PROFILE_YEAR) -> 'TimesliceMapper':
+        '''Builds the mapper of a config, by default the active config'''
+        config = config or load_config()
+        key = (config, year)
+        if key not in _MAPPERS:
+            _MAPPERS[key] = cls(config['seasons'], config['dayparts'],
+                                config.get('timeshift'), config.get('daytype'),
+                                year)
+        return _MAPPERS[key]
+
+    @classmethod
+    def from_days(cls, days: pd.DataFrame, dayparts: Dict[str, List[int]],
+                  timeshift: int = 0,
+                  year: int = PROFILE_YEAR) -> 'TimesliceMapper':
+        '''Builds the mapper of representative days.
+
+        Representative days have no daytype, as clusters mix weekdays and
+        weekends. configuration.validate() rejects 'representative_days'
+        together with 'daytype'.
+
+        Arguments:
+            days: pd.DataFrame
+                SEASON of each DAY (1-366) of the profile year, as written to
+                RepresentativeDays.csv by TS_data.py
+            dayparts: Dict[str, List[int]]
+                Dayparts of the config file
+            timeshift: int
+                Timeshift of the config file
+
+        Returns:
+            TimesliceMapper
+        '''
+        days = days.sort_values('DAY')
+        seasons = sorted(days['SEASON'].unique(), key=lambda s: int(s[1:]))
+        codes = {season: code for code, season in enumerate(seasons)}
+        return cls(seasons, dayparts, timeshift, False, year,
+                   day_season=days['SEASON'].map(codes).values)
+
+    @classmethod
+    def from_data(cls, data: Dict[str, pd.DataFrame], config: Config = None,
+                  year: int = PROFILE_YEAR) -> 'TimesliceMapper':
+        '''Builds the mapper a scenario was built with.
+
+        Arguments:
+            data: Dict[str, pd.DataFrame]
+                Input datastore, with the RepresentativeDays written by
+                TS_data.py
+            config: Config
+                Config the scenario was built with, by default the active
+                config
+
+        Returns:
+            TimesliceMapper
+        '''
+        config = config or load_config()
+        days = data.get('RepresentativeDays')
+        if days is not None and not days.empty:
+            return cls.from_days(days, config.get('dayparts'),
+                                 config.get('timeshift'), year)
+        return cls(config.get('seasons'), config.get('dayparts'),
+                   config.get('timeshift'), config.get('daytype'), year)
+
+    @property
+    def months(self) -> List[int]:
+        '''Months that belong to a season, in calendar order'''
+        return [m for m in range(1, 13) if self.month_season[m] >= 0]
+
+    def shift(self, hours):
+        '''Applies the timeshift to hours of the day'''
+        return apply_timeshift(np.asarray(hours), self.timeshift)
+
+    def dayparts_of(self, hours) -> np.ndarray:
+        '''Daypart codes of (shifted) hours of the day. Later dayparts take
+        precedence where dayparts overlap.'''
+        hours = np.asarray(hours)
+        codes = np.full(hours.shape, -1, dtype=np.int16)
+        for code, (start, end) in enumerate(self.daypart_bounds):
+            if start > end:  # loops over 24hrs
+                codes[(hours >= start) | (hours < end)] = code
+            else:
+                codes[(hours >= start) & (hours < end)] = code
+        return codes
+
+    def _timeslice_codes(self, season, daytype, daypart) -> np.ndarray:
+        codes = ((season * len(self.daytypes) + daytype) * len(self.dayparts)
+                 + daypart).astype(np.int16)
+        codes[(season < 0) | (daypart < 0)] = -1
+        return codes
+
+    @staticmethod
+    def hour_of_year(datetimes: pd.Series) -> np.ndarray:
+        '''Position of each datetime in the lookup arrays'''
+        hours = np.asarray(pd.to_datetime(datetimes), dtype='datetime64[h]')
+        return (hours - hours.astype('datetime64[Y]')).astype(np.int64)
+
+    def timeslice_table(self) -> pd.DataFrame:
+        '''SEASON, DAYTYPE and DAYPART labels of each TIMESLICE, with their
+        set numbers (1, 2, ...) in SEASON_CODE, DAYTYPE_CODE and DAYPART_CODE'''
+        rows = [(s + d + dp, s, d, dp, i + 1, j + 1, k + 1)
+                for i, s in enumerate(self.seasons)
+                for j, d in enumerate(self.daytypes)
+                for k, dp in enumerate(self.dayparts)]
+        return pd.DataFrame(rows, columns=[
+            'TIMESLICE', 'SEASON', 'DAYTYPE', 'DAYPART',
+            'SEASON_CODE', 'DAYTYPE_CODE', 'DAYPART_CODE'])
+
+    def labels(self, codes, labels: List[str]) -> np.ndarray:
+        '''Label of each code, None for -1'''
+        labels = np.array(list(labels) + [None], dtype=object)
+        return labels[np.asarray(codes)]
+
+    def assign(self, df: pd.DataFrame, datetime_col: str = 'Datetime',
+               columns: bool = False) -> pd.DataFrame:
+        '''Adds a TIMESLICE column to hourly data.
+
+        Arguments:
+            df: pd.DataFrame
+                Hourly data of the profile year
+            datetime_col: str
+                Column holding the datetimes
+            columns: bool
+                Also add SEASON, DAYTYPE and DAYPART columns
+
+        Returns:
+            pd.DataFrame
+        '''
+        hour = self.hour_of_year(df[datetime_col])
+        df['TIMESLICE'] = self.labels(self.timeslice[hour], self.timeslices)
+        if columns:
+            df['SEASON'] = self.labels(self.season[hour], self.seasons)
+            df['DAYTYPE'] = self.labels(self.daytype[hour], self.daytypes)
+            df['DAYPART'] = self.labels(self.daypart[hour], self.dayparts)
+        return df
+
+    def aggregate(self, df: pd.DataFrame, datetime_col: str = 'Datetime',
+                  how: str = 'mean') -> pd.DataFrame:
+        '''Aggregates hourly data to timeslices, with a row per timeslice'''
+        hour = self.hour_of_year(df[datetime_col])
+        values = df.drop(columns=datetime_col)
+        return values.groupby(
+            self.labels(self.timeslice[hour], self.timeslices)).agg(how)
+
+    def month_hours(self) -> pd.DataFrame:
+        '''Season and daypart of each hour (1-24) of a representative day in
+        each month, with the DAYS in the season and the HOUR_COUNT of the
+        daypart. Hours are compared to the shifted dayparts as in the result
+        summaries.'''
+        months = np.repeat(np.arange(1, 13), 24)
+        hours = np.tile(np.arange(1, 25), 12)
+        season = self.month_season[months]
+        daypart = self.dayparts_of(hours)
+
+        days = dict(zip(self.seasons, self.season_days))
+        hour_count = np.abs(self.daypart_bounds[:, 1]
+                            - self.daypart_bounds[:, 0])
+
+        df = pd.DataFrame({
+            'MONTH': months,
+            'HOUR': hours,
+            'SEASON': self.labels(season, self.seasons),
+            'DAYPART': self.labels(daypart, self.dayparts),
+        })
+        df['DAYS'] = df['SEASON'].map(days)
+        df['HOUR_COUNT'] = np.append(hour_count, -1)[daypart]
+        return df.dropna().reset_index(drop=True)
+
+    def expand(self, df: pd.DataFrame,
+               timeslice_col: str = 'TIMESLICE') -> pd.DataFrame:
+        '''Expands timesliced data to the hours of a representative day in
+        each month. Rows get MONTH, HOUR, SEASON, DAYPART, DAYS and
+        HOUR_COUNT columns in place of the timeslice.'''
+        timeslices = self.timeslice_table()[['TIMESLICE', 'SEASON', 'DAYPART']]
+        df = df.merge(timeslices.rename(columns={'TIMESLICE': timeslice_col}),
+                      on=timeslice_col)
+        df = df.drop(columns=timeslice_col)
+        return df.merge(self.month_hours(), on=['SEASON', 'DAYPART'])
+
+    def to_power(self, df: pd.DataFrame) -> pd.DataFrame:
+        '''Converts expanded energy values in PJ to average power in MW'''
+        df['VALUE'] = (df['VALUE'].mul(1e6)) / (df['DAYS']
+                                                * df['HOUR_COUNT'].mul(3600))
+        return df
+
+# Mappers built per process as {(config, year): TimesliceMapper}
+_MAPPERS: Dict = {}
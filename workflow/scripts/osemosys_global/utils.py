@@ -1,9 +1,15 @@
 """Utility Functions"""
 
+import numpy as np
 import pandas as pd
-from typing import Dict, Optional
-from pathlib import Path
-from osemosys_global.constants import SET_DTYPES
+from typing import Dict, Iterable, Optional
+if __package__:
+    # imported as osemosys_global.utils, e.g. by the dashboard
+    from .constants import SET_DTYPES
+    from .data_store import read_tables
+else:
+    from constants import SET_DTYPES
+    from data_store import read_tables
 
 import logging 
 logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
@@ -12,27 +18,18 @@ def apply_timeshift(x, timeshift):
     """Applies timeshift to organize dayparts.
     
     Arguments:
-        x = Value between 0-24
+        x = Value between 0-24, or an array of such values
         timeshift = value offset from UTC (-11 -> +12)"""
 
-    x += timeshift
-    if x > 23:
-        return x - 24
-    elif x < 0:
-        return x + 24
-    else:
-        return x
+    return (x + timeshift) % 24
     
 def read_csv(dirpath: str) -> Dict[str,pd.DataFrame]:
-    """Reads in CSVs folder
+    """Reads in the tables of a folder, data tables in the configured
+    data_format (see data_store.read_tables)
     
     Replace with ReadCSV.read() from otoole v1.0
     """
-    data = {}
-    files = [Path(x) for x in Path(dirpath).iterdir()]
-    for f in files:
-        data[f.stem] = pd.read_csv(f)
-    return data
+    return read_tables(dirpath)
 
 def filter_transmission_techs(df: pd.DataFrame, column_name: str = "TECHNOLOGY") -> pd.DataFrame:
     """Filters out only transmission technologies
@@ -48,6 +45,53 @@ def filter_transmission_techs(df: pd.DataFrame, column_name: str = "TECHNOLOGY")
     """
     return df.loc[df[column_name].str.startswith("TRN")].reset_index(drop=True)
 
+def format_transmission_name(df):
+    '''Formats PLEXOS transmission names into OSeMOSYS Global names.
+
+    Args:
+        :param df: Pandas DataFrame with columns 'From' and 'To' describing the 
+               transmission from and to contries. ie. 
+    
+    Returns: 
+        :param df: Same as df_in, except the 'From' and 'To' columns are replaced 
+            with a single 'TECHNOLOGY' column holding OSeMOSYS Global 
+            naming conventions 
+
+    Example:
+        df = pd.DataFrame(
+            [[AF-COD, AF-COG, 0.001],
+            [EU-AUT, EU-SVK, 0.004],
+            [AS-LBN, AS-SYR, 0.006]], 
+            columns = ['From', 'To', 'Losses']
+        )
+        pd.DataFrame(
+            [[0.001,TRNCODXXCOGXX],
+            [0.004,TRNAUTXXSVKXX],
+            [0.006,TRNLBNXXSYRXX]] 
+            columns = ['Losses','TECHNOLOGY'])'''
+
+    # If from column has length 6 then it's the last three chars plus XX
+    df.loc[df["From"].str.len() == 6, "From"] = (df["From"].str[3:6] + "XX")
+
+    # If from column has length 9 then it's the 3:6 and 7:9 three chars plus XX
+    df.loc[df["From"].str.len() == 9, "From"] = (
+        df["From"].str[3:6] + df["From"].str[7:9])
+
+    # If to column has length 6 then it's the last three chars plus XX
+    df.loc[df["To"].str.len() == 6, "To"] = (df["To"].str[3:6] + "XX")
+
+    # If to column has length 9 then it's the 3:6 and 7:9 three chars plus XX
+    df.loc[df["To"].str.len() == 9, "To"] = (
+        df["To"].str[3:6] + df["To"].str[7:9])
+
+    # Combine From and To columns.
+    df["TECHNOLOGY"] = ("TRN" + df["From"] + df["To"])
+
+    # Drop to and from columns
+    df = df.drop(["From", "To"], axis=1)
+
+    return df
+
 def apply_dtypes(df:pd.DataFrame, name: Optional[str]) -> pd.DataFrame:
     """Sets datatypes on dataframe"""
     
@@ -60,3 +104,45 @@ def apply_dtypes(df:pd.DataFrame, name: Optional[str]) -> pd.DataFrame:
             else:
                 logging.info(f"Can not set dtype on {col}")
     return df
+
+def cross_join(df: Optional[pd.DataFrame] = None,
+               **columns: Iterable) -> pd.DataFrame:
+    """Expands rows to every combination of column values.
+
+    The result is ordered as itertools.product, with the rows of df varying
+    slowest, and is built with one repeat or tile per column instead of
+    appending a frame per entity or year.
+
+    Example:
+        cross_join(TECHNOLOGY=techs, YEAR=years)
+        cross_join(df_techs, YEAR=years, MODE_OF_OPERATION=[1, 2])
+
+    Arguments:
+        df: pd.DataFrame
+            Optional entities to expand, e.g. REGION and TECHNOLOGY
+        **columns: Iterable
+            Values of each new column
+
+    Returns:
+        pd.DataFrame
+    """
+    values = [list(v) for v in columns.values()]
+    sizes = [len(v) for v in values]
+    combinations = int(np.prod(sizes))
+
+    if df is None:
+        n_rows = 1
+        result = pd.DataFrame(index=pd.RangeIndex(combinations))
+    else:
+        n_rows = len(df)
+        result = df.iloc[np.repeat(np.arange(n_rows), combinations)]
+        result = result.reset_index(drop=True)
+
+    data = {}
+    for i, (name, column) in enumerate(zip(columns, values)):
+        inner = int(np.prod(sizes[i + 1:]))
+        outer = n_rows * int(np.prod(sizes[:i]))
+        # Empty columns are object, as in the future pandas default
+        column = pd.Series(column, dtype=None if column else object)
+        data[name] = np.tile(np.repeat(column.values, inner), outer)
+    return result.assign(**data) if data else result
@@ -5,6 +5,8 @@ import os
 # from osemosys_global.configuration import ConfigFile, ConfigPaths
 from configuration import ConfigFile, ConfigPaths
 from utils import apply_dtypes
+from data_store import read_table, write_table
+from workbooks import read_excel
 import logging 
 logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
 import itertools
@@ -31,13 +33,13 @@ output_data_dir = config_paths.output_data_dir
 # using 85 as the headers (years) and skipping the energy header...
 
 #### REPLACE FROM BELOW ONCE FIGURED OUT...df_prices = pd.read_excel(
-df_prices = pd.read_excel(
+df_prices = read_excel(
     os.path.join(input_data_dir,
     "CMO-April-2020-forecasts.xlsx"), header=1, skiprows=83, nrows=6
 )
 
 # Read in Technologies
-df_techs = pd.read_csv(os.path.join(output_data_dir,'TECHNOLOGY.csv'))
+df_techs = read_table(os.path.join(output_data_dir, 'TECHNOLOGY.csv'))
 df_trn_techs = df_techs.copy()
 years = config.get_years()
 
@@ -329,10 +331,6 @@ df_fuel_prices_final = df_fuel_prices_final[['REGION',
 df_fuel_prices_final = pd.concat([df_fuel_prices_final,
                                   df_trn_varcosts])
 
-df_fuel_prices_final.to_csv(os.path.join(output_data_dir,
-                                         'VariableCost.csv'),
-                            mode='w',
-                            header=True,
-                            index = None)
+write_table(df_fuel_prices_final, os.path.join(output_data_dir, 'VariableCost.csv'))
 
 logging.info('Variable Costs Completed')
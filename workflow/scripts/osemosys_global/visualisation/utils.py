@@ -4,11 +4,11 @@ import pandas as pd
 import os 
 from osemosys_global.configuration import ConfigFile, ConfigPaths
 from typing import Dict, List, Union, Tuple
-import itertools
 from pathlib import Path
-from osemosys_global.visualisation.constants import DAYS_PER_MONTH, MONTH_NAMES
-from osemosys_global.utils import apply_timeshift, filter_transmission_techs
-from osemosys_global.powerplant_data import format_transmission_name
+from osemosys_global.utils import (filter_transmission_techs,
+                                   format_transmission_name)
+from osemosys_global.codes import CodeIndex
+from osemosys_global.timeslices import TimesliceMapper
 import cartopy.crs as ccrs
 import cartopy.feature as cfeature
 import matplotlib.pyplot as plt
@@ -49,10 +49,12 @@ def powerplant_filter(df: pd.DataFrame, country:str = None) -> pd.DataFrame:
             at a system level
     """
 
-    filtered_df = df[~df.TECHNOLOGY.str.contains('TRN')]
-    filtered_df = filtered_df.loc[filtered_df.TECHNOLOGY.str[0:3] == 'PWR']
-    filtered_df['TYPE'] = filtered_df.TECHNOLOGY.str[3:6]
-    filtered_df['COUNTRY'] = filtered_df.TECHNOLOGY.str[6:9]
+    techs = CodeIndex(df.TECHNOLOGY, 'TECHNOLOGY')
+    mask = techs.mask(~techs.table.index.str.contains('TRN') &
+                      (techs.table['TYPE'] == 'PWR'))
+    filtered_df = df.loc[mask]
+    filtered_df['TYPE'] = techs.field('CATEGORY')[mask].values
+    filtered_df['COUNTRY'] = techs.field('COUNTRY')[mask].values
 
     if country:
         filtered_df = filtered_df.loc[filtered_df['COUNTRY'] == country]
@@ -78,121 +80,29 @@ def transform_ts(data:Dict[str, pd.DataFrame], df:pd.DataFrame) -> pd.DataFrame:
         pd.DataFrame 
     """
 
-    generation = list(data["TECHNOLOGY"]["VALUE"].unique())
+    generation = pd.DataFrame({'TECHNOLOGY': data["TECHNOLOGY"]["VALUE"].unique()})
+    labels = powerplant_filter(generation)['LABEL'].unique()
 
     config = ConfigFile('config')
     if not config.file_path.exists():
         config.file_path = "config/config.yaml"
-    seasons_raw = config.get('seasons')
-    seasonsData = []
-
-    for s, months in seasons_raw.items():
-        for month in months:
-            seasonsData.append([month, s]) 
-    seasons_df = pd.DataFrame(seasonsData, 
-                              columns=['month', 'season'])
-    seasons_df = seasons_df.sort_values(by=['month']).reset_index(drop=True)
-    dayparts_raw = config.get('dayparts')
-    daypartData = []
-    for dp, hr in dayparts_raw.items():
-        daypartData.append([dp, hr[0], hr[1]])
-    dayparts_df = pd.DataFrame(daypartData,
-                               columns=['daypart', 'start_hour', 'end_hour'])
-    timeshift = config.get('timeshift')
-    dayparts_df['start_hour'] = dayparts_df['start_hour'].map(lambda x: apply_timeshift(x, timeshift))
-    dayparts_df['end_hour'] = dayparts_df['end_hour'].map(lambda x: apply_timeshift(x, timeshift))
-
-    month_names = MONTH_NAMES
-    days_per_month = DAYS_PER_MONTH
-
-    seasons_df['month_name'] = seasons_df['month'].map(month_names)
-    seasons_df['days'] = seasons_df['month_name'].map(days_per_month)
-    seasons_df_grouped = seasons_df.groupby(['season'],
-                                            as_index=False)['days'].sum()
-    days_dict = dict(zip(list(seasons_df_grouped['season']),
-                         list(seasons_df_grouped['days'])
-                         )
-                     )
-    seasons_df['days'] = seasons_df['season'].map(days_dict)
-
+    mapper = TimesliceMapper.from_data(data, config)
     years = config.get_years()
 
-    seasons_dict = dict(zip(list(seasons_df['month']),
-                            list(seasons_df['season'])
-                            )
-                        )
-
-    dayparts_dict = {i: [j, k]
-                     for i, j, k
-                     in zip(list(dayparts_df['daypart']),
-                            list(dayparts_df['start_hour']),
-                            list(dayparts_df['end_hour'])
-                            )
-                     }
-
-    hours_dict = {i: abs(k-j)
-                  for i, j, k
-                  in zip(list(dayparts_df['daypart']),
-                         list(dayparts_df['start_hour']),
-                         list(dayparts_df['end_hour'])
-                         )
-                  }
-
-    months = list(seasons_dict)
-    hours = list(range(1, 25))
-
     # APPLY TRANSFORMATION
 
-    df_ts_template = pd.DataFrame(list(itertools.product(generation,
-                                                         months,
-                                                         hours,
-                                                         years)
-                                       ),
-                                  columns=['TECHNOLOGY',
-                                           'MONTH',
-                                           'HOUR',
-                                           'YEAR']
-                                  )
-    
-    df_ts_template = df_ts_template.sort_values(by=['TECHNOLOGY', 'YEAR'])
-    df_ts_template['SEASON'] = df_ts_template['MONTH'].map(seasons_dict)
-    df_ts_template['DAYS'] = df_ts_template['SEASON'].map(days_dict)
-    df_ts_template['YEAR'] = df_ts_template['YEAR'].astype(int)
-    df_ts_template = powerplant_filter(df_ts_template)
-
-    for daypart in dayparts_dict:
-        if dayparts_dict[daypart][0] > dayparts_dict[daypart][1]: # loops over 24hrs
-            df_ts_template.loc[(df_ts_template['HOUR'] >= dayparts_dict[daypart][0]) |
-                          (df_ts_template['HOUR'] < dayparts_dict[daypart][1]),
-                          'DAYPART'] = daypart
-        else:
-            df_ts_template.loc[(df_ts_template['HOUR'] >= dayparts_dict[daypart][0]) &
-                      (df_ts_template['HOUR'] < dayparts_dict[daypart][1]),
-                      'DAYPART'] = daypart
-
-    df_ts_template = df_ts_template.drop_duplicates()
-    df['SEASON'] = df['TIMESLICE'].str[0:2]
-    df['DAYPART'] = df['TIMESLICE'].str[2:]
     df['YEAR'] = df['YEAR'].astype(int)
-    df.drop(['REGION', 'FUEL', 'TIMESLICE'],
-            axis=1,
-            inplace=True)
-
-    df = df.groupby(['LABEL', 'SEASON', 'DAYPART', 'YEAR'],
+    df = df.groupby(['LABEL', 'TIMESLICE', 'YEAR'],
                     as_index=False)['VALUE'].sum()
-    df = pd.merge(df,
-                  df_ts_template,
-                  how='left',
-                  on=['LABEL', 'SEASON', 'DAYPART', 'YEAR']).dropna()
-    df['HOUR_COUNT'] = df['DAYPART'].map(hours_dict)
-    df['VALUE'] = (df['VALUE'].mul(1e6))/(df['DAYS']*df['HOUR_COUNT'].mul(3600))
+    df = df.loc[df['LABEL'].isin(labels) & df['YEAR'].isin(years)]
+    df = mapper.to_power(mapper.expand(df))
 
     df = df.pivot_table(index=['MONTH', 'HOUR', 'YEAR'],
                         columns='LABEL',
                         values='VALUE',
                         aggfunc='mean').reset_index().fillna(0)
     df['MONTH'] = pd.Categorical(df['MONTH'],
-                                 categories=months,
+                                 categories=mapper.months,
                                  ordered=True)
     df = df.sort_values(by=['MONTH', 'HOUR'])
 
@@ -0,0 +1,300 @@
+'''Timeslice profiles of one or more weather years.
+
+The hourly demand and renewable profiles of each year in 'weather_years'
+(e.g. All_Demand_UTC_2015.csv and SolarPV 2015.csv for 2015) are aggregated
+to timeslices in a process pool, one year per process. Each year's result is
+cached in results/cache/weather_years, keyed by its profile files and the
+timeslice and scope settings, so adding a weather year only processes that
+year.
+
+The years are then combined per timeslice and node with the statistic set by
+'weather_year_statistic':
+
+    mean    mean over the weather years (default)
+    min     lowest value
+    max     highest value
+    worst   lowest capacity factor and highest share of demand
+    p10     10th percentile, or any other percentile pNN
+'''
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from cache import file_digest, load_digest_index, save_digest_index
+from configuration import ConfigPaths
+from timeslices import TimesliceMapper
+from profiles import load_profile
+from scope import profile_columns
+
+import logging
+logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
+
+# Hourly profiles of a weather year, relative to resources/data
+DEMAND_FILE = 'All_Demand_UTC_{year}.csv'
+RE_FILES = {
+    'CSP': 'CSP {year}.csv',
+    'SPV': 'SolarPV {year}.csv',
+    'WON': 'Won {year}.csv',
+    'WOF': 'Woff {year}.csv',
+}
+
+# Monthly hydro profiles, the same in every weather year
+HYDRO_FILE = 'Hydro_Monthly_Profiles (15 year average).csv'
+
+# Modules that change the aggregated profiles
+SOURCES = ['weather_years.py', 'timeslices.py', 'scope.py', 'profiles.py']
+
+STATISTICS = ['mean', 'min', 'max', 'worst']
+
+class WeatherYears:
+    '''Aggregates the profiles of weather years to timeslices
+
+    Arguments:
+        input_data_dir: str
+            resources/data directory
+        custom_nodes_dir: str
+            Directory of the custom node profiles
+        custom_nodes: List[str]
+            Custom nodes of the config file
+        geographic_scope: List[str]
+            Countries in scope, empty for a world run
+        remove_nodes: List[str]
+            Nodes to remove
+        timeslices: Dict
+            seasons, dayparts, timeshift and daytype of the config file
+        days: pd.DataFrame
+            SEASON of each DAY with representative days, see
+            TimesliceMapper.from_days()
+
+    Example:
+        weather = WeatherYears(...)
+        profiles = weather.load([2015, 2016])
+        combine_demand(profiles['DEMAND'], 'mean')
+    '''
+
+    def __init__(self, input_data_dir, custom_nodes_dir, custom_nodes,
+                 geographic_scope, remove_nodes, timeslices: Dict,
+                 days: Optional[pd.DataFrame] = None):
+        self.input_data_dir = str(input_data_dir)
+        self.custom_nodes_dir = str(custom_nodes_dir)
+        self.custom_nodes = list(custom_nodes or [])
+        self.geographic_scope = list(geographic_scope)
+        self.remove_nodes = list(remove_nodes)
+        self.timeslices = timeslices
+        self.days = days
+
+    def mapper(self, year: int) -> TimesliceMapper:
+        '''Timeslices of the hours of a weather year'''
+        if self.days is not None:
+            return TimesliceMapper.from_days(self.days,
+                                             self.timeslices['dayparts'],
+                                             self.timeslices.get('timeshift'),
+                                             year)
+        return TimesliceMapper(self.timeslices['seasons'],
+                               self.timeslices['dayparts'],
+                               self.timeslices.get('timeshift'),
+                               self.timeslices.get('daytype'), year)
+
+    def path(self, file_name: str, year: int) -> Path:
+        return Path(self.input_data_dir, file_name.format(year=year))
+
+    def _frame(self, file_name: str, year: int) -> pd.DataFrame:
+        '''In-scope columns of an hourly profile'''
+        profile = load_profile(self.path(file_name, year))
+        return profile.frame(profile_columns(profile.columns,
+                                             self.geographic_scope,
+                                             self.remove_nodes))
+
+    def _demand(self, year: int) -> pd.DataFrame:
+        '''Hourly demand of in-scope and custom nodes'''
+        df = self._frame(DEMAND_FILE, year)
+        if self.custom_nodes:
+            # Custom profiles are matched on month, day and hour
+            datetimes = df['Datetime'].dt
+            df['Month'] = datetimes.month
+            df['Day'] = datetimes.day
+            df['Hour'] = datetimes.hour
+            custom_sp_demand_profile = pd.read_csv(
+                os.path.join(self.input_data_dir, 'custom_nodes',
+                             'specified_demand_profile.csv'))
+            df = pd.merge(df, custom_sp_demand_profile, how='left',
+                          on=['Month', 'Day', 'Hour'])
+            df = df.drop(columns=['Month', 'Day', 'Hour'])
+            df = df[[x for x in df.columns
+                     if x == 'Datetime' or '-' in x or x in self.custom_nodes]]
+        return df
+
+    def _re_profile(self, name: str, year: int) -> pd.DataFrame:
+        '''Hourly capacity factors of in-scope and custom nodes'''
+        df = self._frame(RE_FILES[name], year)
+        if self.custom_nodes:
+            df_custom = pd.read_csv(
+                os.path.join(self.custom_nodes_dir, f'RE_profiles_{name}.csv'),
+                encoding='latin-1')
+            df_custom.drop(['Datetime'], axis=1, inplace=True)
+            df = pd.concat([df, df_custom], axis=1)
+        return df
+
+    def _hyd_profile(self, year: int) -> pd.DataFrame:
+        '''Monthly hydro capacity factors of in-scope nodes for every hour'''
+        hyd_df = pd.read_csv(os.path.join(self.input_data_dir, HYDRO_FILE),
+                             encoding='latin-1')
+        if self.custom_nodes:
+            hyd_df_custom = pd.read_csv(
+                os.path.join(self.custom_nodes_dir, 'RE_profiles_HYD.csv'),
+                encoding='latin-1')
+            hyd_df = pd.concat([hyd_df, hyd_df_custom])
+        hyd_df = hyd_df.loc[hyd_df['NAME'].str.endswith('Capacity Scaler')]
+        hyd_df['NAME'] = hyd_df['NAME'].str.split('_').str[0]
+        # Drop Brazil transmission nodes J1, J2, J3
+        brazil_j_nodes = ['BRA-J1', 'BRA-J2', 'BRA-J3']
+        hyd_df = hyd_df.loc[~hyd_df['NAME'].isin(brazil_j_nodes)]
+        hyd_df = hyd_df.set_index('NAME').T.reset_index()
+        hyd_df.rename(columns={'index': 'MONTH'}, inplace=True)
+        hyd_df['MONTH'] = hyd_df['MONTH'].str.replace('M', '').astype(int)
+
+        # Node columns are named as in the solar profiles
+        spv_profile = load_profile(self.path(RE_FILES['SPV'], year))
+        node_region_dict = {'-'.join(x.split('-')[1:]): x
+                            for x in spv_profile.columns}
+
+        df = pd.DataFrame({'Datetime': spv_profile.timestamps,
+                           'MONTH': spv_profile.timestamps.month})
+        df = pd.merge(df, hyd_df, how='left', on='MONTH')
+        df = df.drop(columns='MONTH').rename(columns=node_region_dict)
+        return df[profile_columns(df.columns, self.geographic_scope,
+                                  self.remove_nodes)]
+
+    def aggregate(self, year: int) -> Dict[str, pd.DataFrame]:
+        '''Aggregates the profiles of a weather year to timeslices.
+
+        Returns:
+            Dict[str, pd.DataFrame]
+                TIMESLICE, node and VALUE of the total demand ('DEMAND') and
+                of the mean capacity factor in % of each renewable ('HYD',
+                'CSP', 'SPV', 'WON', 'WOF')
+        '''
+        mapper = self.mapper(year)
+
+        def by_timeslice(df, how):
+            df = mapper.assign(df, 'Datetime').drop(columns='Datetime')
+            df = pd.melt(df, id_vars='TIMESLICE', var_name='node',
+                         value_name='VALUE')
+            return df.groupby(['TIMESLICE', 'node'], as_index=False).agg(how)
+
+        profiles = {'DEMAND': by_timeslice(self._demand(year), 'sum'),
+                    'HYD': by_timeslice(self._hyd_profile(year), 'mean')}
+        for name in RE_FILES:
+            profiles[name] = by_timeslice(self._re_profile(name, year), 'mean')
+        logging.info(f'Weather year {year} aggregated to timeslices')
+        return profiles
+
+    def _cache_file(self, year: int, index: Dict) -> Path:
+        digest = hashlib.sha256(str(year).encode())
+        files = [self.path(name, year)
+                 for name in [DEMAND_FILE, HYDRO_FILE, *RE_FILES.values()]]
+        if self.custom_nodes:
+            files.append(Path(self.custom_nodes_dir))
+        files += [Path(Path(__file__).resolve().parent, source)
+                  for source in SOURCES]
+        for path in files:
+            digest.update(file_digest(path, index).encode())
+        settings = [self.custom_nodes, self.geographic_scope,
+                    self.remove_nodes, self.timeslices,
+                    None if self.days is None else self.days.to_dict('list')]
+        digest.update(json.dumps(settings, sort_keys=True, default=str).encode())
+        return Path(ConfigPaths().cache_dir, 'weather_years',
+                    f'{year}-{digest.hexdigest()}.pkl')
+
+    def load(self, years: List[int],
+             processes: Optional[int] = None) -> Dict[str, List[pd.DataFrame]]:
+        '''Timeslice profiles of weather years, from the cache or aggregated
+        in a process pool.
+
+        Arguments:
+            years: List[int]
+                Weather years
+            processes: int
+                Maximum number of worker processes, by default the number of
+                CPUs
+
+        Returns:
+            Dict[str, List[pd.DataFrame]]
+                Output of aggregate() for each year, by profile
+        '''
+        cache_dir = Path(ConfigPaths().cache_dir)
+        index = load_digest_index(cache_dir)
+        cache_files = {year: self._cache_file(year, index) for year in years}
+        save_digest_index(cache_dir, index)
+
+        by_year = {year: pd.read_pickle(cache_file)
+                   for year, cache_file in cache_files.items()
+                   if cache_file.is_file()}
+        missing = [year for year in years if year not in by_year]
+        if len(missing) > 1:
+            workers = min(len(missing), processes or os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                by_year.update(zip(missing, pool.map(self.aggregate, missing)))
+        else:
+            by_year.update({year: self.aggregate(year) for year in missing})
+
+        for year in missing:
+            cache_file = cache_files[year]
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_name(f'{cache_file.name}.tmp')
+            pd.to_pickle(by_year[year], tmp_file)
+            os.replace(tmp_file, cache_file)
+
+        return {name: [by_year[year][name] for year in years]
+                for name in by_year[years[0]]}
+
+def combine(frames: List[pd.DataFrame], statistic: str = 'mean',
+            worst: str = 'min') -> pd.DataFrame:
+    '''Combines the values of weather years per TIMESLICE and node.
+
+    Arguments:
+        frames: List[pd.DataFrame]
+            TIMESLICE, node and VALUE of each weather year
+        statistic: str
+            One of STATISTICS, or a percentile such as 'p10'
+        worst: str
+            Statistic used for 'worst'
+
+    Returns:
+        pd.DataFrame
+    '''
+    statistic = worst if statistic == 'worst' else statistic
+    values = pd.concat(frames).groupby(['TIMESLICE', 'node'])['VALUE']
+    if statistic in STATISTICS:
+        df = values.agg(statistic)
+    elif statistic[:1] == 'p' and statistic[1:].isdigit() and \
+            int(statistic[1:]) <= 100:
+        df = values.quantile(int(statistic[1:]) / 100)
+    else:
+        raise ValueError(
+            f"weather_year_statistic must be one of {STATISTICS} or a "
+            f"percentile such as 'p10', not '{statistic}'")
+    return df.reset_index()
+
+def combine_demand(frames: List[pd.DataFrame],
+                   statistic: str = 'mean') -> pd.DataFrame:
+    '''Combines the demand of weather years per TIMESLICE and node.
+
+    The statistic is taken over each node's share of demand in a timeslice
+    ('worst' being the highest share). Shares are then scaled to the mean
+    annual demand of the node over the weather years.
+    '''
+    shares = [df.assign(VALUE=df['VALUE']
+                        / df.groupby('node')['VALUE'].transform('sum'))
+              for df in frames]
+    df = combine(shares, statistic, worst='max')
+    total = pd.concat(frames).groupby('node')['VALUE'].sum() / len(frames)
+    df['VALUE'] = (df['VALUE'] / df.groupby('node')['VALUE'].transform('sum')
+                   * df['node'].map(total))
+    return df
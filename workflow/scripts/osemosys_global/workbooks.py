@@ -0,0 +1,100 @@
+'''Cached reading of Excel workbooks.
+
+Parsing xlsx files is the slowest read in the preprocessing stage. Each
+sheet read through read_excel() is converted once to a columnar cache file
+in results/cache/workbooks, keyed by the hash of the workbook, the sheet name
+and the read options. Later reads of an unchanged workbook load the cache
+file instead of parsing the workbook again. Reads of several sheets are
+cached one file per sheet.
+'''
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Union
+
+import pandas as pd
+
+from cache import file_digest, load_digest_index, save_digest_index
+from configuration import ConfigPaths
+
+import logging
+logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
+
+def _write_cache_file(df: pd.DataFrame, cache_file: Path) -> None:
+    '''Writes a sheet as Parquet, or as a pickle if Parquet can not hold it
+    (e.g. integer column names or columns of mixed types)'''
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_file.with_name(f'{cache_file.name}.tmp')
+    try:
+        if not all(isinstance(col, str) for col in df.columns):
+            raise TypeError('Parquet requires string column names')
+        df.to_parquet(tmp_file)
+        os.replace(tmp_file, cache_file)
+    except (ImportError, TypeError, ValueError, NotImplementedError):
+        df.to_pickle(tmp_file)
+        os.replace(tmp_file, cache_file.with_suffix('.pkl'))
+
+def _cache_file(path: Path, **options) -> Path:
+    '''Cache file of a workbook read with options'''
+    cache_dir = Path(ConfigPaths().cache_dir)
+    index = load_digest_index(cache_dir)
+    options = json.dumps(options, sort_keys=True, default=str)
+    key = hashlib.sha256(
+        f'{file_digest(path, index)}{options}'.encode()).hexdigest()
+    save_digest_index(cache_dir, index)
+    return Path(cache_dir, 'workbooks', f'{key}.parquet')
+
+def _sheet_names(path: Path) -> List[str]:
+    '''Names of the sheets of a workbook, cached as its sheets are'''
+    cache_file = _cache_file(path, sheet_names=True).with_suffix('.json')
+    if cache_file.is_file():
+        with open(cache_file, encoding='utf-8') as f:
+            return json.load(f)
+
+    with pd.ExcelFile(path) as workbook:
+        sheet_names = workbook.sheet_names
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_file.with_name(f'{cache_file.name}.tmp')
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(sheet_names, f)
+    os.replace(tmp_file, cache_file)
+    return sheet_names
+
+def read_excel(path, sheet_name=0,
+               **kwargs) -> Union[pd.DataFrame, Dict[str, pd.DataFrame]]:
+    '''Reads sheets of an Excel workbook through the workbook cache.
+
+    Arguments:
+        path: str
+            Path to the workbook
+        sheet_name: str, int, list or None
+            Sheet to read, or a list of sheets or None for all sheets, which
+            are read one by one through the cache
+        **kwargs:
+            Other options passed to pd.read_excel, e.g. usecols
+
+    Returns:
+        pd.DataFrame, or as pd.read_excel a dict of a pd.DataFrame per sheet
+        for a list of sheets or None
+    '''
+    path = Path(path)
+    if not path.is_file():
+        # keeps pandas' error, which scripts catch to download missing data
+        return pd.read_excel(path, sheet_name=sheet_name, **kwargs)
+
+    if sheet_name is None or isinstance(sheet_name, list):
+        sheets = _sheet_names(path) if sheet_name is None else sheet_name
+        return {sheet: read_excel(path, sheet, **kwargs) for sheet in sheets}
+
+    cache_file = _cache_file(path, sheet_name=sheet_name, **kwargs)
+    if cache_file.is_file():
+        return pd.read_parquet(cache_file)
+    if cache_file.with_suffix('.pkl').is_file():
+        return pd.read_pickle(cache_file.with_suffix('.pkl'))
+
+    logging.info(f'Caching sheet {sheet_name} of {path.name}')
+    df = pd.read_excel(path, sheet_name=sheet_name, **kwargs)
+    _write_cache_file(df, cache_file)
+    return df